@@ -1,11 +1,14 @@
 import asyncio
 import logging
+import os
 
-import nest_asyncio
 from pyrogram import idle
 
+from app import config
 from app.bot_init.bot_init import client_bot
-from app.fsm_context.fsm_context import fsm_context_init
+from app.bot_init.ledger import get_message_ledger
+from app.bot_init.metrics import get_handler_metrics
+from app.fsm_context.fsm_context import fsm_context_init, get_fsm_context
 logging.basicConfig(level=logging.INFO)
 
 logger = logging.getLogger(__name__)
@@ -16,19 +19,76 @@ async def main() -> None:
         Главная функция для запуска бота.
 
         Асинхронно инициализирует FSM-контекст, запускает клиент бота, и ожидает завершения работы.
+        При остановке диспетчер обновлений прекращает прием обновлений и дожидается обработчиков, пока клиент
+        подключен, затем клиент останавливается, и только после этого записываются изменения FSM и журнала.
+        В режиме отложенной записи FSM запускает периодическую запись изменений и сбрасывает их в базу данных
+        при остановке бота. Журнал удаляемых сообщений периодически записывается в базу данных и записывается
+        при остановке бота. Также запускает периодическое удаление неактивных FSM-контекстов.
+        При запуске в фоне загружает из снимка FSM-контексты, не измененные в базе данных после его записи,
+        при этом обработка обновлений начинается сразу, не дожидаясь снимка. При остановке записывает новый
+        снимок. Если при остановке изменения FSM не удалось записать в базу данных, они сохраняются в снимке
+        и записываются при следующем запуске. Если метрики обработчиков включены,
+        запускает HTTP-сервер метрик и периодическую запись сводки метрик в лог.
 
         Возвращает:
         - None
     """
-    loop = asyncio.get_event_loop()
-    run = loop.run_until_complete
-    run(fsm_context_init())
-    run(client_bot.start())
+    await fsm_context_init()
+    fsm_restorer = (asyncio.create_task(get_fsm_context().restore_snapshot(path=config.FSM_SNAPSHOT_PATH))
+                    if config.FSM_SNAPSHOT_PATH else None)
+    fsm_flusher = asyncio.create_task(get_fsm_context().run_flusher()) if get_fsm_context().write_behind else None
+    ledger_flusher = asyncio.create_task(get_message_ledger().run_flusher())
+    fsm_sweeper = asyncio.create_task(get_fsm_context().run_sweeper(
+        interval=config.FSM_SWEEP_INTERVAL, idle=config.FSM_SWEEP_IDLE, batch_size=config.FSM_SWEEP_BATCH_SIZE))
+    metrics_server, metrics_reporter = None, None
+    if get_handler_metrics() is not None:
+        metrics_server = await get_handler_metrics().serve(host=config.METRICS_HOST, port=config.METRICS_PORT)
+        metrics_reporter = asyncio.create_task(get_handler_metrics().run_reporter(interval=config.METRICS_LOG_INTERVAL))
+    await client_bot.start()
     logger.info("Client started")
-    run(idle())
-    logger.info("Client stopped")
-    run(client_bot.stop())
+    try:
+        await idle()
+    finally:
+        # Обработчики завершаются до записи изменений FSM, журнала и снимка, а клиент останавливается после них,
+        # чтобы они успели ответить пользователям
+        logger.info("Dispatcher finished %s queued updates on shutdown",
+                    await client_bot.handlers_dispatcher.stop(timeout=config.DISPATCHER_STOP_TIMEOUT))
+        try:
+            await client_bot.stop()
+            logger.info("Client stopped")
+        except Exception as e:
+            logger.exception(e)
+        fsm_sweeper.cancel()
+        if fsm_restorer and not fsm_restorer.done():
+            fsm_restorer.cancel()
+            await asyncio.wait([fsm_restorer])
+        elif fsm_restorer and fsm_restorer.exception() is not None:
+            logger.error("FSM snapshot was not restored", exc_info=fsm_restorer.exception())
+        ledger_flusher.cancel()
+        await asyncio.wait([ledger_flusher])
+        try:
+            logger.info("Message ledger flushed %s buffers on shutdown", await get_message_ledger().flush())
+        except Exception as e:
+            logger.exception(e)
+        if metrics_server:
+            metrics_server.close()
+            metrics_reporter.cancel()
+        if fsm_flusher:
+            fsm_flusher.cancel()
+            await asyncio.wait([fsm_flusher])
+        logger.info("FSM finished %s pending writes on shutdown", await get_fsm_context().wait_writes())
+        try:
+            logger.info("FSM flushed %s contexts on shutdown", get_fsm_context().flush())
+        except Exception as e:
+            logger.exception(e)
+        # Файл снимка удаляется только после загрузки, поэтому если загрузка прервана, новый снимок не записывается:
+        # прежний файл с изменениями, которые не удалось записать в базу данных, загружается при следующем запуске
+        if config.FSM_SNAPSHOT_PATH and not os.path.exists(config.FSM_SNAPSHOT_PATH):
+            logger.info("FSM snapshot saved %s contexts",
+                        get_fsm_context().dump_snapshot(path=config.FSM_SNAPSHOT_PATH))
 
 
-nest_asyncio.apply()
-asyncio.run(main())
+if __name__ == "__main__":
+    # Клиент Pyrogram привязан к циклу событий, полученному при его создании, поэтому main() запускается
+    # на этом же цикле через client_bot.run(), а не на новом цикле asyncio.run()
+    client_bot.run(main())
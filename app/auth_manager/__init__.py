@@ -1 +1,4 @@
 from . import auth_handlers, settings_handlers, registration_handlers
+from app.fsm_context.states import validate_handlers
+
+validate_handlers(auth_handlers, settings_handlers, registration_handlers)
@@ -3,10 +3,14 @@
 
 Этот модуль содержит функции для взаимодействия с базой данных и управления пользователями.
 
+При обработке обновления пользователь, полученный get_user, запоминается в контексте обновления (UpdateContext),
+а функции, изменяющие пользователей, сбрасывают запомненные значения.
+
 """
 
 from sqlalchemy import text
 
+from app.bot_init.context import get_update_context
 from app.db.db_config import Session
 from app.db.models import Users
 
@@ -27,6 +31,7 @@ def update_is_login(owner_telegram_id: int, is_login: bool) -> None:
         query = text("UPDATE users SET is_login=:is_login WHERE owner_telegram_id=:owner_telegram_id")
         session.execute(query, {"owner_telegram_id": owner_telegram_id, "is_login": is_login})
         session.commit()
+    _forget_users()
 
 
 def update_username(owner_telegram_id: int, username: str) -> None:
@@ -45,6 +50,7 @@ def update_username(owner_telegram_id: int, username: str) -> None:
         query = text("UPDATE users SET username=:username WHERE owner_telegram_id=:owner_telegram_id")
         session.execute(query, {"owner_telegram_id": owner_telegram_id, "username": username})
         session.commit()
+    _forget_users()
 
 
 def update_login_name(owner_telegram_id: int, login_name: str) -> None:
@@ -63,6 +69,7 @@ def update_login_name(owner_telegram_id: int, login_name: str) -> None:
         query = text("UPDATE users SET login_name=:login_name WHERE owner_telegram_id=:owner_telegram_id")
         session.execute(query, {"owner_telegram_id": owner_telegram_id, "login_name": login_name})
         session.commit()
+    _forget_users()
 
 
 def update_password(owner_telegram_id: int, password: str) -> None:
@@ -81,6 +88,7 @@ def update_password(owner_telegram_id: int, password: str) -> None:
         query = text("UPDATE users SET password=:password WHERE owner_telegram_id=:owner_telegram_id")
         session.execute(query, {"owner_telegram_id": owner_telegram_id, "password": password})
         session.commit()
+    _forget_users()
 
 
 def set_user(login_name: str, owner_telegram_id: int, username: str, password: str, is_login: bool = True) -> None:
@@ -105,11 +113,33 @@ def set_user(login_name: str, owner_telegram_id: int, username: str, password: s
         session.execute(query, {"owner_telegram_id": owner_telegram_id, "password": password,
                                 "login_name": login_name, "username": username, "is_login": is_login})
         session.commit()
+    _forget_users()
 
 
 def get_user(owner_telegram_id: int = None, login_name: str = None) -> Users | None:
     """
     Получает пользователя из базы данных по идентификатору владельца аккаунта или уникальному логину.
+    При обработке обновления результат запоминается, и повторный вызов с теми же параметрами не выполняет запрос.
+
+    Параметры:
+        owner_telegram_id (int, optional): Идентификатор владельца аккаунта.
+        login_name (str, optional): Уникальный логин пользователя.
+
+    Возвращает:
+        Users | None: Объект пользователя или None, если пользователь не найден.
+
+    """
+    context = get_update_context()
+    if context is not None:
+        return context.memoize(
+            key=("user", owner_telegram_id, login_name),
+            loader=lambda: _select_user(owner_telegram_id=owner_telegram_id, login_name=login_name))
+    return _select_user(owner_telegram_id=owner_telegram_id, login_name=login_name)
+
+
+def _select_user(owner_telegram_id: int = None, login_name: str = None) -> Users | None:
+    """
+    Выполняет запрос пользователя из базы данных по идентификатору владельца аккаунта или уникальному логину.
 
     Параметры:
         owner_telegram_id (int, optional): Идентификатор владельца аккаунта.
@@ -147,6 +177,7 @@ def delete_user(owner_telegram_id: int) -> None:
         query = text("DELETE FROM users WHERE owner_telegram_id = :owner_telegram_id")
         session.execute(query, {"owner_telegram_id": owner_telegram_id})
         session.commit()
+    _forget_users()
 
 
 def check_user_is_owner(user_telegram_id: int, owner_telegram_id: int) -> bool:
@@ -162,3 +193,16 @@ def check_user_is_owner(user_telegram_id: int, owner_telegram_id: int) -> bool:
 
     """
     return user_telegram_id == owner_telegram_id
+
+
+def _forget_users() -> None:
+    """
+    Сбрасывает пользователей, запомненные в контексте обрабатываемого обновления, после их изменения.
+
+    Возвращает:
+        None
+
+    """
+    context = get_update_context()
+    if context is not None:
+        context.forget(namespace="user")
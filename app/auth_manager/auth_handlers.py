@@ -1,3 +1,5 @@
+import asyncio
+
 from pyrogram import filters, Client, types
 
 from app.auth_manager import auth_controller
@@ -7,6 +9,7 @@ from app.auth_manager.password import (
 from app.bot_init.bot_init import client_bot
 from app.db.models import Users
 from app.fsm_context.fsm_context import get_fsm_context
+from app.fsm_context.schemas import AuthorizationData
 from app.root.controller import send_message_start
 from app.root.filters import get_filters
 from app.utils import TelegramUtils
@@ -30,13 +33,11 @@ async def set_password(_: Client, message: types.Message) -> None:
     if not validation_password(password=message.text.strip()):
         text_message = text_set_password_message(is_error=True)
     else:
-        data = get_fsm_context().get_data(telegram_id=message.from_user.id)
-        data["password"] = encrypt_password(password=message.text.strip())
         text_message = "Подтвердите ваш новый пароль, введя его еще раз"
-        get_fsm_context().update_state(
-            telegram_id=message.from_user.id, state="authorization:confirm_reset_password")
-        get_fsm_context().update_data(telegram_id=message.from_user.id, data=data)
-    telegram_utils = TelegramUtils(text=text_message, reply_markup=reply_markup, message=message)
+        await get_fsm_context().transition(
+            telegram_id=message.from_user.id, state="authorization:confirm_reset_password",
+            data=AuthorizationData(password=encrypt_password(password=message.text.strip())))
+    telegram_utils = await TelegramUtils.create(text=text_message, reply_markup=reply_markup, message=message)
     await telegram_utils.send_messages()
 
 
@@ -53,22 +54,23 @@ async def confirm_set_password(client: Client, message: types.Message) -> None:
         None
 
     """
-    data = get_fsm_context().get_data(telegram_id=message.from_user.id)
+    data: AuthorizationData = get_fsm_context().get_payload(telegram_id=message.from_user.id, schema=AuthorizationData)
     is_update_user: bool = False
-    if not verify_password(password=message.text.strip(), encrypted_password=data.get("password")):
+    if not verify_password(password=message.text.strip(), encrypted_password=data.password):
         text_message = (
             "Пароли не совпадают!!!\n"
             f"{text_set_password_message()}"
         )
         keyboard = [[types.KeyboardButton(text="В главное меню")]]
         reply_markup = types.ReplyKeyboardMarkup(keyboard=keyboard)
-        get_fsm_context().update_state(telegram_id=message.from_user.id, state="authorization:reset_password")
+        await get_fsm_context().update_state(telegram_id=message.from_user.id, state="authorization:reset_password")
     else:
-        auth_controller.update_password(owner_telegram_id=message.from_user.id, password=data.get('password'))
+        await asyncio.to_thread(
+            auth_controller.update_password, owner_telegram_id=message.from_user.id, password=data.password)
         text_message = "Пароль успешно изменен"
         reply_markup = None
         is_update_user = True
-    telegram_utils = TelegramUtils(text=text_message, reply_markup=reply_markup, message=message)
+    telegram_utils = await TelegramUtils.create(text=text_message, reply_markup=reply_markup, message=message)
     await telegram_utils.send_messages()
     if is_update_user:
         await authorization_user(message=message, _=client)
@@ -94,9 +96,9 @@ async def authorization_user(_: Client, message: types.Message) -> None:
     )
     keyboard = [[types.KeyboardButton(text="Продолжить"), types.KeyboardButton(text="В главное меню")]]
     reply_markup = types.ReplyKeyboardMarkup(keyboard=keyboard)
-    telegram_utils = TelegramUtils(text=text_message, reply_markup=reply_markup, message=message)
+    telegram_utils = await TelegramUtils.create(text=text_message, reply_markup=reply_markup, message=message)
     await telegram_utils.send_messages()
-    get_fsm_context().update_state(telegram_id=message.from_user.id, state="authorization:login")
+    await get_fsm_context().update_state(telegram_id=message.from_user.id, state="authorization:login")
 
 
 @client_bot.on_message(filters.text & (get_filters().message_filter(state="authorization:login")))
@@ -113,26 +115,25 @@ async def authorization_user_login(_: Client, message: types.Message) -> None:
 
     """
     login_name = message.from_user.username if message.text == "Продолжить" else message.text.strip()
-    user: Users | None = auth_controller.get_user(login_name=login_name)
+    user: Users | None = await asyncio.to_thread(auth_controller.get_user, login_name=login_name)
     keyboard = list()
     if not user:
         text_message = "Данный логин не был обнаружен. Повторите ввод логина еще раз"
         keyboard.append([types.KeyboardButton(text="Продолжить"), types.KeyboardButton(text="В главное меню")])
         reply_markup = types.ReplyKeyboardMarkup(keyboard=keyboard)
     else:
-        data = get_fsm_context().get_data(telegram_id=message.from_user.id)
-        data["login_name"] = login_name
-        get_fsm_context().update_data(telegram_id=message.from_user.id, data=data)
         text_message = "Введите ваш пароль от аккаунта"
         if auth_controller.check_user_is_owner(
                 user_telegram_id=message.from_user.id, owner_telegram_id=user.owner_telegram_id):
             keyboard.append([types.KeyboardButton(text="Восстановление пароля")])
         keyboard.append([types.KeyboardButton(text="В главное меню")])
         reply_markup = types.ReplyKeyboardMarkup(keyboard=keyboard)
-    telegram_utils = TelegramUtils(text=text_message, reply_markup=reply_markup, message=message)
+    telegram_utils = await TelegramUtils.create(text=text_message, reply_markup=reply_markup, message=message)
     await telegram_utils.send_messages()
     if user:
-        get_fsm_context().update_state(telegram_id=message.from_user.id, state="authorization:password")
+        await get_fsm_context().transition(
+            telegram_id=message.from_user.id, state="authorization:password",
+            data=AuthorizationData(login_name=login_name))
 
 
 @client_bot.on_message(filters.text & (get_filters().message_filter(
@@ -149,8 +150,8 @@ async def reset_password(_: Client, message: types.Message) -> None:
         None
 
     """
-    data = get_fsm_context().get_data(telegram_id=message.from_user.id)
-    user: Users | None = auth_controller.get_user(login_name=data.get('login_name'))
+    data: AuthorizationData = get_fsm_context().get_payload(telegram_id=message.from_user.id, schema=AuthorizationData)
+    user: Users | None = await asyncio.to_thread(auth_controller.get_user, login_name=data.login_name)
     reply_markup = None
     if not auth_controller.check_user_is_owner(
             user_telegram_id=message.from_user.id, owner_telegram_id=user.owner_telegram_id):
@@ -160,8 +161,8 @@ async def reset_password(_: Client, message: types.Message) -> None:
         keyboard = list()
         keyboard.append([types.KeyboardButton(text="В главное меню")])
         reply_markup = types.ReplyKeyboardMarkup(keyboard=keyboard)
-        get_fsm_context().update_state(telegram_id=message.from_user.id, state="authorization:reset_password")
-    telegram_utils = TelegramUtils(text=text_message, reply_markup=reply_markup, message=message)
+        await get_fsm_context().update_state(telegram_id=message.from_user.id, state="authorization:reset_password")
+    telegram_utils = await TelegramUtils.create(text=text_message, reply_markup=reply_markup, message=message)
     await telegram_utils.send_messages()
     if not reply_markup:
         await send_message_start(_=_, message=message)
@@ -183,8 +184,8 @@ async def registration_user(client: Client, message: types.Message) -> None:
     is_authorize: bool = False
     reply_markup = None
     keyboard = list()
-    data = get_fsm_context().get_data(telegram_id=message.from_user.id)
-    user: Users | None = auth_controller.get_user(login_name=data.get('login_name'))
+    data: AuthorizationData = get_fsm_context().get_payload(telegram_id=message.from_user.id, schema=AuthorizationData)
+    user: Users | None = await asyncio.to_thread(auth_controller.get_user, login_name=data.login_name)
     if not verify_password(password=message.text.strip(), encrypted_password=user.password):
         text_message = "Вы ввели неверный пароль. Повторите попытку еще раз, или сбросьте ваш пароль"
         if auth_controller.check_user_is_owner(
@@ -193,10 +194,11 @@ async def registration_user(client: Client, message: types.Message) -> None:
         keyboard.append([types.KeyboardButton(text="В главное меню")])
         reply_markup = types.ReplyKeyboardMarkup(keyboard=keyboard)
     else:
-        auth_controller.update_is_login(owner_telegram_id=user.owner_telegram_id, is_login=True)
+        await asyncio.to_thread(
+            auth_controller.update_is_login, owner_telegram_id=user.owner_telegram_id, is_login=True)
         text_message = "Вы успешно авторизовались"
         is_authorize = True
-    telegram_utils = TelegramUtils(text=text_message, reply_markup=reply_markup, message=message)
+    telegram_utils = await TelegramUtils.create(text=text_message, reply_markup=reply_markup, message=message)
     await telegram_utils.send_messages()
     if is_authorize:
         return await send_message_start(message=message, _=client, owner_telegram_id=user.owner_telegram_id)
@@ -215,12 +217,13 @@ async def confirm_delete_account_user(client: Client, message: types.Message) ->
         None
 
     """
-    data = get_fsm_context().get_data(telegram_id=message.from_user.id)
-    if not data.get('owner_telegram_id'):
+    data: AuthorizationData = get_fsm_context().get_payload(telegram_id=message.from_user.id, schema=AuthorizationData)
+    if not data.owner_telegram_id:
         text_message = "Вы не имеете доступ к данному функционалу"
     else:
-        auth_controller.update_is_login(owner_telegram_id=data.get('owner_telegram_id'), is_login=False)
+        await asyncio.to_thread(
+            auth_controller.update_is_login, owner_telegram_id=data.owner_telegram_id, is_login=False)
         text_message = "Вы успешно отключились от аккаунта"
-    telegram_utils = TelegramUtils(text=text_message, message=message)
+    telegram_utils = await TelegramUtils.create(text=text_message, message=message)
     await telegram_utils.send_messages()
     return await send_message_start(_=client, message=message, owner_telegram_id=message.from_user.id)
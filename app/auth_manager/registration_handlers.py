@@ -1,9 +1,12 @@
+import asyncio
+
 from pyrogram import filters, Client, types
 from app.auth_manager import auth_controller
 from app.auth_manager.password import validation_password, encrypt_password, verify_password, text_set_password_message
 from app.bot_init.bot_init import client_bot
 from app.db.models import Users
 from app.fsm_context.fsm_context import get_fsm_context
+from app.fsm_context.schemas import RegistrationData
 from app.root.controller import send_message_start
 from app.root.filters import get_filters
 from app.utils import TelegramUtils
@@ -27,9 +30,9 @@ async def registration_user(_: Client, message: types.Message) -> None:
     )
     keyboard = [[types.KeyboardButton(text="Продолжить"), types.KeyboardButton(text="В главное меню")]]
     reply_markup = types.ReplyKeyboardMarkup(keyboard=keyboard)
-    telegram_utils = TelegramUtils(text=text_message, reply_markup=reply_markup, message=message)
+    telegram_utils = await TelegramUtils.create(text=text_message, reply_markup=reply_markup, message=message)
     await telegram_utils.send_messages()
-    get_fsm_context().update_state(telegram_id=message.from_user.id, state="registration:username")
+    await get_fsm_context().update_state(telegram_id=message.from_user.id, state="registration:username")
 
 
 @client_bot.on_message(filters.text & get_filters().message_filter(state="registration:username"))
@@ -44,18 +47,17 @@ async def set_username(_: Client, message: types.Message) -> None:
     Возвращает:
     - None
     """
-    data = get_fsm_context().get_data(telegram_id=message.from_user.id)
-    data["username"] = message.from_user.first_name if message.text == "Продолжить" else message.text.strip()
+    username = message.from_user.first_name if message.text == "Продолжить" else message.text.strip()
     text_message = (
-        f"Ваше имя: {data.get('username')}. Введите ваш логин, который будет использоваться для доступа к боту, "
+        f"Ваше имя: {username}. Введите ваш логин, который будет использоваться для доступа к боту, "
         f"или нажмите продолжить, чтобы использовать ваш логин телеграмма"
     )
     keyboard = [[types.KeyboardButton(text="Продолжить"), types.KeyboardButton(text="В главное меню")]]
     reply_markup = types.ReplyKeyboardMarkup(keyboard=keyboard)
-    telegram_utils = TelegramUtils(text=text_message, reply_markup=reply_markup, message=message)
+    telegram_utils = await TelegramUtils.create(text=text_message, reply_markup=reply_markup, message=message)
     await telegram_utils.send_messages()
-    get_fsm_context().update_data(telegram_id=message.from_user.id, data=data)
-    get_fsm_context().update_state(telegram_id=message.from_user.id, state="registration:nickname")
+    await get_fsm_context().transition(
+        telegram_id=message.from_user.id, state="registration:nickname", data=RegistrationData(username=username))
 
 
 @client_bot.on_message(filters.text & get_filters().message_filter(state="registration:nickname"))
@@ -71,7 +73,8 @@ async def set_username(_: Client, message: types.Message) -> None:
     - None
     """
     login_name = message.from_user.username if message.text == "Продолжить" else message.text.strip()
-    user: Users | None = auth_controller.get_user(owner_telegram_id=message.from_user.id)
+    user: Users | None = await asyncio.to_thread(auth_controller.get_user, owner_telegram_id=message.from_user.id)
+    data = RegistrationData()
     if user:
         text_message = (
             "Данный логин уже присутствует в боте. Введите ваш логин, который будет использоваться для доступа к боту, "
@@ -80,15 +83,13 @@ async def set_username(_: Client, message: types.Message) -> None:
         keyboard = [[types.KeyboardButton(text="Продолжить"), types.KeyboardButton(text="В главное меню")]]
         reply_markup = types.ReplyKeyboardMarkup(keyboard=keyboard)
     else:
-        data = get_fsm_context().get_data(telegram_id=message.from_user.id)
-        data["login_name"] = login_name
+        data.login_name = login_name
         text_message = text_set_password_message()
         keyboard = [[types.KeyboardButton(text="В главное меню")]]
         reply_markup = types.ReplyKeyboardMarkup(keyboard=keyboard)
-        get_fsm_context().update_data(telegram_id=message.from_user.id, data=data)
-    telegram_utils = TelegramUtils(text=text_message, reply_markup=reply_markup, message=message)
+    telegram_utils = await TelegramUtils.create(text=text_message, reply_markup=reply_markup, message=message)
     await telegram_utils.send_messages()
-    get_fsm_context().update_state(telegram_id=message.from_user.id, state="registration:set_password")
+    await get_fsm_context().transition(telegram_id=message.from_user.id, state="registration:set_password", data=data)
 
 
 @client_bot.on_message(filters.text & get_filters().message_filter(state="registration:set_password"))
@@ -108,15 +109,13 @@ async def set_password(_: Client, message: types.Message) -> None:
     if not validation_password(password=message.text.strip()):
         text_message = text_set_password_message(is_error=True)
     else:
-        data = get_fsm_context().get_data(telegram_id=message.from_user.id)
-        data["password"] = encrypt_password(password=message.text.strip())
         text_message = (
             "Подтвердите ваш новый пароль, введя его еще раз"
         )
-        get_fsm_context().update_state(
-            telegram_id=message.from_user.id, state="registration:confirm_set_password")
-        get_fsm_context().update_data(telegram_id=message.from_user.id, data=data)
-    telegram_utils = TelegramUtils(text=text_message, reply_markup=reply_markup, message=message)
+        await get_fsm_context().transition(
+            telegram_id=message.from_user.id, state="registration:confirm_set_password",
+            data=RegistrationData(password=encrypt_password(password=message.text.strip())))
+    telegram_utils = await TelegramUtils.create(text=text_message, reply_markup=reply_markup, message=message)
     await telegram_utils.send_messages()
 
 
@@ -132,23 +131,24 @@ async def confirm_set_password(client: Client, message: types.Message) -> None:
     Возвращает:
     - None
     """
-    data = get_fsm_context().get_data(telegram_id=message.from_user.id)
+    data: RegistrationData = get_fsm_context().get_payload(telegram_id=message.from_user.id, schema=RegistrationData)
     is_save_user: bool = False
-    if not verify_password(password=message.text.strip(), encrypted_password=data.get("password")):
+    if not verify_password(password=message.text.strip(), encrypted_password=data.password):
         text_message = (
             "Пароли не совпадают!!!\n"
             f"{text_set_password_message()}"
         )
         keyboard = [[types.KeyboardButton(text="В главное меню")]]
         reply_markup = types.ReplyKeyboardMarkup(keyboard=keyboard)
-        get_fsm_context().update_state(telegram_id=message.from_user.id, state="registration:set_password")
+        await get_fsm_context().update_state(telegram_id=message.from_user.id, state="registration:set_password")
     else:
-        auth_controller.set_user(owner_telegram_id=message.from_user.id, password=data.get('password'),
-                                 login_name=data.get("login_name"), username=data.get("username"))
+        await asyncio.to_thread(
+            auth_controller.set_user, owner_telegram_id=message.from_user.id, password=data.password,
+            login_name=data.login_name, username=data.username)
         text_message = "Регистрация в боте прошла успешно"
         reply_markup = None
         is_save_user = True
-    telegram_utils = TelegramUtils(text=text_message, reply_markup=reply_markup, message=message)
+    telegram_utils = await TelegramUtils.create(text=text_message, reply_markup=reply_markup, message=message)
     await telegram_utils.send_messages()
     if is_save_user:
         await send_message_start(message=message, _=client)
@@ -1,14 +1,19 @@
+import asyncio
+
 from pyrogram import filters, types, Client
 from app.auth_manager import auth_controller
 from app.auth_manager.password import text_set_password_message, validation_password, encrypt_password, verify_password
 from app.bot_init.bot_init import client_bot
+from app.bot_init.router import get_callback_router
 from app.fsm_context.fsm_context import get_fsm_context
+from app.fsm_context.schemas import SettingsData
 from app.root.controller import send_message_start
 from app.root.filters import get_filters
+from app.root.screens import get_screen_renderer
 from app.utils import TelegramUtils
 
 
-@client_bot.on_callback_query(filters.regex("menu_settings:") & (
+@client_bot.on_callback_query(get_callback_router().route("menu_settings:{owner_telegram_id}") & (
         get_filters().message_filter(state="main_menu") |
         (get_filters().message_filter(state="settings", is_regex=True))))
 @client_bot.on_message(filters.text & filters.regex("Изменение настроек"))
@@ -23,37 +28,25 @@ async def settings_menu(_: Client, message: types.Message | types.CallbackQuery)
     Возвращает:
     - None
     """
-    data = get_fsm_context().get_data(telegram_id=message.from_user.id)
+    data: SettingsData = get_fsm_context().get_payload(telegram_id=message.from_user.id, schema=SettingsData)
     reply_markup = None
-    if not data.get('owner_telegram_id') or not auth_controller.check_user_is_owner(
-            user_telegram_id=message.from_user.id, owner_telegram_id=data.get('owner_telegram_id')):
+    if not data.owner_telegram_id or not auth_controller.check_user_is_owner(
+            user_telegram_id=message.from_user.id, owner_telegram_id=data.owner_telegram_id):
         text_message = "Вы не имеете доступ к данному функционалу"
         state = "main_menu"
     else:
-        text_message = (
-            "Данное меню предназначено для изменения настроек профиля"
-        )
-        inline_keyboard = list()
-        inline_keyboard.append([types.InlineKeyboardButton(
-            text="Изменить название профиля",
-            callback_data=f"settings:update_username:{data.get('owner_telegram_id')}")])
-        inline_keyboard.append([types.InlineKeyboardButton(
-            text="Изменить логин", callback_data=f"settings:update_login:{data.get('owner_telegram_id')}")])
-        inline_keyboard.append([types.InlineKeyboardButton(
-            text="Изменить пароль", callback_data=f"settings:update_password:{data.get('owner_telegram_id')}")])
-        inline_keyboard.append([types.InlineKeyboardButton(
-            text="Вернуться в главное меню", callback_data=f"main_menu:{data.get('owner_telegram_id')}")])
-        reply_markup = types.InlineKeyboardMarkup(inline_keyboard=inline_keyboard)
+        text_message, reply_markup = get_screen_renderer().render(
+            screen="settings_menu", owner_telegram_id=data.owner_telegram_id)
         state = "settings"
-    get_fsm_context().update_state(telegram_id=message.from_user.id, state=state)
-    telegram_utils = TelegramUtils(text=text_message, reply_markup=reply_markup, message=message)
-    await telegram_utils.send_messages()
+    await get_fsm_context().update_state(telegram_id=message.from_user.id, state=state)
+    await TelegramUtils.show_screen(text=text_message, reply_markup=reply_markup, message=message)
     if not reply_markup:
         await send_message_start(_=_, message=message)
 
 
 @client_bot.on_callback_query(
-    filters.regex("settings:update_username:") & get_filters().message_filter(state="settings"))
+    get_callback_router().route("settings:update_username:{owner_telegram_id}")
+    & get_filters().message_filter(state="settings"))
 async def update_username(_: Client, message: types.CallbackQuery) -> None:
     """
     Обработчик для начала изменения имени пользователя.
@@ -65,13 +58,13 @@ async def update_username(_: Client, message: types.CallbackQuery) -> None:
     Возвращает:
     - None
     """
-    owner_telegram_id = int(message.data.split(":")[-1])
+    owner_telegram_id = get_callback_router().params(message=message).owner_telegram_id
     text_message = (
         "Введите ваше новое имя"
     )
     reply_markup = get_back_buttons(owner_telegram_id=owner_telegram_id)
-    get_fsm_context().update_state(telegram_id=message.from_user.id, state="settings:set_username")
-    telegram_utils = TelegramUtils(text=text_message, reply_markup=reply_markup, message=message)
+    await get_fsm_context().update_state(telegram_id=message.from_user.id, state="settings:set_username")
+    telegram_utils = await TelegramUtils.create(text=text_message, reply_markup=reply_markup, message=message)
     await telegram_utils.send_messages()
 
 
@@ -87,17 +80,19 @@ async def set_username(_: Client, message: types.Message) -> None:
     Возвращает:
     - None
     """
-    auth_controller.update_username(owner_telegram_id=message.from_user.id, username=message.text)
+    await asyncio.to_thread(
+        auth_controller.update_username, owner_telegram_id=message.from_user.id, username=message.text)
     text_message = (
         f"Имя успешно изменено. Новое имя: {message.text}"
     )
-    telegram_utils = TelegramUtils(text=text_message, message=message)
+    telegram_utils = await TelegramUtils.create(text=text_message, message=message)
     await telegram_utils.send_messages()
     return await settings_menu(_=_, message=message)
 
 
 @client_bot.on_callback_query(
-    filters.regex("settings:update_login:") & get_filters().message_filter(state="settings"))
+    get_callback_router().route("settings:update_login:{owner_telegram_id}")
+    & get_filters().message_filter(state="settings"))
 async def update_login(_: Client, message: types.CallbackQuery) -> None:
     """
     Обработчик для начала изменения логина пользователя.
@@ -109,13 +104,13 @@ async def update_login(_: Client, message: types.CallbackQuery) -> None:
     Возвращает:
     - None
     """
-    owner_telegram_id = int(message.data.split(":")[-1])
+    owner_telegram_id = get_callback_router().params(message=message).owner_telegram_id
     text_message = (
         "Введите ваш новый логин"
     )
     reply_markup = get_back_buttons(owner_telegram_id=owner_telegram_id)
-    get_fsm_context().update_state(telegram_id=message.from_user.id, state="settings:set_login_name")
-    telegram_utils = TelegramUtils(text=text_message, reply_markup=reply_markup, message=message)
+    await get_fsm_context().update_state(telegram_id=message.from_user.id, state="settings:set_login_name")
+    telegram_utils = await TelegramUtils.create(text=text_message, reply_markup=reply_markup, message=message)
     await telegram_utils.send_messages()
 
 
@@ -133,26 +128,28 @@ async def set_login(_: Client, message: types.Message) -> None:
     """
     is_update_login: bool = False
     reply_markup = None
-    if auth_controller.get_user(login_name=message.text):
+    if await asyncio.to_thread(auth_controller.get_user, login_name=message.text):
         text_message = (
             "Данный логин уже существует!!!\n"
             "Введите ваш новый логин"
         )
         reply_markup = get_back_buttons(owner_telegram_id=message.from_user.id)
     else:
-        auth_controller.update_login_name(owner_telegram_id=message.from_user.id, login_name=message.text)
+        await asyncio.to_thread(
+            auth_controller.update_login_name, owner_telegram_id=message.from_user.id, login_name=message.text)
         text_message = (
             f"Логин успешно изменен. Новый логин: {message.text}"
         )
         is_update_login = True
-    telegram_utils = TelegramUtils(text=text_message, message=message, reply_markup=reply_markup)
+    telegram_utils = await TelegramUtils.create(text=text_message, message=message, reply_markup=reply_markup)
     await telegram_utils.send_messages()
     if is_update_login:
         return await settings_menu(_=_, message=message)
 
 
 @client_bot.on_callback_query(
-    filters.regex("settings:update_password:") & get_filters().message_filter(state="settings"))
+    get_callback_router().route("settings:update_password:{owner_telegram_id}")
+    & get_filters().message_filter(state="settings"))
 async def update_password(_: Client, message: types.CallbackQuery) -> None:
     """
     Обработчик для начала изменения пароля пользователя.
@@ -164,11 +161,11 @@ async def update_password(_: Client, message: types.CallbackQuery) -> None:
     Возвращает:
     - None
     """
-    owner_telegram_id = int(message.data.split(":")[-1])
+    owner_telegram_id = get_callback_router().params(message=message).owner_telegram_id
     text_message = text_set_password_message()
     reply_markup = get_back_buttons(owner_telegram_id=owner_telegram_id)
-    get_fsm_context().update_state(telegram_id=message.from_user.id, state="settings:set_password")
-    telegram_utils = TelegramUtils(text=text_message, reply_markup=reply_markup, message=message)
+    await get_fsm_context().update_state(telegram_id=message.from_user.id, state="settings:set_password")
+    telegram_utils = await TelegramUtils.create(text=text_message, reply_markup=reply_markup, message=message)
     await telegram_utils.send_messages()
 
 
@@ -184,18 +181,18 @@ async def set_password(_: Client, message: types.Message) -> None:
     Возвращает:
     - None
     """
-    data = get_fsm_context().get_data(telegram_id=message.from_user.id)
+    data: SettingsData = get_fsm_context().get_payload(telegram_id=message.from_user.id, schema=SettingsData)
     if not validation_password(password=message.text.strip()):
         text_message = text_set_password_message(is_error=True)
     else:
-        data["password"] = encrypt_password(password=message.text.strip())
         text_message = (
             "Подтвердите ваш новый пароль, введя его еще раз"
         )
-        get_fsm_context().update_data(telegram_id=message.from_user.id, data=data)
-        get_fsm_context().update_state(telegram_id=message.from_user.id, state="settings:confirm_set_password")
-    reply_markup = get_back_buttons(owner_telegram_id=data.get('owner_telegram_id'))
-    telegram_utils = TelegramUtils(text=text_message, reply_markup=reply_markup, message=message)
+        await get_fsm_context().transition(
+            telegram_id=message.from_user.id, state="settings:confirm_set_password",
+            data=SettingsData(password=encrypt_password(password=message.text.strip())))
+    reply_markup = get_back_buttons(owner_telegram_id=data.owner_telegram_id)
+    telegram_utils = await TelegramUtils.create(text=text_message, reply_markup=reply_markup, message=message)
     await telegram_utils.send_messages()
 
 
@@ -211,22 +208,23 @@ async def confirm_set_password(_: Client, message: types.Message) -> None:
     Возвращает:
     - None
     """
-    data = get_fsm_context().get_data(telegram_id=message.from_user.id)
-    owner_telegram_id = data.get('owner_telegram_id')
+    data: SettingsData = get_fsm_context().get_payload(telegram_id=message.from_user.id, schema=SettingsData)
+    owner_telegram_id = data.owner_telegram_id
     is_update_password: bool = False
-    if not verify_password(password=message.text.strip(), encrypted_password=data.get("password")):
+    if not verify_password(password=message.text.strip(), encrypted_password=data.password):
         text_message = (
             "Пароли не совпадают!!!\n"
             f"{text_set_password_message()}"
         )
         reply_markup = get_back_buttons(owner_telegram_id=owner_telegram_id)
-        get_fsm_context().update_state(telegram_id=owner_telegram_id, state="registration:set_password")
+        await get_fsm_context().update_state(telegram_id=owner_telegram_id, state="settings:set_password")
     else:
-        auth_controller.update_password(owner_telegram_id=owner_telegram_id, password=data.get('password'))
+        await asyncio.to_thread(
+            auth_controller.update_password, owner_telegram_id=owner_telegram_id, password=data.password)
         text_message = "Пароль успешно изменен"
         reply_markup = None
         is_update_password = True
-    telegram_utils = TelegramUtils(text=text_message, reply_markup=reply_markup, message=message)
+    telegram_utils = await TelegramUtils.create(text=text_message, reply_markup=reply_markup, message=message)
     await telegram_utils.send_messages()
     if is_update_password:
         return await settings_menu(_=_, message=message)
@@ -240,12 +238,6 @@ def get_back_buttons(owner_telegram_id: int) -> types.InlineKeyboardMarkup:
     - owner_telegram_id: Идентификатор владельца пользователя.
 
     Возвращает:
-    - types.InlineKeyboardMarkup: Объект клавиатуры Pyrogram.
-    """
-    inline_keyboard = list()
-    inline_keyboard.append([types.InlineKeyboardButton(
-        text="Вернуться назад", callback_data=f"menu_settings:{owner_telegram_id}")])
-    inline_keyboard.append([types.InlineKeyboardButton(
-        text="Вернуться в главное меню", callback_data=f"main_menu:{owner_telegram_id}")])
-    reply_markup = types.InlineKeyboardMarkup(inline_keyboard=inline_keyboard)
-    return reply_markup
+    - types.InlineKeyboardMarkup: Общий неизменяемый объект клавиатуры Pyrogram из кэша экранов.
+    """
+    return get_screen_renderer().markup(screen="settings_back", owner_telegram_id=owner_telegram_id)
@@ -7,18 +7,127 @@
     api_id (int): Идентификатор API, предоставленный Telegram.
     api_hash (str): Секретный хеш, предоставленный Telegram.
     bot_token (str): Токен бота Telegram.
-    client_bot (Client): Объект клиента бота Pyrogram.
+    client_bot (BotClient): Объект клиента бота Pyrogram.
 
 """
 
 from pyrogram import Client
+from pyrogram.handlers import CallbackQueryHandler, MessageHandler
+from pyrogram.handlers.handler import Handler
+
 from app import config
+from app.bot_init.context import get_update_context
+from app.bot_init.dispatcher import Dispatcher
+from app.bot_init.metrics import HandlerMetrics, get_handler_metrics
+from app.bot_init.router import get_callback_router
+from app.fsm_context.fsm_context import get_fsm_context
+
+
+class BotClient(Client):
+    """
+    Клиент бота Pyrogram, передающий обработчики сообщений и коллбэк-запросов в Dispatcher.
+
+    Декораторы on_message и on_callback_query регистрируют обработчики через add_handler, поэтому обработчики
+    попадают в Dispatcher без изменений в модулях обработчиков. В диспетчере Pyrogram регистрируется по одному
+    обработчику каждого типа, который ставит обновление в очередь пользователя. Состояние FSM пользователя
+    определяется диспетчером один раз для каждого обновления, чтобы выбрать обработчики из таблицы, а данные
+    коллбэк-запроса разбираются CallbackRouter один раз, в том числе в компактном формате. Если метрики включены,
+    запросы к Telegram API учитываются в контексте обрабатываемого обновления (UpdateContext).
+
+    Параметры:
+        handlers_dispatcher (Dispatcher): Диспетчер обработчиков с очередью обновлений для каждого пользователя.
+        __count_api_calls (bool): Флаг учета запросов к Telegram API (метрики включены).
+
+    Methods:
+        add_handler(handler: Handler, group: int = 0) -> tuple[Handler, int]: Регистрирует обработчик.
+        invoke(*args, **kwargs): Выполняет запрос к Telegram API.
+
+    """
+
+    def __init__(self, *args, max_concurrency: int = 16, queries_warning: int = 10,
+                 metrics: HandlerMetrics | None = None, max_queue: int = 1000, max_user_queue: int = 10,
+                 deadline: float = 30.0, **kwargs):
+        """
+        Инициализация объекта BotClient.
+
+        Параметры:
+            max_concurrency (int): Максимальное количество одновременно обрабатываемых обновлений
+                (по умолчанию 16).
+            queries_warning (int): Количество запросов к базе данных за обновление, после которого в лог
+                записывается предупреждение (по умолчанию 10).
+            metrics (HandlerMetrics | None): Сбор метрик обработчиков (по умолчанию None - метрики выключены).
+            max_queue (int): Максимальное количество обновлений во всех очередях (по умолчанию 1000).
+            max_user_queue (int): Максимальное количество обновлений в очереди одного пользователя
+                (по умолчанию 10).
+            deadline (float): Время ожидания обработки в секундах, после которого обновление отбрасывается
+                (по умолчанию 30, 0 - без ограничения).
+            *args, **kwargs: Параметры клиента Pyrogram.
+
+        """
+        super().__init__(*args, **kwargs)
+        self.__count_api_calls = metrics is not None
+        self.handlers_dispatcher = Dispatcher(
+            max_concurrency=max_concurrency,
+            preload=lambda telegram_id: get_fsm_context().preload(telegram_id=telegram_id),
+            get_state_code=lambda telegram_id: get_fsm_context().get_state_code(telegram_id=telegram_id),
+            get_state_version=lambda: get_fsm_context().get_state_version(),
+            get_callback_prefix=lambda query: get_callback_router().prefix(message=query),
+            queries_warning=queries_warning,
+            metrics=metrics,
+            max_queue=max_queue,
+            max_user_queue=max_user_queue,
+            deadline=deadline)
+        super().add_handler(MessageHandler(self.handlers_dispatcher.feed))
+        super().add_handler(CallbackQueryHandler(self.handlers_dispatcher.feed))
+
+    def add_handler(self, handler: Handler, group: int = 0) -> tuple[Handler, int]:
+        """
+        Регистрирует обработчик. Обработчики сообщений и коллбэк-запросов передаются в Dispatcher,
+        остальные - в диспетчер Pyrogram.
+
+        Параметры:
+            handler (Handler): Обработчик Pyrogram.
+            group (int): Группа обработчика (по умолчанию 0).
+
+        Возвращает:
+            tuple[Handler, int]: Обработчик и его группа.
+
+        """
+        if isinstance(handler, (MessageHandler, CallbackQueryHandler)):
+            self.handlers_dispatcher.add_handler(handler=handler, group=group)
+            return handler, group
+        return super().add_handler(handler, group)
+
+    async def invoke(self, *args, **kwargs):
+        """
+        Выполняет запрос к Telegram API и, если метрики включены, учитывает его в контексте обрабатываемого
+        обновления.
+
+        Параметры:
+            *args, **kwargs: Параметры метода invoke клиента Pyrogram.
+
+        Возвращает:
+            Результат запроса к Telegram API.
+
+        """
+        if self.__count_api_calls:
+            context = get_update_context()
+            if context is not None:
+                context.api_calls += 1
+        return await super().invoke(*args, **kwargs)
+
 
 api_id = config.API_ID
 api_hash = config.API_HASH
 bot_token = config.TELEGRAM_BOT_TOKEN
-client_bot = Client(
+client_bot = BotClient(
     name=f"{config.CLIENT_SESSION_PATH}/pyrogram_bot",
     api_id=api_id, api_hash=api_hash,
-    bot_token=bot_token
+    bot_token=bot_token,
+    max_concurrency=config.DISPATCHER_MAX_CONCURRENCY,
+    queries_warning=config.DISPATCHER_QUERIES_WARNING,
+    metrics=get_handler_metrics(),
+    max_queue=config.DISPATCHER_MAX_QUEUE,
+    max_user_queue=config.DISPATCHER_MAX_USER_QUEUE,
+    deadline=config.DISPATCHER_DEADLINE
 )
@@ -0,0 +1,125 @@
+"""
+Модуль, содержащий класс UpdateContext - контекст обработки одного обновления Telegram.
+
+Контекст создается Dispatcher при начале обработки обновления и доступен обработчикам и вызываемым ими функциям
+через get_update_context() (значение хранится в contextvars, поэтому у каждой задачи обработки свой контекст).
+В контексте запоминаются результаты загрузки данных (например, пользователя из базы данных), чтобы цепочка
+обработчиков одного нажатия не повторяла одинаковые запросы, и считаются запросы к базе данных и к Telegram API.
+
+Параметры:
+    _update_context (ContextVar[UpdateContext | None]): Контекст обрабатываемого обновления.
+
+"""
+
+from contextvars import ContextVar, Token
+from typing import Any, Callable, Hashable
+
+from pyrogram import types
+
+
+class UpdateContext:
+    """
+    Класс контекста обработки одного обновления Telegram.
+
+    Параметры:
+        __memo (dict[Hashable, Any]): Запомненные результаты загрузки данных.
+        update (types.Message | types.CallbackQuery): Обрабатываемое обновление.
+        telegram_id (int | None): Идентификатор пользователя в Telegram.
+        state_code (int | None): Код состояния FSM пользователя на момент получения обновления.
+        queries (int): Количество выполненных запросов к базе данных.
+        db_time (float): Время выполнения запросов к базе данных в секундах (только при включенных метриках).
+        api_calls (int): Количество запросов к Telegram API (только при включенных метриках).
+
+    Methods:
+        memoize(key: Hashable, loader: Callable[[], Any]) -> Any: Получает запомненный результат или загружает его.
+        forget(namespace: str) -> None: Удаляет запомненные результаты с ключами из пространства имен.
+
+    """
+
+    def __init__(self, update: types.Message | types.CallbackQuery):
+        """
+        Инициализация объекта UpdateContext.
+
+        Параметры:
+            update (types.Message | types.CallbackQuery): Обрабатываемое обновление.
+
+        """
+        self.update = update
+        self.telegram_id: int | None = update.from_user.id if update.from_user else None
+        self.state_code: int | None = None
+        self.queries = 0
+        self.db_time = 0.0
+        self.api_calls = 0
+        self.__memo: dict[Hashable, Any] = dict()
+
+    def memoize(self, key: Hashable, loader: Callable[[], Any]) -> Any:
+        """
+        Получает запомненный результат по ключу или загружает и запоминает его.
+
+        Параметры:
+            key (Hashable): Ключ вида (пространство имен, параметры...), например ("user", owner_telegram_id, None).
+            loader (Callable[[], Any]): Функция загрузки результата.
+
+        Возвращает:
+            Any: Результат загрузки (в том числе None).
+
+        """
+        if key not in self.__memo:
+            self.__memo[key] = loader()
+        return self.__memo[key]
+
+    def forget(self, namespace: str) -> None:
+        """
+        Удаляет запомненные результаты с ключами из пространства имен, например после изменения пользователя.
+
+        Параметры:
+            namespace (str): Пространство имен (первый элемент ключа).
+
+        Возвращает:
+            None
+
+        """
+        for key in [key for key in self.__memo if isinstance(key, tuple) and key and key[0] == namespace]:
+            del self.__memo[key]
+
+
+_update_context: ContextVar[UpdateContext | None] = ContextVar("update_context", default=None)
+
+
+def get_update_context() -> UpdateContext | None:
+    """
+    Получение контекста обрабатываемого обновления.
+
+    Возвращает:
+        UpdateContext | None: Объект UpdateContext или None вне обработки обновления.
+
+    """
+    return _update_context.get()
+
+
+def set_update_context(context: UpdateContext | None) -> Token:
+    """
+    Устанавливает контекст обрабатываемого обновления.
+
+    Параметры:
+        context (UpdateContext | None): Объект UpdateContext.
+
+    Возвращает:
+        Token: Токен для восстановления предыдущего контекста (_update_context.reset).
+
+    """
+    return _update_context.set(context)
+
+
+def reset_update_context(token: Token) -> None:
+    """
+    Восстанавливает контекст, установленный до вызова set_update_context.
+
+    Параметры:
+        token (Token): Токен, полученный от set_update_context.
+
+    Возвращает:
+        None
+
+    """
+    _update_context.reset(token)
@@ -0,0 +1,485 @@
+"""
+    Модуль, содержащий класс Dispatcher - диспетчер обработчиков сообщений и коллбэк-запросов с упорядоченной
+    обработкой обновлений каждого пользователя.
+
+    Обновления одного пользователя (from_user.id) обрабатываются строго по одному в порядке поступления,
+    поэтому два быстрых нажатия не выполняют обработчики одновременно и не теряют изменения FSM.
+    Обновления разных пользователей обрабатываются параллельно, но не более max_concurrency одновременно.
+
+    Очередь ограничена: если в очередях всех пользователей уже max_queue обновлений или в очереди пользователя
+    max_user_queue обновлений, новое обновление отбрасывается. Обновление, которое ожидало обработки дольше
+    deadline секунд, тоже отбрасывается. Пользователю отправляется короткий ответ о перегрузке без обращения
+    к базе данных (не чаще одного раза в busy_interval секунд). Так одна очередь пользователя не занимает всю
+    очередь, а при всплеске нагрузки задержка обработки остается ограниченной.
+
+    Перед выполнением обработчиков контекст FSM пользователя загружается функцией preload в отдельном потоке,
+    а обработчики выполняют запросы к базе данных через asyncio.to_thread, поэтому запрос одного пользователя
+    не останавливает цикл событий и не задерживает обработку обновлений других пользователей.
+
+    Обработчики индексируются по типу обновления, коду состояния FSM и префиксу данных коллбэк-запроса,
+    извлеченным из фильтров обработчика. Для обновления состояние пользователя определяется один раз
+    и определяется заново перед следующей группой обработчиков, только если обработчик предыдущей группы изменил
+    состояние (изменился счетчик get_state_version). Фильтры (в том числе регулярные выражения) проверяются
+    только у обработчиков из подходящей ячейки таблицы.
+
+    При остановке бота метод stop прекращает прием обновлений и ожидает обработки уже полученных, чтобы изменения
+    обработчиков были записаны до остановки.
+
+    На время обработки обновления устанавливается UpdateContext, в котором запоминаются загруженные данные
+    и считаются запросы к базе данных. Количество запросов записывается в лог после обработки обновления.
+
+"""
+
+import asyncio
+import functools
+import inspect
+import logging
+import re
+from collections import OrderedDict, deque
+from time import monotonic
+from typing import Awaitable, Callable
+
+from pyrogram import Client, ContinuePropagation, StopPropagation, types
+from pyrogram.handlers import CallbackQueryHandler, MessageHandler
+from pyrogram.filters import AndFilter, Filter
+from pyrogram.handlers.handler import Handler
+
+from app.bot_init.context import UpdateContext, reset_update_context, set_update_context
+from app.bot_init.metrics import HandlerMetrics
+from app.bot_init.outbound import PRIORITY_INTERACTIVE, get_outbound_scheduler
+
+logger = logging.getLogger(__name__)
+
+
+class Dispatcher:
+    """
+    Класс диспетчера обработчиков с очередью обновлений для каждого пользователя.
+
+    Параметры:
+        __groups (OrderedDict[int, list[Handler]]): Отсортированный по номеру группы словарь обработчиков.
+        __queues (dict[int | None, deque]): Очереди необработанных обновлений пользователей - пары
+            (обновление, время постановки в очередь).
+        __queued (int): Количество обновлений во всех очередях.
+        __busy_replies (dict[int, float]): Время последнего ответа о перегрузке каждому пользователю.
+        __tasks (set[asyncio.Task]): Задачи, обрабатывающие очереди пользователей, и ответы о перегрузке.
+        __stopped (bool): Флаг остановки приема обновлений.
+        __semaphore (asyncio.Semaphore): Ограничение количества одновременно обрабатываемых обновлений.
+        __preload (Callable[[int], Awaitable[None]] | None): Функция загрузки данных пользователя перед
+            выполнением обработчиков.
+        __get_state_code (Callable[[int], int] | None): Функция получения кода состояния FSM пользователя.
+        __get_state_version (Callable[[], int] | None): Функция получения счетчика изменений состояний FSM.
+        __get_callback_prefix (Callable[[types.CallbackQuery], str | None] | None): Функция получения префикса
+            данных коллбэк-запроса.
+        __routes (dict[Handler, tuple[frozenset[int] | None, str | None]]): Коды состояний и префикс данных
+            коллбэк-запроса, которым ограничен каждый обработчик (None - без ограничения).
+        __prefixes (set[str]): Префиксы данных коллбэк-запросов, встречающиеся в фильтрах обработчиков.
+        __table (dict[tuple, list[list[Handler]]]): Таблица обработчиков по группам для ключа
+            (тип обработчика, код состояния, префикс), заполняемая при первом обращении к ключу.
+        max_concurrency (int): Максимальное количество одновременно обрабатываемых обновлений.
+        queries_warning (int): Количество запросов к базе данных за обновление, после которого в лог
+            записывается предупреждение.
+        metrics (HandlerMetrics | None): Сбор метрик обработчиков (None - метрики выключены).
+        max_queue (int): Максимальное количество обновлений во всех очередях.
+        max_user_queue (int): Максимальное количество обновлений в очереди одного пользователя.
+        deadline (float): Время ожидания обработки в секундах, после которого обновление отбрасывается
+            (0 - без ограничения).
+        busy_text (str): Текст ответа о перегрузке.
+        busy_interval (float): Минимальный интервал между ответами о перегрузке одному пользователю в секундах.
+        dropped (dict[str, int]): Количество отброшенных обновлений по причинам (queue_full, user_queue_full,
+            deadline, stopped).
+
+    Methods:
+        add_handler(handler: Handler, group: int = 0) -> None: Регистрирует обработчик.
+        feed(client: Client, update: types.Message | types.CallbackQuery) -> None: Ставит обновление в очередь
+            пользователя.
+        queue_depth() -> int: Получает количество обновлений во всех очередях.
+        stop(timeout: float | None = None) -> int: Прекращает прием обновлений и ожидает обработки полученных.
+        __run_queue(client: Client, key: int | None) -> None: Приватный метод для обработки очереди пользователя.
+        __shed(client: Client, update: types.Message | types.CallbackQuery, reason: str) -> None: Приватный метод
+            для отбрасывания обновления.
+        __reply_busy(client: Client, update: types.Message | types.CallbackQuery) -> None: Приватный метод для
+            отправки ответа о перегрузке.
+        __process(client: Client, update: types.Message | types.CallbackQuery) -> None: Приватный метод для
+            выполнения подходящего обработчика.
+        __candidates(handler_type: type[Handler], state_code: int | None, prefix: str | None) -> list[list[Handler]]:
+            Приватный метод для получения обработчиков из ячейки таблицы.
+        __route(flt: Filter | None) -> tuple[frozenset[int] | None, str | None]: Приватный метод для извлечения
+            ограничений обработчика из дерева фильтров.
+
+    """
+
+    __handler_types: dict[type, type[Handler]] = {
+        types.Message: MessageHandler,
+        types.CallbackQuery: CallbackQueryHandler,
+    }
+
+    def __init__(self, max_concurrency: int = 16, preload: Callable[[int], Awaitable[None]] | None = None,
+                 get_state_code: Callable[[int], int] | None = None,
+                 get_state_version: Callable[[], int] | None = None,
+                 get_callback_prefix: Callable[[types.CallbackQuery], str | None] | None = None,
+                 queries_warning: int = 10, metrics: HandlerMetrics | None = None, max_queue: int = 1000,
+                 max_user_queue: int = 10, deadline: float = 30.0,
+                 busy_text: str = "Бот сейчас перегружен, попробуйте еще раз через минуту",
+                 busy_interval: float = 10.0):
+        """
+        Инициализация объекта Dispatcher.
+
+        Параметры:
+            max_concurrency (int): Максимальное количество одновременно обрабатываемых обновлений
+                (по умолчанию 16).
+            preload (Callable[[int], Awaitable[None]] | None): Функция загрузки данных пользователя по его
+                идентификатору (например, контекста FSM) без блокировки цикла событий. Вызывается перед
+                определением состояния пользователя.
+            get_state_code (Callable[[int], int] | None): Функция получения кода состояния FSM пользователя
+                по его идентификатору. Если не задана, обработчики не индексируются по состоянию.
+            get_state_version (Callable[[], int] | None): Функция получения счетчика изменений состояний FSM.
+                Если задана, код состояния определяется заново перед группой обработчиков, когда счетчик
+                изменился после предыдущей группы. Если не задана, код состояния определяется заново после
+                каждой группы, в которой выполнился обработчик.
+            get_callback_prefix (Callable[[types.CallbackQuery], str | None] | None): Функция получения префикса
+                данных коллбэк-запроса. Если не задана, префиксом считается часть данных до первого двоеточия.
+            queries_warning (int): Количество запросов к базе данных за обновление, после которого в лог
+                записывается предупреждение (по умолчанию 10).
+            metrics (HandlerMetrics | None): Сбор метрик обработчиков. Если задан, функции регистрируемых
+                обработчиков оборачиваются для сбора метрик (по умолчанию None - метрики выключены).
+            max_queue (int): Максимальное количество обновлений во всех очередях (по умолчанию 1000).
+            max_user_queue (int): Максимальное количество обновлений в очереди одного пользователя
+                (по умолчанию 10).
+            deadline (float): Время ожидания обработки в секундах, после которого обновление отбрасывается
+                (по умолчанию 30, 0 - без ограничения).
+            busy_text (str): Текст ответа о перегрузке.
+            busy_interval (float): Минимальный интервал между ответами о перегрузке одному пользователю
+                в секундах (по умолчанию 10).
+
+        """
+        self.max_concurrency = max_concurrency
+        self.queries_warning = queries_warning
+        self.metrics = metrics
+        self.max_queue = max_queue
+        self.max_user_queue = max_user_queue
+        self.deadline = deadline
+        self.busy_text = busy_text
+        self.busy_interval = busy_interval
+        self.dropped: dict[str, int] = {"queue_full": 0, "user_queue_full": 0, "deadline": 0, "stopped": 0}
+        self.__queued = 0
+        self.__busy_replies: dict[int, float] = dict()
+        self.__groups: OrderedDict[int, list[Handler]] = OrderedDict()
+        self.__queues: dict[int | None, deque] = dict()
+        self.__tasks: set[asyncio.Task] = set()
+        self.__stopped = False
+        self.__semaphore = asyncio.Semaphore(max_concurrency)
+        self.__preload = preload
+        self.__get_state_code = get_state_code
+        self.__get_state_version = get_state_version
+        self.__get_callback_prefix = get_callback_prefix
+        self.__routes: dict[Handler, tuple[frozenset[int] | None, str | None]] = dict()
+        self.__prefixes: set[str] = set()
+        self.__table: dict[tuple, list[list[Handler]]] = dict()
+        if metrics is not None:
+            metrics.watch_ingress(queue_depth=self.queue_depth, dropped=lambda: self.dropped)
+
+    def add_handler(self, handler: Handler, group: int = 0) -> None:
+        """
+        Регистрирует обработчик. Обработчики проверяются в порядке возрастания группы и регистрации,
+        как в диспетчере Pyrogram.
+
+        Параметры:
+            handler (Handler): Обработчик Pyrogram (MessageHandler или CallbackQueryHandler).
+            group (int): Группа обработчика (по умолчанию 0).
+
+        Возвращает:
+            None
+
+        """
+        if self.metrics is not None:
+            handler.callback = self.metrics.instrument(handler.callback)
+        if group not in self.__groups:
+            self.__groups[group] = list()
+            self.__groups = OrderedDict(sorted(self.__groups.items()))
+        self.__groups[group].append(handler)
+        state_codes, prefix = self.__route(handler.filters)
+        self.__routes[handler] = (state_codes if self.__get_state_code else None, prefix)
+        if prefix is not None:
+            self.__prefixes.add(prefix)
+        self.__table.clear()
+
+    async def feed(self, client: Client, update: types.Message | types.CallbackQuery) -> None:
+        """
+        Ставит обновление в очередь пользователя и запускает обработку очереди, если она еще не запущена.
+        Метод не ожидает выполнения обработчиков, поэтому не задерживает получение следующих обновлений.
+        Если общая очередь или очередь пользователя заполнена, обновление отбрасывается. После вызова stop
+        обновления отбрасываются без ответа пользователю.
+
+        Параметры:
+            client (Client): Объект клиента Pyrogram.
+            update (types.Message | types.CallbackQuery): Обновление Telegram.
+
+        Возвращает:
+            None
+
+        """
+        key = update.from_user.id if update.from_user else None
+        if self.__stopped:
+            self.dropped["stopped"] += 1
+            logger.debug("Update from %s dropped: dispatcher is stopped", key)
+            return
+        queue = self.__queues.get(key)
+        if self.__queued >= self.max_queue or (queue is not None and len(queue) >= self.max_user_queue):
+            self.__shed(client=client, update=update,
+                        reason="queue_full" if self.__queued >= self.max_queue else "user_queue_full")
+            return
+        self.__queued += 1
+        if queue is not None:
+            queue.append((update, monotonic()))
+            return
+        self.__queues[key] = deque([(update, monotonic())])
+        task = asyncio.create_task(self.__run_queue(client=client, key=key))
+        self.__tasks.add(task)
+        task.add_done_callback(self.__tasks.discard)
+
+    async def __run_queue(self, client: Client, key: int | None) -> None:
+        """
+        Приватный метод для последовательной обработки очереди обновлений пользователя. Обновление, ожидавшее
+        дольше deadline секунд, отбрасывается. Очередь удаляется, когда в ней не остается обновлений.
+
+        Параметры:
+            client (Client): Объект клиента Pyrogram.
+            key (int | None): Идентификатор пользователя в Telegram.
+
+        """
+        queue = self.__queues[key]
+        try:
+            while queue:
+                update, enqueued = queue[0]
+                async with self.__semaphore:
+                    if self.deadline and monotonic() - enqueued > self.deadline:
+                        self.__shed(client=client, update=update, reason="deadline")
+                    else:
+                        await self.__process(client=client, update=update)
+                queue.popleft()
+                self.__queued -= 1
+        finally:
+            self.__queued -= len(queue)
+            del self.__queues[key]
+
+    def queue_depth(self) -> int:
+        """
+        Получает количество обновлений во всех очередях, включая обрабатываемые.
+
+        Возвращает:
+            int: Количество обновлений.
+
+        """
+        return self.__queued
+
+    async def stop(self, timeout: float | None = None) -> int:
+        """
+        Прекращает прием обновлений и ожидает, пока будут обработаны обновления, уже поставленные в очереди,
+        и отправлены ответы о перегрузке. Если задачи не завершились за timeout секунд, они отменяются
+        (начатая запись FSM при отмене обработчика дожидается завершения). Повторный вызов не ожидает ничего.
+
+        Параметры:
+            timeout (float | None): Максимальное время ожидания в секундах (по умолчанию None - без ограничения).
+
+        Возвращает:
+            int: Количество обновлений, ожидавших обработки при вызове.
+
+        """
+        self.__stopped = True
+        queued = self.__queued
+        deadline = monotonic() + timeout if timeout is not None else None
+        # Обработка очереди может запустить ответ о перегрузке, поэтому задачи ожидаются, пока не закончатся
+        while self.__tasks:
+            remaining = max(deadline - monotonic(), 0.0) if deadline is not None else None
+            _, pending = await asyncio.wait(set(self.__tasks), timeout=remaining)
+            if pending:
+                logger.warning("Dispatcher stop timed out, %s tasks cancelled", len(pending))
+                for task in pending:
+                    task.cancel()
+                await asyncio.wait(pending)
+        return queued
+
+    def __shed(self, client: Client, update: types.Message | types.CallbackQuery, reason: str) -> None:
+        """
+        Приватный метод для отбрасывания обновления: учитывает его в dropped и отправляет пользователю ответ
+        о перегрузке, если ответ не отправлялся последние busy_interval секунд.
+
+        Параметры:
+            client (Client): Объект клиента Pyrogram.
+            update (types.Message | types.CallbackQuery): Обновление Telegram.
+            reason (str): Причина (queue_full, user_queue_full или deadline).
+
+        """
+        self.dropped[reason] += 1
+        key = update.from_user.id if update.from_user else None
+        logger.debug("Update from %s dropped: %s", key, reason)
+        now = monotonic()
+        if key is None or now - self.__busy_replies.get(key, -self.busy_interval) < self.busy_interval:
+            return
+        if len(self.__busy_replies) >= self.max_queue:
+            self.__busy_replies = {
+                telegram_id: replied for telegram_id, replied in self.__busy_replies.items()
+                if now - replied < self.busy_interval}
+        self.__busy_replies[key] = now
+        task = asyncio.create_task(self.__reply_busy(client=client, update=update))
+        self.__tasks.add(task)
+        task.add_done_callback(self.__tasks.discard)
+
+    async def __reply_busy(self, client: Client, update: types.Message | types.CallbackQuery) -> None:
+        """
+        Приватный метод для отправки ответа о перегрузке: всплывающего уведомления на коллбэк-запрос
+        или сообщения в чат. Ответ не обращается к базе данных и отправляется через OutboundScheduler, поэтому
+        при всплеске нагрузки не превышает ограничения частоты отправки сообщений.
+
+        Параметры:
+            client (Client): Объект клиента Pyrogram.
+            update (types.Message | types.CallbackQuery): Обновление Telegram.
+
+        """
+        try:
+            if isinstance(update, types.CallbackQuery):
+                await get_outbound_scheduler().send(
+                    chat_id=None, priority=PRIORITY_INTERACTIVE,
+                    call=functools.partial(client.answer_callback_query, callback_query_id=update.id,
+                                           text=self.busy_text))
+            elif update.chat:
+                await get_outbound_scheduler().send(
+                    chat_id=update.chat.id, priority=PRIORITY_INTERACTIVE,
+                    call=functools.partial(client.send_message, chat_id=update.chat.id, text=self.busy_text))
+        except Exception as e:
+            logger.warning("Busy reply to %s failed: %s", update.from_user.id, e)
+
+    async def __process(self, client: Client, update: types.Message | types.CallbackQuery) -> None:
+        """
+        Приватный метод для выполнения первого подходящего обработчика в каждой группе с учетом
+        StopPropagation и ContinuePropagation. Обработчики выполняются с контекстом обновления UpdateContext.
+
+        Параметры:
+            client (Client): Объект клиента Pyrogram.
+            update (types.Message | types.CallbackQuery): Обновление Telegram.
+
+        """
+        context = UpdateContext(update=update)
+        token = set_update_context(context)
+        try:
+            handler_type = self.__handler_types.get(type(update))
+            if self.__preload and update.from_user:
+                try:
+                    await self.__preload(update.from_user.id)
+                except Exception as e:
+                    logger.exception(e)
+            track_state = self.__get_state_code is not None and update.from_user is not None
+            if track_state:
+                context.state_code = self.__get_state_code(update.from_user.id)
+            version = self.__get_state_version() if self.__get_state_version else None
+            prefix = None
+            if self.__get_callback_prefix and isinstance(update, types.CallbackQuery):
+                prefix = self.__get_callback_prefix(update)
+                prefix = prefix if prefix in self.__prefixes else None
+            elif isinstance(update, types.CallbackQuery) and isinstance(update.data, str):
+                prefix = update.data.split(":", 1)[0] if ":" in update.data else None
+                prefix = prefix if prefix in self.__prefixes else None
+            groups = self.__candidates(handler_type=handler_type, state_code=context.state_code, prefix=prefix)
+            for index in range(len(groups)):
+                handled = False
+                for handler in groups[index]:
+                    try:
+                        if not await handler.check(client, update):
+                            continue
+                    except Exception as e:
+                        logger.exception(e)
+                        continue
+                    handled = True
+                    try:
+                        if inspect.iscoroutinefunction(handler.callback):
+                            await handler.callback(client, update)
+                        else:
+                            await client.loop.run_in_executor(client.executor, handler.callback, client, update)
+                    except StopPropagation:
+                        raise
+                    except ContinuePropagation:
+                        continue
+                    except Exception as e:
+                        logger.exception(e)
+                    break
+                # Обработчик мог изменить состояние пользователя - следующие группы выбираются по новому состоянию
+                if not track_state or not handled:
+                    continue
+                if self.__get_state_version is not None:
+                    if self.__get_state_version() == version:
+                        continue
+                    version = self.__get_state_version()
+                state_code = self.__get_state_code(update.from_user.id)
+                if state_code != context.state_code:
+                    context.state_code = state_code
+                    groups = self.__candidates(handler_type=handler_type, state_code=state_code, prefix=prefix)
+        except StopPropagation:
+            pass
+        finally:
+            reset_update_context(token)
+            logger.log(logging.WARNING if context.queries > self.queries_warning else logging.DEBUG,
+                       "Update from %s handled with %s database queries", context.telegram_id, context.queries)
+
+    def __candidates(self, handler_type: type[Handler], state_code: int | None,
+                     prefix: str | None) -> list[list[Handler]]:
+        """
+        Приватный метод для получения обработчиков, которые могут подойти обновлению, по группам в порядке
+        регистрации. Результат сохраняется в таблице и пересчитывается только после регистрации нового обработчика.
+
+        Параметры:
+            handler_type (type[Handler]): Тип обработчика обновления.
+            state_code (int | None): Код состояния FSM пользователя.
+            prefix (str | None): Префикс данных коллбэк-запроса, встречающийся в фильтрах обработчиков.
+
+        Возвращает:
+            list[list[Handler]]: Обработчики по группам.
+
+        """
+        key = (handler_type, state_code, prefix)
+        groups = self.__table.get(key)
+        if groups is None:
+            groups = list()
+            for group in self.__groups.values():
+                handlers = list()
+                for handler in group:
+                    state_codes, handler_prefix = self.__routes[handler]
+                    if not isinstance(handler, handler_type):
+                        continue
+                    if state_codes is not None and state_code is not None and state_code not in state_codes:
+                        continue
+                    if handler_prefix is not None and handler_prefix != prefix:
+                        continue
+                    handlers.append(handler)
+                groups.append(handlers)
+            self.__table[key] = groups
+        return groups
+
+    @staticmethod
+    def __route(flt: Filter | None) -> tuple[frozenset[int] | None, str | None]:
+        """
+        Приватный метод для извлечения ограничений обработчика из дерева фильтров. Учитываются только фильтры,
+        объединенные через &: фильтр состояния FSM (атрибут state_codes), фильтр маршрута коллбэк-запроса
+        (атрибут callback_prefix) и регулярное выражение вида "^префикс:...", для которого префиксом считается
+        часть до первого двоеточия.
+
+        Параметры:
+            flt (Filter | None): Фильтр обработчика.
+
+        Возвращает:
+            tuple[frozenset[int] | None, str | None]: Коды состояний и префикс данных коллбэк-запроса
+                (None - без ограничения).
+
+        """
+        if isinstance(flt, AndFilter):
+            base_state_codes, base_prefix = Dispatcher.__route(flt.base)
+            other_state_codes, other_prefix = Dispatcher.__route(flt.other)
+            state_codes = (base_state_codes & other_state_codes if base_state_codes is not None
+                           and other_state_codes is not None else base_state_codes or other_state_codes)
+            return state_codes, base_prefix or other_prefix
+        state_codes = getattr(flt, "state_codes", None)
+        pattern = getattr(flt, "p", None)
+        prefix = getattr(flt, "callback_prefix", None)
+        if isinstance(pattern, re.Pattern) and isinstance(pattern.pattern, str):
+            match = re.match(r"\^([\w-]+):", pattern.pattern)
+            prefix = match.group(1) if match else None
+        return state_codes, prefix
@@ -0,0 +1,303 @@
+"""
+Модуль, содержащий класс MessageLedger - журнал идентификаторов сообщений бота, удаляемых при следующем ответе.
+
+Для каждой пары (пользователь, чат) в памяти хранится кольцевой буфер последних capacity идентификаторов
+сообщений: при переполнении самые старые идентификаторы вытесняются (такие сообщения больше не удаляются).
+Журнал не входит в данные FSM, поэтому отправка сообщения не перезаписывает контекст пользователя.
+
+За буферами стоит компактная таблица message_ledger (одна строка с массивом идентификаторов на пару
+пользователь-чат). Перед ответом пользователю буферы его чатов загружаются из таблицы одним запросом
+в отдельном потоке (preload), поэтому запрос не останавливает цикл событий. Измененные буферы записываются
+пакетом по таймеру и при остановке бота (одним запросом на вставку и одним на удаление пустых строк), запись
+также выполняется в отдельном потоке. Количество буферов в памяти ограничено max_size: вытесняются давно
+не использованные буферы, которые уже записаны в таблицу.
+
+Параметры:
+    _message_ledger (MessageLedger): Статический объект MessageLedger.
+
+"""
+
+import asyncio
+import logging
+from collections import OrderedDict, deque
+
+from sqlalchemy import text
+
+from app import config
+from app.db.db_config import Session
+
+logger = logging.getLogger(__name__)
+
+
+class MessageLedger:
+    """
+    Класс журнала идентификаторов сообщений по парам (пользователь, чат).
+
+    Параметры:
+        __buffers (OrderedDict[tuple[int, int], deque[int]]): Кольцевые буферы идентификаторов сообщений
+            в порядке последнего использования.
+        __dirty (set[tuple[int, int]]): Пары, изменения которых еще не записаны в таблицу.
+        __flushing (set[tuple[int, int]]): Пары, которые записываются в таблицу в отдельном потоке.
+        capacity (int): Максимальное количество идентификаторов в буфере.
+        max_size (int): Максимальное количество буферов в памяти.
+        flush_interval (float): Интервал записи изменений в таблицу в секундах.
+
+    Methods:
+        preload(telegram_id: int, chat_ids: list[int]) -> None: Загружает буферы пар (пользователь, чат)
+            из таблицы без блокировки цикла событий.
+        record(telegram_id: int, chat_id: int, message_ids: list[int]) -> None: Добавляет идентификаторы
+            сообщений в журнал.
+        take(telegram_id: int, chat_id: int) -> list[int]: Забирает все идентификаторы сообщений из журнала.
+        flush() -> int: Записывает измененные буферы в таблицу без блокировки цикла событий.
+        run_flusher() -> None: Периодически записывает измененные буферы в таблицу.
+        __load(telegram_id: int, chat_ids: list[int]) -> dict[tuple[int, int], list[int]]: Приватный метод
+            для загрузки идентификаторов сообщений из таблицы.
+        __write(values: list[str], empty: list[str], params: dict) -> None: Приватный метод для записи
+            буферов в таблицу.
+        __get(key: tuple[int, int]) -> deque[int]: Приватный метод для получения загруженного буфера.
+        __evict(keep: set[tuple[int, int]]) -> None: Приватный метод для вытеснения буферов сверх max_size.
+
+    """
+
+    def __init__(self, capacity: int = 100, max_size: int = 10000, flush_interval: float = 1.0):
+        """
+        Инициализация объекта MessageLedger.
+
+        Параметры:
+            capacity (int): Максимальное количество идентификаторов в буфере (по умолчанию 100).
+            max_size (int): Максимальное количество буферов в памяти (по умолчанию 10000).
+            flush_interval (float): Интервал записи изменений в таблицу в секундах (по умолчанию 1.0).
+
+        """
+        self.__buffers: OrderedDict[tuple[int, int], deque[int]] = OrderedDict()
+        self.__dirty: set[tuple[int, int]] = set()
+        self.__flushing: set[tuple[int, int]] = set()
+        self.capacity = capacity
+        self.max_size = max_size
+        self.flush_interval = flush_interval
+
+    async def preload(self, telegram_id: int, chat_ids: list[int]) -> None:
+        """
+        Загружает из таблицы буферы пар (пользователь, чат), которых нет в памяти, одним запросом в отдельном
+        потоке. Вызывается перед take и record: буферы этих пар не вытесняются до следующего вызова preload.
+
+        Параметры:
+            telegram_id (int): Идентификатор пользователя в Telegram.
+            chat_ids (list[int]): Идентификаторы чатов.
+
+        Возвращает:
+            None
+
+        """
+        keys = [(telegram_id, chat_id) for chat_id in chat_ids]
+        missing = [key[1] for key in keys if key not in self.__buffers]
+        if missing:
+            loaded = await asyncio.to_thread(self.__load, telegram_id, missing)
+            for chat_id in missing:
+                key = (telegram_id, chat_id)
+                # Пока выполнялся запрос, буфер мог быть загружен другим обработчиком
+                if key not in self.__buffers:
+                    self.__buffers[key] = deque(loaded.get(key) or (), maxlen=self.capacity)
+        for key in keys:
+            self.__buffers.move_to_end(key)
+        self.__evict(keep=set(keys))
+
+    def record(self, telegram_id: int, chat_id: int, message_ids: list[int]) -> None:
+        """
+        Добавляет идентификаторы сообщений в журнал пары (пользователь, чат).
+
+        Параметры:
+            telegram_id (int): Идентификатор пользователя в Telegram.
+            chat_id (int): Идентификатор чата.
+            message_ids (list[int]): Идентификаторы сообщений.
+
+        Возвращает:
+            None
+
+        """
+        if not message_ids:
+            return
+        key = (telegram_id, chat_id)
+        self.__get(key).extend(message_ids)
+        self.__dirty.add(key)
+
+    def take(self, telegram_id: int, chat_id: int) -> list[int]:
+        """
+        Забирает все идентификаторы сообщений из журнала пары (пользователь, чат).
+
+        Параметры:
+            telegram_id (int): Идентификатор пользователя в Telegram.
+            chat_id (int): Идентификатор чата.
+
+        Возвращает:
+            list[int]: Идентификаторы сообщений в порядке добавления.
+
+        """
+        key = (telegram_id, chat_id)
+        buffer = self.__get(key)
+        if not buffer:
+            return list()
+        message_ids = list(buffer)
+        buffer.clear()
+        self.__dirty.add(key)
+        return message_ids
+
+    async def flush(self) -> int:
+        """
+        Записывает измененные буферы в таблицу message_ledger в отдельном потоке: непустые буферы - одним
+        многострочным запросом INSERT ... ON CONFLICT, строки пустых буферов удаляются одним запросом.
+        Набор измененных пар и их идентификаторы сообщений забираются в цикле событий, поэтому изменения,
+        сделанные во время записи, попадают в следующую запись. Если запись не удалась, пары снова
+        помечаются измененными.
+
+        Возвращает:
+            int: Количество записанных буферов.
+
+        """
+        if not self.__dirty:
+            return 0
+        dirty, self.__dirty = self.__dirty, set()
+        values, params, empty = list(), dict(), list()
+        for num, key in enumerate(dirty):
+            buffer = self.__buffers.get(key)
+            if not buffer:
+                empty.append(f"(:telegram_id_{num}, :chat_id_{num})")
+            else:
+                values.append(f"(:telegram_id_{num}, :chat_id_{num}, :message_ids_{num})")
+                params[f"message_ids_{num}"] = list(buffer)
+            params[f"telegram_id_{num}"], params[f"chat_id_{num}"] = key
+        # Записываемые буферы не вытесняются, чтобы при ошибке записи их можно было записать повторно
+        self.__flushing |= dirty
+        write = asyncio.ensure_future(asyncio.to_thread(self.__write, values, empty, params))
+        try:
+            await asyncio.shield(write)
+        except asyncio.CancelledError:
+            await asyncio.wait([write])
+            raise
+        finally:
+            self.__flushing -= dirty
+            if not write.done() or write.cancelled() or write.exception() is not None:
+                self.__dirty |= dirty
+        return len(dirty)
+
+    async def run_flusher(self) -> None:
+        """
+        Периодически записывает измененные буферы в таблицу с интервалом flush_interval.
+
+        Возвращает:
+            None
+
+        """
+        while True:
+            await asyncio.sleep(self.flush_interval)
+            try:
+                await self.flush()
+            except Exception as e:
+                logger.exception(e)
+
+    @staticmethod
+    def __load(telegram_id: int, chat_ids: list[int]) -> dict[tuple[int, int], list[int]]:
+        """
+        Приватный метод для загрузки идентификаторов сообщений пар (пользователь, чат) из таблицы одним запросом.
+
+        Параметры:
+            telegram_id (int): Идентификатор пользователя в Telegram.
+            chat_ids (list[int]): Идентификаторы чатов.
+
+        Возвращает:
+            dict[tuple[int, int], list[int]]: Идентификаторы сообщений найденных пар.
+
+        """
+        params = {f"chat_id_{num}": chat_id for num, chat_id in enumerate(chat_ids)}
+        with Session() as session:
+            rows = session.execute(text(
+                "SELECT chat_id, message_ids FROM message_ledger WHERE telegram_id=:telegram_id "
+                f"AND chat_id IN ({', '.join(f':{name}' for name in params)})"
+            ), {"telegram_id": telegram_id, **params}).all()
+        return {(telegram_id, chat_id): message_ids for chat_id, message_ids in rows}
+
+    @staticmethod
+    def __write(values: list[str], empty: list[str], params: dict) -> None:
+        """
+        Приватный метод для записи буферов в таблицу в одной транзакции.
+
+        Параметры:
+            values (list[str]): Строки VALUES непустых буферов.
+            empty (list[str]): Пары (пользователь, чат) пустых буферов, строки которых удаляются.
+            params (dict): Параметры запросов.
+
+        Возвращает:
+            None
+
+        """
+        with Session() as session:
+            if values:
+                session.execute(text(
+                    f"INSERT INTO message_ledger (telegram_id, chat_id, message_ids) VALUES {', '.join(values)} "
+                    "ON CONFLICT (telegram_id, chat_id) DO UPDATE SET message_ids=EXCLUDED.message_ids"
+                ), params)
+            if empty:
+                session.execute(text(
+                    f"DELETE FROM message_ledger WHERE (telegram_id, chat_id) IN ({', '.join(empty)})"
+                ), params)
+            session.commit()
+
+    def __get(self, key: tuple[int, int]) -> deque[int]:
+        """
+        Приватный метод для получения буфера пары (пользователь, чат), загруженного заранее (preload). Если буфер
+        не загружен, выбрасывается RuntimeError: загрузка из таблицы в цикле событий остановила бы другие обработчики.
+
+        Параметры:
+            key (tuple[int, int]): Пара (идентификатор пользователя, идентификатор чата).
+
+        Возвращает:
+            deque[int]: Кольцевой буфер идентификаторов сообщений.
+
+        """
+        buffer = self.__buffers.get(key)
+        if buffer is None:
+            raise RuntimeError(f"Message ledger buffer {key} is not preloaded")
+        self.__buffers.move_to_end(key)
+        return buffer
+
+    def __evict(self, keep: set[tuple[int, int]]) -> None:
+        """
+        Приватный метод для вытеснения давно не использованных буферов, если их в памяти больше max_size.
+        Не вытесняются буферы с незаписанными изменениями, записываемые буферы и буферы из keep.
+
+        Параметры:
+            keep (set[tuple[int, int]]): Пары, буферы которых остаются в памяти.
+
+        Возвращает:
+            None
+
+        """
+        excess = len(self.__buffers) - self.max_size
+        if excess <= 0:
+            return
+        evicted = list()
+        for candidate in self.__buffers:
+            if len(evicted) == excess:
+                break
+            if candidate not in keep and candidate not in self.__dirty and candidate not in self.__flushing:
+                evicted.append(candidate)
+        for candidate in evicted:
+            del self.__buffers[candidate]
+
+
+_message_ledger = MessageLedger(
+    capacity=config.LEDGER_CAPACITY,
+    max_size=config.LEDGER_CACHE_MAX_SIZE,
+    flush_interval=config.LEDGER_FLUSH_INTERVAL
+)
+
+
+def get_message_ledger() -> MessageLedger:
+    """
+    Получение объекта MessageLedger.
+
+    Возвращает:
+        MessageLedger: Объект MessageLedger.
+
+    """
+    return _message_ledger
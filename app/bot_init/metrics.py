@@ -0,0 +1,384 @@
+"""
+Модуль, содержащий класс HandlerMetrics - сбор метрик обработчиков сообщений и коллбэк-запросов.
+
+Если метрики включены (METRICS_ENABLED), Dispatcher оборачивает функцию каждого регистрируемого обработчика,
+и для каждого вызова записываются время выполнения, время запросов к базе данных, количество запросов к базе
+данных и к Telegram API (из UpdateContext) и исключения. Время записывается в гистограммы с фиксированными
+границами. Вместе с размером очереди обновлений Dispatcher и количеством отброшенных обновлений метрики
+и временем ожидания исходящих запросов в очереди OutboundScheduler метрики отдаются в текстовом формате
+Prometheus по HTTP и периодически записываются в лог.
+Если метрики выключены, обработчики не оборачиваются и сбор метрик не добавляет работы при обработке обновлений.
+
+Параметры:
+    BUCKETS (tuple[float, ...]): Верхние границы интервалов гистограмм в секундах.
+    _handler_metrics (HandlerMetrics | None): Статический объект HandlerMetrics или None, если метрики выключены.
+
+"""
+
+import asyncio
+import bisect
+import functools
+import logging
+from time import perf_counter
+from typing import Callable
+
+from pyrogram import ContinuePropagation, StopPropagation
+
+from app import config
+from app.bot_init.context import get_update_context
+
+logger = logging.getLogger(__name__)
+
+BUCKETS: tuple[float, ...] = (0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+
+class Histogram:
+    """
+    Класс гистограммы с фиксированными границами интервалов.
+
+    Параметры:
+        counts (list[int]): Количество значений в каждом интервале (последний - больше всех границ).
+        total (float): Сумма значений.
+        count (int): Количество значений.
+
+    Methods:
+        observe(value: float) -> None: Записывает значение.
+        quantile(q: float) -> float: Получает оценку квантиля сверху (границу интервала).
+
+    """
+
+    def __init__(self):
+        """
+        Инициализация объекта Histogram.
+
+        """
+        self.counts: list[int] = [0] * (len(BUCKETS) + 1)
+        self.total = 0.0
+        self.count = 0
+
+    def observe(self, value: float) -> None:
+        """
+        Записывает значение.
+
+        Параметры:
+            value (float): Значение в секундах.
+
+        Возвращает:
+            None
+
+        """
+        self.counts[bisect.bisect_left(BUCKETS, value)] += 1
+        self.total += value
+        self.count += 1
+
+    def quantile(self, q: float) -> float:
+        """
+        Получает оценку квантиля сверху - границу интервала, в который попадает квантиль.
+
+        Параметры:
+            q (float): Квантиль от 0 до 1.
+
+        Возвращает:
+            float: Граница интервала в секундах (inf, если квантиль больше всех границ).
+
+        """
+        rank = q * self.count
+        cumulative = 0
+        for bound, count in zip(BUCKETS + (float("inf"),), self.counts):
+            cumulative += count
+            if cumulative >= rank:
+                return bound
+        return float("inf")
+
+
+class HandlerStats:
+    """
+    Класс метрик одного обработчика.
+
+    Параметры:
+        duration (Histogram): Гистограмма времени выполнения.
+        db_time (Histogram): Гистограмма времени запросов к базе данных.
+        queries (int): Количество запросов к базе данных.
+        api_calls (int): Количество запросов к Telegram API.
+        exceptions (int): Количество вызовов, завершившихся исключением.
+
+    """
+
+    def __init__(self):
+        """
+        Инициализация объекта HandlerStats.
+
+        """
+        self.duration = Histogram()
+        self.db_time = Histogram()
+        self.queries = 0
+        self.api_calls = 0
+        self.exceptions = 0
+
+
+class HandlerMetrics:
+    """
+    Класс сбора метрик обработчиков.
+
+    Параметры:
+        __stats (dict[str, HandlerStats]): Метрики обработчиков по названию функции.
+        __queue_depth (Callable[[], int] | None): Функция получения размера очереди обновлений.
+        __dropped (Callable[[], dict[str, int]] | None): Функция получения количества отброшенных обновлений
+            по причинам.
+        __outbound_depth (Callable[[], int] | None): Функция получения количества исходящих запросов в очереди.
+        __outbound_wait (dict[str, Histogram]): Гистограммы времени ожидания исходящих запросов по приоритетам.
+        __flood_waits (Callable[[], int] | None): Функция получения количества полученных FloodWait.
+
+    Methods:
+        instrument(callback: Callable) -> Callable: Оборачивает функцию обработчика для сбора метрик.
+        watch_ingress(queue_depth: Callable[[], int], dropped: Callable[[], dict[str, int]]) -> None: Подключает
+            метрики очереди обновлений.
+        watch_outbound(queue_depth: Callable[[], int], wait: dict[str, Histogram], flood_waits: Callable[[], int])
+            -> None: Подключает метрики очереди исходящих запросов.
+        render() -> str: Получает метрики в текстовом формате Prometheus.
+        summary() -> str: Получает краткую сводку метрик для лога.
+        serve(host: str, port: int) -> asyncio.Server: Запускает HTTP-сервер, отдающий метрики.
+        run_reporter(interval: float) -> None: Периодически записывает сводку метрик в лог.
+        __handle(reader: asyncio.StreamReader, writer: asyncio.StreamWriter) -> None: Приватный метод для ответа
+            на HTTP-запрос.
+
+    """
+
+    def __init__(self):
+        """
+        Инициализация объекта HandlerMetrics.
+
+        """
+        self.__stats: dict[str, HandlerStats] = dict()
+        self.__queue_depth: Callable[[], int] | None = None
+        self.__dropped: Callable[[], dict[str, int]] | None = None
+        self.__outbound_depth: Callable[[], int] | None = None
+        self.__outbound_wait: dict[str, Histogram] = dict()
+        self.__flood_waits: Callable[[], int] | None = None
+
+    def instrument(self, callback: Callable) -> Callable:
+        """
+        Оборачивает асинхронную функцию обработчика: для каждого вызова записываются время выполнения и разница
+        счетчиков UpdateContext до и после вызова. StopPropagation и ContinuePropagation не считаются
+        исключениями. Синхронные функции не оборачиваются.
+
+        Параметры:
+            callback (Callable): Функция обработчика.
+
+        Возвращает:
+            Callable: Обернутая функция обработчика.
+
+        """
+        if not asyncio.iscoroutinefunction(callback):
+            return callback
+        stats = self.__stats.setdefault(f"{callback.__module__}.{callback.__qualname__}", HandlerStats())
+
+        @functools.wraps(callback)
+        async def instrumented(client, update):
+            context = get_update_context()
+            queries, db_time, api_calls = (
+                (context.queries, context.db_time, context.api_calls) if context is not None else (0, 0.0, 0))
+            started = perf_counter()
+            try:
+                return await callback(client, update)
+            except (StopPropagation, ContinuePropagation):
+                raise
+            except BaseException:
+                stats.exceptions += 1
+                raise
+            finally:
+                stats.duration.observe(perf_counter() - started)
+                if context is not None:
+                    stats.db_time.observe(context.db_time - db_time)
+                    stats.queries += context.queries - queries
+                    stats.api_calls += context.api_calls - api_calls
+
+        return instrumented
+
+    def watch_ingress(self, queue_depth: Callable[[], int], dropped: Callable[[], dict[str, int]]) -> None:
+        """
+        Подключает метрики очереди обновлений. Значения запрашиваются при выводе метрик.
+
+        Параметры:
+            queue_depth (Callable[[], int]): Функция получения размера очереди обновлений.
+            dropped (Callable[[], dict[str, int]]): Функция получения количества отброшенных обновлений
+                по причинам.
+
+        Возвращает:
+            None
+
+        """
+        self.__queue_depth = queue_depth
+        self.__dropped = dropped
+
+    def watch_outbound(self, queue_depth: Callable[[], int], wait: dict[str, Histogram],
+                       flood_waits: Callable[[], int]) -> None:
+        """
+        Подключает метрики очереди исходящих запросов. Значения запрашиваются при выводе метрик.
+
+        Параметры:
+            queue_depth (Callable[[], int]): Функция получения количества исходящих запросов в очереди.
+            wait (dict[str, Histogram]): Гистограммы времени ожидания в очереди по названиям приоритетов.
+            flood_waits (Callable[[], int]): Функция получения количества полученных FloodWait.
+
+        Возвращает:
+            None
+
+        """
+        self.__outbound_depth = queue_depth
+        self.__outbound_wait = wait
+        self.__flood_waits = flood_waits
+
+    def render(self) -> str:
+        """
+        Получает метрики в текстовом формате Prometheus.
+
+        Возвращает:
+            str: Метрики в текстовом формате Prometheus.
+
+        """
+        lines = list()
+        for metric, attribute, description in (
+                ("bot_handler_duration_seconds", "duration", "Handler wall time"),
+                ("bot_handler_db_seconds", "db_time", "Database time spent by handler")):
+            lines.append(f"# HELP {metric} {description}.")
+            lines.append(f"# TYPE {metric} histogram")
+            for name, stats in self.__stats.items():
+                histogram: Histogram = getattr(stats, attribute)
+                cumulative = 0
+                for bound, count in zip(BUCKETS + (float("inf"),), histogram.counts):
+                    cumulative += count
+                    le = "+Inf" if bound == float("inf") else repr(bound)
+                    lines.append(f'{metric}_bucket{{handler="{name}",le="{le}"}} {cumulative}')
+                lines.append(f'{metric}_sum{{handler="{name}"}} {histogram.total!r}')
+                lines.append(f'{metric}_count{{handler="{name}"}} {histogram.count}')
+        for metric, attribute, description in (
+                ("bot_handler_queries_total", "queries", "Database queries made by handler"),
+                ("bot_handler_api_calls_total", "api_calls", "Telegram API calls made by handler"),
+                ("bot_handler_exceptions_total", "exceptions", "Handler calls that raised an exception")):
+            lines.append(f"# HELP {metric} {description}.")
+            lines.append(f"# TYPE {metric} counter")
+            for name, stats in self.__stats.items():
+                lines.append(f'{metric}{{handler="{name}"}} {getattr(stats, attribute)}')
+        if self.__queue_depth is not None:
+            lines.append("# HELP bot_ingress_queue_depth Updates waiting in or being processed from the queue.")
+            lines.append("# TYPE bot_ingress_queue_depth gauge")
+            lines.append(f"bot_ingress_queue_depth {self.__queue_depth()}")
+            lines.append("# HELP bot_ingress_dropped_total Updates dropped by admission control.")
+            lines.append("# TYPE bot_ingress_dropped_total counter")
+            for reason, count in self.__dropped().items():
+                lines.append(f'bot_ingress_dropped_total{{reason="{reason}"}} {count}')
+        if self.__outbound_depth is not None:
+            lines.append("# HELP bot_outbound_queue_depth Outbound requests waiting for the scheduler.")
+            lines.append("# TYPE bot_outbound_queue_depth gauge")
+            lines.append(f"bot_outbound_queue_depth {self.__outbound_depth()}")
+            lines.append("# HELP bot_outbound_wait_seconds Time outbound requests waited in the scheduler queue.")
+            lines.append("# TYPE bot_outbound_wait_seconds histogram")
+            for priority, histogram in self.__outbound_wait.items():
+                cumulative = 0
+                for bound, count in zip(BUCKETS + (float("inf"),), histogram.counts):
+                    cumulative += count
+                    le = "+Inf" if bound == float("inf") else repr(bound)
+                    lines.append(f'bot_outbound_wait_seconds_bucket{{priority="{priority}",le="{le}"}} {cumulative}')
+                lines.append(f'bot_outbound_wait_seconds_sum{{priority="{priority}"}} {histogram.total!r}')
+                lines.append(f'bot_outbound_wait_seconds_count{{priority="{priority}"}} {histogram.count}')
+            lines.append("# HELP bot_outbound_flood_waits_total FloodWait errors received from Telegram.")
+            lines.append("# TYPE bot_outbound_flood_waits_total counter")
+            lines.append(f"bot_outbound_flood_waits_total {self.__flood_waits()}")
+        return "\n".join(lines) + "\n"
+
+    def summary(self) -> str:
+        """
+        Получает краткую сводку метрик вызывавшихся обработчиков, от самых медленных к быстрым.
+
+        Возвращает:
+            str: Сводка метрик.
+
+        """
+        lines = list()
+        for name, stats in sorted(self.__stats.items(), key=lambda item: -item[1].duration.total):
+            calls = stats.duration.count
+            if not calls:
+                continue
+            lines.append(
+                f"{name}: calls={calls} avg={stats.duration.total / calls * 1000:.1f}ms "
+                f"p95<={stats.duration.quantile(0.95) * 1000:g}ms db={stats.db_time.total / calls * 1000:.1f}ms "
+                f"queries={stats.queries / calls:.1f} api={stats.api_calls / calls:.1f} errors={stats.exceptions}")
+        if self.__queue_depth is not None and (lines or any(self.__dropped().values())):
+            dropped = " ".join(f"{reason}={count}" for reason, count in self.__dropped().items())
+            lines.append(f"ingress: queue_depth={self.__queue_depth()} dropped: {dropped}")
+        if self.__outbound_depth is not None and any(histogram.count for histogram in self.__outbound_wait.values()):
+            wait = " ".join(
+                f"{priority}=avg {histogram.total / histogram.count * 1000:.1f}ms "
+                f"p95<={histogram.quantile(0.95) * 1000:g}ms"
+                for priority, histogram in self.__outbound_wait.items() if histogram.count)
+            lines.append(f"outbound: queue_depth={self.__outbound_depth()} wait: {wait} "
+                         f"flood_waits={self.__flood_waits()}")
+        return "\n".join(lines)
+
+    async def serve(self, host: str, port: int) -> asyncio.Server:
+        """
+        Запускает HTTP-сервер, отдающий метрики в текстовом формате Prometheus на любой запрос.
+
+        Параметры:
+            host (str): Адрес, на котором принимаются подключения.
+            port (int): Порт.
+
+        Возвращает:
+            asyncio.Server: Запущенный сервер.
+
+        """
+        server = await asyncio.start_server(self.__handle, host=host, port=port)
+        logger.info("Handler metrics are served on http://%s:%s/metrics", host, port)
+        return server
+
+    async def run_reporter(self, interval: float) -> None:
+        """
+        Периодически записывает сводку метрик в лог.
+
+        Параметры:
+            interval (float): Интервал в секундах.
+
+        Возвращает:
+            None
+
+        """
+        while True:
+            await asyncio.sleep(interval)
+            summary = self.summary()
+            if summary:
+                logger.info("Handler metrics:\n%s", summary)
+
+    async def __handle(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter) -> None:
+        """
+        Приватный метод для ответа на HTTP-запрос метриками в текстовом формате Prometheus.
+
+        Параметры:
+            reader (asyncio.StreamReader): Поток чтения запроса.
+            writer (asyncio.StreamWriter): Поток записи ответа.
+
+        """
+        try:
+            await reader.readuntil(b"\r\n\r\n")
+            body = self.render().encode()
+            writer.write(b"HTTP/1.1 200 OK\r\nContent-Type: text/plain; version=0.0.4; charset=utf-8\r\n"
+                         b"Content-Length: " + str(len(body)).encode() + b"\r\nConnection: close\r\n\r\n" + body)
+            await writer.drain()
+        except (asyncio.IncompleteReadError, asyncio.LimitOverrunError, ConnectionError):
+            pass
+        finally:
+            writer.close()
+
+
+_handler_metrics: HandlerMetrics | None = HandlerMetrics() if config.METRICS_ENABLED else None
+
+
+def get_handler_metrics() -> HandlerMetrics | None:
+    """
+    Получение объекта HandlerMetrics.
+
+    Возвращает:
+        HandlerMetrics | None: Объект HandlerMetrics или None, если метрики выключены.
+
+    """
+    return _handler_metrics
@@ -0,0 +1,397 @@
+"""
+Модуль, содержащий класс OutboundScheduler - планировщик исходящих запросов к Telegram API с учетом ограничений
+частоты отправки сообщений.
+
+Каждый запрос (отправка или удаление сообщений) ожидает разрешения планировщика в очереди своего приоритета:
+сначала обслуживаются ответы пользователям (PRIORITY_INTERACTIVE), затем массовые отправки, например списки
+задач (PRIORITY_BULK). Разрешение выдается, когда есть токен в общем ведре (не чаще global_rate запросов
+в секунду) и в ведре чата (chat_rate запросов в секунду с запасом chat_burst), а у чата нет выполняемого
+запроса - поэтому запросы в один чат выполняются по порядку, а чаты, исчерпавшие свой лимит, не задерживают
+остальные.
+Если Telegram отвечает FloodWait, чат блокируется на указанное время, и запрос повторяется (не более
+flood_retries раз). Запросы без чата (chat_id=None, например удаление сообщений) ограничиваются только общим
+ведром и выполняются одновременно с отправкой сообщений в чат. Время ожидания в очереди записывается
+в гистограммы по приоритетам и отдается в метриках обработчиков.
+
+Параметры:
+    PRIORITY_INTERACTIVE (int): Приоритет ответов пользователям.
+    PRIORITY_BULK (int): Приоритет массовых отправок.
+    PRIORITIES (tuple[str, ...]): Названия приоритетов для метрик.
+    _outbound_scheduler (OutboundScheduler): Статический объект OutboundScheduler.
+
+"""
+
+import asyncio
+import logging
+from collections import deque
+from time import monotonic
+from typing import Any, Awaitable, Callable
+
+from pyrogram.errors import FloodWait
+
+from app import config
+from app.bot_init.metrics import HandlerMetrics, Histogram, get_handler_metrics
+
+logger = logging.getLogger(__name__)
+
+PRIORITY_INTERACTIVE = 0
+PRIORITY_BULK = 1
+PRIORITIES: tuple[str, ...] = ("interactive", "bulk")
+
+
+class TokenBucket:
+    """
+    Класс ведра токенов: rate токенов в секунду, не более capacity токенов.
+
+    Параметры:
+        rate (float): Скорость пополнения в токенах в секунду.
+        capacity (float): Максимальное количество токенов.
+        tokens (float): Текущее количество токенов.
+        updated (float): Время последнего пополнения (time.monotonic()).
+        blocked_until (float): Время, до которого токены не выдаются (после FloodWait).
+
+    Methods:
+        delay(now: float) -> float: Получает время до появления токена.
+        take(now: float) -> None: Забирает токен.
+        block(until: float) -> None: Запрещает выдачу токенов до указанного времени.
+        idle(now: float) -> bool: Проверяет, что ведро полное и не заблокировано.
+
+    """
+
+    __slots__ = ("rate", "capacity", "tokens", "updated", "blocked_until")
+
+    def __init__(self, rate: float, capacity: float):
+        """
+        Инициализация объекта TokenBucket.
+
+        Параметры:
+            rate (float): Скорость пополнения в токенах в секунду.
+            capacity (float): Максимальное количество токенов.
+
+        """
+        self.rate = rate
+        self.capacity = capacity
+        self.tokens = capacity
+        self.updated = monotonic()
+        self.blocked_until = 0.0
+
+    def __refill(self, now: float) -> None:
+        """
+        Приватный метод для пополнения токенов за время, прошедшее с последнего пополнения.
+
+        Параметры:
+            now (float): Текущее время (time.monotonic()).
+
+        """
+        self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+
+    def delay(self, now: float) -> float:
+        """
+        Получает время до появления токена.
+
+        Параметры:
+            now (float): Текущее время (time.monotonic()).
+
+        Возвращает:
+            float: Время в секундах (0 - токен есть).
+
+        """
+        if now < self.blocked_until:
+            return self.blocked_until - now
+        self.__refill(now)
+        return 0.0 if self.tokens >= 1 else (1 - self.tokens) / self.rate
+
+    def take(self, now: float) -> None:
+        """
+        Забирает токен.
+
+        Параметры:
+            now (float): Текущее время (time.monotonic()).
+
+        Возвращает:
+            None
+
+        """
+        self.__refill(now)
+        self.tokens -= 1
+
+    def block(self, until: float) -> None:
+        """
+        Запрещает выдачу токенов до указанного времени.
+
+        Параметры:
+            until (float): Время (time.monotonic()).
+
+        Возвращает:
+            None
+
+        """
+        self.blocked_until = max(self.blocked_until, until)
+        self.tokens = 0.0
+
+    def idle(self, now: float) -> bool:
+        """
+        Проверяет, что ведро полное и не заблокировано (его можно удалить без изменения поведения).
+
+        Параметры:
+            now (float): Текущее время (time.monotonic()).
+
+        Возвращает:
+            bool: True, если ведро полное и не заблокировано.
+
+        """
+        self.__refill(now)
+        return now >= self.blocked_until and self.tokens >= self.capacity
+
+
+class OutboundRequest:
+    """
+    Класс запроса, ожидающего разрешения планировщика.
+
+    Параметры:
+        chat_id (int | None): Идентификатор чата (None - без ограничений чата).
+        priority (int): Приоритет.
+        future (asyncio.Future): Разрешение на выполнение запроса.
+        queued (float): Время постановки в очередь (time.monotonic()).
+
+    """
+
+    __slots__ = ("chat_id", "priority", "future", "queued")
+
+    def __init__(self, chat_id: int | None, priority: int):
+        """
+        Инициализация объекта OutboundRequest.
+
+        Параметры:
+            chat_id (int | None): Идентификатор чата (None - без ограничений чата).
+            priority (int): Приоритет.
+
+        """
+        self.chat_id = chat_id
+        self.priority = priority
+        self.future: asyncio.Future = asyncio.get_running_loop().create_future()
+        self.queued = monotonic()
+
+
+class OutboundScheduler:
+    """
+    Класс планировщика исходящих запросов к Telegram API.
+
+    Параметры:
+        __lanes (tuple[deque[OutboundRequest], ...]): Очереди запросов по приоритетам.
+        __global (TokenBucket): Общее ведро токенов.
+        __chats (dict[int, TokenBucket]): Ведра токенов чатов.
+        __active (set[int]): Чаты, в которых выполняется запрос.
+        __wakeup (asyncio.Event): Событие для пробуждения задачи выдачи разрешений.
+        __worker (asyncio.Task | None): Задача выдачи разрешений (None, если очереди пусты).
+        chat_rate (float): Количество запросов в чат в секунду.
+        chat_burst (int): Количество запросов в чат, которое можно выполнить без ожидания.
+        flood_retries (int): Количество повторов запроса после FloodWait.
+        max_chats (int): Количество ведер чатов, после которого удаляются полные ведра.
+        wait (dict[str, Histogram]): Гистограммы времени ожидания в очереди по названиям приоритетов.
+        flood_waits (int): Количество полученных FloodWait.
+
+    Methods:
+        send(chat_id: int | None, call: Callable[[], Awaitable], priority: int = PRIORITY_INTERACTIVE) -> Any: Выполняет
+            запрос после разрешения планировщика.
+        queue_depth() -> int: Получает количество запросов, ожидающих разрешения.
+        __acquire(chat_id: int | None, priority: int) -> None: Приватный метод для ожидания разрешения.
+        __release(chat_id: int | None) -> None: Приватный метод для завершения запроса в чат.
+        __run() -> None: Приватный метод выдачи разрешений.
+        __next_request(now: float) -> tuple[OutboundRequest | None, float | None]: Приватный метод для выбора
+            следующего запроса.
+
+    """
+
+    def __init__(self, global_rate: float = 30.0, chat_rate: float = 1.0, chat_burst: int = 3,
+                 flood_retries: int = 3, max_chats: int = 10000, metrics: HandlerMetrics | None = None):
+        """
+        Инициализация объекта OutboundScheduler.
+
+        Параметры:
+            global_rate (float): Количество запросов в секунду для всех чатов (по умолчанию 30).
+            chat_rate (float): Количество запросов в чат в секунду (по умолчанию 1).
+            chat_burst (int): Количество запросов в чат без ожидания (по умолчанию 3).
+            flood_retries (int): Количество повторов запроса после FloodWait (по умолчанию 3).
+            max_chats (int): Количество ведер чатов, после которого удаляются полные ведра (по умолчанию 10000).
+            metrics (HandlerMetrics | None): Сбор метрик (по умолчанию None - метрики выключены).
+
+        """
+        self.__lanes: tuple[deque[OutboundRequest], ...] = tuple(deque() for _ in PRIORITIES)
+        # Общее ведро без запаса: запросы всех чатов равномерно распределяются по времени
+        self.__global = TokenBucket(rate=global_rate, capacity=1)
+        self.__chats: dict[int, TokenBucket] = dict()
+        self.__active: set[int] = set()
+        self.__wakeup = asyncio.Event()
+        self.__worker: asyncio.Task | None = None
+        self.chat_rate = chat_rate
+        self.chat_burst = chat_burst
+        self.flood_retries = flood_retries
+        self.max_chats = max_chats
+        self.wait: dict[str, Histogram] = {name: Histogram() for name in PRIORITIES}
+        self.flood_waits = 0
+        if metrics is not None:
+            metrics.watch_outbound(queue_depth=self.queue_depth, wait=self.wait, flood_waits=lambda: self.flood_waits)
+
+    async def send(
+            self, chat_id: int | None, call: Callable[[], Awaitable], priority: int = PRIORITY_INTERACTIVE) -> Any:
+        """
+        Выполняет запрос после разрешения планировщика. После FloodWait чат (для запроса без чата - общее ведро)
+        блокируется на указанное время, и запрос ставится в очередь заново.
+
+        Параметры:
+            chat_id (int | None): Идентификатор чата (None - запрос ограничивается только общим ведром).
+            call (Callable[[], Awaitable]): Функция, создающая запрос, например
+                lambda: client_bot.send_message(chat_id=chat_id, text=text).
+            priority (int): Приоритет (по умолчанию PRIORITY_INTERACTIVE).
+
+        Возвращает:
+            Any: Результат запроса.
+
+        """
+        retries = 0
+        while True:
+            await self.__acquire(chat_id=chat_id, priority=priority)
+            try:
+                return await call()
+            except FloodWait as error:
+                self.flood_waits += 1
+                if retries >= self.flood_retries:
+                    raise
+                retries += 1
+                logger.warning("FloodWait %s s for chat %s, retry %s of %s",
+                               error.value, chat_id, retries, self.flood_retries)
+                bucket = self.__global if chat_id is None else self.__chats[chat_id]
+                bucket.block(until=monotonic() + error.value)
+            finally:
+                self.__release(chat_id=chat_id)
+
+    def queue_depth(self) -> int:
+        """
+        Получает количество запросов, ожидающих разрешения.
+
+        Возвращает:
+            int: Количество запросов.
+
+        """
+        return sum(len(lane) for lane in self.__lanes)
+
+    async def __acquire(self, chat_id: int | None, priority: int) -> None:
+        """
+        Приватный метод для ожидания разрешения планировщика. Если ожидание отменено после выдачи разрешения,
+        запрос в чат завершается.
+
+        Параметры:
+            chat_id (int | None): Идентификатор чата.
+            priority (int): Приоритет.
+
+        """
+        request = OutboundRequest(chat_id=chat_id, priority=priority)
+        self.__lanes[priority].append(request)
+        self.__wakeup.set()
+        if self.__worker is None:
+            self.__worker = asyncio.create_task(self.__run())
+        try:
+            await request.future
+        except asyncio.CancelledError:
+            if request.future.done() and not request.future.cancelled():
+                self.__release(chat_id=chat_id)
+            raise
+
+    def __release(self, chat_id: int | None) -> None:
+        """
+        Приватный метод для завершения запроса в чат: следующий запрос в этот чат может получить разрешение.
+
+        Параметры:
+            chat_id (int | None): Идентификатор чата.
+
+        """
+        self.__active.discard(chat_id)
+        self.__wakeup.set()
+
+    async def __run(self) -> None:
+        """
+        Приватный метод выдачи разрешений: пока есть запросы в очередях, выдает разрешение первому запросу
+        с наивысшим приоритетом, для которого есть токены, и записывает время его ожидания.
+
+        """
+        try:
+            while self.queue_depth():
+                self.__wakeup.clear()
+                now = monotonic()
+                request, delay = self.__next_request(now=now)
+                if request is None:
+                    try:
+                        await asyncio.wait_for(self.__wakeup.wait(), timeout=delay)
+                    except TimeoutError:
+                        pass
+                    continue
+                delay = self.__global.delay(now)
+                if delay:
+                    await asyncio.sleep(delay)
+                    continue
+                self.__lanes[request.priority].remove(request)
+                self.__global.take(now)
+                if request.chat_id is not None:
+                    self.__chats[request.chat_id].take(now)
+                    self.__active.add(request.chat_id)
+                self.wait[PRIORITIES[request.priority]].observe(now - request.queued)
+                request.future.set_result(None)
+                if len(self.__chats) > self.max_chats:
+                    for chat_id in [chat_id for chat_id, bucket in self.__chats.items()
+                                    if chat_id not in self.__active and bucket.idle(now)]:
+                        del self.__chats[chat_id]
+        finally:
+            self.__worker = None
+
+    def __next_request(self, now: float) -> tuple[OutboundRequest | None, float | None]:
+        """
+        Приватный метод для выбора следующего запроса: первого по порядку запроса с наивысшим приоритетом, чат
+        которого не занят и имеет токен. Отмененные запросы удаляются из очередей.
+
+        Параметры:
+            now (float): Текущее время (time.monotonic()).
+
+        Возвращает:
+            tuple[OutboundRequest | None, float | None]: Запрос (None, если ни один запрос нельзя выполнить сейчас)
+                и время до появления токена у ближайшего чата (None - ожидать завершения запросов).
+
+        """
+        delay = None
+        for lane in self.__lanes:
+            for request in [request for request in lane if request.future.cancelled()]:
+                lane.remove(request)
+            for request in lane:
+                if request.chat_id is None:
+                    return request, None
+                if request.chat_id in self.__active:
+                    continue
+                bucket = self.__chats.get(request.chat_id)
+                if bucket is None:
+                    bucket = self.__chats[request.chat_id] = TokenBucket(rate=self.chat_rate, capacity=self.chat_burst)
+                chat_delay = bucket.delay(now)
+                if not chat_delay:
+                    return request, None
+                delay = chat_delay if delay is None else min(delay, chat_delay)
+        return None, delay
+
+
+_outbound_scheduler = OutboundScheduler(
+    global_rate=config.OUTBOUND_GLOBAL_RATE,
+    chat_rate=config.OUTBOUND_CHAT_RATE,
+    chat_burst=config.OUTBOUND_CHAT_BURST,
+    flood_retries=config.OUTBOUND_FLOOD_RETRIES,
+    metrics=get_handler_metrics()
+)
+
+
+def get_outbound_scheduler() -> OutboundScheduler:
+    """
+    Получение объекта OutboundScheduler.
+
+    Возвращает:
+        OutboundScheduler: Объект OutboundScheduler.
+
+    """
+    return _outbound_scheduler
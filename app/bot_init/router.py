@@ -0,0 +1,416 @@
+"""
+Модуль, содержащий класс CallbackRouter - маршрутизатор данных коллбэк-запросов на основе префиксного дерева.
+
+Маршрут - шаблон данных коллбэк-запроса из сегментов, разделенных ":", например
+"tasks:edit_task:id_task:{id_task}:{owner_telegram_id}". Сегменты в фигурных скобках - параметры, которые
+приводятся к типам полей CallbackParams. Данные коллбэк-запроса разбираются один раз: результат сохраняется
+в атрибуте callback_params обновления и используется фильтрами всех маршрутов и обработчиком.
+
+Кнопки бота получают данные в компактном формате (CallbackRouter.pack): "~" и base64url (без "=") от байтов
+[версия формата][код маршрута][параметры маршрута в порядке шаблона]. Целые параметры записываются как varint
+от zigzag(значение) + 1, строковые - как varint от длины + 1 и байты UTF-8, значение None - как 0. Коды маршрутов
+не должны меняться: новые маршруты добавляются в конец реестра со следующим свободным кодом. Данные в текстовом
+формате шаблона (кнопки, отправленные до появления компактного формата) по-прежнему разбираются.
+
+Параметры:
+    ROUTES (dict[str, int]): Реестр маршрутов и их кодов.
+    CALLBACK_VERSION (int): Текущая версия компактного формата.
+    CALLBACK_MARKER (str): Первый символ данных в компактном формате.
+    CALLBACK_MAX_LENGTH (int): Максимальная длина данных коллбэк-запроса в байтах, которую принимает Telegram.
+    _callback_router (CallbackRouter): Статический объект CallbackRouter.
+
+"""
+
+import base64
+import binascii
+
+import msgspec
+from pyrogram import filters, types
+from pyrogram.filters import Filter
+
+ROUTES: dict[str, int] = {
+    "main_menu:{owner_telegram_id}": 1,
+    "delete_account:{owner_telegram_id}": 2,
+    "menu_settings:{owner_telegram_id}": 3,
+    "settings:update_username:{owner_telegram_id}": 4,
+    "settings:update_login:{owner_telegram_id}": 5,
+    "settings:update_password:{owner_telegram_id}": 6,
+    "menu_tasks:{owner_telegram_id}": 7,
+    "tasks:create_task:{owner_telegram_id}": 8,
+    "tasks:view_tasks:{owner_telegram_id}": 9,
+    "tasks:view_current_tasks:{owner_telegram_id}": 10,
+    "tasks:view_completed_tasks:{owner_telegram_id}": 11,
+    "tasks:view_overdue_tasks:{owner_telegram_id}": 12,
+    "tasks:view_all_tasks:{owner_telegram_id}": 13,
+    "tasks:edit_tasks:{owner_telegram_id}": 14,
+    "tasks:edit_task:button:{page}": 15,
+    "tasks:edit_task:id_task:{id_task}:{owner_telegram_id}": 16,
+    "tasks:menu_edit:{owner_telegram_id}": 17,
+    "tasks:edit_task:view_task:{owner_telegram_id}": 18,
+    "tasks:edit_task:edit_status:{owner_telegram_id}": 19,
+    "tasks:edit_task:edit_name:{owner_telegram_id}": 20,
+    "tasks:edit_task:edit_desc:{owner_telegram_id}": 21,
+    "tasks:edit_task:edit_start:{owner_telegram_id}": 22,
+    "tasks:edit_task:edit_end:{owner_telegram_id}": 23,
+    "tasks:edit_task:delete:{owner_telegram_id}": 24,
+    "tasks:edit_task:confirm_delete:{owner_telegram_id}": 25,
+    "tasks:view_page:{view}:{page}:{end_time}:{id_task}:{owner_telegram_id}": 26,
+}
+CALLBACK_VERSION: int = 1
+CALLBACK_MARKER: str = "~"
+CALLBACK_MAX_LENGTH: int = 64
+
+
+class CallbackParams(msgspec.Struct):
+    """
+    Разобранные данные коллбэк-запроса.
+
+    Параметры:
+        route (str | None): Шаблон маршрута, которому соответствуют данные (None - маршрут не найден).
+        owner_telegram_id (int | None): Идентификатор владельца аккаунта.
+        id_task (int | None): Идентификатор задачи.
+        page (str | None): Кнопка пагинации списка задач (previous, next, start или end).
+        view (str | None): Тип просматриваемых задач (current, overdue, completed или all).
+        end_time (int | None): Время окончания задачи-курсора пагинации в микросекундах от эпохи.
+
+    """
+
+    route: str | None = None
+    owner_telegram_id: int | None = None
+    id_task: int | None = None
+    page: str | None = None
+    view: str | None = None
+    end_time: int | None = None
+
+
+class RouteNode:
+    """
+    Класс узла префиксного дерева маршрутов.
+
+    Параметры:
+        children (dict[str, RouteNode]): Дочерние узлы по значению сегмента.
+        param (tuple[str, RouteNode] | None): Название параметра и дочерний узел для сегмента-параметра.
+        route (str | None): Шаблон маршрута, который заканчивается в этом узле.
+
+    """
+
+    __slots__ = ("children", "param", "route")
+
+    def __init__(self):
+        """
+        Инициализация объекта RouteNode.
+
+        """
+        self.children: dict[str, RouteNode] = dict()
+        self.param: tuple[str, RouteNode] | None = None
+        self.route: str | None = None
+
+
+class CallbackRouter:
+    """
+    Класс маршрутизатора данных коллбэк-запросов на основе префиксного дерева.
+
+    Параметры:
+        __param_types (dict[str, type]): Типы параметров маршрутов.
+        __root (RouteNode): Корень префиксного дерева маршрутов.
+        __routes (dict[int, str]): Шаблоны маршрутов по кодам.
+        __route_params (dict[str, tuple[str, ...]]): Параметры каждого маршрута в порядке шаблона.
+
+    Methods:
+        route(template: str) -> Filter: Регистрирует маршрут и создает фильтр Pyrogram для него.
+        pack(template: str, **params) -> str: Кодирует данные коллбэк-запроса в компактном формате.
+        parse(data: str) -> CallbackParams: Разбирает данные коллбэк-запроса.
+        params(message: types.Message | types.CallbackQuery) -> CallbackParams: Получает разобранные данные
+            коллбэк-запроса, разбирая их при первом обращении.
+        prefix(message: types.CallbackQuery) -> str | None: Получает первый сегмент маршрута коллбэк-запроса.
+        __unpack(data: str) -> CallbackParams: Приватный метод для разбора данных в компактном формате.
+        __match(node: RouteNode, segments: list[str], index: int, values: dict[str, str]) -> str | None:
+            Приватный метод для поиска маршрута в префиксном дереве.
+        __write_varint(buffer: bytearray, value: int) -> None: Приватный метод для записи числа в формате varint.
+        __read_varint(raw: bytes, offset: int) -> tuple[int, int]: Приватный метод для чтения числа
+            в формате varint.
+
+    """
+
+    __param_types: dict[str, type] = {
+        "owner_telegram_id": int,
+        "id_task": int,
+        "page": str,
+        "view": str,
+        "end_time": int,
+    }
+
+    def __init__(self, routes: dict[str, int]):
+        """
+        Инициализация объекта CallbackRouter.
+
+        Параметры:
+            routes (dict[str, int]): Реестр маршрутов и их кодов.
+
+        """
+        if len(set(routes.values())) != len(routes) or not all(0 < code < 256 for code in routes.values()):
+            raise ValueError("Callback route codes must be unique and fit in one byte")
+        self.__root = RouteNode()
+        self.__routes: dict[int, str] = {code: template for template, code in routes.items()}
+        self.__route_params: dict[str, tuple[str, ...]] = {
+            template: tuple(segment[1:-1] for segment in template.split(":") if segment.startswith("{"))
+            for template in routes}
+
+    def route(self, template: str) -> Filter:
+        """
+        Регистрирует маршрут и создает фильтр Pyrogram, пропускающий коллбэк-запросы, данные которых
+        соответствуют шаблону маршрута.
+
+        Параметры:
+            template (str): Шаблон маршрута из реестра ROUTES, например
+                "tasks:edit_task:edit_name:{owner_telegram_id}". Необъявленный маршрут, неизвестный параметр
+                или два разных параметра на одной позиции вызывают ValueError при создании фильтра,
+                то есть при запуске бота.
+
+        Возвращает:
+            Filter: Фильтр Pyrogram.
+
+        """
+        if template not in self.__route_params:
+            raise ValueError(f"Unknown callback route: {template!r}")
+        segments = template.split(":")
+        node = self.__root
+        for segment in segments:
+            if segment.startswith("{") and segment.endswith("}"):
+                name = segment[1:-1]
+                if name not in self.__param_types:
+                    raise ValueError(f"Unknown callback parameter: {name!r}")
+                if node.param is None:
+                    node.param = (name, RouteNode())
+                elif node.param[0] != name:
+                    raise ValueError(f"Callback parameter {name!r} conflicts with {node.param[0]!r}")
+                node = node.param[1]
+            else:
+                node = node.children.setdefault(segment, RouteNode())
+        node.route = template
+
+        async def __func(flt: filters, __, query: types.CallbackQuery) -> bool:
+            return self.params(message=query).route == flt.template
+
+        callback_prefix = segments[0] if not segments[0].startswith("{") else None
+        return filters.create(__func, template=template, callback_prefix=callback_prefix)
+
+    def pack(self, template: str, **params) -> str:
+        """
+        Кодирует данные коллбэк-запроса в компактном формате.
+
+        Параметры:
+            template (str): Шаблон маршрута из реестра ROUTES.
+            **params: Значения параметров маршрута (отсутствующий параметр кодируется как None).
+
+        Возвращает:
+            str: Данные коллбэк-запроса. Если данные длиннее CALLBACK_MAX_LENGTH байт, вызывается ValueError,
+                так как Telegram не принимает такую кнопку.
+
+        """
+        names = self.__route_params.get(template)
+        if names is None:
+            raise ValueError(f"Unknown callback route: {template!r}")
+        if not params.keys() <= set(names):
+            raise ValueError(f"Unknown parameters for callback route {template!r}: {params.keys() - set(names)}")
+        buffer = bytearray((CALLBACK_VERSION, ROUTES[template]))
+        for name in names:
+            value = params.get(name)
+            if value is None:
+                buffer.append(0)
+            elif self.__param_types[name] is int:
+                value = int(value)
+                self.__write_varint(buffer=buffer, value=(value << 1 if value >= 0 else (~value << 1) | 1) + 1)
+            else:
+                raw = str(value).encode()
+                self.__write_varint(buffer=buffer, value=len(raw) + 1)
+                buffer += raw
+        data = CALLBACK_MARKER + base64.urlsafe_b64encode(buffer).rstrip(b"=").decode()
+        if len(data) > CALLBACK_MAX_LENGTH:
+            raise ValueError(f"Callback data for route {template!r} is longer than {CALLBACK_MAX_LENGTH} bytes")
+        return data
+
+    def parse(self, data: str) -> CallbackParams:
+        """
+        Разбирает данные коллбэк-запроса в компактном или текстовом формате: находит маршрут и приводит
+        параметры к их типам. Значение "None" параметра в текстовом формате приводится к None. Если маршрут
+        не найден, версия формата неизвестна или параметр не приводится к типу, возвращаются параметры
+        без маршрута.
+
+        Параметры:
+            data (str): Данные коллбэк-запроса.
+
+        Возвращает:
+            CallbackParams: Разобранные данные коллбэк-запроса.
+
+        """
+        if data.startswith(CALLBACK_MARKER):
+            return self.__unpack(data=data)
+        values: dict[str, str] = dict()
+        route = self.__match(self.__root, data.split(":"), 0, values)
+        if route is None:
+            return CallbackParams()
+        params = dict()
+        try:
+            for name, value in values.items():
+                params[name] = None if value == "None" else self.__param_types[name](value)
+        except ValueError:
+            return CallbackParams()
+        return CallbackParams(route=route, **params)
+
+    def params(self, message: types.Message | types.CallbackQuery) -> CallbackParams:
+        """
+        Получает разобранные данные коллбэк-запроса. Данные разбираются при первом обращении и сохраняются
+        в атрибуте callback_params обновления. Для сообщений возвращаются параметры без маршрута.
+
+        Параметры:
+            message (types.Message | types.CallbackQuery): Обновление Telegram.
+
+        Возвращает:
+            CallbackParams: Разобранные данные коллбэк-запроса.
+
+        """
+        if not isinstance(message, types.CallbackQuery) or not isinstance(message.data, str):
+            return CallbackParams()
+        params = getattr(message, "callback_params", None)
+        if params is None:
+            params = self.parse(data=message.data)
+            message.callback_params = params
+        return params
+
+    def prefix(self, message: types.CallbackQuery) -> str | None:
+        """
+        Получает первый сегмент маршрута коллбэк-запроса, по которому Dispatcher выбирает обработчики.
+        Для данных, не соответствующих маршруту, возвращается первый сегмент текстовых данных.
+
+        Параметры:
+            message (types.CallbackQuery): Коллбэк-запрос.
+
+        Возвращает:
+            str | None: Первый сегмент маршрута или None.
+
+        """
+        route = self.params(message=message).route
+        if route is not None:
+            return route.split(":", 1)[0]
+        if isinstance(message.data, str) and ":" in message.data:
+            return message.data.split(":", 1)[0]
+        return None
+
+    def __unpack(self, data: str) -> CallbackParams:
+        """
+        Приватный метод для разбора данных коллбэк-запроса в компактном формате. Каждая версия формата
+        разбирается своим способом, поэтому кнопки, отправленные в предыдущих версиях, остаются рабочими.
+
+        Параметры:
+            data (str): Данные коллбэк-запроса.
+
+        Возвращает:
+            CallbackParams: Разобранные данные коллбэк-запроса.
+
+        """
+        payload = data[len(CALLBACK_MARKER):]
+        try:
+            raw = base64.urlsafe_b64decode(payload + "=" * (-len(payload) % 4))
+            if len(raw) < 2 or raw[0] != CALLBACK_VERSION or raw[1] not in self.__routes:
+                return CallbackParams()
+            route = self.__routes[raw[1]]
+            params = dict()
+            offset = 2
+            for name in self.__route_params[route]:
+                value, offset = self.__read_varint(raw=raw, offset=offset)
+                if not value:
+                    params[name] = None
+                elif self.__param_types[name] is int:
+                    value -= 1
+                    params[name] = value >> 1 if not value & 1 else ~(value >> 1)
+                else:
+                    params[name] = raw[offset:offset + value - 1].decode()
+                    offset += value - 1
+            if offset != len(raw):
+                return CallbackParams()
+        except (binascii.Error, IndexError, UnicodeDecodeError, ValueError):
+            return CallbackParams()
+        return CallbackParams(route=route, **params)
+
+    def __match(self, node: RouteNode, segments: list[str], index: int, values: dict[str, str]) -> str | None:
+        """
+        Приватный метод для поиска маршрута в префиксном дереве. Сегмент сначала сравнивается с постоянными
+        сегментами маршрутов, затем считается значением параметра.
+
+        Параметры:
+            node (RouteNode): Текущий узел префиксного дерева.
+            segments (list[str]): Сегменты данных коллбэк-запроса.
+            index (int): Индекс текущего сегмента.
+            values (dict[str, str]): Найденные значения параметров.
+
+        Возвращает:
+            str | None: Шаблон найденного маршрута или None.
+
+        """
+        if index == len(segments):
+            return node.route
+        child = node.children.get(segments[index])
+        if child is not None:
+            route = self.__match(child, segments, index + 1, values)
+            if route is not None:
+                return route
+        if node.param is not None:
+            name, child = node.param
+            values[name] = segments[index]
+            route = self.__match(child, segments, index + 1, values)
+            if route is not None:
+                return route
+            del values[name]
+        return None
+
+    @staticmethod
+    def __write_varint(buffer: bytearray, value: int) -> None:
+        """
+        Приватный метод для записи неотрицательного числа в формате varint (по 7 бит в байте, младшие первыми).
+
+        Параметры:
+            buffer (bytearray): Буфер, в который записывается число.
+            value (int): Неотрицательное число.
+
+        """
+        while value > 0x7F:
+            buffer.append(value & 0x7F | 0x80)
+            value >>= 7
+        buffer.append(value)
+
+    @staticmethod
+    def __read_varint(raw: bytes, offset: int) -> tuple[int, int]:
+        """
+        Приватный метод для чтения неотрицательного числа в формате varint.
+
+        Параметры:
+            raw (bytes): Данные.
+            offset (int): Позиция начала числа.
+
+        Возвращает:
+            tuple[int, int]: Число и позиция после него.
+
+        """
+        value = shift = 0
+        while True:
+            byte = raw[offset]
+            offset += 1
+            value |= (byte & 0x7F) << shift
+            if not byte & 0x80:
+                return value, offset
+            shift += 7
+
+
+_callback_router: CallbackRouter = CallbackRouter(routes=ROUTES)
+
+
+def get_callback_router() -> CallbackRouter:
+    """
+    Получение объекта CallbackRouter.
+
+    Возвращает:
+        CallbackRouter: Объект CallbackRouter.
+
+    """
+    return _callback_router
@@ -18,3 +18,69 @@ API_HASH = getenv('API_HASH', '0123456789abcdef0123456789abcdef')
 API_ID = int(getenv('API_ID', '12345678'))
 
 CLIENT_SESSION_PATH = getenv('CLIENT_SESSION_PATH', './app/bot_init')
+
+FSM_WRITE_BEHIND = getenv('FSM_WRITE_BEHIND', 'false').lower() == 'true'
+
+FSM_FLUSH_INTERVAL = float(getenv('FSM_FLUSH_INTERVAL', '1.0'))
+
+FSM_FLUSH_MAX_DIRTY = int(getenv('FSM_FLUSH_MAX_DIRTY', '500'))
+
+FSM_CACHE_MAX_SIZE = int(getenv('FSM_CACHE_MAX_SIZE', '10000'))
+
+FSM_CACHE_TTL = float(getenv('FSM_CACHE_TTL', '3600'))
+
+FSM_STORAGE = getenv('FSM_STORAGE', 'postgres')
+
+FSM_SQLITE_PATH = getenv('FSM_SQLITE_PATH', './fsm_context.sqlite3')
+
+FSM_REDIS_URL = getenv('FSM_REDIS_URL', 'redis://localhost:6379/0')
+
+DISPATCHER_MAX_CONCURRENCY = int(getenv('DISPATCHER_MAX_CONCURRENCY', '16'))
+
+DISPATCHER_QUERIES_WARNING = int(getenv('DISPATCHER_QUERIES_WARNING', '10'))
+
+DISPATCHER_MAX_QUEUE = int(getenv('DISPATCHER_MAX_QUEUE', '1000'))
+
+DISPATCHER_MAX_USER_QUEUE = int(getenv('DISPATCHER_MAX_USER_QUEUE', '10'))
+
+DISPATCHER_DEADLINE = float(getenv('DISPATCHER_DEADLINE', '30'))
+
+DISPATCHER_STOP_TIMEOUT = float(getenv('DISPATCHER_STOP_TIMEOUT', '30'))
+
+METRICS_ENABLED = getenv('METRICS_ENABLED', 'false').lower() == 'true'
+
+METRICS_HOST = getenv('METRICS_HOST', '127.0.0.1')
+
+METRICS_PORT = int(getenv('METRICS_PORT', '9100'))
+
+METRICS_LOG_INTERVAL = float(getenv('METRICS_LOG_INTERVAL', '300'))
+
+FSM_SWEEP_INTERVAL = float(getenv('FSM_SWEEP_INTERVAL', '600'))
+
+FSM_SWEEP_IDLE = float(getenv('FSM_SWEEP_IDLE', '2592000'))
+
+FSM_SWEEP_BATCH_SIZE = int(getenv('FSM_SWEEP_BATCH_SIZE', '1000'))
+
+FSM_SNAPSHOT_PATH = getenv('FSM_SNAPSHOT_PATH', './fsm_context.snapshot')
+
+OUTBOUND_GLOBAL_RATE = float(getenv('OUTBOUND_GLOBAL_RATE', '30'))
+
+OUTBOUND_CHAT_RATE = float(getenv('OUTBOUND_CHAT_RATE', '1'))
+
+OUTBOUND_CHAT_BURST = int(getenv('OUTBOUND_CHAT_BURST', '3'))
+
+OUTBOUND_FLOOD_RETRIES = int(getenv('OUTBOUND_FLOOD_RETRIES', '3'))
+
+UI_EDIT_IN_PLACE = getenv('UI_EDIT_IN_PLACE', 'true').lower() == 'true'
+
+FANOUT_CONCURRENCY = int(getenv('FANOUT_CONCURRENCY', '32'))
+
+LEDGER_CAPACITY = int(getenv('LEDGER_CAPACITY', '100'))
+
+LEDGER_CACHE_MAX_SIZE = int(getenv('LEDGER_CACHE_MAX_SIZE', '10000'))
+
+LEDGER_FLUSH_INTERVAL = float(getenv('LEDGER_FLUSH_INTERVAL', '1.0'))
+
+SCREEN_CACHE_MAX_SIZE = int(getenv('SCREEN_CACHE_MAX_SIZE', '4096'))
+
+TASKS_PAGE_SIZE = int(getenv('TASKS_PAGE_SIZE', '10'))
@@ -8,15 +8,17 @@
     - engine: SQLAlchemy engine, используемый для взаимодействия с базой данных.
 
 Действия:
-    - Скрипт использует SQL-запросы для создания таблиц users, fsm_context и user_tasks.
+    - Скрипт использует SQL-запросы для создания таблиц users, fsm_context, user_tasks и message_ledger.
     - При создании таблицы user_tasks, заданы внешние ключи и каскадное удаление, связывающее ее с таблицей users.
     - Если таблица в базе данных уже создана, данное действие в этом файле пропускается
 """
 
-from sqlalchemy import text
+from sqlalchemy import String, text
+from sqlalchemy.dialects.postgresql import JSONB
 from sqlalchemy.ext.automap import automap_base
 
 from app.db.db_config import engine
+from app.fsm_context.states import STATES
 
 Base = automap_base()
 Base.prepare(engine, reflect=True)
@@ -60,18 +62,47 @@ with engine.connect() as con:
     ############################################################################################
     #                                Создание таблицы fsm_context                              #
     #   telegram_id: id телеграмма пользователя (не обязательно зарегистрированного в системе) #
-    #   state: данное состояние пользователя в боте                                            #
-    #   data: сохраненные временные данные пользователя в fsm. имеет тип данных dict           #
+    #   state: код данного состояния пользователя в боте из app/fsm_context/states.py          #
+    #   data: сохраненные временные данные пользователя в fsm. имеет тип данных dict (JSONB)   #
+    #   last_touched: время последнего изменения, по нему удаляются неактивные контексты       #
     ############################################################################################
     if "fsm_context" not in table_names:
         con.execute(
             text(
                 'CREATE TABLE fsm_context (\
                 telegram_id BIGINT NOT NULL PRIMARY KEY, \
-                state VARCHAR DEFAULT NULL, \
-                data JSON DEFAULT \'{}\');'
+                state SMALLINT NOT NULL DEFAULT 0, \
+                data JSONB DEFAULT \'{}\', \
+                last_touched TIMESTAMPTZ NOT NULL DEFAULT CURRENT_TIMESTAMP);'
             )
         )
+    elif not isinstance(Base.metadata.tables["fsm_context"].columns["data"].type, JSONB):
+        # Перевод ранее созданной колонки data из JSON в JSONB для частичного обновления ключей
+        con.execute(text('ALTER TABLE fsm_context ALTER COLUMN data TYPE JSONB USING data::jsonb;'))
+        con.execute(text('ALTER TABLE fsm_context ALTER COLUMN data SET DEFAULT \'{}\';'))
+    if "fsm_context" in table_names and \
+            isinstance(Base.metadata.tables["fsm_context"].columns["state"].type, String):
+        # Перевод ранее сохраненных строковых состояний в коды из реестра состояний
+        con.execute(text('ALTER TABLE fsm_context ALTER COLUMN state DROP DEFAULT;'))
+        con.execute(
+            text(
+                'ALTER TABLE fsm_context ALTER COLUMN state TYPE SMALLINT USING (CASE state ' +
+                ' '.join(f"WHEN '{state}' THEN {code}" for state, code in STATES.items()) +
+                ' ELSE 0 END);'
+            )
+        )
+        con.execute(text('ALTER TABLE fsm_context ALTER COLUMN state SET DEFAULT 0, ALTER COLUMN state SET NOT NULL;'))
+    con.execute(
+        text(
+            'ALTER TABLE fsm_context ADD COLUMN IF NOT EXISTS \
+            last_touched TIMESTAMPTZ NOT NULL DEFAULT CURRENT_TIMESTAMP;'
+        )
+    )
+    con.execute(
+        text(
+            'CREATE INDEX IF NOT EXISTS fsm_context_last_touched_idx ON fsm_context (last_touched);'
+        )
+    )
     ######################################################################################################
     #                                    Создание таблицы user_tasks                                     #
     #   task_uuid: уникальный автогенерируемый индентификатор задачи                                     #
@@ -100,5 +131,50 @@ with engine.connect() as con:
                 FOREIGN KEY (owner_telegram_id) REFERENCES users (owner_telegram_id) ON DELETE CASCADE);'
             )
         )
+    # Индекс для постраничного просмотра задач по ключу (end_time, id_task)
+    con.execute(
+        text(
+            'CREATE INDEX IF NOT EXISTS user_tasks_owner_end_time_idx \
+            ON user_tasks (owner_telegram_id, end_time, id_task);'
+        )
+    )
+
+    ###################################################################################
+    #                        Создание таблицы message_ledger                          #
+    #   telegram_id: id телеграмма пользователя                                       #
+    #   chat_id: id чата, в который отправлены сообщения                              #
+    #   message_ids: id сообщений бота, удаляемых при следующем ответе пользователю   #
+    ###################################################################################
+    if "message_ledger" not in table_names:
+        con.execute(
+            text(
+                'CREATE TABLE message_ledger (\
+                telegram_id BIGINT NOT NULL, \
+                chat_id BIGINT NOT NULL, \
+                message_ids BIGINT[] NOT NULL DEFAULT \'{}\', \
+                PRIMARY KEY (telegram_id, chat_id));'
+            )
+        )
+    # Идентификаторы удаляемых сообщений хранятся в таблице message_ledger, а не в данных FSM: ранее сохраненные
+    # в FSM идентификаторы (сообщения в личном чате пользователя) переносятся в журнал, затем удаляются из FSM
+    con.execute(
+        text(
+            'INSERT INTO message_ledger (telegram_id, chat_id, message_ids) \
+            SELECT telegram_id, telegram_id, ARRAY(\
+                SELECT element.value::BIGINT \
+                FROM jsonb_array_elements_text(data->\'list_messages_delete_ids\') AS element(value) \
+                WHERE element.value ~ \'^-?[0-9]+$\') \
+            FROM fsm_context \
+            WHERE jsonb_typeof(data->\'list_messages_delete_ids\') = \'array\' \
+            ON CONFLICT (telegram_id, chat_id) \
+            DO UPDATE SET message_ids = EXCLUDED.message_ids || message_ledger.message_ids;'
+        )
+    )
+    con.execute(
+        text(
+            'UPDATE fsm_context SET data = data - \'list_messages_delete_ids\' \
+            WHERE data ? \'list_messages_delete_ids\';'
+        )
+    )
 
     con.commit()
@@ -1,6 +1,9 @@
-from sqlalchemy import create_engine, JSON, ARRAY, Integer, MetaData
+from time import perf_counter
+
+from sqlalchemy import create_engine, event, JSON, ARRAY, Integer, MetaData
 from sqlalchemy.orm import sessionmaker, DeclarativeBase
 from app import config
+from app.bot_init.context import get_update_context
 
 
 class Base(DeclarativeBase):
@@ -54,3 +57,51 @@ class Base(DeclarativeBase):
 
 engine = create_engine(config.DATABASE_CONNECTION_STRING, pool_size=10, max_overflow=30)
 Session = sessionmaker(bind=engine)
+
+
+@event.listens_for(engine, "before_cursor_execute")
+def count_update_query(conn, *_) -> None:
+    """
+    Увеличивает счетчик запросов к базе данных в контексте обрабатываемого обновления (UpdateContext).
+    Вне обработки обновления запросы не считаются.
+
+    Возвращает:
+        None
+
+    """
+    context = get_update_context()
+    if context is not None:
+        context.queries += 1
+
+
+def start_update_query(conn, *_) -> None:
+    """
+    Запоминает время начала запроса к базе данных в контексте обрабатываемого обновления.
+    Подключается только при включенных метриках (METRICS_ENABLED).
+
+    Возвращает:
+        None
+
+    """
+    if get_update_context() is not None:
+        conn.info["query_started"] = perf_counter()
+
+
+def time_update_query(conn, *_) -> None:
+    """
+    Добавляет время выполнения запроса к времени запросов к базе данных в контексте обрабатываемого обновления.
+    Подключается только при включенных метриках (METRICS_ENABLED).
+
+    Возвращает:
+        None
+
+    """
+    context = get_update_context()
+    started = conn.info.pop("query_started", None)
+    if context is not None and started is not None:
+        context.db_time += perf_counter() - started
+
+
+if config.METRICS_ENABLED:
+    event.listen(engine, "before_cursor_execute", start_update_query)
+    event.listen(engine, "after_cursor_execute", time_update_query)
@@ -0,0 +1,175 @@
+"""
+    Модуль, содержащий класс FSMCache - ограниченный кэш FSMContext объектов с ленивой загрузкой.
+
+    Контекст пользователя загружается из хранилища при первом обращении и вытесняется из памяти,
+    если он не использовался дольше заданного времени (TTL) или если кэш превысил максимальный размер (LRU).
+
+"""
+
+from collections import OrderedDict
+from time import monotonic
+from typing import Callable
+
+from app.db.models import FSMContext
+
+
+class FSMCache:
+    """
+    Класс ограниченного кэша FSMContext объектов с ленивой загрузкой и вытеснением по LRU и TTL.
+
+    Параметры:
+        __loader (Callable[[int], FSMContext | None]): Функция загрузки FSMContext объекта из хранилища.
+        __is_pinned (Callable[[int], bool]): Функция, определяющая, что объект нельзя вытеснять
+            (например, изменения которого еще не записаны в базу данных).
+        __items (OrderedDict[int, list]): Упорядоченный по времени последнего обращения словарь
+            пар [FSMContext | None, время последнего обращения].
+        max_size (int): Максимальное количество объектов в кэше.
+        ttl (float): Время в секундах, после которого неиспользуемый объект вытесняется из кэша.
+
+    Methods:
+        get(telegram_id: int, default=None) -> FSMContext | None: Получает FSMContext объект, загружая его
+            из хранилища при отсутствии в кэше.
+        peek(telegram_id: int) -> FSMContext | None: Получает FSMContext объект, только если он уже есть в кэше.
+        is_loaded(telegram_id: int) -> bool: Проверяет, что get не будет обращаться к хранилищу.
+        pop(telegram_id: int, default=None) -> FSMContext | None: Удаляет FSMContext объект из кэша.
+        values() -> list[FSMContext]: Получает загруженные FSMContext объекты от давно использованных к недавним.
+        __evict() -> None: Приватный метод для вытеснения устаревших и лишних объектов.
+
+    """
+
+    def __init__(self, loader: Callable[[int], FSMContext | None], max_size: int = 10000, ttl: float = 3600.0,
+                 is_pinned: Callable[[int], bool] = lambda telegram_id: False):
+        """
+        Инициализация объекта FSMCache.
+
+        Параметры:
+            loader (Callable[[int], FSMContext | None]): Функция загрузки FSMContext объекта из хранилища.
+            max_size (int): Максимальное количество объектов в кэше (по умолчанию 10000).
+            ttl (float): Время простоя в секундах до вытеснения объекта (по умолчанию 3600).
+            is_pinned (Callable[[int], bool]): Функция, определяющая, что объект нельзя вытеснять.
+
+        """
+        self.max_size = max_size
+        self.ttl = ttl
+        self.__loader = loader
+        self.__is_pinned = is_pinned
+        self.__items: OrderedDict[int, list] = OrderedDict()
+
+    def get(self, telegram_id: int, default=None) -> FSMContext | None:
+        """
+        Получает FSMContext объект пользователя, загружая его из хранилища при отсутствии в кэше.
+
+        Отсутствие объекта в хранилище тоже кэшируется, чтобы новые пользователи не вызывали запрос
+        к базе данных при каждой проверке фильтров.
+
+        Параметры:
+            telegram_id (int): Идентификатор пользователя в Telegram.
+            default: Значение, возвращаемое при отсутствии объекта (по умолчанию None).
+
+        Возвращает:
+            FSMContext | None: Объект FSMContext или default, если объект не найден.
+
+        """
+        now = monotonic()
+        item = self.__items.get(telegram_id)
+        if item is not None and (now - item[1] <= self.ttl or self.__is_pinned(telegram_id)):
+            item[1] = now
+            self.__items.move_to_end(telegram_id)
+        else:
+            item = [self.__loader(telegram_id), now]
+            self.__items[telegram_id] = item
+            self.__items.move_to_end(telegram_id)
+            self.__evict()
+        return item[0] if item[0] is not None else default
+
+    def peek(self, telegram_id: int) -> FSMContext | None:
+        """
+        Получает FSMContext объект пользователя, только если он уже загружен в кэш, без обращения к хранилищу
+        и без изменения порядка вытеснения.
+
+        Параметры:
+            telegram_id (int): Идентификатор пользователя в Telegram.
+
+        Возвращает:
+            FSMContext | None: Объект FSMContext или None, если объекта нет в кэше.
+
+        """
+        item = self.__items.get(telegram_id)
+        return item[0] if item else None
+
+    def is_loaded(self, telegram_id: int) -> bool:
+        """
+        Проверяет, что FSMContext объект пользователя (или отсутствие объекта в хранилище) уже загружен в кэш
+        и не устарел, то есть get не будет обращаться к хранилищу.
+
+        Параметры:
+            telegram_id (int): Идентификатор пользователя в Telegram.
+
+        Возвращает:
+            bool: True, если объект загружен в кэш.
+
+        """
+        item = self.__items.get(telegram_id)
+        return item is not None and (monotonic() - item[1] <= self.ttl or self.__is_pinned(telegram_id))
+
+    def pop(self, telegram_id: int, default=None) -> FSMContext | None:
+        """
+        Удаляет FSMContext объект пользователя из кэша.
+
+        Параметры:
+            telegram_id (int): Идентификатор пользователя в Telegram.
+            default: Значение, возвращаемое при отсутствии объекта (по умолчанию None).
+
+        Возвращает:
+            FSMContext | None: Удаленный объект FSMContext или default.
+
+        """
+        item = self.__items.pop(telegram_id, None)
+        return item[0] if item and item[0] is not None else default
+
+    def values(self) -> list[FSMContext]:
+        """
+        Получает загруженные в кэш FSMContext объекты в порядке от давно использованных к недавно использованным,
+        без обращения к хранилищу.
+
+        Возвращает:
+            list[FSMContext]: Список объектов FSMContext.
+
+        """
+        return [item[0] for item in self.__items.values() if item[0] is not None]
+
+    def __getitem__(self, telegram_id: int) -> FSMContext:
+        fsm_context = self.get(telegram_id)
+        if fsm_context is None:
+            raise KeyError(telegram_id)
+        return fsm_context
+
+    def __setitem__(self, telegram_id: int, fsm_context: FSMContext | None) -> None:
+        self.__items[telegram_id] = [fsm_context, monotonic()]
+        self.__items.move_to_end(telegram_id)
+        self.__evict()
+
+    def __delitem__(self, telegram_id: int) -> None:
+        del self.__items[telegram_id]
+
+    def __contains__(self, telegram_id: int) -> bool:
+        return self.get(telegram_id) is not None
+
+    def __len__(self) -> int:
+        return len(self.__items)
+
+    def __evict(self) -> None:
+        """
+        Приватный метод для вытеснения объектов, не использовавшихся дольше ttl, и самых старых объектов
+        при превышении max_size. Закрепленные объекты не вытесняются.
+
+        """
+        now = monotonic()
+        for _ in range(len(self.__items)):
+            telegram_id, (_, last_access) = next(iter(self.__items.items()))
+            if len(self.__items) <= self.max_size and now - last_access <= self.ttl:
+                break
+            if self.__is_pinned(telegram_id):
+                self.__items.move_to_end(telegram_id)
+            else:
+                del self.__items[telegram_id]
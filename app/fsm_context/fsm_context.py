@@ -1,20 +1,50 @@
 """
     Модуль, содержащий класс FSM (Конечный Автомат) и функцию для инициализации экземпляра FSM.
 
-    Класс FSM предоставляет методы для работы с таблицей fsm_context в базе данных,
-    представляющей контекст конечного автомата для пользователей.
+    Класс FSM предоставляет методы для работы с контекстом конечного автомата для пользователей,
+    который хранится в одном из хранилищ модуля app.fsm_context.storage (по умолчанию таблица fsm_context в PostgreSQL).
 
     Функция fsm_context_init и глобальная переменная _fsm_context используются для инициализации
     единственного экземпляра FSM при старте приложения.
 
+    Контексты пользователей загружаются из хранилища при первом обращении и хранятся в ограниченном кэше FSMCache
+    с вытеснением по LRU и времени простоя (TTL). После перезапуска снимок контекстов загружается в фоне, и контекст
+    пользователя из снимка переносится в кэш при первом обращении вместо запроса к хранилищу.
+
+    В режиме отложенной записи (write-behind) изменения сохраняются только в памяти и сбрасываются в базу данных
+    одним многострочным запросом по таймеру или при превышении количества измененных записей. Запись выполняет
+    фоновая задача run_flusher в отдельном потоке, поэтому она не задерживает обработку обновлений.
+
+    Диспетчер обновлений заранее загружает контекст пользователя методом preload в отдельном потоке, поэтому
+    чтение контекста в фильтрах и обработчиках не выполняет запросов к базе данных в цикле событий. Методы
+    изменения контекста асинхронные: в режиме немедленной записи запись в хранилище выполняется в отдельном
+    потоке, обработчик ожидает ее завершения, а изменение применяется к контексту в памяти только после
+    успешной записи. Ошибка записи передается обработчику до того, как он ответит пользователю. Методы изменения
+    контекста не обращаются к хранилищу в цикле событий, даже если контекст не загружен заранее.
+
 """
 
-import json
+import asyncio
+import logging
+import os
+from time import monotonic
+from typing import Any, Callable, TypeVar
 
-from sqlalchemy import text
+import msgspec
 
-from app.db.db_config import Session
+from app import config
 from app.db.models import FSMContext
+from app.fsm_context.fsm_cache import FSMCache
+from app.fsm_context.schemas import FSMData, to_fsm_data
+from app.fsm_context.snapshot import load_snapshot, save_snapshot, snapshot_entry_to_fsm_context
+from app.fsm_context.states import get_states
+from app.fsm_context.storage import (BaseStorage, EXISTING_BATCH_SIZE, create_storage, merge_fsm_data, del_fsm_keys,
+                                    append_fsm_list)
+
+logger = logging.getLogger(__name__)
+
+
+Payload = TypeVar("Payload", bound=FSMData)
 
 
 class FSM:
@@ -22,118 +52,322 @@ class FSM:
     Класс для управления состояниями конечного автомата (FSM) для пользователей.
 
     Параметры:
-        __list_fsm_contexts (dict[int, FSMContext]):
-            Словарь, содержащий FSMContext объекты для каждого пользователя.
+        __storage (BaseStorage): Хранилище FSMContext объектов.
+        __list_fsm_contexts (FSMCache):
+            Кэш FSMContext объектов пользователей, загружаемых из хранилища при первом обращении.
+        __dirty_fsm_contexts (set[int]): Идентификаторы пользователей, изменения которых еще не записаны в базу
+            данных (используется только в режиме отложенной записи).
+        __flushing_fsm_contexts (set[int]): Идентификаторы пользователей, изменения которых записываются
+            в базу данных в данный момент.
+        __flush_requested (asyncio.Event | None): Событие внеочередной записи для фоновой задачи run_flusher
+            (None, если задача не запущена).
+        __writes (set[asyncio.Future]): Незавершенные записи в режиме немедленной записи.
+        __pending_writes (dict[int, int]): Количество незавершенных записей каждого пользователя.
+        __state_version (int): Счетчик изменений состояний пользователей.
+        __snapshot (dict[int, list]): Записи снимка, еще не загруженные в кэш: запись пользователя
+            преобразуется в FSMContext объект и переносится в кэш при первом обращении вместо запроса к хранилищу.
+        __snapshot_expires (float): Время (по часам monotonic), после которого неиспользованные записи снимка
+            удаляются, как объекты кэша по TTL.
+        __snapshot_skipped (set[int] | None): Пользователи, чьи контексты загружены из хранилища или изменены,
+            пока загружается снимок (None, если снимок не загружается).
+        write_behind (bool): Флаг режима отложенной записи.
+        flush_interval (float): Максимальное время в секундах, в течение которого изменения могут находиться
+            только в памяти.
+        flush_max_dirty (int): Количество измененных записей, при достижении которого выполняется запись в базу.
 
     Methods:
-        get_list_fsm_contexts(): Получает словарь FSMContext объектов для всех пользователей.
-        __update_list_fsm_contexts(): Приватный метод для обновления списка FSMContext объектов из базы данных.
-        __get_fsm_context(telegram_id: int) -> FSMContext | None: Приватный метод для получения FSMContext
-            объекта для пользователя.
-        __set_fsm_context(telegram_id: int, state: str, data: dict) -> None: Приватный метод для
-            установки нового FSMContext объекта в базе данных.
-        __update_fsm_context(telegram_id: int, state: str, data: dict) -> None: Приватный метод для
-            обновления существующего FSMContext объекта в базе данных.
+        get_list_fsm_contexts(): Получает кэш FSMContext объектов пользователей.
         __delete_fsm_context(telegram_id: int) -> None: Приватный метод для удаления FSMContext
-            объекта из базы данных.
+            объекта из хранилища.
+        __store_fsm_context(telegram_id: int, state: str | None, change: Callable | None) -> None:
+            Приватный метод для изменения FSMContext объекта только в памяти в режиме отложенной записи.
+        __change_data(telegram_id: int, change: Callable, write: Callable) -> None: Приватный метод для
+            частичного изменения дополнительных данных пользователя.
+        __apply_change(telegram_id: int, change: Callable) -> None: Приватный метод для применения записанного
+            изменения к дополнительным данным пользователя в памяти.
+        __write(telegram_id: int, write: Callable, apply: Callable) -> None: Приватный метод для записи изменения
+            в хранилище в режиме немедленной записи.
+        wait_writes() -> int: Ожидает завершения записей в режиме немедленной записи.
+        preload(telegram_id: int) -> None: Загружает FSMContext объект пользователя в кэш в отдельном потоке.
         get_state(telegram_id: int) -> str | None: Получает текущее состояние пользователя в FSM.
+        get_state_code(telegram_id: int) -> int: Получает код текущего состояния пользователя в FSM.
+        get_state_version() -> int: Получает счетчик изменений состояний пользователей.
         update_state(telegram_id: int, state: str) -> None: Обновляет состояние пользователя в FSM.
         get_data(telegram_id: int) -> dict: Получает дополнительные данные пользователя в FSM.
+        get_payload(telegram_id: int, schema: type[Payload]) -> Payload: Получает дополнительные данные
+            пользователя, приведенные к схеме сценария.
         update_data(telegram_id: int, data: dict) -> dict: Обновляет дополнительные данные пользователя в FSM.
+        transition(telegram_id: int, state: str | None = None, data: dict | FSMData | None = None,
+                   merge: bool = True) -> None:
+            Одной записью обновляет состояние и дополнительные данные пользователя в FSM.
+        set_keys(telegram_id: int, values: dict | FSMData) -> None: Устанавливает значения ключей в данных
+            пользователя.
+        del_keys(telegram_id: int, keys: list[str]) -> None: Удаляет ключи из данных пользователя.
+        append_to_list(telegram_id: int, key: str, values: list) -> None: Добавляет значения в список
+            в данных пользователя.
         clear(telegram_id: int) -> None: Очищает FSMContext объект для пользователя.
+        __begin_flush() -> list[FSMContext]: Приватный метод для получения копий FSMContext объектов
+            с отложенными изменениями перед записью.
+        __end_flush(fsm_contexts: list[FSMContext], saved: bool) -> None: Приватный метод для завершения записи
+            отложенных изменений.
+        flush() -> int: Записывает все отложенные изменения в базу данных.
+        flush_in_thread() -> int: Записывает все отложенные изменения в базу данных в отдельном потоке.
+        run_flusher() -> None: Периодически записывает отложенные изменения в базу данных.
+        sweep(idle: float, batch_size: int) -> int: Удаляет пакет FSMContext объектов, не изменявшихся дольше
+            idle секунд.
+        run_sweeper(interval: float, idle: float, batch_size: int) -> None: Периодически удаляет неактивные
+            FSMContext объекты.
+        dump_snapshot(path: str) -> int: Записывает FSMContext объекты из памяти в файл снимка.
+        restore_snapshot(path: str) -> int | None: Загружает в фоне актуальные записи FSMContext объектов
+            из файла снимка.
+        __find_stale(watermark: float, telegram_ids: list[int]) -> set[int]: Приватный метод для поиска
+            объектов снимка, измененных или удаленных в хранилище после его записи.
 
     """
 
-    def __init__(self):
+    def __init__(self, storage: BaseStorage, write_behind: bool = False, flush_interval: float = 1.0,
+                 flush_max_dirty: int = 500, cache_max_size: int = 10000, cache_ttl: float = 3600.0):
         """
         Инициализация объекта FSM.
 
-        """
-        self.__list_fsm_contexts: dict[int, FSMContext] = dict()
-        self.__update_list_fsm_contexts()
+        Параметры:
+            storage (BaseStorage): Хранилище FSMContext объектов.
+            write_behind (bool): Флаг режима отложенной записи (по умолчанию False).
+            flush_interval (float): Максимальное окно потери изменений в секундах (по умолчанию 1.0).
+            flush_max_dirty (int): Порог количества измененных записей для внеочередной записи (по умолчанию 500).
+            cache_max_size (int): Максимальное количество контекстов в памяти (по умолчанию 10000).
+            cache_ttl (float): Время простоя контекста в секундах до вытеснения из памяти (по умолчанию 3600).
 
-    def get_list_fsm_contexts(self) -> dict[int, FSMContext]:
         """
-        Получает словарь FSMContext объектов для всех пользователей.
+        self.__storage = storage
+        self.write_behind = write_behind
+        self.flush_interval = flush_interval
+        self.flush_max_dirty = flush_max_dirty
+        self.__dirty_fsm_contexts: set[int] = set()
+        self.__flushing_fsm_contexts: set[int] = set()
+        self.__flush_requested: asyncio.Event | None = None
+        self.__writes: set[asyncio.Future] = set()
+        self.__pending_writes: dict[int, int] = dict()
+        self.__state_version = 0
+        self.__snapshot: dict[int, list] = dict()
+        self.__snapshot_expires = 0.0
+        self.__snapshot_skipped: set[int] | None = None
+        self.__list_fsm_contexts: FSMCache = FSMCache(
+            loader=self.__load, max_size=cache_max_size, ttl=cache_ttl,
+            is_pinned=lambda x: x in self.__dirty_fsm_contexts or x in self.__flushing_fsm_contexts
+            or x in self.__pending_writes)
+
+    def get_list_fsm_contexts(self) -> FSMCache:
+        """
+        Получает кэш FSMContext объектов пользователей.
+
+        Метод get кэша загружает контекст из хранилища, если его еще нет в памяти.
 
         Возвращает:
-            dict[int, FSMContext]: Словарь FSMContext объектов для всех пользователей.
+            FSMCache: Кэш FSMContext объектов пользователей.
 
         """
         return self.__list_fsm_contexts
 
-    def __update_list_fsm_contexts(self) -> None:
+    def __delete_fsm_context(self, telegram_id: int) -> None:
         """
-        Приватный метод для обновления списка FSMContext объектов из базы данных.
+        Приватный метод для удаления FSMContext объекта из хранилища.
+
+        Параметры:
+            telegram_id (int): Идентификатор пользователя в Telegram.
 
         """
-        with Session() as session:
-            query = text("SELECT * FROM fsm_context")
-            fsm_context_list: list[FSMContext] = session.execute(query).all()
-        self.__list_fsm_contexts: dict[int, FSMContext] = {x.telegram_id: x for x in fsm_context_list}
+        self.__storage.delete(telegram_id=telegram_id)
+        self.__list_fsm_contexts.pop(telegram_id)
+        self.__dirty_fsm_contexts.discard(telegram_id)
 
-    @staticmethod
-    def __get_fsm_context(telegram_id: int) -> FSMContext | None:
+    async def __store_fsm_context(self, telegram_id: int, state: str | None,
+                                  change: Callable[[dict], dict] | None) -> None:
         """
-        Приватный метод для получения FSMContext объекта для пользователя.
+        Приватный метод для изменения FSMContext объекта только в памяти в режиме отложенной записи.
+        Если объекта нет в памяти, он загружается в отдельном потоке (preload).
+        При достижении flush_max_dirty измененных записей запись в базу данных поручается фоновой задаче
+        run_flusher, а если она не запущена, выполняется сразу в отдельном потоке.
 
         Параметры:
             telegram_id (int): Идентификатор пользователя в Telegram.
+            state (str | None): Новое состояние пользователя в FSM или None, чтобы оставить текущее.
+            change (Callable[[dict], dict] | None): Функция, вычисляющая новые дополнительные данные из текущих,
+                или None, чтобы оставить текущие.
 
-        Возвращает:
-            FSMContext | None: Объект FSMContext или None, если объект не найден.
+        """
+        await self.preload(telegram_id=telegram_id)
+        fsm_context = self.__list_fsm_contexts.get(telegram_id)
+        self.__dirty_fsm_contexts.add(telegram_id)
+        if not fsm_context:
+            fsm_context = FSMContext(telegram_id=telegram_id, state=str(), data=dict())
+            self.__list_fsm_contexts[telegram_id] = fsm_context
+        if state is not None:
+            fsm_context.state = state
+        if change is not None:
+            fsm_context.data = change(fsm_context.data)
+        if len(self.__dirty_fsm_contexts) < self.flush_max_dirty:
+            return
+        if self.__flush_requested is not None:
+            self.__flush_requested.set()
+            return
+        try:
+            await self.flush_in_thread()
+        except Exception as e:
+            logger.exception(e)
+
+    async def __change_data(self, telegram_id: int, change: Callable[[dict], dict],
+                            write: Callable[[], None]) -> None:
+        """
+        Приватный метод для частичного изменения дополнительных данных пользователя.
+
+        Изменение записывается в хранилище в отдельном потоке без повторного чтения документа и после записи
+        применяется к копии в памяти.
+
+        Параметры:
+            telegram_id (int): Идентификатор пользователя в Telegram.
+            change (Callable[[dict], dict]): Функция, вычисляющая новые дополнительные данные из текущих.
+            write (Callable[[], None]): Функция частичной записи изменения в хранилище.
 
         """
-        with Session() as session:
-            query = text("SELECT * FROM fsm_context WHERE telegram_id=:telegram_id")
-            fsm_context: FSMContext | None = session.execute(query, {"telegram_id": telegram_id}).first()
-        return fsm_context
+        if self.write_behind:
+            return await self.__store_fsm_context(telegram_id=telegram_id, state=None, change=change)
+        await self.__write(telegram_id=telegram_id, write=write, apply=lambda _: self.__apply_change(
+            telegram_id=telegram_id, change=change))
 
-    def __set_fsm_context(self, telegram_id: int, state: str, data: dict) -> None:
+    def __apply_change(self, telegram_id: int, change: Callable[[dict], dict]) -> None:
         """
-        Приватный метод для установки нового FSMContext объекта в базе данных.
+        Приватный метод для применения записанного изменения к дополнительным данным пользователя в памяти.
+        Если контекста нет в памяти, он будет загружен из хранилища при следующем обращении.
 
         Параметры:
             telegram_id (int): Идентификатор пользователя в Telegram.
-            state (str): Новое состояние пользователя в FSM.
-            data (dict): Новые дополнительные данные пользователя в FSM.
+            change (Callable[[dict], dict]): Функция, вычисляющая новые дополнительные данные из текущих.
 
         """
-        with Session() as session:
-            query = text("INSERT INTO fsm_context VALUES (:telegram_id, :state, :data)")
-            session.execute(query, {"telegram_id": telegram_id, "state": state, "data": json.dumps(data)})
-            session.commit()
-        self.__list_fsm_contexts[telegram_id] = self.__get_fsm_context(telegram_id=telegram_id)
+        fsm_context: FSMContext | None = self.__list_fsm_contexts.peek(telegram_id)
+        if fsm_context:
+            fsm_context.data = change(fsm_context.data)
+        else:
+            self.__list_fsm_contexts.pop(telegram_id)
 
-    def __update_fsm_context(self, telegram_id: int, state: str, data: dict) -> None:
+    async def __write(self, telegram_id: int, write: Callable[[], Any], apply: Callable[[Any], None]) -> None:
         """
-        Приватный метод для обновления существующего FSMContext объекта в базе данных.
+        Приватный метод для записи изменения в хранилище в режиме немедленной записи. Запись выполняется
+        в отдельном потоке, и метод ожидает ее завершения, поэтому ошибка записи пробрасывается обработчику,
+        а изменение применяется к контексту в памяти (функцией apply) только после успешной записи.
+        Пока запись не завершена, контекст не вытесняется из памяти. Если ожидание отменено, метод дожидается
+        уже начатой записи, чтобы ее результат был применен к контексту в памяти.
 
         Параметры:
             telegram_id (int): Идентификатор пользователя в Telegram.
-            state (str): Новое состояние пользователя в FSM.
-            data (dict): Новые дополнительные данные пользователя в FSM.
+            write (Callable[[], Any]): Функция записи изменения в хранилище.
+            apply (Callable[[Any], None]): Функция применения изменения к контексту в памяти, получающая
+                результат функции записи.
 
         """
-        with Session() as session:
-            query = text("UPDATE fsm_context SET state=:state, data=:data WHERE telegram_id=:telegram_id")
-            session.execute(query, {"telegram_id": telegram_id, "state": state, "data": json.dumps(data)})
-            session.commit()
-        self.__list_fsm_contexts[telegram_id] = self.__get_fsm_context(telegram_id=telegram_id)
+        self.__discard_snapshot_entry(telegram_id=telegram_id)
+        self.__pending_writes[telegram_id] = self.__pending_writes.get(telegram_id, 0) + 1
+        future = asyncio.ensure_future(asyncio.to_thread(write))
+        self.__writes.add(future)
+        try:
+            await asyncio.shield(future)
+        except asyncio.CancelledError:
+            await asyncio.wait([future])
+            raise
+        finally:
+            self.__writes.discard(future)
+            self.__pending_writes[telegram_id] -= 1
+            if not self.__pending_writes[telegram_id]:
+                del self.__pending_writes[telegram_id]
+            if future.done() and not future.cancelled() and future.exception() is None:
+                apply(future.result())
+
+    async def wait_writes(self) -> int:
+        """
+        Ожидает завершения записей в режиме немедленной записи, в том числе записей отмененных обработчиков.
+
+        Возвращает:
+            int: Количество ожидавшихся записей.
 
-    def __delete_fsm_context(self, telegram_id: int) -> None:
         """
-        Приватный метод для удаления FSMContext объекта из базы данных.
+        writes = set(self.__writes)
+        if writes:
+            await asyncio.wait(writes)
+        return len(writes)
+
+    async def preload(self, telegram_id: int) -> None:
+        """
+        Загружает FSMContext объект пользователя в кэш в отдельном потоке, если его еще нет в памяти.
+        Если объект есть в загруженном снимке, он берется из снимка без запроса к хранилищу.
+        После загрузки чтение состояния и данных пользователя не обращается к хранилищу.
 
         Параметры:
             telegram_id (int): Идентификатор пользователя в Telegram.
 
+        Возвращает:
+            None
+
+        """
+        if self.__list_fsm_contexts.is_loaded(telegram_id):
+            return
+        fsm_context = self.__take_snapshot_entry(telegram_id=telegram_id)
+        if fsm_context is None:
+            self.__discard_snapshot_entry(telegram_id=telegram_id)
+            fsm_context = await asyncio.to_thread(self.__storage.load, telegram_id=telegram_id)
+        if not self.__list_fsm_contexts.is_loaded(telegram_id):
+            self.__list_fsm_contexts[telegram_id] = fsm_context
+
+    def __load(self, telegram_id: int) -> FSMContext | None:
         """
-        with Session() as session:
-            query = text("DELETE FROM fsm_context WHERE telegram_id=:telegram_id")
-            session.execute(query, {"telegram_id": telegram_id})
-            session.commit()
-        del self.__list_fsm_contexts[telegram_id]
+        Приватный метод загрузки FSMContext объекта для кэша: объект берется из загруженного снимка, а если
+        его там нет, загружается из хранилища.
+
+        Параметры:
+            telegram_id (int): Идентификатор пользователя в Telegram.
+
+        Возвращает:
+            FSMContext | None: Объект FSMContext или None, если объект не найден.
+
+        """
+        fsm_context = self.__take_snapshot_entry(telegram_id=telegram_id)
+        if fsm_context is not None:
+            return fsm_context
+        self.__discard_snapshot_entry(telegram_id=telegram_id)
+        return self.__storage.load(telegram_id=telegram_id)
+
+    def __take_snapshot_entry(self, telegram_id: int) -> FSMContext | None:
+        """
+        Приватный метод для извлечения записи пользователя из загруженного снимка. Запись удаляется из снимка,
+        а неиспользованные записи удаляются целиком по истечении cache_ttl после загрузки снимка.
+
+        Параметры:
+            telegram_id (int): Идентификатор пользователя в Telegram.
+
+        Возвращает:
+            FSMContext | None: Объект FSMContext из снимка или None, если записи нет.
+
+        """
+        if self.__snapshot and monotonic() > self.__snapshot_expires:
+            self.__snapshot = dict()
+        entry = self.__snapshot.pop(telegram_id, None)
+        if entry is None:
+            return None
+        return snapshot_entry_to_fsm_context(telegram_id=telegram_id, entry=entry)
+
+    def __discard_snapshot_entry(self, telegram_id: int) -> None:
+        """
+        Приватный метод для удаления записи пользователя из снимка, когда его контекст загружается
+        из хранилища или изменяется. Если снимок еще загружается, пользователь запоминается, чтобы его запись
+        не была добавлена после загрузки.
+
+        Параметры:
+            telegram_id (int): Идентификатор пользователя в Telegram.
+
+        """
+        self.__snapshot.pop(telegram_id, None)
+        if self.__snapshot_skipped is not None:
+            self.__snapshot_skipped.add(telegram_id)
 
     def get_state(self, telegram_id: int) -> str | None:
         """
@@ -146,10 +380,35 @@ class FSM:
             str | None: Состояние пользователя в FSM или None, если объект не найден.
 
         """
-        if self.__list_fsm_contexts.get(telegram_id):
-            return self.__list_fsm_contexts[telegram_id].state
+        fsm_context: FSMContext | None = self.__list_fsm_contexts.get(telegram_id)
+        if fsm_context:
+            return fsm_context.state
+
+    def get_state_code(self, telegram_id: int) -> int:
+        """
+        Получает код текущего состояния пользователя в FSM из реестра состояний.
+
+        Параметры:
+            telegram_id (int): Идентификатор пользователя в Telegram.
+
+        Возвращает:
+            int: Код состояния пользователя (код пустого состояния, если объект не найден).
+
+        """
+        return get_states().code(self.get_state(telegram_id=telegram_id) or str())
+
+    def get_state_version(self) -> int:
+        """
+        Получает счетчик изменений состояний пользователей. Счетчик увеличивается при каждой смене состояния,
+        поэтому по его значению можно определить, что вычисленный ранее код состояния мог устареть.
+
+        Возвращает:
+            int: Значение счетчика.
 
-    def update_state(self, telegram_id: int, state: str) -> None:
+        """
+        return self.__state_version
+
+    async def update_state(self, telegram_id: int, state: str) -> None:
         """
         Обновляет состояние пользователя в FSM.
 
@@ -161,11 +420,7 @@ class FSM:
             None
 
         """
-        fsm_context: FSMContext | None = self.__get_fsm_context(telegram_id=telegram_id)
-        if fsm_context:
-            self.__update_fsm_context(telegram_id=telegram_id, state=state, data=fsm_context.data)
-        else:
-            self.__set_fsm_context(telegram_id=telegram_id, state=state, data=dict())
+        await self.transition(telegram_id=telegram_id, state=state)
 
     def get_data(self, telegram_id: int) -> dict:
         """
@@ -178,9 +433,25 @@ class FSM:
             dict: Дополнительные данные пользователя в FSM или пустой словарь, если объект не найден.
 
         """
-        return self.__list_fsm_contexts[telegram_id].data if self.__list_fsm_contexts.get(telegram_id) else dict()
+        fsm_context: FSMContext | None = self.__list_fsm_contexts.get(telegram_id)
+        return fsm_context.data if fsm_context else dict()
+
+    def get_payload(self, telegram_id: int, schema: type[Payload]) -> Payload:
+        """
+        Получает дополнительные данные пользователя в FSM, проверенные и приведенные к схеме сценария.
+        Ключи, не объявленные в схеме, игнорируются.
+
+        Параметры:
+            telegram_id (int): Идентификатор пользователя в Telegram.
+            schema (type[Payload]): Схема дополнительных данных из app/fsm_context/schemas.py.
+
+        Возвращает:
+            Payload: Объект схемы с дополнительными данными пользователя.
+
+        """
+        return msgspec.convert(self.get_data(telegram_id=telegram_id), type=schema)
 
-    def update_data(self, telegram_id: int, data: dict) -> dict:
+    async def update_data(self, telegram_id: int, data: dict) -> dict:
         """
         Обновляет дополнительные данные пользователя в FSM.
 
@@ -192,14 +463,107 @@ class FSM:
             dict: Обновленные дополнительные данные пользователя в FSM.
 
         """
-        fsm_context: FSMContext | None = self.__get_fsm_context(telegram_id=telegram_id)
-        if fsm_context:
-            self.__update_fsm_context(telegram_id=telegram_id, data=data, state=fsm_context.state)
-        else:
-            self.__set_fsm_context(telegram_id=telegram_id, data=data, state=str())
+        await self.transition(telegram_id=telegram_id, data=data, merge=False)
         return self.get_data(telegram_id=telegram_id)
 
-    def clear(self, telegram_id: int) -> None:
+    async def transition(self, telegram_id: int, state: str | None = None, data: dict | FSMData | None = None,
+                   merge: bool = True) -> None:
+        """
+        Обновляет состояние и дополнительные данные пользователя в FSM одной записью в хранилище.
+
+        Состояние и данные записываются атомарно, поэтому параллельный запрос не увидит новые данные
+        со старым состоянием или наоборот. Если запись не удалась, исключение хранилища пробрасывается,
+        а контекст в памяти не изменяется.
+        Состояние должно быть объявлено в реестре app/fsm_context/states.py, иначе возникает ValueError.
+        Переход, которого нет в графе переходов реестра, записывается в лог (переходы в состояния, заданные строкой,
+        проверяются при импорте обработчиков функцией validate_handlers).
+
+        Параметры:
+            telegram_id (int): Идентификатор пользователя в Telegram.
+            state (str | None): Новое состояние пользователя в FSM или None, чтобы оставить текущее.
+            data (dict | FSMData | None): Дополнительные данные пользователя в FSM (словарь или схема
+                сценария, из которой записываются только заданные поля) или None, чтобы оставить текущие.
+            merge (bool): Флаг объединения переданных данных с текущими (по умолчанию True).
+                При False текущие данные полностью заменяются переданными.
+
+        Возвращает:
+            None
+
+        """
+        if state is not None:
+            state = get_states().name(get_states().code(state))
+            self.__state_version += 1
+            current = self.__list_fsm_contexts.peek(telegram_id)
+            if current is not None and not get_states().allows(source=current.state, target=state):
+                logger.warning("Undeclared FSM transition of %s: %r -> %r", telegram_id, current.state, state)
+        if data is not None:
+            data = to_fsm_data(data)
+        if self.write_behind:
+            return await self.__store_fsm_context(
+                telegram_id=telegram_id, state=state,
+                change=(lambda current: merge_fsm_data(current=current, data=data, merge=merge))
+                if data is not None else None)
+        if state is None and data is None:
+            return
+        # Хранилище возвращает записанный объект, поэтому контекст, не загруженный заранее (preload), тоже
+        # записывается в отдельном потоке и сразу попадает в память
+        await self.__write(
+            telegram_id=telegram_id,
+            write=lambda: self.__storage.save(telegram_id=telegram_id, state=state, data=data, merge=merge),
+            apply=lambda fsm_context: self.__list_fsm_contexts.__setitem__(telegram_id, fsm_context))
+
+    async def set_keys(self, telegram_id: int, values: dict | FSMData) -> None:
+        """
+        Устанавливает значения ключей в дополнительных данных пользователя, не переписывая остальные ключи.
+
+        Параметры:
+            telegram_id (int): Идентификатор пользователя в Telegram.
+            values (dict | FSMData): Устанавливаемые значения (словарь или схема сценария).
+
+        Возвращает:
+            None
+
+        """
+        values = to_fsm_data(values)
+        await self.__change_data(
+            telegram_id=telegram_id, change=lambda current: merge_fsm_data(current=current, data=values, merge=True),
+            write=lambda: self.__storage.set_keys(telegram_id=telegram_id, values=values))
+
+    async def del_keys(self, telegram_id: int, keys: list[str]) -> None:
+        """
+        Удаляет ключи из дополнительных данных пользователя.
+
+        Параметры:
+            telegram_id (int): Идентификатор пользователя в Telegram.
+            keys (list[str]): Удаляемые ключи.
+
+        Возвращает:
+            None
+
+        """
+        await self.__change_data(
+            telegram_id=telegram_id, change=lambda current: del_fsm_keys(current=current, keys=keys),
+            write=lambda: self.__storage.del_keys(telegram_id=telegram_id, keys=keys))
+
+    async def append_to_list(self, telegram_id: int, key: str, values: list) -> None:
+        """
+        Добавляет значения в конец списка в дополнительных данных пользователя.
+
+        Параметры:
+            telegram_id (int): Идентификатор пользователя в Telegram.
+            key (str): Ключ списка.
+            values (list): Добавляемые значения.
+
+        Возвращает:
+            None
+
+        """
+        await self.__change_data(
+            telegram_id=telegram_id,
+            change=lambda current: append_fsm_list(current=current, key=key, values=values),
+            write=lambda: self.__storage.append_to_list(telegram_id=telegram_id, key=key, values=values))
+
+    async def clear(self, telegram_id: int) -> None:
         """
         Очищает FSMContext объект для пользователя.
 
@@ -210,7 +574,276 @@ class FSM:
             None
 
         """
-        self.__update_fsm_context(telegram_id=telegram_id, state=str(), data=dict())
+        await self.transition(telegram_id=telegram_id, state=str(), data=dict(), merge=False)
+
+    def __begin_flush(self) -> list[FSMContext]:
+        """
+        Приватный метод для получения копий FSMContext объектов с отложенными изменениями перед записью.
+        Объекты перестают считаться измененными, но не вытесняются из памяти до завершения записи.
+        Изменения, сделанные во время записи, снова отмечают объект измененным.
+
+        Возвращает:
+            list[FSMContext]: Копии записываемых FSMContext объектов.
+
+        """
+        fsm_contexts = [
+            FSMContext(telegram_id=x.telegram_id, state=x.state, data=dict(x.data))
+            for x in map(self.__list_fsm_contexts.peek, self.__dirty_fsm_contexts) if x is not None]
+        self.__flushing_fsm_contexts.update(self.__dirty_fsm_contexts)
+        self.__dirty_fsm_contexts.clear()
+        return fsm_contexts
+
+    def __end_flush(self, fsm_contexts: list[FSMContext], saved: bool) -> None:
+        """
+        Приватный метод для завершения записи отложенных изменений. Если запись завершилась ошибкой,
+        объекты снова отмечаются измененными и будут записаны при следующем вызове.
+
+        Параметры:
+            fsm_contexts (list[FSMContext]): Записываемые FSMContext объекты.
+            saved (bool): Флаг успешной записи.
+
+        """
+        telegram_ids = [x.telegram_id for x in fsm_contexts]
+        self.__flushing_fsm_contexts.difference_update(telegram_ids)
+        if not saved:
+            self.__dirty_fsm_contexts.update(telegram_ids)
+            return
+        logger.debug("FSM flushed %s contexts", len(telegram_ids))
+
+    def flush(self) -> int:
+        """
+        Записывает все отложенные изменения FSMContext объектов в хранилище одной операцией.
+
+        Если запись завершилась ошибкой, изменения остаются отложенными и будут записаны при следующем вызове.
+
+        Возвращает:
+            int: Количество записанных FSMContext объектов.
+
+        """
+        fsm_contexts = self.__begin_flush()
+        if not fsm_contexts:
+            return 0
+        saved = False
+        try:
+            self.__storage.save_many(fsm_contexts=fsm_contexts)
+            saved = True
+        finally:
+            self.__end_flush(fsm_contexts=fsm_contexts, saved=saved)
+        return len(fsm_contexts)
+
+    async def flush_in_thread(self) -> int:
+        """
+        Записывает все отложенные изменения FSMContext объектов в хранилище одной операцией в отдельном потоке.
+        Копии объектов снимаются в цикле событий, поэтому обработчики продолжают изменять контексты во время записи.
+
+        Если ожидание отменено, метод дожидается уже начатой записи, чтобы ее результат был учтен до остановки.
+
+        Возвращает:
+            int: Количество записанных FSMContext объектов.
+
+        """
+        fsm_contexts = self.__begin_flush()
+        if not fsm_contexts:
+            return 0
+        write = asyncio.ensure_future(asyncio.to_thread(self.__storage.save_many, fsm_contexts=fsm_contexts))
+        try:
+            await asyncio.shield(write)
+        except asyncio.CancelledError:
+            await asyncio.wait([write])
+            raise
+        finally:
+            self.__end_flush(fsm_contexts=fsm_contexts, saved=write.done() and write.exception() is None)
+        return len(fsm_contexts)
+
+    async def sweep(self, idle: float, batch_size: int) -> int:
+        """
+        Удаляет из хранилища и из памяти не более batch_size FSMContext объектов, не изменявшихся
+        дольше idle секунд. Запрос к хранилищу выполняется в отдельном потоке, а объекты удаляются из памяти
+        в цикле событий после него. Объекты с отложенными или выполняющимися изменениями остаются в памяти
+        и будут записаны заново при следующей записи.
+
+        Параметры:
+            idle (float): Время простоя в секундах.
+            batch_size (int): Максимальное количество удаляемых записей за один запрос.
+
+        Возвращает:
+            int: Количество удаленных FSMContext объектов.
+
+        """
+        telegram_ids = await asyncio.to_thread(self.__storage.delete_stale, idle=idle, limit=batch_size)
+        pinned = self.__dirty_fsm_contexts | self.__flushing_fsm_contexts | set(self.__pending_writes)
+        for telegram_id in telegram_ids:
+            self.__discard_snapshot_entry(telegram_id=telegram_id)
+            if telegram_id not in pinned:
+                self.__list_fsm_contexts.pop(telegram_id)
+        return len(telegram_ids)
+
+    async def run_sweeper(self, interval: float, idle: float, batch_size: int) -> None:
+        """
+        Периодически удаляет FSMContext объекты, не изменявшиеся дольше idle секунд, и сообщает в лог
+        количество удаленных записей. Удаление выполняется пакетами по batch_size записей, чтобы не удерживать
+        блокировки надолго, каждый пакет удаляется в отдельном потоке.
+
+        Параметры:
+            interval (float): Интервал между запусками в секундах.
+            idle (float): Время простоя в секундах.
+            batch_size (int): Максимальное количество удаляемых записей за один запрос.
+
+        Возвращает:
+            None
+
+        """
+        while True:
+            await asyncio.sleep(interval)
+            count = 0
+            try:
+                while True:
+                    removed = await self.sweep(idle=idle, batch_size=batch_size)
+                    count += removed
+                    if removed < batch_size:
+                        break
+            except Exception as e:
+                logger.exception(e)
+            logger.info("FSM sweeper removed %s stale contexts", count)
+
+    def dump_snapshot(self, path: str) -> int:
+        """
+        Записывает FSMContext объекты, загруженные в память, и еще не использованные записи загруженного снимка
+        в файл снимка для быстрого перезапуска. Вызывается при остановке бота после записи отложенных изменений.
+        Если записать их не удалось, идентификаторы измененных объектов сохраняются в снимке, и после загрузки
+        снимка объекты снова считаются измененными. Если хранилище недоступно, снимок записывается с нулевым
+        watermark, и при загрузке снимка все объекты, кроме измененных, пропускаются и загружаются из хранилища
+        заново.
+
+        Параметры:
+            path (str): Путь к файлу снимка.
+
+        Возвращает:
+            int: Количество записанных FSMContext объектов.
+
+        """
+        fsm_contexts = self.__list_fsm_contexts.values()
+        if self.__snapshot and monotonic() > self.__snapshot_expires:
+            self.__snapshot = dict()
+        try:
+            watermark = self.__storage.watermark()
+        except Exception as e:
+            logger.exception(e)
+            watermark = 0.0
+        save_snapshot(path=path, fsm_contexts=fsm_contexts, watermark=watermark,
+                      dirty=self.__dirty_fsm_contexts | self.__flushing_fsm_contexts, entries=self.__snapshot)
+        return len(self.__snapshot) + len(fsm_contexts)
+
+    async def restore_snapshot(self, path: str) -> int | None:
+        """
+        Загружает записи FSMContext объектов из файла снимка, не задерживая обработку обновлений: вызывается
+        в фоновой задаче, пока бот уже отвечает пользователям, загружая их контексты из хранилища.
+
+        Файл снимка читается в отдельном потоке и разбирается пакетами (load_snapshot). Затем снимок сверяется
+        с хранилищем: записи объектов, измененных в хранилище после записи снимка (начиная с его watermark
+        включительно) или удаленных из него, а также записи пользователей, чьи контексты загружены из хранилища
+        или изменены во время загрузки снимка, отбрасываются. Остальные записи преобразуются в FSMContext объекты
+        по одной при первом обращении пользователя (preload), поэтому загрузка снимка не создает объекты всех
+        пользователей сразу.
+
+        Объекты, изменения которых не были записаны в базу данных перед записью снимка, сразу добавляются
+        в кэш, отмечаются измененными и записываются в отдельном потоке. Файл удаляется после загрузки,
+        чтобы снимок не был загружен повторно после аварийной остановки. Поврежденный файл удаляется без загрузки.
+
+        Параметры:
+            path (str): Путь к файлу снимка.
+
+        Возвращает:
+            int | None: Количество загруженных записей снимка или None, если снимка нет.
+
+        """
+        started = monotonic()
+        self.__snapshot_skipped = set()
+        try:
+            try:
+                snapshot = await load_snapshot(path=path)
+            except Exception as e:
+                logger.exception(e)
+                snapshot = None
+            if snapshot is None:
+                if os.path.exists(path):
+                    os.remove(path)
+                return None
+            watermark, entries, dirty = snapshot
+            # Незаписанные изменения из снимка новее хранилища, поэтому такие объекты не считаются устаревшими
+            stale = await self.__find_stale(
+                watermark=watermark, telegram_ids=[x for x in entries if x not in dirty]) - dirty
+            loaded = {x for x in dirty if self.__list_fsm_contexts.is_loaded(x)}
+            for telegram_id in stale | self.__snapshot_skipped | loaded:
+                if telegram_id in dirty:
+                    logger.warning("FSM context %s changed before the snapshot was restored, "
+                                   "its unsaved snapshot changes are dropped", telegram_id)
+                entries.pop(telegram_id, None)
+            restored_dirty = dirty & entries.keys()
+            for telegram_id in restored_dirty:
+                self.__list_fsm_contexts[telegram_id] = snapshot_entry_to_fsm_context(
+                    telegram_id=telegram_id, entry=entries.pop(telegram_id))
+                self.__dirty_fsm_contexts.add(telegram_id)
+            self.__snapshot = entries
+            self.__snapshot_expires = monotonic() + self.__list_fsm_contexts.ttl
+        finally:
+            self.__snapshot_skipped = None
+        os.remove(path)
+        logger.info("FSM snapshot restored %s contexts in %.3f s, %s stale contexts skipped",
+                    len(entries) + len(restored_dirty), monotonic() - started, len(stale))
+        if restored_dirty:
+            # Изменения, которые не удалось записать перед остановкой
+            try:
+                await self.flush_in_thread()
+            except Exception as e:
+                logger.exception(e)
+        return len(entries) + len(restored_dirty)
+
+    async def __find_stale(self, watermark: float, telegram_ids: list[int]) -> set[int]:
+        """
+        Приватный метод для поиска пользователей, чьи FSMContext объекты изменены в хранилище после записи снимка
+        (начиная с его watermark включительно) или удалены из хранилища. Запросы к хранилищу выполняются
+        в отдельном потоке, наличие объектов проверяется пакетами по EXISTING_BATCH_SIZE отдельными вызовами,
+        чтобы проверка большого снимка не удерживала блокировки хранилища и GIL.
+
+        Параметры:
+            watermark (float): Watermark снимка.
+            telegram_ids (list[int]): Идентификаторы пользователей из снимка.
+
+        Возвращает:
+            set[int]: Идентификаторы пользователей, чьи объекты в снимке устарели.
+
+        """
+        touched = await asyncio.to_thread(self.__storage.touched_since, watermark=watermark)
+        existing = set()
+        for start in range(0, len(telegram_ids), EXISTING_BATCH_SIZE):
+            existing |= await asyncio.to_thread(
+                self.__storage.existing, telegram_ids=telegram_ids[start:start + EXISTING_BATCH_SIZE])
+        return set(touched) | (set(telegram_ids) - existing)
+
+    async def run_flusher(self) -> None:
+        """
+        Периодически записывает отложенные изменения в базу данных с интервалом flush_interval, а также
+        вне очереди при достижении flush_max_dirty измененных записей. Запись выполняется в отдельном потоке.
+
+        Возвращает:
+            None
+
+        """
+        self.__flush_requested = asyncio.Event()
+        try:
+            while True:
+                try:
+                    await asyncio.wait_for(self.__flush_requested.wait(), timeout=self.flush_interval)
+                except asyncio.TimeoutError:
+                    pass
+                self.__flush_requested.clear()
+                try:
+                    await self.flush_in_thread()
+                except Exception as e:
+                    logger.exception(e)
+        finally:
+            self.__flush_requested = None
 
 
 _fsm_context: FSM
@@ -227,7 +860,10 @@ async def fsm_context_init() -> None:
 
     """
     global _fsm_context
-    _fsm_context = FSM()
+    _fsm_context = FSM(
+        storage=create_storage(), write_behind=config.FSM_WRITE_BEHIND, flush_interval=config.FSM_FLUSH_INTERVAL,
+        flush_max_dirty=config.FSM_FLUSH_MAX_DIRTY, cache_max_size=config.FSM_CACHE_MAX_SIZE,
+        cache_ttl=config.FSM_CACHE_TTL)
 
 
 def get_fsm_context() -> FSM:
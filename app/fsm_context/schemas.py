@@ -0,0 +1,112 @@
+"""
+    Модуль, содержащий схемы дополнительных данных FSM для каждого сценария работы с ботом.
+
+    Схемы - структуры msgspec. Данные пользователя проверяются и приводятся к схеме один раз при чтении
+    (FSM.get_payload), а при записи структура преобразуется в словарь только с заданными полями,
+    поэтому запись структуры меняет только указанные ключи.
+
+"""
+
+import msgspec
+
+
+class FSMData(msgspec.Struct, omit_defaults=True):
+    """
+    Общие дополнительные данные пользователя.
+
+    Параметры:
+        owner_telegram_id (int | None): Идентификатор владельца аккаунта, в который выполнен вход.
+
+    """
+
+    owner_telegram_id: int | None = None
+
+
+class RegistrationData(FSMData):
+    """
+    Дополнительные данные сценария регистрации.
+
+    Параметры:
+        username (str | None): Имя пользователя в боте.
+        login_name (str | None): Логин пользователя.
+        password (str | None): Зашифрованный пароль, ожидающий подтверждения.
+
+    """
+
+    username: str | None = None
+    login_name: str | None = None
+    password: str | None = None
+
+
+class AuthorizationData(FSMData):
+    """
+    Дополнительные данные сценария авторизации.
+
+    Параметры:
+        login_name (str | None): Логин пользователя.
+        password (str | None): Зашифрованный новый пароль, ожидающий подтверждения.
+
+    """
+
+    login_name: str | None = None
+    password: str | None = None
+
+
+class SettingsData(FSMData):
+    """
+    Дополнительные данные сценария настроек аккаунта.
+
+    Параметры:
+        password (str | None): Зашифрованный новый пароль, ожидающий подтверждения.
+
+    """
+
+    password: str | None = None
+
+
+class TaskCreationData(FSMData):
+    """
+    Дополнительные данные сценария создания задачи.
+
+    Параметры:
+        task_name (str | None): Название задачи.
+        task_description (str | None): Описание задачи.
+        task_start_time (str | None): Время начала задачи в формате ввода пользователя.
+
+    """
+
+    task_name: str | None = None
+    task_description: str | None = None
+    task_start_time: str | None = None
+
+
+class TaskEditData(FSMData):
+    """
+    Дополнительные данные сценария редактирования задач.
+
+    Параметры:
+        editor_task_id (int | None): Идентификатор редактируемой задачи.
+        editor_task_pagination (int | None): Смещение текущей страницы списка задач.
+        editor_task_list_ids (list[int] | None): Идентификаторы задач пользователя.
+
+    """
+
+    editor_task_id: int | None = None
+    editor_task_pagination: int | None = None
+    editor_task_list_ids: list[int] | None = None
+
+
+def to_fsm_data(payload: dict | FSMData) -> dict:
+    """
+    Преобразует схему дополнительных данных в словарь только с заданными полями.
+
+    Параметры:
+        payload (dict | FSMData): Схема дополнительных данных или словарь.
+
+    Возвращает:
+        dict: Словарь дополнительных данных.
+
+    """
+    if isinstance(payload, FSMData):
+        return msgspec.to_builtins(payload)
+    return payload
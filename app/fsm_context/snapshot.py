@@ -0,0 +1,122 @@
+"""
+    Модуль, содержащий функции записи и чтения файла снимка FSMContext объектов для быстрого перезапуска бота.
+
+    Снимок - файл msgpack со словарем {"version", "watermark", "contexts", "dirty"}, где contexts - список
+    [telegram_id, код состояния, данные] в порядке от давно использованных к недавно использованным,
+    а watermark - наибольшее время последнего изменения (last_touched) в хранилище на момент записи снимка.
+    Записи, измененные в хранилище после watermark, при загрузке снимка считаются устаревшими.
+    Список dirty содержит пользователей, изменения которых не удалось записать в хранилище перед записью снимка
+    (в снимках без этого ключа таких пользователей нет).
+
+"""
+
+import asyncio
+import os
+
+import msgpack
+
+from app.db.models import FSMContext
+from app.fsm_context.states import get_states
+
+SNAPSHOT_VERSION = 1
+
+SNAPSHOT_BATCH_SIZE = 500
+
+
+def save_snapshot(path: str, fsm_contexts: list[FSMContext], watermark: float,
+                  dirty: set[int] = frozenset(), entries: dict[int, list] | None = None) -> None:
+    """
+    Записывает снимок FSMContext объектов в файл. Запись выполняется во временный файл, который затем
+    заменяет снимок, поэтому прерванная запись не повреждает предыдущий снимок.
+
+    Параметры:
+        path (str): Путь к файлу снимка.
+        fsm_contexts (list[FSMContext]): Список объектов FSMContext.
+        watermark (float): Наибольшее время последнего изменения в хранилище (Unix time).
+        dirty (set[int]): Пользователи, изменения которых не записаны в хранилище (по умолчанию пусто).
+        entries (dict[int, list] | None): Записи [код состояния, данные] предыдущего снимка, полученные
+            load_snapshot, которые записываются перед fsm_contexts без преобразования в FSMContext объекты
+            (по умолчанию нет).
+
+    """
+    contexts = [[telegram_id, state, data] for telegram_id, (state, data) in (entries or dict()).items()]
+    contexts.extend([x.telegram_id, get_states().code(x.state), x.data] for x in fsm_contexts)
+    payload = msgpack.packb({
+        "version": SNAPSHOT_VERSION,
+        "watermark": watermark,
+        "contexts": contexts,
+        "dirty": sorted(dirty),
+    })
+    with open(f"{path}.tmp", "wb") as file:
+        file.write(payload)
+    os.replace(f"{path}.tmp", path)
+
+
+async def load_snapshot(path: str) -> tuple[float, dict[int, list], set[int]] | None:
+    """
+    Читает снимок FSMContext объектов из файла. Файл читается в отдельном потоке, а записи разбираются
+    в цикле событий пакетами по SNAPSHOT_BATCH_SIZE, между которыми управление возвращается циклу событий:
+    разбор в отдельном потоке удерживал бы GIL и задерживал обработку обновлений. Объекты FSMContext
+    не создаются: записи снимка преобразуются в них по одной при обращении пользователей
+    (snapshot_entry_to_fsm_context).
+
+    Параметры:
+        path (str): Путь к файлу снимка.
+
+    Возвращает:
+        tuple[float, dict[int, list], set[int]] | None: Watermark снимка, записи [код состояния, данные]
+            по пользователям в порядке от давно использованных к недавно использованным и пользователи
+            с незаписанными изменениями или None, если файла нет, он пуст или записан другой версией.
+
+    """
+    payload = await asyncio.to_thread(_read_snapshot, path)
+    if not payload:
+        return None
+    unpacker = msgpack.Unpacker(strict_map_key=False, max_buffer_size=len(payload))
+    unpacker.feed(payload)
+    snapshot, entries = dict(), dict()
+    for _ in range(unpacker.read_map_header()):
+        key = unpacker.unpack()
+        if key != "contexts" or snapshot.get("version") != SNAPSHOT_VERSION:
+            snapshot[key] = unpacker.unpack()
+            continue
+        for num in range(1, unpacker.read_array_header() + 1):
+            telegram_id, state, data = unpacker.unpack()
+            entries[telegram_id] = [state, data]
+            if not num % SNAPSHOT_BATCH_SIZE:
+                await asyncio.sleep(0)
+    if snapshot.get("version") != SNAPSHOT_VERSION:
+        return None
+    return snapshot["watermark"], entries, set(snapshot.get("dirty", ()))
+
+
+def _read_snapshot(path: str) -> bytes | None:
+    """
+    Читает файл снимка целиком.
+
+    Параметры:
+        path (str): Путь к файлу снимка.
+
+    Возвращает:
+        bytes | None: Содержимое файла или None, если файла нет.
+
+    """
+    if not os.path.exists(path):
+        return None
+    with open(path, "rb") as file:
+        return file.read()
+
+
+def snapshot_entry_to_fsm_context(telegram_id: int, entry: list) -> FSMContext:
+    """
+    Преобразует запись снимка, полученную load_snapshot, в объект FSMContext.
+
+    Параметры:
+        telegram_id (int): Идентификатор пользователя в Telegram.
+        entry (list): Запись [код состояния, данные].
+
+    Возвращает:
+        FSMContext: Объект FSMContext.
+
+    """
+    return FSMContext(telegram_id=telegram_id, state=get_states().decode(entry[0]), data=entry[1])
@@ -0,0 +1,293 @@
+"""
+    Модуль, содержащий реестр состояний конечного автомата (FSM) и класс States для работы с ним.
+
+    Каждое объявленное состояние получает постоянный целочисленный код, который сохраняется в хранилище FSMContext
+    объектов вместо строки. Коды не должны меняться: новые состояния добавляются в конец реестра со следующим
+    свободным кодом, а код удаленного состояния больше не используется.
+
+    Для каждого состояния заранее вычисляется множество кодов его потомков (состояний, для которых оно является
+    префиксом по разделителю ":"), поэтому проверка фильтра с is_regex=True сводится к поиску кода во множестве.
+
+    Рядом с реестром объявлен граф разрешенных переходов TRANSITIONS. В состояния ENTRY_STATES можно перейти
+    из любого состояния (команда /start и кнопки клавиатуры главного меню), повторный переход в текущее состояние
+    разрешен всегда. Функция validate_handlers при импорте модулей обработчиков проверяет, что каждое состояние,
+    в которое обработчик переводит пользователя, объявлено, а переход из состояний его фильтра есть в графе.
+
+"""
+
+import ast
+import inspect
+from types import ModuleType
+
+STATES: dict[str, int] = {
+    "": 0,
+    "registration_authorization": 1,
+    "main_menu": 2,
+    "registration:username": 3,
+    "registration:nickname": 4,
+    "registration:set_password": 5,
+    "registration:confirm_set_password": 6,
+    "authorization:login": 7,
+    "authorization:password": 8,
+    "authorization:reset_password": 9,
+    "authorization:confirm_reset_password": 10,
+    "settings": 11,
+    "settings:set_username": 12,
+    "settings:set_login_name": 13,
+    "settings:set_password": 14,
+    "settings:confirm_set_password": 15,
+    "tasks": 16,
+    "tasks:create:set_name": 17,
+    "tasks:create:set_description": 18,
+    "tasks:create:set_start_time": 19,
+    "tasks:create:set_end_time": 20,
+    "tasks:view": 21,
+    "tasks:edit": 22,
+    "tasks:edit:edit_task": 23,
+    "tasks:edit:edit_task:set_name": 24,
+    "tasks:edit:edit_task:set_description": 25,
+    "tasks:edit:edit_task:set_start_date": 26,
+    "tasks:edit:edit_task:set_end_date": 27,
+    "tasks:edit:edit_task:delete": 28,
+}
+
+ENTRY_STATES: tuple[str, ...] = ("", "registration_authorization", "main_menu", "tasks", "settings")
+
+TRANSITIONS: dict[str, tuple[str, ...]] = {
+    "registration_authorization": ("registration:username", "authorization:login"),
+    "registration:username": ("registration:nickname",),
+    "registration:nickname": ("registration:set_password",),
+    "registration:set_password": ("registration:confirm_set_password",),
+    "registration:confirm_set_password": ("registration:set_password",),
+    "authorization:login": ("authorization:password",),
+    "authorization:password": ("authorization:reset_password",),
+    "authorization:reset_password": ("authorization:confirm_reset_password",),
+    "authorization:confirm_reset_password": ("authorization:reset_password", "authorization:login"),
+    "settings": ("settings:set_username", "settings:set_login_name", "settings:set_password"),
+    "settings:set_password": ("settings:confirm_set_password",),
+    "settings:confirm_set_password": ("settings:set_password",),
+    "tasks": ("tasks:create:set_name", "tasks:view", "tasks:edit"),
+    "tasks:create:set_name": ("tasks:create:set_description",),
+    "tasks:create:set_description": ("tasks:create:set_start_time",),
+    "tasks:create:set_start_time": ("tasks:create:set_end_time",),
+    "tasks:edit": ("tasks:edit:edit_task",),
+    "tasks:edit:edit_task": (
+        "tasks:edit:edit_task:set_name", "tasks:edit:edit_task:set_description",
+        "tasks:edit:edit_task:set_start_date", "tasks:edit:edit_task:set_end_date", "tasks:edit:edit_task:delete"),
+    "tasks:edit:edit_task:set_name": ("tasks:edit:edit_task",),
+    "tasks:edit:edit_task:set_description": ("tasks:edit:edit_task",),
+    "tasks:edit:edit_task:set_start_date": ("tasks:edit:edit_task",),
+    "tasks:edit:edit_task:set_end_date": ("tasks:edit:edit_task",),
+    "tasks:edit:edit_task:delete": ("tasks:edit", "tasks:edit:edit_task"),
+}
+
+
+class States:
+    """
+    Класс реестра состояний конечного автомата (FSM) с постоянными целочисленными кодами.
+
+    Параметры:
+        __codes (dict[str, int]): Словарь кодов состояний.
+        __names (dict[int, str]): Словарь состояний по кодам.
+        __descendants (dict[int, frozenset[int]]): Множества кодов состояния и всех его потомков.
+        __entry (frozenset[int]): Коды состояний, в которые можно перейти из любого состояния.
+        __transitions (dict[int, frozenset[int]]): Коды состояний, в которые можно перейти из состояния.
+
+    Methods:
+        code(state: str) -> int: Получает код объявленного состояния.
+        name(code: int) -> str: Получает состояние по коду.
+        descendants(state: str) -> frozenset[int]: Получает коды состояния и всех его потомков.
+        decode(value: int | str | None) -> str: Получает состояние по значению, сохраненному в хранилище.
+        allows(source: str, target: str) -> bool: Проверяет, что переход между состояниями объявлен.
+
+    """
+
+    def __init__(self, states: dict[str, int], transitions: dict[str, tuple[str, ...]] | None = None,
+                 entry_states: tuple[str, ...] = ()):
+        """
+        Инициализация реестра состояний. Состояние, не объявленное в реестре, в графе переходов вызывает ValueError.
+
+        Параметры:
+            states (dict[str, int]): Словарь объявленных состояний и их кодов.
+            transitions (dict[str, tuple[str, ...]] | None): Граф разрешенных переходов или None, если переходы
+                не ограничены.
+            entry_states (tuple[str, ...]): Состояния, в которые можно перейти из любого состояния.
+
+        """
+        if len(set(states.values())) != len(states):
+            raise ValueError("FSM state codes must be unique")
+        self.__codes: dict[str, int] = {state: code for state, code in states.items()}
+        self.__names: dict[int, str] = {code: state for state, code in self.__codes.items()}
+        self.__descendants: dict[int, frozenset[int]] = {
+            code: frozenset(
+                other_code for other, other_code in self.__codes.items()
+                if other == state or other.startswith(f"{state}:"))
+            for state, code in self.__codes.items()}
+        self.__entry: frozenset[int] = frozenset(self.code(x) for x in entry_states)
+        self.__transitions: dict[int, frozenset[int]] | None = None if transitions is None else {
+            self.code(source): frozenset(self.code(x) for x in targets) for source, targets in transitions.items()}
+
+    def code(self, state: str) -> int:
+        """
+        Получает код объявленного состояния.
+
+        Параметры:
+            state (str): Состояние конечного автомата (FSM).
+
+        Возвращает:
+            int: Код состояния.
+
+        """
+        code = self.__codes.get(state)
+        if code is None:
+            raise ValueError(f"Unknown FSM state: {state!r}")
+        return code
+
+    def name(self, code: int) -> str:
+        """
+        Получает состояние по коду.
+
+        Параметры:
+            code (int): Код состояния.
+
+        Возвращает:
+            str: Состояние конечного автомата (FSM).
+
+        """
+        state = self.__names.get(code)
+        if state is None:
+            raise ValueError(f"Unknown FSM state code: {code!r}")
+        return state
+
+    def descendants(self, state: str) -> frozenset[int]:
+        """
+        Получает коды состояния и всех его потомков, например для "tasks" - коды "tasks", "tasks:view" и т.д.
+
+        Параметры:
+            state (str): Состояние конечного автомата (FSM).
+
+        Возвращает:
+            frozenset[int]: Множество кодов состояний.
+
+        """
+        return self.__descendants[self.code(state)]
+
+    def decode(self, value: int | str | None) -> str:
+        """
+        Получает состояние по значению, сохраненному в хранилище. Поддерживает коды, коды в виде строки
+        (Redis, SQLite) и строковые состояния, записанные до появления реестра. Неизвестное значение
+        сбрасывается в пустое состояние.
+
+        Параметры:
+            value (int | str | None): Сохраненное значение состояния.
+
+        Возвращает:
+            str: Состояние конечного автомата (FSM).
+
+        """
+        if isinstance(value, str):
+            if value in self.__codes:
+                return self.name(self.__codes[value])
+            value = int(value) if value.isdigit() else None
+        return self.__names.get(value, str())
+
+    def allows(self, source: str, target: str) -> bool:
+        """
+        Проверяет, что переход между состояниями объявлен в графе переходов.
+
+        Параметры:
+            source (str): Текущее состояние.
+            target (str): Новое состояние.
+
+        Возвращает:
+            bool: True, если переход разрешен.
+
+        """
+        source_code, target_code = self.code(source), self.code(target)
+        return (self.__transitions is None or source_code == target_code or target_code in self.__entry
+                or target_code in self.__transitions.get(source_code, ()))
+
+
+_states: States = States(states=STATES, transitions=TRANSITIONS, entry_states=ENTRY_STATES)
+
+
+def get_states() -> States:
+    """
+    Получение реестра состояний.
+
+    Возвращает:
+        States: Объект States.
+
+    """
+    return _states
+
+
+def validate_handlers(*modules: ModuleType) -> None:
+    """
+    Проверяет переходы между состояниями в модулях обработчиков при их импорте.
+
+    Для каждой функции с декоратором on_message или on_callback_query исходными считаются состояния из фильтров
+    message_filter(state=...) декораторов (с is_regex=True - состояние и его потомки), а без фильтра состояния -
+    любое состояние. Новыми считаются состояния, переданные строкой в аргументе state вызовов в теле функции
+    (update_state, transition и вспомогательные функции). Состояния, заданные переменными, проверяются
+    при выполнении в FSM.transition.
+
+    Параметры:
+        *modules (ModuleType): Модули обработчиков.
+
+    Возвращает:
+        None
+
+    """
+    errors = list()
+    for module in modules:
+        for node in ast.walk(ast.parse(inspect.getsource(module))):
+            if not isinstance(node, (ast.FunctionDef, ast.AsyncFunctionDef)) or not any(
+                    isinstance(x, ast.Call) and getattr(x.func, "attr", None) in ("on_message", "on_callback_query")
+                    for x in node.decorator_list):
+                continue
+            sources = set()
+            for decorator in node.decorator_list:
+                for call in ast.walk(decorator):
+                    state = _state_argument(call, "message_filter")
+                    if state is None:
+                        continue
+                    if any(x.arg == "is_regex" and getattr(x.value, "value", False) for x in call.keywords):
+                        sources.update(get_states().name(x) for x in get_states().descendants(state))
+                    else:
+                        sources.add(state)
+            targets = {x for call in node.body for x in map(_state_argument, ast.walk(call)) if x is not None}
+            for target in sorted(targets):
+                if target not in STATES:
+                    errors.append(f"{module.__name__}.{node.name}: unknown state {target!r}")
+                    continue
+                for source in sorted(sources) or [None]:
+                    if source is None and target not in ENTRY_STATES or \
+                            source is not None and not get_states().allows(source=source, target=target):
+                        errors.append(f"{module.__name__}.{node.name}: {source or '*'!r} -> {target!r}")
+    if errors:
+        raise ValueError(f"Undeclared FSM transitions: {'; '.join(errors)}")
+
+
+def _state_argument(node: ast.AST, name: str | None = None) -> str | None:
+    """
+    Получает состояние, переданное строкой в аргументе state вызова.
+
+    Параметры:
+        node (ast.AST): Узел синтаксического дерева.
+        name (str | None): Имя вызываемой функции или метода. Если не задано, учитываются все вызовы,
+            кроме message_filter.
+
+    Возвращает:
+        str | None: Состояние или None, если узел не является таким вызовом.
+
+    """
+    if not isinstance(node, ast.Call):
+        return None
+    func = getattr(node.func, "attr", None) or getattr(node.func, "id", None)
+    if (name is None and func == "message_filter") or (name is not None and func != name):
+        return None
+    for keyword in node.keywords:
+        if keyword.arg == "state" and isinstance(keyword.value, ast.Constant) and isinstance(keyword.value.value, str):
+            return keyword.value.value
+    return None
@@ -0,0 +1,753 @@
+"""
+    Модуль, содержащий хранилища FSMContext объектов и функцию выбора хранилища по конфигурации.
+
+    Все хранилища реализуют интерфейс BaseStorage:
+        - MemoryStorage: хранение в памяти процесса (данные теряются при перезапуске).
+        - SQLiteStorage: локальная база SQLite в режиме WAL для развертывания на одном узле.
+        - PostgresStorage: таблица fsm_context в основной базе данных PostgreSQL.
+        - RedisStorage: key-value хранилище, совместимое с протоколом Redis.
+
+    Хранилище выбирается параметром FSM_STORAGE в app/config.py.
+
+    Состояние сохраняется в виде целочисленного кода из реестра app/fsm_context/states.py,
+    дополнительные данные сериализуются в JSON кодировщиком msgspec.
+
+    Каждая запись обновляет время последнего изменения (last_touched), по которому delete_stale удаляет
+    контексты пользователей, не проявлявших активности дольше заданного времени.
+
+    Частичные изменения данных (set_keys, del_keys, append_to_list) в PostgreSQL выполняются операторами JSONB
+    (||, -, jsonb_set), поэтому объем записи пропорционален изменению, а не размеру документа. Остальные хранилища
+    применяют изменение к документу внутри своей транзакции.
+
+"""
+
+import sqlite3
+import threading
+import time
+from abc import ABC, abstractmethod
+from typing import Callable
+
+import msgspec
+import redis
+from sqlalchemy import text
+
+from app import config
+from app.db.db_config import Session
+from app.db.models import FSMContext
+from app.fsm_context.states import get_states
+
+EXISTING_BATCH_SIZE = 500
+
+_json_encoder = msgspec.json.Encoder()
+_json_decoder = msgspec.json.Decoder(dict)
+
+
+def dump_fsm_data(data: dict) -> str:
+    """
+    Сериализует дополнительные данные FSMContext объекта в JSON.
+
+    Параметры:
+        data (dict): Дополнительные данные.
+
+    Возвращает:
+        str: Строка JSON.
+
+    """
+    return _json_encoder.encode(data).decode()
+
+
+def load_fsm_data(raw: str | bytes | None) -> dict:
+    """
+    Десериализует дополнительные данные FSMContext объекта из JSON.
+
+    Параметры:
+        raw (str | bytes | None): Строка JSON или None.
+
+    Возвращает:
+        dict: Дополнительные данные.
+
+    """
+    return _json_decoder.decode(raw) if raw else dict()
+
+
+def merge_fsm_data(current: dict | None, data: dict | None, merge: bool) -> dict:
+    """
+    Вычисляет новые дополнительные данные FSMContext объекта.
+
+    Параметры:
+        current (dict | None): Текущие данные.
+        data (dict | None): Переданные данные или None, чтобы оставить текущие.
+        merge (bool): Флаг объединения переданных данных с текущими.
+
+    Возвращает:
+        dict: Новые дополнительные данные.
+
+    """
+    current = current or dict()
+    if data is None:
+        return current
+    return {**current, **data} if merge else dict(data)
+
+
+def del_fsm_keys(current: dict | None, keys: list[str]) -> dict:
+    """
+    Удаляет ключи из дополнительных данных FSMContext объекта.
+
+    Параметры:
+        current (dict | None): Текущие данные.
+        keys (list[str]): Удаляемые ключи.
+
+    Возвращает:
+        dict: Новые дополнительные данные.
+
+    """
+    return {key: value for key, value in (current or dict()).items() if key not in keys}
+
+
+def append_fsm_list(current: dict | None, key: str, values: list) -> dict:
+    """
+    Добавляет значения в конец списка, хранящегося в дополнительных данных FSMContext объекта.
+
+    Параметры:
+        current (dict | None): Текущие данные.
+        key (str): Ключ списка. Если значения по ключу нет или оно не является списком, создается новый список.
+        values (list): Добавляемые значения.
+
+    Возвращает:
+        dict: Новые дополнительные данные.
+
+    """
+    current = current or dict()
+    items = current.get(key)
+    return {**current, key: (list(items) if isinstance(items, list) else list()) + list(values)}
+
+
+class BaseStorage(ABC):
+    """
+    Интерфейс хранилища FSMContext объектов.
+
+    Methods:
+        load(telegram_id: int) -> FSMContext | None: Загружает FSMContext объект пользователя.
+        modify(telegram_id: int, func: Callable) -> FSMContext | None: Атомарно применяет функцию к FSMContext
+            объекту пользователя и сохраняет результат.
+        save(telegram_id: int, state: str | None, data: dict | None, merge: bool) -> FSMContext: Атомарно
+            обновляет состояние и данные пользователя и возвращает сохраненный объект.
+        set_keys(telegram_id: int, values: dict) -> None: Устанавливает значения ключей в данных пользователя.
+        del_keys(telegram_id: int, keys: list[str]) -> None: Удаляет ключи из данных пользователя.
+        append_to_list(telegram_id: int, key: str, values: list) -> None: Добавляет значения в список
+            в данных пользователя.
+        save_many(fsm_contexts: list[FSMContext]) -> None: Записывает несколько FSMContext объектов целиком.
+        delete(telegram_id: int) -> None: Удаляет FSMContext объект пользователя.
+        delete_stale(idle: float, limit: int) -> list[int]: Удаляет FSMContext объекты, не изменявшиеся
+            дольше заданного времени.
+        watermark() -> float: Получает наибольшее время последнего изменения FSMContext объектов.
+        touched_since(watermark: float) -> list[int]: Получает пользователей, чьи FSMContext объекты изменены
+            начиная с заданного времени.
+        existing(telegram_ids: list[int]) -> set[int]: Получает пользователей из списка, чьи FSMContext объекты
+            есть в хранилище.
+
+    """
+
+    @abstractmethod
+    def load(self, telegram_id: int) -> FSMContext | None:
+        """
+        Загружает FSMContext объект пользователя.
+
+        Параметры:
+            telegram_id (int): Идентификатор пользователя в Telegram.
+
+        Возвращает:
+            FSMContext | None: Объект FSMContext или None, если объект не найден.
+
+        """
+
+    @abstractmethod
+    def modify(self, telegram_id: int,
+               func: Callable[[FSMContext | None], FSMContext | None]) -> FSMContext | None:
+        """
+        Атомарно применяет функцию к FSMContext объекту пользователя и сохраняет результат.
+
+        Параметры:
+            telegram_id (int): Идентификатор пользователя в Telegram.
+            func (Callable[[FSMContext | None], FSMContext | None]): Функция, получающая текущий объект
+                (или None, если его нет) и возвращающая новый объект (или None, если сохранять ничего не нужно).
+
+        Возвращает:
+            FSMContext | None: Сохраненный объект FSMContext или None, если функция вернула None.
+
+        """
+
+    def save(self, telegram_id: int, state: str | None, data: dict | None, merge: bool) -> FSMContext:
+        """
+        Атомарно обновляет состояние и дополнительные данные пользователя, создавая запись при ее отсутствии.
+
+        Параметры:
+            telegram_id (int): Идентификатор пользователя в Telegram.
+            state (str | None): Новое состояние или None, чтобы оставить текущее.
+            data (dict | None): Дополнительные данные или None, чтобы оставить текущие.
+            merge (bool): Флаг объединения переданных данных с текущими.
+
+        Возвращает:
+            FSMContext: Сохраненный объект FSMContext.
+
+        """
+        return self.modify(telegram_id=telegram_id, func=lambda fsm_context: FSMContext(
+            telegram_id=telegram_id,
+            state=state if state is not None else fsm_context.state if fsm_context else str(),
+            data=merge_fsm_data(current=fsm_context.data if fsm_context else None, data=data, merge=merge)))
+
+    def set_keys(self, telegram_id: int, values: dict) -> None:
+        """
+        Устанавливает значения ключей в дополнительных данных пользователя, не затрагивая остальные ключи.
+
+        Параметры:
+            telegram_id (int): Идентификатор пользователя в Telegram.
+            values (dict): Устанавливаемые значения.
+
+        """
+        self.save(telegram_id=telegram_id, state=None, data=values, merge=True)
+
+    def del_keys(self, telegram_id: int, keys: list[str]) -> None:
+        """
+        Удаляет ключи из дополнительных данных пользователя.
+
+        Параметры:
+            telegram_id (int): Идентификатор пользователя в Telegram.
+            keys (list[str]): Удаляемые ключи.
+
+        """
+        self.modify(telegram_id=telegram_id, func=lambda fsm_context: FSMContext(
+            telegram_id=telegram_id, state=fsm_context.state,
+            data=del_fsm_keys(current=fsm_context.data, keys=keys)) if fsm_context else None)
+
+    def append_to_list(self, telegram_id: int, key: str, values: list) -> None:
+        """
+        Добавляет значения в конец списка в дополнительных данных пользователя.
+
+        Параметры:
+            telegram_id (int): Идентификатор пользователя в Telegram.
+            key (str): Ключ списка.
+            values (list): Добавляемые значения.
+
+        """
+        self.modify(telegram_id=telegram_id, func=lambda fsm_context: FSMContext(
+            telegram_id=telegram_id, state=fsm_context.state if fsm_context else str(),
+            data=append_fsm_list(current=fsm_context.data if fsm_context else None, key=key, values=values)))
+
+    @abstractmethod
+    def save_many(self, fsm_contexts: list[FSMContext]) -> None:
+        """
+        Записывает несколько FSMContext объектов целиком за одну операцию.
+
+        Параметры:
+            fsm_contexts (list[FSMContext]): Список объектов FSMContext.
+
+        """
+
+    @abstractmethod
+    def delete(self, telegram_id: int) -> None:
+        """
+        Удаляет FSMContext объект пользователя.
+
+        Параметры:
+            telegram_id (int): Идентификатор пользователя в Telegram.
+
+        """
+
+    @abstractmethod
+    def delete_stale(self, idle: float, limit: int) -> list[int]:
+        """
+        Удаляет не более limit FSMContext объектов, не изменявшихся дольше idle секунд, начиная с самых старых.
+
+        Параметры:
+            idle (float): Время простоя в секундах.
+            limit (int): Максимальное количество удаляемых объектов за один вызов.
+
+        Возвращает:
+            list[int]: Идентификаторы пользователей, чьи FSMContext объекты удалены.
+
+        """
+
+    @abstractmethod
+    def watermark(self) -> float:
+        """
+        Получает наибольшее время последнего изменения FSMContext объектов по часам хранилища.
+
+        Возвращает:
+            float: Время в формате Unix time или 0, если хранилище пусто.
+
+        """
+
+    @abstractmethod
+    def touched_since(self, watermark: float) -> list[int]:
+        """
+        Получает пользователей, чьи FSMContext объекты изменены начиная с заданного времени включительно:
+        изменение с тем же временем, что и watermark, могло быть сделано после его получения.
+
+        Параметры:
+            watermark (float): Время в формате Unix time, полученное методом watermark.
+
+        Возвращает:
+            list[int]: Идентификаторы пользователей.
+
+        """
+
+    @abstractmethod
+    def existing(self, telegram_ids: list[int]) -> set[int]:
+        """
+        Получает пользователей из списка, чьи FSMContext объекты есть в хранилище. Используется для поиска
+        объектов, удаленных после записи снимка (удаление не оставляет времени изменения).
+
+        Параметры:
+            telegram_ids (list[int]): Идентификаторы пользователей.
+
+        Возвращает:
+            set[int]: Идентификаторы пользователей, чьи объекты найдены.
+
+        """
+
+
+class MemoryStorage(BaseStorage):
+    """
+    Хранилище FSMContext объектов в памяти процесса.
+
+    Параметры:
+        __fsm_contexts (dict[int, FSMContext]): Словарь FSMContext объектов пользователей.
+        __last_touched (dict[int, float]): Время последнего изменения FSMContext объектов.
+        __lock (threading.RLock): Блокировка изменения и обхода словарей из нескольких потоков.
+
+    """
+
+    def __init__(self):
+        self.__fsm_contexts: dict[int, FSMContext] = dict()
+        self.__last_touched: dict[int, float] = dict()
+        self.__lock = threading.RLock()
+
+    def load(self, telegram_id: int) -> FSMContext | None:
+        fsm_context = self.__fsm_contexts.get(telegram_id)
+        if not fsm_context:
+            return None
+        return FSMContext(telegram_id=telegram_id, state=fsm_context.state, data=dict(fsm_context.data))
+
+    def modify(self, telegram_id: int,
+               func: Callable[[FSMContext | None], FSMContext | None]) -> FSMContext | None:
+        fsm_context = func(self.load(telegram_id=telegram_id))
+        if fsm_context is None:
+            return None
+        with self.__lock:
+            self.__fsm_contexts[telegram_id] = fsm_context
+            self.__last_touched[telegram_id] = time.time()
+        return FSMContext(telegram_id=telegram_id, state=fsm_context.state, data=dict(fsm_context.data))
+
+    def save_many(self, fsm_contexts: list[FSMContext]) -> None:
+        with self.__lock:
+            for fsm_context in fsm_contexts:
+                self.__fsm_contexts[fsm_context.telegram_id] = FSMContext(
+                    telegram_id=fsm_context.telegram_id, state=fsm_context.state, data=dict(fsm_context.data))
+                self.__last_touched[fsm_context.telegram_id] = time.time()
+
+    def delete(self, telegram_id: int) -> None:
+        with self.__lock:
+            self.__fsm_contexts.pop(telegram_id, None)
+            self.__last_touched.pop(telegram_id, None)
+
+    def delete_stale(self, idle: float, limit: int) -> list[int]:
+        with self.__lock:
+            deadline = time.time() - idle
+            telegram_ids = sorted(
+                (x for x, last_touched in self.__last_touched.items() if last_touched < deadline),
+                key=self.__last_touched.__getitem__)[:limit]
+            for telegram_id in telegram_ids:
+                self.delete(telegram_id=telegram_id)
+        return telegram_ids
+
+    def watermark(self) -> float:
+        with self.__lock:
+            return max(self.__last_touched.values(), default=0.0)
+
+    def touched_since(self, watermark: float) -> list[int]:
+        with self.__lock:
+            return [x for x, last_touched in self.__last_touched.items() if last_touched >= watermark]
+
+    def existing(self, telegram_ids: list[int]) -> set[int]:
+        return {x for x in telegram_ids if x in self.__fsm_contexts}
+
+
+class SQLiteStorage(BaseStorage):
+    """
+    Хранилище FSMContext объектов в локальной базе SQLite в режиме WAL.
+
+    Параметры:
+        __connection (sqlite3.Connection): Соединение с базой SQLite.
+        __lock (threading.Lock): Блокировка соединения для доступа из нескольких потоков.
+
+    """
+
+    def __init__(self, path: str):
+        """
+        Инициализация хранилища SQLite. Создает таблицу fsm_context, если она отсутствует.
+
+        Параметры:
+            path (str): Путь к файлу базы SQLite.
+
+        """
+        self.__lock = threading.Lock()
+        self.__connection = sqlite3.connect(path, check_same_thread=False, isolation_level=None)
+        self.__connection.execute("PRAGMA journal_mode=WAL")
+        self.__connection.execute("PRAGMA synchronous=NORMAL")
+        self.__connection.execute(
+            "CREATE TABLE IF NOT EXISTS fsm_context ("
+            "telegram_id INTEGER NOT NULL PRIMARY KEY, "
+            "state INTEGER NOT NULL DEFAULT 0, "
+            "data TEXT DEFAULT '{}', "
+            "last_touched REAL NOT NULL DEFAULT 0)"
+        )
+        if "last_touched" not in [x[1] for x in self.__connection.execute("PRAGMA table_info(fsm_context)")]:
+            self.__connection.execute("ALTER TABLE fsm_context ADD COLUMN last_touched REAL NOT NULL DEFAULT 0")
+        self.__connection.execute(
+            "CREATE INDEX IF NOT EXISTS fsm_context_last_touched_idx ON fsm_context (last_touched)")
+
+    def __select(self, telegram_id: int) -> FSMContext | None:
+        row = self.__connection.execute(
+            "SELECT telegram_id, state, data FROM fsm_context WHERE telegram_id=?", (telegram_id,)).fetchone()
+        if not row:
+            return None
+        return FSMContext(
+            telegram_id=row[0], state=get_states().decode(row[1]), data=load_fsm_data(row[2]))
+
+    def load(self, telegram_id: int) -> FSMContext | None:
+        with self.__lock:
+            return self.__select(telegram_id=telegram_id)
+
+    def modify(self, telegram_id: int,
+               func: Callable[[FSMContext | None], FSMContext | None]) -> FSMContext | None:
+        with self.__lock:
+            self.__connection.execute("BEGIN IMMEDIATE")
+            try:
+                fsm_context = func(self.__select(telegram_id=telegram_id))
+                if fsm_context is not None:
+                    self.__connection.execute(
+                        "INSERT INTO fsm_context (telegram_id, state, data, last_touched) VALUES (?, ?, ?, ?) "
+                        "ON CONFLICT (telegram_id) DO UPDATE SET "
+                        "state=excluded.state, data=excluded.data, last_touched=excluded.last_touched",
+                        (telegram_id, get_states().code(fsm_context.state), dump_fsm_data(fsm_context.data),
+                         time.time()))
+                self.__connection.execute("COMMIT")
+            except Exception:
+                self.__connection.execute("ROLLBACK")
+                raise
+        return fsm_context
+
+    def save_many(self, fsm_contexts: list[FSMContext]) -> None:
+        with self.__lock:
+            self.__connection.execute("BEGIN IMMEDIATE")
+            try:
+                self.__connection.executemany(
+                    "INSERT INTO fsm_context (telegram_id, state, data, last_touched) VALUES (?, ?, ?, ?) "
+                    "ON CONFLICT (telegram_id) DO UPDATE SET "
+                    "state=excluded.state, data=excluded.data, last_touched=excluded.last_touched",
+                    [(x.telegram_id, get_states().code(x.state), dump_fsm_data(x.data), time.time())
+                     for x in fsm_contexts])
+                self.__connection.execute("COMMIT")
+            except Exception:
+                self.__connection.execute("ROLLBACK")
+                raise
+
+    def delete(self, telegram_id: int) -> None:
+        with self.__lock:
+            self.__connection.execute("DELETE FROM fsm_context WHERE telegram_id=?", (telegram_id,))
+
+    def delete_stale(self, idle: float, limit: int) -> list[int]:
+        with self.__lock:
+            rows = self.__connection.execute(
+                "DELETE FROM fsm_context WHERE telegram_id IN ("
+                "SELECT telegram_id FROM fsm_context WHERE last_touched < ? ORDER BY last_touched LIMIT ?"
+                ") RETURNING telegram_id", (time.time() - idle, limit)).fetchall()
+        return [x[0] for x in rows]
+
+    def watermark(self) -> float:
+        with self.__lock:
+            return self.__connection.execute("SELECT COALESCE(MAX(last_touched), 0) FROM fsm_context").fetchone()[0]
+
+    def touched_since(self, watermark: float) -> list[int]:
+        with self.__lock:
+            rows = self.__connection.execute(
+                "SELECT telegram_id FROM fsm_context WHERE last_touched >= ?", (watermark,)).fetchall()
+        return [x[0] for x in rows]
+
+    def existing(self, telegram_ids: list[int]) -> set[int]:
+        found = set()
+        with self.__lock:
+            for start in range(0, len(telegram_ids), EXISTING_BATCH_SIZE):
+                batch = telegram_ids[start:start + EXISTING_BATCH_SIZE]
+                found.update(x[0] for x in self.__connection.execute(
+                    f"SELECT telegram_id FROM fsm_context WHERE telegram_id IN ({', '.join('?' * len(batch))})",
+                    batch))
+        return found
+
+
+class PostgresStorage(BaseStorage):
+    """
+    Хранилище FSMContext объектов в таблице fsm_context основной базы данных PostgreSQL.
+
+    Каждое изменение выполняется одним запросом: INSERT ... ON CONFLICT DO UPDATE ... RETURNING для смены состояния
+    и операторы JSONB (||, -, jsonb_set) для частичного изменения данных.
+
+    """
+
+    def load(self, telegram_id: int) -> FSMContext | None:
+        with Session() as session:
+            query = text("SELECT telegram_id, state, data FROM fsm_context WHERE telegram_id=:telegram_id")
+            fsm_context = session.execute(query, {"telegram_id": telegram_id}).first()
+        if not fsm_context:
+            return None
+        return FSMContext(
+            telegram_id=fsm_context.telegram_id, state=get_states().decode(fsm_context.state), data=fsm_context.data)
+
+    def modify(self, telegram_id: int,
+               func: Callable[[FSMContext | None], FSMContext | None]) -> FSMContext | None:
+        with Session() as session:
+            query = text("SELECT telegram_id, state, data FROM fsm_context WHERE telegram_id=:telegram_id FOR UPDATE")
+            row = session.execute(query, {"telegram_id": telegram_id}).first()
+            fsm_context = func(FSMContext(
+                telegram_id=row.telegram_id, state=get_states().decode(row.state), data=row.data) if row else None)
+            if fsm_context is not None:
+                session.execute(text(
+                    "INSERT INTO fsm_context (telegram_id, state, data) VALUES (:telegram_id, :state, :data) "
+                    "ON CONFLICT (telegram_id) DO UPDATE SET state=EXCLUDED.state, data=EXCLUDED.data, "
+                    "last_touched=CURRENT_TIMESTAMP"
+                ), {"telegram_id": telegram_id, "state": get_states().code(fsm_context.state),
+                    "data": dump_fsm_data(fsm_context.data)})
+            session.commit()
+        return fsm_context
+
+    def save(self, telegram_id: int, state: str | None, data: dict | None, merge: bool) -> FSMContext:
+        query = ["last_touched=CURRENT_TIMESTAMP"]
+        if state is not None:
+            query.append("state=EXCLUDED.state")
+        if data is not None:
+            query.append("data=COALESCE(fsm_context.data, '{}') || EXCLUDED.data" if merge else "data=EXCLUDED.data")
+        with Session() as session:
+            fsm_context = session.execute(text(
+                "INSERT INTO fsm_context (telegram_id, state, data) VALUES (:telegram_id, :state, :data) "
+                f"ON CONFLICT (telegram_id) DO UPDATE SET {', '.join(query)} "
+                "RETURNING telegram_id, state, data"
+            ), {"telegram_id": telegram_id, "state": get_states().code(state if state is not None else str()),
+                "data": dump_fsm_data(data if data is not None else dict())}).one()
+            session.commit()
+        return FSMContext(
+            telegram_id=fsm_context.telegram_id, state=get_states().decode(fsm_context.state), data=fsm_context.data)
+
+    def set_keys(self, telegram_id: int, values: dict) -> None:
+        with Session() as session:
+            session.execute(text(
+                "INSERT INTO fsm_context (telegram_id, state, data) VALUES (:telegram_id, 0, :values) "
+                "ON CONFLICT (telegram_id) DO UPDATE SET data=COALESCE(fsm_context.data, '{}') || EXCLUDED.data, "
+                "last_touched=CURRENT_TIMESTAMP"
+            ), {"telegram_id": telegram_id, "values": dump_fsm_data(values)})
+            session.commit()
+
+    def del_keys(self, telegram_id: int, keys: list[str]) -> None:
+        with Session() as session:
+            session.execute(text(
+                "UPDATE fsm_context SET data=data - CAST(:keys AS TEXT[]), last_touched=CURRENT_TIMESTAMP "
+                "WHERE telegram_id=:telegram_id"
+            ), {"telegram_id": telegram_id, "keys": list(keys)})
+            session.commit()
+
+    def append_to_list(self, telegram_id: int, key: str, values: list) -> None:
+        with Session() as session:
+            session.execute(text(
+                "INSERT INTO fsm_context (telegram_id, state, data) "
+                "VALUES (:telegram_id, 0, jsonb_build_object(CAST(:key AS TEXT), CAST(:values AS JSONB))) "
+                "ON CONFLICT (telegram_id) DO UPDATE SET data=jsonb_set("
+                "COALESCE(fsm_context.data, '{}'), ARRAY[CAST(:key AS TEXT)], "
+                "(CASE WHEN jsonb_typeof(fsm_context.data -> CAST(:key AS TEXT)) = 'array' "
+                "THEN fsm_context.data -> CAST(:key AS TEXT) ELSE '[]' END) || CAST(:values AS JSONB)), "
+                "last_touched=CURRENT_TIMESTAMP"
+            ), {"telegram_id": telegram_id, "key": key, "values": dump_fsm_data(list(values))})
+            session.commit()
+
+    def save_many(self, fsm_contexts: list[FSMContext]) -> None:
+        values = list()
+        params = dict()
+        for num, fsm_context in enumerate(fsm_contexts):
+            values.append(f"(:telegram_id_{num}, :state_{num}, :data_{num})")
+            params[f"telegram_id_{num}"] = fsm_context.telegram_id
+            params[f"state_{num}"] = get_states().code(fsm_context.state)
+            params[f"data_{num}"] = dump_fsm_data(fsm_context.data)
+        with Session() as session:
+            session.execute(text(
+                f"INSERT INTO fsm_context (telegram_id, state, data) VALUES {', '.join(values)} "
+                "ON CONFLICT (telegram_id) DO UPDATE SET state=EXCLUDED.state, data=EXCLUDED.data, "
+                "last_touched=CURRENT_TIMESTAMP"
+            ), params)
+            session.commit()
+
+    def delete(self, telegram_id: int) -> None:
+        with Session() as session:
+            query = text("DELETE FROM fsm_context WHERE telegram_id=:telegram_id")
+            session.execute(query, {"telegram_id": telegram_id})
+            session.commit()
+
+    def delete_stale(self, idle: float, limit: int) -> list[int]:
+        with Session() as session:
+            rows = session.execute(text(
+                "DELETE FROM fsm_context WHERE telegram_id IN ("
+                "SELECT telegram_id FROM fsm_context "
+                "WHERE last_touched < CURRENT_TIMESTAMP - make_interval(secs => :idle) "
+                "ORDER BY last_touched LIMIT :limit FOR UPDATE SKIP LOCKED"
+                ") RETURNING telegram_id"
+            ), {"idle": idle, "limit": limit}).all()
+            session.commit()
+        return [x.telegram_id for x in rows]
+
+    def watermark(self) -> float:
+        with Session() as session:
+            return float(session.execute(text(
+                "SELECT COALESCE(EXTRACT(EPOCH FROM MAX(last_touched)), 0) FROM fsm_context")).scalar_one())
+
+    def touched_since(self, watermark: float) -> list[int]:
+        with Session() as session:
+            rows = session.execute(text(
+                "SELECT telegram_id FROM fsm_context WHERE last_touched >= to_timestamp(:watermark)"
+            ), {"watermark": watermark}).all()
+        return [x.telegram_id for x in rows]
+
+    def existing(self, telegram_ids: list[int]) -> set[int]:
+        found = set()
+        with Session() as session:
+            for start in range(0, len(telegram_ids), EXISTING_BATCH_SIZE):
+                found.update(x.telegram_id for x in session.execute(text(
+                    "SELECT telegram_id FROM fsm_context WHERE telegram_id = ANY(:telegram_ids)"
+                ), {"telegram_ids": telegram_ids[start:start + EXISTING_BATCH_SIZE]}).all())
+        return found
+
+
+class RedisStorage(BaseStorage):
+    """
+    Хранилище FSMContext объектов в key-value базе, совместимой с протоколом Redis.
+
+    Каждый FSMContext объект хранится в хэше fsm_context:{telegram_id} с полями state и data.
+    Время последнего изменения хранится в упорядоченном множестве fsm_context:last_touched.
+    Объединение данных и удаление неактивных контекстов выполняются в транзакциях WATCH/MULTI/EXEC.
+
+    Параметры:
+        __client (redis.Redis): Клиент Redis.
+
+    """
+
+    def __init__(self, url: str, client: redis.Redis | None = None):
+        """
+        Инициализация хранилища Redis.
+
+        Параметры:
+            url (str): Адрес подключения к Redis, например redis://localhost:6379/0.
+            client (redis.Redis | None): Готовый клиент с decode_responses=True, например совместимый сервер
+                в памяти для тестов и бенчмарков. Если задан, url не используется.
+
+        """
+        self.__client = client if client is not None else redis.Redis.from_url(url, decode_responses=True)
+
+    __last_touched_key = "fsm_context:last_touched"
+
+    @staticmethod
+    def __key(telegram_id: int) -> str:
+        return f"fsm_context:{telegram_id}"
+
+    @staticmethod
+    def __parse(telegram_id: int, fields: dict) -> FSMContext | None:
+        if not fields:
+            return None
+        return FSMContext(
+            telegram_id=telegram_id, state=get_states().decode(fields.get("state")),
+            data=load_fsm_data(fields.get("data")))
+
+    def load(self, telegram_id: int) -> FSMContext | None:
+        return self.__parse(telegram_id=telegram_id, fields=self.__client.hgetall(self.__key(telegram_id)))
+
+    def modify(self, telegram_id: int,
+               func: Callable[[FSMContext | None], FSMContext | None]) -> FSMContext | None:
+        key = self.__key(telegram_id)
+
+        def apply(pipe: redis.client.Pipeline) -> FSMContext | None:
+            fsm_context = func(self.__parse(telegram_id=telegram_id, fields=pipe.hgetall(key)))
+            pipe.multi()
+            if fsm_context is not None:
+                pipe.hset(key, mapping={
+                    "state": get_states().code(fsm_context.state), "data": dump_fsm_data(fsm_context.data)})
+                pipe.zadd(self.__last_touched_key, {str(telegram_id): time.time()})
+            return fsm_context
+
+        return self.__client.transaction(apply, key, value_from_callable=True)
+
+    def save_many(self, fsm_contexts: list[FSMContext]) -> None:
+        with self.__client.pipeline(transaction=True) as pipe:
+            for fsm_context in fsm_contexts:
+                pipe.hset(self.__key(fsm_context.telegram_id), mapping={
+                    "state": get_states().code(fsm_context.state), "data": dump_fsm_data(fsm_context.data)})
+            if fsm_contexts:
+                pipe.zadd(self.__last_touched_key, {str(x.telegram_id): time.time() for x in fsm_contexts})
+            pipe.execute()
+
+    def delete(self, telegram_id: int) -> None:
+        with self.__client.pipeline(transaction=True) as pipe:
+            pipe.delete(self.__key(telegram_id))
+            pipe.zrem(self.__last_touched_key, str(telegram_id))
+            pipe.execute()
+
+    def delete_stale(self, idle: float, limit: int) -> list[int]:
+        deadline = time.time() - idle
+        candidates = [int(x) for x in self.__client.zrangebyscore(
+            self.__last_touched_key, "-inf", deadline, start=0, num=limit)]
+        if not candidates:
+            return list()
+
+        def apply(pipe: redis.client.Pipeline) -> list[int]:
+            # Время изменения перечитывается под WATCH: контекст, измененный после выборки, не удаляется,
+            # а запись во время транзакции изменяет хэш контекста и повторяет ее
+            scores = [pipe.zscore(self.__last_touched_key, str(x)) for x in candidates]
+            telegram_ids = [x for x, score in zip(candidates, scores) if score is not None and score <= deadline]
+            pipe.multi()
+            if telegram_ids:
+                pipe.delete(*[self.__key(x) for x in telegram_ids])
+                pipe.zrem(self.__last_touched_key, *[str(x) for x in telegram_ids])
+            return telegram_ids
+
+        return self.__client.transaction(apply, *[self.__key(x) for x in candidates], value_from_callable=True)
+
+    def watermark(self) -> float:
+        last = self.__client.zrevrange(self.__last_touched_key, 0, 0, withscores=True)
+        return last[0][1] if last else 0.0
+
+    def touched_since(self, watermark: float) -> list[int]:
+        return [int(x) for x in self.__client.zrangebyscore(self.__last_touched_key, watermark, "+inf")]
+
+    def existing(self, telegram_ids: list[int]) -> set[int]:
+        found = set()
+        for start in range(0, len(telegram_ids), EXISTING_BATCH_SIZE):
+            batch = telegram_ids[start:start + EXISTING_BATCH_SIZE]
+            with self.__client.pipeline(transaction=False) as pipe:
+                for telegram_id in batch:
+                    pipe.exists(self.__key(telegram_id))
+                found.update(x for x, exists in zip(batch, pipe.execute()) if exists)
+        return found
+
+
+def create_storage() -> BaseStorage:
+    """
+    Создает хранилище FSMContext объектов, указанное в параметре FSM_STORAGE конфигурации.
+
+    Возвращает:
+        BaseStorage: Объект хранилища.
+
+    """
+    if config.FSM_STORAGE == "memory":
+        return MemoryStorage()
+    if config.FSM_STORAGE == "sqlite":
+        return SQLiteStorage(path=config.FSM_SQLITE_PATH)
+    if config.FSM_STORAGE == "redis":
+        return RedisStorage(url=config.FSM_REDIS_URL)
+    if config.FSM_STORAGE == "postgres":
+        return PostgresStorage()
+    raise ValueError(f"Unknown FSM storage: {config.FSM_STORAGE}")
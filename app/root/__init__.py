@@ -1 +1,4 @@
 from . import handlers
+from app.fsm_context.states import validate_handlers
+
+validate_handlers(handlers)
@@ -2,30 +2,21 @@
 Модуль для отправки стартового сообщения бота.
 
 Этот модуль содержит код для отправки стартового сообщения бота в зависимости от состояния пользователя.
-
-Параметры:
-    menu_owner_keyboard (list): Клавиатура для владельца аккаунта.
-    menu_not_owner_keyboard (list): Клавиатура для не-владельца аккаунта.
+Клавиатуры стартового сообщения и главного меню берутся из кэша экранов (app.root.screens).
 
 """
 
+import asyncio
+
 from pyrogram import Client, types
 
 from app.auth_manager import auth_controller
+from app.bot_init.router import get_callback_router
 from app.db.models import Users
 from app.fsm_context.fsm_context import get_fsm_context
+from app.root.screens import get_screen_renderer
 from app.utils import TelegramUtils
 
-menu_owner_keyboard = [
-    [types.KeyboardButton(text="Меню просмотра задач")],
-    [types.KeyboardButton(text="Изменение настроек")],
-    [types.KeyboardButton(text="Выйти с аккаунта"), types.KeyboardButton(text="Удалить аккаунт")]
-]
-menu_not_owner_keyboard = [
-    [types.KeyboardButton(text="Меню просмотра задач")],
-    [types.KeyboardButton(text="Выйти с аккаунта")]
-]
-
 
 async def send_message_start(
         _: Client, message: types.Message | types.CallbackQuery, owner_telegram_id: int = None) -> None:
@@ -41,19 +32,15 @@ async def send_message_start(
         None
 
     """
-    keyboard = list()
     if isinstance(message, types.CallbackQuery):
-        owner_telegram_id = int(message.data.split(":")[-1])
+        owner_telegram_id = get_callback_router().params(message=message).owner_telegram_id
     else:
         state_telegram_id = get_fsm_context().get_data(telegram_id=message.from_user.id).get('telegram_id')
         owner_telegram_id = (
             owner_telegram_id if owner_telegram_id else state_telegram_id if
             state_telegram_id else message.from_user.id)
     data = dict()
-    data["list_messages_delete_ids"] = get_fsm_context().get_data(
-        telegram_id=message.from_user.id).get('list_messages_delete_ids')
-    get_fsm_context().clear(telegram_id=message.from_user.id)
-    user: Users | None = auth_controller.get_user(owner_telegram_id=owner_telegram_id)
+    user: Users | None = await asyncio.to_thread(auth_controller.get_user, owner_telegram_id=owner_telegram_id)
     if not user or not user.is_login:
         text_message = (
             f"Привет {message.from_user.first_name}.\n\n"
@@ -61,12 +48,7 @@ async def send_message_start(
             f"{('пройдите регистрацию, нажав на кнопку \'Регистрация\', или\n' if not user else '')}"
             "пройдите авторизацию, нажав на кнопку 'Авторизация'"
         )
-        keyboard.append([types.KeyboardButton(text="Авторизация")])
-        if not user:
-            keyboard.append([types.KeyboardButton(text="Регистрация")])
-        else:
-            keyboard.append([types.KeyboardButton(text="Удалить аккаунт")])
-        reply_markup = types.ReplyKeyboardMarkup(keyboard=keyboard)
+        reply_markup = get_screen_renderer().markup(screen="start_guest" if not user else "start_registered")
         state = "registration_authorization"
     else:
         is_owner = auth_controller.check_user_is_owner(
@@ -76,11 +58,9 @@ async def send_message_start(
             f"Привет {user.username}.\n\n"
             "Ты находишься в главном меню приложения;\n"
             "Для продолжения работы с ботом, нажмите на нижние кнопки")
-        keyboard = menu_owner_keyboard if is_owner else menu_not_owner_keyboard
-        reply_markup = types.ReplyKeyboardMarkup(keyboard=keyboard)
+        reply_markup = get_screen_renderer().markup(screen="main_menu", is_owner=is_owner)
         state = "main_menu"
         data["owner_telegram_id"] = int(owner_telegram_id)
-    get_fsm_context().update_data(telegram_id=message.from_user.id, data=data)
-    get_fsm_context().update_state(telegram_id=message.from_user.id, state=state)
-    telegram_utils = TelegramUtils(text=text_message, reply_markup=reply_markup, message=message)
+    await get_fsm_context().transition(telegram_id=message.from_user.id, state=state, data=data, merge=False)
+    telegram_utils = await TelegramUtils.create(text=text_message, reply_markup=reply_markup, message=message)
     await telegram_utils.send_messages()
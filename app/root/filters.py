@@ -13,6 +13,7 @@ from pyrogram import filters, types
 from pyrogram.filters import Filter
 
 from app.fsm_context.fsm_context import get_fsm_context
+from app.fsm_context.states import get_states
 
 
 class Filters:
@@ -57,8 +58,10 @@ class Filters:
         Приватный метод для создания динамического фильтра Pyrogram на основе состояния FSM.
 
         Параметры:
-            state (str): Состояние конечного автомата (FSM).
-            is_regex (bool): Флаг, указывающий, является ли состояние регулярным выражением.
+            state (str): Состояние конечного автомата (FSM), объявленное в реестре состояний. Необъявленное
+                состояние вызывает ValueError при создании фильтра, то есть при запуске бота.
+            is_regex (bool): Флаг, указывающий, что фильтр также пропускает все вложенные состояния
+                (например, "tasks" пропускает "tasks:view").
 
         Возвращает:
             Filter: Динамический фильтр Pyrogram.
@@ -66,13 +69,10 @@ class Filters:
         """
 
         async def __func(flt: filters, __, message: types.Message | types.CallbackQuery) -> bool:
-            user_fsm_state_object = get_fsm_context().get_list_fsm_contexts().get(message.from_user.id)
-            user_state = str() if not user_fsm_state_object else user_fsm_state_object.state
-            if is_regex:
-                return flt.state in user_state
-            return flt.state == user_state
+            return get_fsm_context().get_state_code(telegram_id=message.from_user.id) in flt.state_codes
 
-        return filters.create(__func, state=state, is_regex=is_regex)
+        state_codes = get_states().descendants(state) if is_regex else frozenset({get_states().code(state)})
+        return filters.create(__func, state=state, is_regex=is_regex, state_codes=state_codes)
 
 
 _filters: Filters = Filters()
@@ -6,10 +6,13 @@
 
 """
 
+import asyncio
+
 from pyrogram import filters, Client, types
 
 from app.auth_manager import auth_controller
 from app.bot_init.bot_init import client_bot
+from app.bot_init.router import get_callback_router
 from app.db.models import Users
 from app.fsm_context.fsm_context import get_fsm_context
 from app.root.controller import send_message_start
@@ -18,7 +21,7 @@ from app.tasks_manager import tasks_controller
 from app.utils import TelegramUtils
 
 
-@client_bot.on_callback_query(filters.regex("main_menu"))
+@client_bot.on_callback_query(get_callback_router().route("main_menu:{owner_telegram_id}"))
 @client_bot.on_message(filters.text & (filters.regex("В главное меню") | filters.command("start")))
 async def handler_start(_: Client, message: types.Message | types.CallbackQuery, owner_telegram_id: int = None) -> None:
     """
@@ -51,7 +54,7 @@ async def confirm_delete_account_user(_: Client, message: types.Message) -> None
     """
     data = get_fsm_context().get_data(telegram_id=message.from_user.id)
     reply_markup = None
-    user: Users | None = auth_controller.get_user(owner_telegram_id=message.from_user.id)
+    user: Users | None = await asyncio.to_thread(auth_controller.get_user, owner_telegram_id=message.from_user.id)
     if not user or (data.get('owner_telegram_id') and auth_controller.check_user_is_owner(
             user_telegram_id=message.from_user.id, owner_telegram_id=data.get('owner_telegram_id'))):
         text_message = "Вы не имеете доступ к данному функционалу"
@@ -62,18 +65,20 @@ async def confirm_delete_account_user(_: Client, message: types.Message) -> None
         owner_telegram_id = data.get('owner_telegram_id') if data.get('owner_telegram_id') else message.from_user.id
         inline_keyboard = list()
         inline_keyboard.append([types.InlineKeyboardButton(
-            text="Удалить аккаунт", callback_data=f"delete_account:{owner_telegram_id}")])
+            text="Удалить аккаунт", callback_data=get_callback_router().pack(
+                "delete_account:{owner_telegram_id}", owner_telegram_id=owner_telegram_id))])
         inline_keyboard.append([types.InlineKeyboardButton(
-            text="Вернуться в главное меню", callback_data=f"main_menu:{owner_telegram_id}")])
+            text="Вернуться в главное меню", callback_data=get_callback_router().pack(
+                "main_menu:{owner_telegram_id}", owner_telegram_id=owner_telegram_id))])
         reply_markup = types.InlineKeyboardMarkup(inline_keyboard=inline_keyboard)
-    get_fsm_context().update_state(telegram_id=message.from_user.id, state="main_menu")
-    telegram_utils = TelegramUtils(text=text_message, reply_markup=reply_markup, message=message)
+    await get_fsm_context().update_state(telegram_id=message.from_user.id, state="main_menu")
+    telegram_utils = await TelegramUtils.create(text=text_message, reply_markup=reply_markup, message=message)
     await telegram_utils.send_messages()
     if not reply_markup:
         await send_message_start(_=_, message=message)
 
 
-@client_bot.on_callback_query(filters.regex("delete_account:") & (
+@client_bot.on_callback_query(get_callback_router().route("delete_account:{owner_telegram_id}") & (
         get_filters().message_filter(state="registration_authorization")
         | get_filters().message_filter(state="main_menu")))
 async def delete_account_user(client: Client, message: types.CallbackQuery) -> None:
@@ -88,22 +93,18 @@ async def delete_account_user(client: Client, message: types.CallbackQuery) -> N
         None
 
     """
-    owner_telegram_id = int(message.data.split(":")[-1])
+    owner_telegram_id = get_callback_router().params(message=message).owner_telegram_id
     if auth_controller.check_user_is_owner(user_telegram_id=message.from_user.id, owner_telegram_id=owner_telegram_id):
-        auth_controller.delete_user(owner_telegram_id=owner_telegram_id)
-        tasks_controller.delete_task(owner_telegram_id=owner_telegram_id)
+        await asyncio.to_thread(auth_controller.delete_user, owner_telegram_id=owner_telegram_id)
+        await asyncio.to_thread(tasks_controller.delete_task, owner_telegram_id=owner_telegram_id)
         text_message = (
             "Привязанный аккаунт был успешно удален"
         )
-        data = dict()
-        data["list_messages_delete_ids"] = get_fsm_context().get_data(
-            telegram_id=message.from_user.id).get('list_messages_delete_ids')
-        get_fsm_context().clear(telegram_id=message.from_user.id)
-        get_fsm_context().update_data(telegram_id=message.from_user.id, data=data)
+        await get_fsm_context().transition(telegram_id=message.from_user.id, state=str(), data=dict(), merge=False)
     else:
         text_message = (
             "Вы не имеете доступ к данному действию"
         )
-    telegram_utils = TelegramUtils(text=text_message, message=message)
+    telegram_utils = await TelegramUtils.create(text=text_message, message=message)
     await telegram_utils.send_messages()
     return await handler_start(_=client, message=message)
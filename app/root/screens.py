@@ -0,0 +1,355 @@
+"""
+Модуль, содержащий шаблоны экранов меню и класс ScreenRenderer - кэш готовых клавиатур экранов.
+
+Экран - текст и клавиатура меню, описанные один раз в виде шаблона (SCREENS). Между показами экрана меняются
+только идентификатор владельца аккаунта в данных кнопок и набор кнопок, доступных только владельцу, поэтому
+ScreenRenderer собирает клавиатуру один раз для ключа (экран, владелец, является ли пользователь владельцем)
+и хранит ее в LRU-кэше. При сборке шаблона заранее определяется, от чего зависит экран: для экранов без кнопок
+владельца или без идентификатора владельца в данных кнопок эти части ключа не учитываются.
+
+Готовые клавиатуры неизменяемы (Frozen-классы): строки хранятся в кортежах, а изменение атрибутов вызывает
+AttributeError, поэтому один объект безопасно отдается всем обработчикам.
+
+Параметры:
+    SCREENS (dict[str, Screen]): Шаблоны экранов по названиям.
+    _screen_renderer (ScreenRenderer): Статический объект ScreenRenderer.
+
+"""
+
+from collections import OrderedDict
+
+import msgspec
+from pyrogram import types
+
+from app import config
+from app.bot_init.router import get_callback_router
+
+
+class Frozen:
+    """
+    Класс-примесь, запрещающий изменение атрибутов объекта Pyrogram после вызова freeze().
+
+    Methods:
+        freeze() -> Frozen: Запрещает изменение атрибутов объекта.
+
+    """
+
+    def freeze(self) -> "Frozen":
+        """
+        Запрещает изменение атрибутов объекта.
+
+        Возвращает:
+            Frozen: Этот же объект.
+
+        """
+        self.__dict__["_frozen"] = True
+        return self
+
+    def __setattr__(self, name, value):
+        if self.__dict__.get("_frozen"):
+            raise AttributeError(f"{type(self).__name__} is immutable")
+        super().__setattr__(name, value)
+
+    def __delattr__(self, name):
+        if self.__dict__.get("_frozen"):
+            raise AttributeError(f"{type(self).__name__} is immutable")
+        super().__delattr__(name)
+
+
+class FrozenInlineKeyboardButton(Frozen, types.InlineKeyboardButton):
+    """
+    Неизменяемая кнопка инлайн-клавиатуры.
+
+    """
+
+
+class FrozenInlineKeyboardMarkup(Frozen, types.InlineKeyboardMarkup):
+    """
+    Неизменяемая инлайн-клавиатура (строки - кортежи).
+
+    """
+
+
+class FrozenKeyboardButton(Frozen, types.KeyboardButton):
+    """
+    Неизменяемая кнопка обычной клавиатуры.
+
+    """
+
+
+class FrozenReplyKeyboardMarkup(Frozen, types.ReplyKeyboardMarkup):
+    """
+    Неизменяемая обычная клавиатура (строки - кортежи).
+
+    """
+
+
+class Button(msgspec.Struct, frozen=True):
+    """
+    Шаблон кнопки.
+
+    Параметры:
+        text (str): Текст кнопки.
+        route (str | None): Шаблон маршрута коллбэк-запроса (None - кнопка обычной клавиатуры).
+        owner_only (bool): Флаг кнопки, доступной только владельцу аккаунта.
+
+    """
+
+    text: str
+    route: str | None = None
+    owner_only: bool = False
+
+
+class Screen(msgspec.Struct, frozen=True):
+    """
+    Шаблон экрана.
+
+    Параметры:
+        rows (tuple[tuple[Button, ...], ...]): Строки кнопок.
+        text (str | None): Текст экрана (None - экран используется только как клавиатура).
+        reply (bool): Флаг обычной клавиатуры (ReplyKeyboardMarkup) вместо инлайн-клавиатуры.
+
+    """
+
+    rows: tuple[tuple[Button, ...], ...]
+    text: str | None = None
+    reply: bool = False
+
+
+TASKS_BACK_ROWS: tuple[tuple[Button, ...], ...] = (
+    (Button(text="Вернуться назад", route="menu_tasks:{owner_telegram_id}"),),
+    (Button(text="Вернуться в главное меню", route="main_menu:{owner_telegram_id}"),),
+)
+
+SCREENS: dict[str, Screen] = {
+    "start_guest": Screen(reply=True, rows=(
+        (Button(text="Авторизация"),),
+        (Button(text="Регистрация"),),
+    )),
+    "start_registered": Screen(reply=True, rows=(
+        (Button(text="Авторизация"),),
+        (Button(text="Удалить аккаунт"),),
+    )),
+    "main_menu": Screen(reply=True, rows=(
+        (Button(text="Меню просмотра задач"),),
+        (Button(text="Изменение настроек", owner_only=True),),
+        (Button(text="Выйти с аккаунта"), Button(text="Удалить аккаунт", owner_only=True)),
+    )),
+    "tasks_menu": Screen(
+        text=(
+            "ВНИМАНИЕ!!! ТОЛЬКО ВЛАДЕЛЕЦ АККАУНТА "
+            "ИМЕЕТ ВОЗМОЖНОСТЬ СОЗДАВАТЬ НОВЫЕ ЗАДАЧИ;\n"
+            "Данное меню позволяет выполнить следующие действия:\n\n"
+            "1) Создать новую задачу;\n"
+            "2) Посмотреть созданные задачи;\n"
+            "3) Редактировать созданные задачи;\n"
+        ),
+        rows=(
+            (Button(text="Создать новую задачу", route="tasks:create_task:{owner_telegram_id}", owner_only=True),),
+            (Button(text="Просмотреть созданные задачи", route="tasks:view_tasks:{owner_telegram_id}"),),
+            (Button(text="Редактировать созданные задачи", route="tasks:edit_tasks:{owner_telegram_id}"),),
+            (Button(text="Вернуться в главное меню", route="main_menu:{owner_telegram_id}"),),
+        )),
+    "tasks_back": Screen(rows=TASKS_BACK_ROWS),
+    "tasks_view_back": Screen(rows=(
+        (Button(text="Вернуться назад", route="tasks:view_tasks:{owner_telegram_id}"),),
+        (Button(text="Вернуться в главное меню", route="main_menu:{owner_telegram_id}"),),
+    )),
+    "tasks_edit_back": Screen(rows=(
+        (Button(text="Вернуться назад", route="tasks:menu_edit:{owner_telegram_id}"),),
+        (Button(text="Вернуться в главное меню", route="main_menu:{owner_telegram_id}"),),
+    )),
+    "view_tasks": Screen(
+        text=(
+            "В данном меню вы можете:\n\n"
+            "1) Просмотреть все действующие задачи\n"
+            "2) Просмотреть все выполненные задачи\n"
+            "3) Просмотреть все просроченные задачи\n"
+            "4) Просмотреть все задачи\n"
+        ),
+        rows=(
+            (Button(text="Просмотреть все действующие задачи", route="tasks:view_current_tasks:{owner_telegram_id}"),),
+            (Button(text="Просмотреть все выполненные задачи",
+                    route="tasks:view_completed_tasks:{owner_telegram_id}"),),
+            (Button(text="Просмотреть все просроченные задачи", route="tasks:view_overdue_tasks:{owner_telegram_id}"),),
+            (Button(text="Просмотреть все задачи", route="tasks:view_all_tasks:{owner_telegram_id}"),),
+        ) + TASKS_BACK_ROWS),
+    "edit_task": Screen(
+        text=(
+            "В данном меню у вас есть возможность\n\n"
+            "1) Просмотреть данныую задачу\n"
+            "2) Изменить статус задачи\n"
+            "3) Изменить название задачи\n"
+            "4) Изменить описание задачи\n"
+            "5) Изменить дату и время старта задачи\n"
+            "6) Изменить дату и время окончания задачи\n"
+            "7) Удалить задачу\n"
+        ),
+        rows=(
+            (Button(text="Просмотреть данную задачу", route="tasks:edit_task:view_task:{owner_telegram_id}"),),
+            (Button(text="Изменить статус задачи", route="tasks:edit_task:edit_status:{owner_telegram_id}"),),
+            (Button(text="Изменить название задачи", route="tasks:edit_task:edit_name:{owner_telegram_id}",
+                    owner_only=True),),
+            (Button(text="Изменить описание задачи", route="tasks:edit_task:edit_desc:{owner_telegram_id}",
+                    owner_only=True),),
+            (Button(text="Изменить дату и время старта задачи", route="tasks:edit_task:edit_start:{owner_telegram_id}",
+                    owner_only=True),),
+            (Button(text="Изменить дату и время окончания задачи", route="tasks:edit_task:edit_end:{owner_telegram_id}",
+                    owner_only=True),),
+            (Button(text="Удалить задачу", route="tasks:edit_task:delete:{owner_telegram_id}", owner_only=True),),
+        ) + TASKS_BACK_ROWS),
+    "settings_menu": Screen(
+        text="Данное меню предназначено для изменения настроек профиля",
+        rows=(
+            (Button(text="Изменить название профиля", route="settings:update_username:{owner_telegram_id}"),),
+            (Button(text="Изменить логин", route="settings:update_login:{owner_telegram_id}"),),
+            (Button(text="Изменить пароль", route="settings:update_password:{owner_telegram_id}"),),
+            (Button(text="Вернуться в главное меню", route="main_menu:{owner_telegram_id}"),),
+        )),
+    "settings_back": Screen(rows=(
+        (Button(text="Вернуться назад", route="menu_settings:{owner_telegram_id}"),),
+        (Button(text="Вернуться в главное меню", route="main_menu:{owner_telegram_id}"),),
+    )),
+}
+
+
+class ScreenRenderer:
+    """
+    Класс сборки клавиатур экранов с LRU-кэшем готовых неизменяемых клавиатур.
+
+    Параметры:
+        __screens (dict[str, Screen]): Шаблоны экранов по названиям.
+        __depends (dict[str, tuple[bool, bool]]): Зависит ли экран от владельца и от признака владельца.
+        __cache (OrderedDict[tuple[str, int | None, bool], FrozenInlineKeyboardMarkup | FrozenReplyKeyboardMarkup]):
+            Готовые клавиатуры в порядке последнего использования.
+        max_size (int): Максимальное количество клавиатур в кэше.
+
+    Methods:
+        text(screen: str) -> str: Получает текст экрана.
+        markup(screen: str, owner_telegram_id: int | None = None, is_owner: bool = False)
+            -> FrozenInlineKeyboardMarkup | FrozenReplyKeyboardMarkup: Получает клавиатуру экрана.
+        render(screen: str, owner_telegram_id: int | None = None, is_owner: bool = False)
+            -> tuple[str, FrozenInlineKeyboardMarkup | FrozenReplyKeyboardMarkup]: Получает текст и клавиатуру.
+        __build(screen: Screen, owner_telegram_id: int | None, is_owner: bool)
+            -> FrozenInlineKeyboardMarkup | FrozenReplyKeyboardMarkup: Приватный метод для сборки клавиатуры.
+
+    """
+
+    def __init__(self, screens: dict[str, Screen], max_size: int = 4096):
+        """
+        Инициализация объекта ScreenRenderer.
+
+        Параметры:
+            screens (dict[str, Screen]): Шаблоны экранов по названиям.
+            max_size (int): Максимальное количество клавиатур в кэше (по умолчанию 4096).
+
+        """
+        self.__screens = screens
+        self.__depends: dict[str, tuple[bool, bool]] = {
+            name: (
+                any(button.route and "{owner_telegram_id}" in button.route for row in screen.rows for button in row),
+                any(button.owner_only for row in screen.rows for button in row))
+            for name, screen in screens.items()}
+        self.__cache: OrderedDict[
+            tuple[str, int | None, bool], FrozenInlineKeyboardMarkup | FrozenReplyKeyboardMarkup] = OrderedDict()
+        self.max_size = max_size
+
+    def text(self, screen: str) -> str:
+        """
+        Получает текст экрана.
+
+        Параметры:
+            screen (str): Название экрана.
+
+        Возвращает:
+            str: Текст экрана.
+
+        """
+        return self.__screens[screen].text
+
+    def markup(self, screen: str, owner_telegram_id: int | None = None,
+               is_owner: bool = False) -> FrozenInlineKeyboardMarkup | FrozenReplyKeyboardMarkup:
+        """
+        Получает неизменяемую клавиатуру экрана из кэша или собирает и запоминает ее.
+
+        Параметры:
+            screen (str): Название экрана.
+            owner_telegram_id (int | None): Идентификатор владельца аккаунта для данных кнопок (по умолчанию None).
+            is_owner (bool): Флаг, что пользователь - владелец аккаунта (по умолчанию False).
+
+        Возвращает:
+            FrozenInlineKeyboardMarkup | FrozenReplyKeyboardMarkup: Клавиатура экрана.
+
+        """
+        uses_owner, uses_is_owner = self.__depends[screen]
+        key = (screen, owner_telegram_id if uses_owner else None, is_owner if uses_is_owner else False)
+        markup = self.__cache.get(key)
+        if markup is not None:
+            self.__cache.move_to_end(key)
+            return markup
+        markup = self.__cache[key] = self.__build(
+            screen=self.__screens[screen], owner_telegram_id=key[1], is_owner=key[2])
+        if len(self.__cache) > self.max_size:
+            self.__cache.popitem(last=False)
+        return markup
+
+    def render(self, screen: str, owner_telegram_id: int | None = None,
+               is_owner: bool = False) -> tuple[str, FrozenInlineKeyboardMarkup | FrozenReplyKeyboardMarkup]:
+        """
+        Получает текст и неизменяемую клавиатуру экрана.
+
+        Параметры:
+            screen (str): Название экрана.
+            owner_telegram_id (int | None): Идентификатор владельца аккаунта для данных кнопок (по умолчанию None).
+            is_owner (bool): Флаг, что пользователь - владелец аккаунта (по умолчанию False).
+
+        Возвращает:
+            tuple[str, FrozenInlineKeyboardMarkup | FrozenReplyKeyboardMarkup]: Текст и клавиатура экрана.
+
+        """
+        return self.text(screen=screen), self.markup(
+            screen=screen, owner_telegram_id=owner_telegram_id, is_owner=is_owner)
+
+    @staticmethod
+    def __build(screen: Screen, owner_telegram_id: int | None,
+                is_owner: bool) -> FrozenInlineKeyboardMarkup | FrozenReplyKeyboardMarkup:
+        """
+        Приватный метод для сборки неизменяемой клавиатуры экрана. Кнопки владельца пропускаются, если
+        пользователь не владелец; пустые строки не добавляются.
+
+        Параметры:
+            screen (Screen): Шаблон экрана.
+            owner_telegram_id (int | None): Идентификатор владельца аккаунта для данных кнопок.
+            is_owner (bool): Флаг, что пользователь - владелец аккаунта.
+
+        Возвращает:
+            FrozenInlineKeyboardMarkup | FrozenReplyKeyboardMarkup: Клавиатура экрана.
+
+        """
+        rows = list()
+        for row in screen.rows:
+            buttons = tuple(
+                FrozenKeyboardButton(text=button.text).freeze() if screen.reply else
+                FrozenInlineKeyboardButton(text=button.text, callback_data=get_callback_router().pack(
+                    button.route, **({"owner_telegram_id": owner_telegram_id}
+                                     if "{owner_telegram_id}" in button.route else {}))).freeze()
+                for button in row if is_owner or not button.owner_only)
+            if buttons:
+                rows.append(buttons)
+        if screen.reply:
+            return FrozenReplyKeyboardMarkup(keyboard=tuple(rows), resize_keyboard=True).freeze()
+        return FrozenInlineKeyboardMarkup(inline_keyboard=tuple(rows)).freeze()
+
+
+_screen_renderer = ScreenRenderer(screens=SCREENS, max_size=config.SCREEN_CACHE_MAX_SIZE)
+
+
+def get_screen_renderer() -> ScreenRenderer:
+    """
+    Получение объекта ScreenRenderer.
+
+    Возвращает:
+        ScreenRenderer: Объект ScreenRenderer.
+
+    """
+    return _screen_renderer
@@ -1 +1,4 @@
 from . import create_tasks_handlers, edit_tasks_handlers, view_tasks_handlers, handlers
+from app.fsm_context.states import validate_handlers
+
+validate_handlers(create_tasks_handlers, edit_tasks_handlers, view_tasks_handlers, handlers)
@@ -1,7 +1,11 @@
+import asyncio
+
 from pyrogram import filters, Client, types
 from app.auth_manager import auth_controller
 from app.bot_init.bot_init import client_bot
+from app.bot_init.router import get_callback_router
 from app.fsm_context.fsm_context import get_fsm_context
+from app.fsm_context.schemas import TaskCreationData
 from app.root.filters import get_filters
 from app.tasks_manager import tasks_controller
 from app.tasks_manager.handlers import get_back_buttons, tasks_menu
@@ -9,7 +13,7 @@ from app.utils import TelegramUtils
 
 
 @client_bot.on_callback_query(
-    filters.regex("tasks:create_task:") & get_filters().message_filter(state="tasks"))
+    get_callback_router().route("tasks:create_task:{owner_telegram_id}") & get_filters().message_filter(state="tasks"))
 async def create_task(_: Client, message: types.CallbackQuery) -> None:
     """
     Обработчик для создания новой задачи.
@@ -21,7 +25,7 @@ async def create_task(_: Client, message: types.CallbackQuery) -> None:
     Возвращает:
     - None
     """
-    owner_telegram_id = int(message.data.split(":")[-1])
+    owner_telegram_id = get_callback_router().params(message=message).owner_telegram_id
     reply_markup = None
     is_owner = auth_controller.check_user_is_owner(
         user_telegram_id=message.from_user.id, owner_telegram_id=owner_telegram_id)
@@ -30,12 +34,12 @@ async def create_task(_: Client, message: types.CallbackQuery) -> None:
             "Введите название вашей новой задачи"
         )
         reply_markup = get_back_buttons(owner_telegram_id=owner_telegram_id)
-        get_fsm_context().update_state(telegram_id=message.from_user.id, state="tasks:create:set_name")
+        await get_fsm_context().update_state(telegram_id=message.from_user.id, state="tasks:create:set_name")
     else:
         text_message = (
             "Вы не имеете доступ к данному функционалу"
         )
-    telegram_utils = TelegramUtils(text=text_message, reply_markup=reply_markup, message=message)
+    telegram_utils = await TelegramUtils.create(text=text_message, reply_markup=reply_markup, message=message)
     await telegram_utils.send_messages()
     if not is_owner:
         return await tasks_menu(_=_, message=message)
@@ -53,15 +57,15 @@ async def create_task_set_name(_: Client, message: types.Message) -> None:
     Возвращает:
     - None
     """
-    data = get_fsm_context().get_data(telegram_id=message.from_user.id)
-    data['task_name'] = message.text
-    get_fsm_context().update_data(telegram_id=message.from_user.id, data=data)
+    data: TaskCreationData = get_fsm_context().get_payload(telegram_id=message.from_user.id, schema=TaskCreationData)
     text_message = (
         "Введите описание вашей новой задачи"
     )
-    reply_markup = get_back_buttons(owner_telegram_id=data.get('owner_telegram_id'))
-    get_fsm_context().update_state(telegram_id=message.from_user.id, state="tasks:create:set_description")
-    telegram_utils = TelegramUtils(text=text_message, reply_markup=reply_markup, message=message)
+    reply_markup = get_back_buttons(owner_telegram_id=data.owner_telegram_id)
+    await get_fsm_context().transition(
+        telegram_id=message.from_user.id, state="tasks:create:set_description",
+        data=TaskCreationData(task_name=message.text))
+    telegram_utils = await TelegramUtils.create(text=text_message, reply_markup=reply_markup, message=message)
     await telegram_utils.send_messages()
 
 
@@ -77,13 +81,13 @@ async def create_task_set_description(_: Client, message: types.Message) -> None
     Возвращает:
     - None
     """
-    data = get_fsm_context().get_data(telegram_id=message.from_user.id)
-    data['task_description'] = message.text
-    get_fsm_context().update_data(telegram_id=message.from_user.id, data=data)
+    data: TaskCreationData = get_fsm_context().get_payload(telegram_id=message.from_user.id, schema=TaskCreationData)
     text_message = tasks_controller.get_text_set_time()
-    reply_markup = get_back_buttons(owner_telegram_id=data.get('owner_telegram_id'))
-    get_fsm_context().update_state(telegram_id=message.from_user.id, state="tasks:create:set_start_time")
-    telegram_utils = TelegramUtils(text=text_message, reply_markup=reply_markup, message=message)
+    reply_markup = get_back_buttons(owner_telegram_id=data.owner_telegram_id)
+    await get_fsm_context().transition(
+        telegram_id=message.from_user.id, state="tasks:create:set_start_time",
+        data=TaskCreationData(task_description=message.text))
+    telegram_utils = await TelegramUtils.create(text=text_message, reply_markup=reply_markup, message=message)
     await telegram_utils.send_messages()
 
 
@@ -99,16 +103,16 @@ async def create_task_set_start_time(_: Client, message: types.Message) -> None:
     Возвращает:
     - None
     """
-    data = get_fsm_context().get_data(telegram_id=message.from_user.id)
+    data: TaskCreationData = get_fsm_context().get_payload(telegram_id=message.from_user.id, schema=TaskCreationData)
     if not tasks_controller.check_valid_date(start_time=message.text):
         text_message = tasks_controller.get_text_set_time(is_error=True)
     else:
-        data['task_start_time'] = message.text
-        get_fsm_context().update_data(telegram_id=message.from_user.id, data=data)
-        text_message = tasks_controller.get_text_set_time(start_time=data.get('task_start_time'))
-        get_fsm_context().update_state(telegram_id=message.from_user.id, state="tasks:create:set_end_time")
-    reply_markup = get_back_buttons(owner_telegram_id=data.get('owner_telegram_id'))
-    telegram_utils = TelegramUtils(text=text_message, reply_markup=reply_markup, message=message)
+        text_message = tasks_controller.get_text_set_time(start_time=message.text)
+        await get_fsm_context().transition(
+            telegram_id=message.from_user.id, state="tasks:create:set_end_time",
+            data=TaskCreationData(task_start_time=message.text))
+    reply_markup = get_back_buttons(owner_telegram_id=data.owner_telegram_id)
+    telegram_utils = await TelegramUtils.create(text=text_message, reply_markup=reply_markup, message=message)
     await telegram_utils.send_messages()
 
 
@@ -124,21 +128,21 @@ async def create_task_set_end_time(_: Client, message: types.Message) -> None:
     Возвращает:
     - None
     """
-    data = get_fsm_context().get_data(telegram_id=message.from_user.id)
+    data: TaskCreationData = get_fsm_context().get_payload(telegram_id=message.from_user.id, schema=TaskCreationData)
     is_task_create: bool = False
     reply_markup = None
-    if not tasks_controller.check_valid_date(start_time=data.get('task_start_time'), end_time=message.text.strip()):
-        text_message = tasks_controller.get_text_set_time(start_time=data.get('task_start_time'), is_error=True)
-        reply_markup = get_back_buttons(owner_telegram_id=data.get('owner_telegram_id'))
+    if not tasks_controller.check_valid_date(start_time=data.task_start_time, end_time=message.text.strip()):
+        text_message = tasks_controller.get_text_set_time(start_time=data.task_start_time, is_error=True)
+        reply_markup = get_back_buttons(owner_telegram_id=data.owner_telegram_id)
     else:
-        start_time = tasks_controller.transform_utc_time(time=data.get('task_start_time'))
+        start_time = tasks_controller.transform_utc_time(time=data.task_start_time)
         end_time = tasks_controller.transform_utc_time(time=message.text.strip())
-        tasks_controller.set_task(
-            owner_telegram_id=data.get('owner_telegram_id'), start_time=start_time, end_time=end_time,
-            task_name=data.get('task_name'), description=data.get('task_description'))
+        await asyncio.to_thread(
+            tasks_controller.set_task, owner_telegram_id=data.owner_telegram_id, start_time=start_time,
+            end_time=end_time, task_name=data.task_name, description=data.task_description)
         text_message = "Новая задача упешно создана"
         is_task_create = True
-    telegram_utils = TelegramUtils(text=text_message, reply_markup=reply_markup, message=message)
+    telegram_utils = await TelegramUtils.create(text=text_message, reply_markup=reply_markup, message=message)
     await telegram_utils.send_messages()
     if is_task_create:
         await tasks_menu(_=_, message=message)
@@ -1,16 +1,23 @@
+import asyncio
+
 from pyrogram import types, filters, Client
 
 from app.auth_manager import auth_controller
 from app.bot_init.bot_init import client_bot
+from app.bot_init.router import get_callback_router
 from app.db.models import UserTasks
 from app.fsm_context.fsm_context import get_fsm_context
+from app.fsm_context.schemas import TaskEditData
 from app.root.filters import get_filters
+from app.root.screens import get_screen_renderer
 from app.tasks_manager import tasks_controller
 from app.tasks_manager.handlers import get_back_edit_buttons, get_back_buttons, tasks_menu
 from app.utils import TelegramUtils
 
 
-@client_bot.on_callback_query(filters.regex("tasks:edit_tasks:") & get_filters().message_filter(state="tasks"))
+@client_bot.on_callback_query(
+    get_callback_router().route("tasks:edit_tasks:{owner_telegram_id}")
+    & get_filters().message_filter(state="tasks"))
 async def edit_tasks(_: Client, message: types.CallbackQuery | types.Message) -> None:
     """
         Обработчик для команды /edit_tasks или кнопки редактирования задач в меню.
@@ -21,11 +28,10 @@ async def edit_tasks(_: Client, message: types.CallbackQuery | types.Message) ->
 
         Возвращает: None
     """
-    data: dict = get_fsm_context().get_data(telegram_id=message.from_user.id)
-    owner_telegram_id = (int(message.data.split(":")[-1])
-                         if isinstance(message, types.CallbackQuery) and message.data.split(":")[-1].isdigit()
-                         else data.get('owner_telegram_id'))
-    list_user_tasks: list[UserTasks] = tasks_controller.get_all_tasks(owner_telegram_id=owner_telegram_id)
+    data: TaskEditData = get_fsm_context().get_payload(telegram_id=message.from_user.id, schema=TaskEditData)
+    owner_telegram_id = get_callback_router().params(message=message).owner_telegram_id or data.owner_telegram_id
+    list_user_tasks: list[UserTasks] = await asyncio.to_thread(
+        tasks_controller.get_all_tasks, owner_telegram_id=owner_telegram_id)
     reply_markup = None
     if not list_user_tasks:
         text_message = (
@@ -33,24 +39,25 @@ async def edit_tasks(_: Client, message: types.CallbackQuery | types.Message) ->
         )
     else:
         list_ids_tasks: list[int] = [x.id_task for x in list_user_tasks]
-        if not data.get('editor_task_pagination'):
-            data['editor_task_pagination'] = 0
-        data['editor_task_list_ids'] = list_ids_tasks
-        get_fsm_context().update_data(telegram_id=message.from_user.id, data=data)
-        pagination = data.get("editor_task_pagination")
+        pagination = data.editor_task_pagination or 0
         button_previous = types.InlineKeyboardButton(
-            text="Предыдущие SKU", callback_data=f"tasks:edit_task:button:previous")
+            text="Предыдущие SKU", callback_data=get_callback_router().pack(
+                "tasks:edit_task:button:{page}", page="previous"))
         button_next = types.InlineKeyboardButton(
-            text="Следующие SKU", callback_data=f"tasks:edit_task:button:next")
+            text="Следующие SKU", callback_data=get_callback_router().pack(
+                "tasks:edit_task:button:{page}", page="next"))
         button_start = types.InlineKeyboardButton(
-            text="Перейти в начало", callback_data=f"tasks:edit_task:button:start")
+            text="Перейти в начало", callback_data=get_callback_router().pack(
+                "tasks:edit_task:button:{page}", page="start"))
         button_end = types.InlineKeyboardButton(
-            text="Перейти в конец", callback_data=f"tasks:edit_task:button:end")
+            text="Перейти в конец", callback_data=get_callback_router().pack(
+                "tasks:edit_task:button:{page}", page="end"))
         button_ids = [list_ids_tasks[x:x + 2] for x in range(pagination, pagination + 10, 2)]
         inline_keyboard = [
             [types.InlineKeyboardButton(
-                text=str(x), callback_data=f"tasks:edit_task:id_task:{list_ids_tasks[pagination+count*2+num]}"
-                                           f":{owner_telegram_id}")
+                text=str(x), callback_data=get_callback_router().pack(
+                    "tasks:edit_task:id_task:{id_task}:{owner_telegram_id}",
+                    id_task=list_ids_tasks[pagination+count*2+num], owner_telegram_id=owner_telegram_id))
                 for num, x in enumerate(y)] for count, y in enumerate(button_ids)]
         inline_keyboard.append([button_previous, button_next] if pagination and pagination + 10 < len(
             list_ids_tasks) else [button_previous] if pagination else [button_next]
@@ -61,15 +68,16 @@ async def edit_tasks(_: Client, message: types.CallbackQuery | types.Message) ->
             "Введите номер вашей задачи, или выберите ее из списка доступных вам"
         )
         reply_markup = types.InlineKeyboardMarkup(inline_keyboard=inline_keyboard)
-        get_fsm_context().update_state(telegram_id=message.from_user.id, state="tasks:edit")
-    telegram_utils = TelegramUtils(text=text_message, reply_markup=reply_markup, message=message)
-    await telegram_utils.send_messages()
+        await get_fsm_context().transition(
+            telegram_id=message.from_user.id, state="tasks:edit",
+            data=TaskEditData(editor_task_pagination=pagination, editor_task_list_ids=list_ids_tasks))
+    await TelegramUtils.show_screen(text=text_message, reply_markup=reply_markup, message=message)
     if not list_user_tasks:
         await tasks_menu(_=_, message=message)
 
 
 @client_bot.on_callback_query(
-    filters.regex("tasks:edit_task:button:") & get_filters().message_filter(state="tasks:edit"))
+    get_callback_router().route("tasks:edit_task:button:{page}") & get_filters().message_filter(state="tasks:edit"))
 async def pagination_button(_: Client, message: types.CallbackQuery) -> None:
     """
         Обработчик для кнопок пагинации при выборе задачи для редактирования.
@@ -80,19 +88,22 @@ async def pagination_button(_: Client, message: types.CallbackQuery) -> None:
 
         Возвращает: None
     """
-    data: dict = get_fsm_context().get_data(telegram_id=message.from_user.id)
-    data["editor_task_pagination"] = (
-        data.get("editor_task_pagination") - 10 if message.data == "tasks:edit_task:button:previous"
-        else data.get("editor_task_pagination") + 10 if message.data == "tasks:edit_task:button:next"
-        else 0 if message.data == "tasks:edit_task:button:start" else
-        len(data.get("editor_task_list_ids")) - len(data.get("editor_task_list_ids")) % 10)
-    get_fsm_context().update_data(telegram_id=message.from_user.id, data=data)
+    data: TaskEditData = get_fsm_context().get_payload(telegram_id=message.from_user.id, schema=TaskEditData)
+    page = get_callback_router().params(message=message).page
+    editor_task_pagination = (
+        data.editor_task_pagination - 10 if page == "previous"
+        else data.editor_task_pagination + 10 if page == "next"
+        else 0 if page == "start" else
+        len(data.editor_task_list_ids) - len(data.editor_task_list_ids) % 10)
+    await get_fsm_context().set_keys(
+        telegram_id=message.from_user.id, values=TaskEditData(editor_task_pagination=editor_task_pagination))
     await edit_tasks(_=_, message=message)
 
 
 @client_bot.on_message(filters.text & get_filters().message_filter(state="tasks:edit"))
 @client_bot.on_callback_query(
-    filters.regex("tasks:edit_task:id_task:") & get_filters().message_filter(state="tasks:edit"))
+    get_callback_router().route("tasks:edit_task:id_task:{id_task}:{owner_telegram_id}")
+    & get_filters().message_filter(state="tasks:edit"))
 async def choice_task(_: Client, message: types.Message | types.CallbackQuery) -> None:
     """
         Обработчик для выбора задачи для редактирования.
@@ -103,41 +114,40 @@ async def choice_task(_: Client, message: types.Message | types.CallbackQuery) -
 
         Возвращает: None
     """
-    data: dict = get_fsm_context().get_data(telegram_id=message.from_user.id)
+    data: TaskEditData = get_fsm_context().get_payload(telegram_id=message.from_user.id, schema=TaskEditData)
     if isinstance(message, types.Message):
-        owner_telegram_id = int(data.get('owner_telegram_id'))
-        id_task = message.text.strip()
+        owner_telegram_id = int(data.owner_telegram_id)
+        id_task = int(message.text.strip()) if message.text.strip().isdigit() else None
     else:
-        owner_telegram_id = int(message.data.split(":")[-1])
-        id_task = message.data.split(":")[-2]
+        params = get_callback_router().params(message=message)
+        owner_telegram_id, id_task = params.owner_telegram_id, params.id_task
     reply_markup = None
-    if not id_task.isdigit():
+    if id_task is None:
         text_message = (
             "Неверный формат ввода данных. Попробуйте отправить номер задачи заново"
         )
     else:
-        id_task = int(id_task)
-        task = tasks_controller.get_task_by_id(id_task=id_task, owner_telegram_id=owner_telegram_id)
+        task = await asyncio.to_thread(
+            tasks_controller.get_task_by_id, id_task=id_task, owner_telegram_id=owner_telegram_id)
         if not task:
             text_message = (
                 "Данная задача не была найдена в базе данных. Попробуйте отправить номер задачи заново"
             )
         else:
-            data['editor_task_id'] = id_task
-            get_fsm_context().update_data(telegram_id=message.from_user.id, data=data)
             is_owner: bool = auth_controller.check_user_is_owner(
                 user_telegram_id=message.from_user.id, owner_telegram_id=owner_telegram_id)
-            text_message, inline_keyboard = create_text_and_buttons_edit(
+            text_message, reply_markup = create_text_and_buttons_edit(
                 owner_telegram_id=owner_telegram_id, is_owner=is_owner)
-            reply_markup = types.InlineKeyboardMarkup(inline_keyboard=inline_keyboard)
-            get_fsm_context().update_state(telegram_id=message.from_user.id, state="tasks:edit:edit_task")
-    telegram_utils = TelegramUtils(text=text_message, reply_markup=reply_markup, message=message)
+            await get_fsm_context().transition(
+                telegram_id=message.from_user.id, state="tasks:edit:edit_task",
+                data=TaskEditData(editor_task_id=id_task))
+    telegram_utils = await TelegramUtils.create(text=text_message, reply_markup=reply_markup, message=message)
     await telegram_utils.send_messages()
     if get_fsm_context().get_state(telegram_id=message.from_user.id) != "tasks:edit:edit_task":
         await edit_tasks(_=_, message=message)
 
 
-@client_bot.on_callback_query(filters.regex("tasks:menu_edit") &
+@client_bot.on_callback_query(get_callback_router().route("tasks:menu_edit:{owner_telegram_id}") &
                               get_filters().message_filter(state="tasks:edit", is_regex=True))
 async def call_menu_editor(_: Client, message: types.Message | types.CallbackQuery) -> None:
     """
@@ -149,23 +159,23 @@ async def call_menu_editor(_: Client, message: types.Message | types.CallbackQue
 
         Возвращает: None
     """
-    data: dict = get_fsm_context().get_data(telegram_id=message.from_user.id)
+    data: TaskEditData = get_fsm_context().get_payload(telegram_id=message.from_user.id, schema=TaskEditData)
     if isinstance(message, types.Message):
-        owner_telegram_id = int(data.get('owner_telegram_id'))
+        owner_telegram_id = int(data.owner_telegram_id)
     else:
-        owner_telegram_id = int(message.data.split(":")[-1])
+        owner_telegram_id = get_callback_router().params(message=message).owner_telegram_id
     is_owner: bool = auth_controller.check_user_is_owner(
         user_telegram_id=message.from_user.id, owner_telegram_id=owner_telegram_id)
-    text_message, inline_keyboard = create_text_and_buttons_edit(
+    text_message, reply_markup = create_text_and_buttons_edit(
         owner_telegram_id=owner_telegram_id, is_owner=is_owner)
-    reply_markup = types.InlineKeyboardMarkup(inline_keyboard=inline_keyboard)
-    telegram_utils = TelegramUtils(text=text_message, reply_markup=reply_markup, message=message)
+    telegram_utils = await TelegramUtils.create(text=text_message, reply_markup=reply_markup, message=message)
     await telegram_utils.send_messages()
-    get_fsm_context().update_state(telegram_id=message.from_user.id, state="tasks:edit:edit_task")
+    await get_fsm_context().update_state(telegram_id=message.from_user.id, state="tasks:edit:edit_task")
 
 
 @client_bot.on_callback_query(
-    filters.regex("tasks:edit_task:view_task:") & get_filters().message_filter(state="tasks:edit:edit_task"))
+    get_callback_router().route("tasks:edit_task:view_task:{owner_telegram_id}")
+    & get_filters().message_filter(state="tasks:edit:edit_task"))
 async def update_status_task(_: Client, message: types.CallbackQuery) -> None:
     """
         Обработчик для обновления статуса задачи при редактировании.
@@ -176,16 +186,18 @@ async def update_status_task(_: Client, message: types.CallbackQuery) -> None:
 
         Возвращает: None
     """
-    data: dict = get_fsm_context().get_data(telegram_id=message.from_user.id)
-    owner_telegram_id = int(message.data.split(":")[-1])
-    id_task = data.get('editor_task_id')
-    task = tasks_controller.get_task_by_id(owner_telegram_id=owner_telegram_id, id_task=id_task)
+    data: TaskEditData = get_fsm_context().get_payload(telegram_id=message.from_user.id, schema=TaskEditData)
+    owner_telegram_id = get_callback_router().params(message=message).owner_telegram_id
+    id_task = data.editor_task_id
+    task = await asyncio.to_thread(
+        tasks_controller.get_task_by_id, owner_telegram_id=owner_telegram_id, id_task=id_task)
     await tasks_controller.send_messages_get_all_tasks(list_tasks=[task], message=message)
     await call_menu_editor(_=_, message=message)
 
 
 @client_bot.on_callback_query(
-    filters.regex("tasks:edit_task:edit_status:") & get_filters().message_filter(state="tasks:edit:edit_task"))
+    get_callback_router().route("tasks:edit_task:edit_status:{owner_telegram_id}")
+    & get_filters().message_filter(state="tasks:edit:edit_task"))
 async def update_status_task(_: Client, message: types.CallbackQuery) -> None:
     """
         Обработчик для обновления статуса задачи (завершена/не завершена) при редактировании.
@@ -196,21 +208,23 @@ async def update_status_task(_: Client, message: types.CallbackQuery) -> None:
 
         Возвращает: None
     """
-    data: dict = get_fsm_context().get_data(telegram_id=message.from_user.id)
-    owner_telegram_id = int(message.data.split(":")[-1])
-    id_task = data.get('editor_task_id')
-    status = tasks_controller.update_task_completion(owner_telegram_id=owner_telegram_id, id_task=id_task)
+    data: TaskEditData = get_fsm_context().get_payload(telegram_id=message.from_user.id, schema=TaskEditData)
+    owner_telegram_id = get_callback_router().params(message=message).owner_telegram_id
+    id_task = data.editor_task_id
+    status = await asyncio.to_thread(
+        tasks_controller.update_task_completion, owner_telegram_id=owner_telegram_id, id_task=id_task)
     text_message = (
         f"Статут задания с номером {id_task} успешно изменен на "
         f"{'\'Завершена\'' if status else '\'Не завершена\''}"
     )
-    telegram_utils = TelegramUtils(text=text_message, message=message)
+    telegram_utils = await TelegramUtils.create(text=text_message, message=message)
     await telegram_utils.send_messages()
     await call_menu_editor(_=_, message=message)
 
 
 @client_bot.on_callback_query(
-    filters.regex("tasks:edit_task:edit_name:") & get_filters().message_filter(state="tasks:edit:edit_task"))
+    get_callback_router().route("tasks:edit_task:edit_name:{owner_telegram_id}")
+    & get_filters().message_filter(state="tasks:edit:edit_task"))
 async def update_name_task(_: Client, message: types.CallbackQuery) -> None:
     """
        Обработчик для изменения названия задачи при редактировании.
@@ -236,19 +250,21 @@ async def set_task_name(_: Client, message: types.Message) -> None:
 
        Возвращает: None
     """
-    data: dict = get_fsm_context().get_data(telegram_id=message.from_user.id)
-    tasks_controller.update_task_name(
-        id_task=data.get('editor_task_id'), owner_telegram_id=data.get('owner_telegram_id'), task_name=message.text)
+    data: TaskEditData = get_fsm_context().get_payload(telegram_id=message.from_user.id, schema=TaskEditData)
+    await asyncio.to_thread(
+        tasks_controller.update_task_name, id_task=data.editor_task_id, owner_telegram_id=data.owner_telegram_id,
+        task_name=message.text)
     text_message = (
-        f"Название задачи под номером {data.get('editor_task_id')} было успешно изменено на {message.text}"
+        f"Название задачи под номером {data.editor_task_id} было успешно изменено на {message.text}"
     )
-    telegram_utils = TelegramUtils(text=text_message, message=message)
+    telegram_utils = await TelegramUtils.create(text=text_message, message=message)
     await telegram_utils.send_messages()
     await call_menu_editor(_=_, message=message)
 
 
 @client_bot.on_callback_query(
-    filters.regex("tasks:edit_task:edit_desc:") & get_filters().message_filter(state="tasks:edit:edit_task"))
+    get_callback_router().route("tasks:edit_task:edit_desc:{owner_telegram_id}")
+    & get_filters().message_filter(state="tasks:edit:edit_task"))
 async def update_description_task(_: Client, message: types.CallbackQuery) -> None:
     """
        Обработчик для изменения описания задачи при редактировании.
@@ -274,19 +290,21 @@ async def set_description_task(_: Client, message: types.Message) -> None:
 
         Возвращает: None
     """
-    data: dict = get_fsm_context().get_data(telegram_id=message.from_user.id)
-    tasks_controller.update_task_description(
-        id_task=data.get('editor_task_id'), owner_telegram_id=data.get('owner_telegram_id'), description=message.text)
+    data: TaskEditData = get_fsm_context().get_payload(telegram_id=message.from_user.id, schema=TaskEditData)
+    await asyncio.to_thread(
+        tasks_controller.update_task_description, id_task=data.editor_task_id,
+        owner_telegram_id=data.owner_telegram_id, description=message.text)
     text_message = (
-        f"Описание задачи под номером {data.get('editor_task_id')} было успешно изменено на:\n{message.text}"
+        f"Описание задачи под номером {data.editor_task_id} было успешно изменено на:\n{message.text}"
     )
-    telegram_utils = TelegramUtils(text=text_message, message=message)
+    telegram_utils = await TelegramUtils.create(text=text_message, message=message)
     await telegram_utils.send_messages()
     await call_menu_editor(_=_, message=message)
 
 
 @client_bot.on_callback_query(
-    filters.regex("tasks:edit_task:edit_start:") & get_filters().message_filter(state="tasks:edit:edit_task"))
+    get_callback_router().route("tasks:edit_task:edit_start:{owner_telegram_id}")
+    & get_filters().message_filter(state="tasks:edit:edit_task"))
 async def update_start_date_task(_: Client, message: types.CallbackQuery) -> None:
     """
        Обработчик для изменения даты начала задачи при редактировании.
@@ -312,24 +330,25 @@ async def set_start_date_task(_: Client, message: types.Message) -> None:
 
         Возвращает: None
     """
-    data: dict = get_fsm_context().get_data(telegram_id=message.from_user.id)
+    data: TaskEditData = get_fsm_context().get_payload(telegram_id=message.from_user.id, schema=TaskEditData)
     if not tasks_controller.check_valid_date(start_time=message.text.strip()):
         text_message = tasks_controller.get_text_set_time(is_error=True)
         return await call_send_state(
             message=message, state="tasks:edit:edit_task:set_start_date", text_message=text_message)
-    tasks_controller.update_task_start_time(
-        id_task=data.get('editor_task_id'), owner_telegram_id=data.get('owner_telegram_id'),
+    await asyncio.to_thread(
+        tasks_controller.update_task_start_time, id_task=data.editor_task_id, owner_telegram_id=data.owner_telegram_id,
         start_time=message.text.strip())
     text_message = (
         f"Дата старта задачи по Гринвичу была успешно обновлена на {message.text}"
     )
-    telegram_utils = TelegramUtils(text=text_message, message=message)
+    telegram_utils = await TelegramUtils.create(text=text_message, message=message)
     await telegram_utils.send_messages()
     await call_menu_editor(_=_, message=message)
 
 
 @client_bot.on_callback_query(
-    filters.regex("tasks:edit_task:edit_end:") & get_filters().message_filter(state="tasks:edit:edit_task"))
+    get_callback_router().route("tasks:edit_task:edit_end:{owner_telegram_id}")
+    & get_filters().message_filter(state="tasks:edit:edit_task"))
 async def update_end_date_task(_: Client, message: types.CallbackQuery) -> None:
     """
         Обработчик для изменения даты и времени окончания задачи при редактировании.
@@ -340,9 +359,9 @@ async def update_end_date_task(_: Client, message: types.CallbackQuery) -> None:
 
         Возвращает: None
     """
-    data: dict = get_fsm_context().get_data(telegram_id=message.from_user.id)
-    task: UserTasks = tasks_controller.get_task_by_id(
-        id_task=data.get('editor_task_id'), owner_telegram_id=data.get('owner_telegram_id'))
+    data: TaskEditData = get_fsm_context().get_payload(telegram_id=message.from_user.id, schema=TaskEditData)
+    task: UserTasks = await asyncio.to_thread(
+        tasks_controller.get_task_by_id, id_task=data.editor_task_id, owner_telegram_id=data.owner_telegram_id)
     text_message = tasks_controller.get_text_set_time(start_time=task.start_time)
     await call_send_state(message=message, state="tasks:edit:edit_task:set_end_date", text_message=text_message)
 
@@ -358,27 +377,28 @@ async def set_end_date_task(_: Client, message: types.Message) -> None:
 
         Возвращает: None
     """
-    data: dict = get_fsm_context().get_data(telegram_id=message.from_user.id)
-    task: UserTasks = tasks_controller.get_task_by_id(
-        id_task=data.get('editor_task_id'), owner_telegram_id=data.get('owner_telegram_id'))
+    data: TaskEditData = get_fsm_context().get_payload(telegram_id=message.from_user.id, schema=TaskEditData)
+    task: UserTasks = await asyncio.to_thread(
+        tasks_controller.get_task_by_id, id_task=data.editor_task_id, owner_telegram_id=data.owner_telegram_id)
     start_time = task.start_time.strftime(format='%d.%m.%Y %H:%M')
     if not tasks_controller.check_valid_date(start_time=start_time, end_time=message.text.strip()):
         text_message = tasks_controller.get_text_set_time(is_error=True)
         return await call_send_state(
             message=message, state="tasks:edit:edit_task:set_end_date", text_message=text_message)
-    tasks_controller.update_task_end_time(
-        id_task=data.get('editor_task_id'), owner_telegram_id=data.get('owner_telegram_id'),
+    await asyncio.to_thread(
+        tasks_controller.update_task_end_time, id_task=data.editor_task_id, owner_telegram_id=data.owner_telegram_id,
         end_time=message.text.strip())
     text_message = (
         f"Дата завершения задачи по Гринвичу была успешно обновлена на {message.text}"
     )
-    telegram_utils = TelegramUtils(text=text_message, message=message)
+    telegram_utils = await TelegramUtils.create(text=text_message, message=message)
     await telegram_utils.send_messages()
     await call_menu_editor(_=_, message=message)
 
 
 @client_bot.on_callback_query(
-    filters.regex("tasks:edit_task:delete:") & get_filters().message_filter(state="tasks:edit:edit_task"))
+    get_callback_router().route("tasks:edit_task:delete:{owner_telegram_id}")
+    & get_filters().message_filter(state="tasks:edit:edit_task"))
 async def delete_task(_: Client, message: types.CallbackQuery) -> None:
     """
        Обработчик для удаления задачи при редактировании.
@@ -389,26 +409,29 @@ async def delete_task(_: Client, message: types.CallbackQuery) -> None:
 
        Возвращает: None
     """
-    data: dict = get_fsm_context().get_data(telegram_id=message.from_user.id)
+    data: TaskEditData = get_fsm_context().get_payload(telegram_id=message.from_user.id, schema=TaskEditData)
     text_message = (
-        f"Вы точно хотите удалить задачу под номером {data.get('editor_task_id')}"
+        f"Вы точно хотите удалить задачу под номером {data.editor_task_id}"
     )
     inline_keyboard = list()
     inline_keyboard.append([
         types.InlineKeyboardButton(
-            text="Да", callback_data=f"tasks:edit_task:confirm_delete:{data.get('owner_telegram_id')}"),
+            text="Да", callback_data=get_callback_router().pack(
+                "tasks:edit_task:confirm_delete:{owner_telegram_id}", owner_telegram_id=data.owner_telegram_id)),
         types.InlineKeyboardButton(
-            text="Нет", callback_data=f"tasks:menu_edit:{data.get('owner_telegram_id')}")
+            text="Нет", callback_data=get_callback_router().pack(
+                "tasks:menu_edit:{owner_telegram_id}", owner_telegram_id=data.owner_telegram_id))
     ])
     inline_keyboard.append([types.InlineKeyboardButton(
-        text="Вернуться в главное меню", callback_data=f"main_menu:{data.get('owner_telegram_id')}")])
+        text="Вернуться в главное меню", callback_data=get_callback_router().pack(
+            "main_menu:{owner_telegram_id}", owner_telegram_id=data.owner_telegram_id))])
     reply_markup = types.InlineKeyboardMarkup(inline_keyboard=inline_keyboard)
-    telegram_utils = TelegramUtils(text=text_message, message=message, reply_markup=reply_markup)
+    telegram_utils = await TelegramUtils.create(text=text_message, message=message, reply_markup=reply_markup)
     await telegram_utils.send_messages()
-    get_fsm_context().update_state(telegram_id=message.from_user.id, state="tasks:edit:edit_task:delete")
+    await get_fsm_context().update_state(telegram_id=message.from_user.id, state="tasks:edit:edit_task:delete")
 
 
-@client_bot.on_callback_query(filters.regex("tasks:edit_task:confirm_delete:") &
+@client_bot.on_callback_query(get_callback_router().route("tasks:edit_task:confirm_delete:{owner_telegram_id}") &
                               get_filters().message_filter(state="tasks:edit:edit_task:delete"))
 async def confirm_delete_task(_: Client, message: types.Message) -> None:
     """
@@ -420,63 +443,29 @@ async def confirm_delete_task(_: Client, message: types.Message) -> None:
 
         Возвращает: None
     """
-    data: dict = get_fsm_context().get_data(telegram_id=message.from_user.id)
-    tasks_controller.delete_task(
-        owner_telegram_id=data.get('owner_telegram_id'), id_task=data.get('editor_task_id'))
+    data: TaskEditData = get_fsm_context().get_payload(telegram_id=message.from_user.id, schema=TaskEditData)
+    await asyncio.to_thread(
+        tasks_controller.delete_task, owner_telegram_id=data.owner_telegram_id, id_task=data.editor_task_id)
     text_message = (
-        f'Задача номер {data.get('editor_task_id')} была успешно удалена'
+        f'Задача номер {data.editor_task_id} была успешно удалена'
     )
-    telegram_utils = TelegramUtils(text=text_message, message=message)
+    telegram_utils = await TelegramUtils.create(text=text_message, message=message)
     await telegram_utils.send_messages()
     await edit_tasks(_=_, message=message)
 
 
 def create_text_and_buttons_edit(
-        owner_telegram_id: int, is_owner: bool = False) -> tuple[str, list[list[types.InlineKeyboardButton]]]:
+        owner_telegram_id: int, is_owner: bool = False) -> tuple[str, types.InlineKeyboardMarkup]:
     """
-        Функция для создания текста и кнопок в меню редактирования задачи.
+        Функция для получения текста и клавиатуры меню редактирования задачи из кэша экранов.
 
         Параметры:
         - owner_telegram_id: ID владельца задачи
         - is_owner: Флаг, указывающий, является ли пользователь владельцем задачи
 
-        Возвращает: Кортеж с текстом и списком кнопок
+        Возвращает: Кортеж с текстом и общей неизменяемой клавиатурой
     """
-    text_message = (
-        "В данном меню у вас есть возможность\n\n"
-        "1) Просмотреть данныую задачу\n"
-        "2) Изменить статус задачи\n"
-        "3) Изменить название задачи\n"
-        "4) Изменить описание задачи\n"
-        "5) Изменить дату и время старта задачи\n"
-        "6) Изменить дату и время окончания задачи\n"
-        "7) Удалить задачу\n"
-    )
-    inline_keyboard = list()
-    inline_keyboard.append([types.InlineKeyboardButton(
-        text="Просмотреть данную задачу",
-        callback_data=f"tasks:edit_task:view_task:{owner_telegram_id}")])
-    inline_keyboard.append([types.InlineKeyboardButton(
-        text="Изменить статус задачи",
-        callback_data=f"tasks:edit_task:edit_status:{owner_telegram_id}")])
-    if is_owner:
-        inline_keyboard.append([types.InlineKeyboardButton(
-            text="Изменить название задачи",
-            callback_data=f"tasks:edit_task:edit_name:{owner_telegram_id}")])
-        inline_keyboard.append([types.InlineKeyboardButton(
-            text="Изменить описание задачи",
-            callback_data=f"tasks:edit_task:edit_desc:{owner_telegram_id}")])
-        inline_keyboard.append([types.InlineKeyboardButton(
-            text="Изменить дату и время старта задачи",
-            callback_data=f"tasks:edit_task:edit_start:{owner_telegram_id}")])
-        inline_keyboard.append([types.InlineKeyboardButton(
-            text="Изменить дату и время окончания задачи",
-            callback_data=f"tasks:edit_task:edit_end:{owner_telegram_id}")])
-        inline_keyboard.append([types.InlineKeyboardButton(
-            text="Удалить задачу",
-            callback_data=f"tasks:edit_task:delete:{owner_telegram_id}")])
-    inline_keyboard += get_back_buttons(owner_telegram_id=owner_telegram_id).inline_keyboard
-    return text_message, inline_keyboard
+    return get_screen_renderer().render(screen="edit_task", owner_telegram_id=owner_telegram_id, is_owner=is_owner)
 
 
 async def call_send_state(message: types.CallbackQuery | types.Message, state: str, text_message: str) -> None:
@@ -490,10 +479,11 @@ async def call_send_state(message: types.CallbackQuery | types.Message, state: s
 
        Возвращает: None
     """
-    data: dict = get_fsm_context().get_data(telegram_id=message.from_user.id)
+    data: TaskEditData = get_fsm_context().get_payload(telegram_id=message.from_user.id, schema=TaskEditData)
     owner_telegram_id = (
-        int(message.data.split(":")[-1] if isinstance(message, types.CallbackQuery) else data.get('owner_telegram_id')))
+        get_callback_router().params(message=message).owner_telegram_id if isinstance(message, types.CallbackQuery)
+        else int(data.owner_telegram_id))
     reply_markup = get_back_edit_buttons(owner_telegram_id=owner_telegram_id)
-    telegram_utils = TelegramUtils(text=text_message, message=message, reply_markup=reply_markup)
+    telegram_utils = await TelegramUtils.create(text=text_message, message=message, reply_markup=reply_markup)
     await telegram_utils.send_messages()
-    get_fsm_context().update_state(telegram_id=message.from_user.id, state=state)
+    await get_fsm_context().update_state(telegram_id=message.from_user.id, state=state)
@@ -1,15 +1,37 @@
 import re
-from datetime import datetime, UTC
+from collections.abc import Iterable, Iterator
+from datetime import datetime, timedelta, UTC
+from io import StringIO
 
 import pytz
 from pyrogram import types
 from sqlalchemy import text
 
+from app.bot_init.outbound import PRIORITY_BULK
 from app.db.db_config import Session
 from app.db.models import UserTasks
 from app.utils import TelegramUtils
 
 
+TASK_FILTERS: dict[str, str] = {
+    "current": (" AND start_time AT TIME ZONE 'UTC' < current_timestamp AT TIME ZONE "
+                "'UTC' AND end_time AT TIME ZONE 'UTC' > current_timestamp AT TIME ZONE 'UTC'"
+                " AND status = false"),
+    "overdue": " AND end_time AT TIME ZONE 'UTC' < current_timestamp AT TIME ZONE 'UTC' AND status = false",
+    "completed": " AND status = true",
+    "all": "",
+}
+CURSOR_EPOCH = datetime(1970, 1, 1, tzinfo=UTC)
+# Максимальная длина текста сообщения Telegram в единицах UTF-16
+MESSAGE_MAX_LENGTH = 4096
+# Части текста, между которыми можно разделить карточку задачи: слова (разметка Markdown и HTML, которую Pyrogram
+# превращает в сущности сообщения, не разделяется, даже если содержит пробелы), переводы строк и пробелы
+CARD_TOKEN_PATTERN = re.compile(
+    r"(?:```.*?```|`[^`\n]+`|\*\*.+?\*\*|__.+?__|~~.+?~~|\|\|.+?\|\||\[[^\]\n]*\]\([^)\s]*\)"
+    r"|<(?P<tag>[a-z]+)\b[^>]*>.*?</(?P=tag)>|\S)+|\n|[^\S\n]+",
+    re.DOTALL | re.IGNORECASE)
+
+
 def get_all_tasks(
         owner_telegram_id: int, current_tasks: bool = False, overdue_tasks: bool = False, completed_tasks: bool = False
 ) -> list[UserTasks]:
@@ -25,26 +47,70 @@ def get_all_tasks(
         Возвращает:
         - list[UserTasks]: Список объектов задач пользователя.
     """
-    condition_text = "WHERE owner_telegram_id =:owner_telegram_id"
+    task_filter = (
+        "current" if current_tasks else "overdue" if overdue_tasks else "completed" if completed_tasks else "all")
     with Session() as session:
-        if current_tasks:
-            condition_text += (" AND start_time AT TIME ZONE 'UTC' < current_timestamp AT TIME ZONE "
-                               "'UTC' AND end_time AT TIME ZONE 'UTC' > current_timestamp AT TIME ZONE 'UTC'"
-                               " AND status = false;")
-        elif overdue_tasks:
-            condition_text += (" AND end_time AT TIME ZONE 'UTC' < current_timestamp AT TIME ZONE 'UTC'"
-                               " AND status = false;")
-        elif completed_tasks:
-            condition_text += " AND status = true;"
         query = text(
             "SELECT id_task, owner_telegram_id, task_name, start_time, end_time, completion_time, status, description "
             "FROM user_tasks "
-            f"{condition_text}"
+            f"WHERE owner_telegram_id =:owner_telegram_id{TASK_FILTERS[task_filter]}"
         )
         user_tasks_list: list[UserTasks] = session.execute(query, {"owner_telegram_id": owner_telegram_id}).all()
     return user_tasks_list
 
 
+def get_tasks_page(
+        owner_telegram_id: int, task_filter: str = "all", after_key: tuple[int, int] | None = None, limit: int = 10,
+        backward: bool = False) -> tuple[list[UserTasks], bool]:
+    """
+        Получает страницу задач пользователя с пагинацией по ключу (end_time, id_task). Запрос читает не более
+        limit + 1 строк по индексу (owner_telegram_id, end_time, id_task), поэтому время и память на страницу
+        не зависят от количества задач пользователя.
+
+        Параметры:
+        - owner_telegram_id (int): ID пользователя в Telegram.
+        - task_filter (str): Тип задач из TASK_FILTERS (current, overdue, completed или all).
+        - after_key (tuple[int, int] | None): Курсор (end_time в микросекундах от эпохи, id_task) граничной задачи
+          предыдущей страницы (None - первая страница).
+        - limit (int): Максимальное количество задач на странице (по умолчанию 10).
+        - backward (bool): Флаг выборки задач перед курсором, а не после него (по умолчанию False).
+
+        Возвращает:
+        - tuple[list[UserTasks], bool]: Задачи страницы по возрастанию ключа и флаг наличия следующих задач
+          в направлении выборки.
+    """
+    condition_text = f"WHERE owner_telegram_id =:owner_telegram_id{TASK_FILTERS[task_filter]}"
+    params = {"owner_telegram_id": owner_telegram_id, "limit": limit + 1}
+    if after_key is not None:
+        condition_text += f" AND (end_time, id_task) {'<' if backward else '>'} (:end_time, :id_task)"
+        params["end_time"], params["id_task"] = CURSOR_EPOCH + timedelta(microseconds=after_key[0]), after_key[1]
+    order = "DESC" if backward else "ASC"
+    with Session() as session:
+        query = text(
+            "SELECT id_task, owner_telegram_id, task_name, start_time, end_time, completion_time, status, description "
+            f"FROM user_tasks {condition_text} ORDER BY end_time {order}, id_task {order} LIMIT :limit"
+        )
+        user_tasks_list: list[UserTasks] = session.execute(query, params).all()
+    has_more = len(user_tasks_list) > limit
+    user_tasks_list = user_tasks_list[:limit]
+    if backward:
+        user_tasks_list.reverse()
+    return user_tasks_list, has_more
+
+
+def get_task_cursor(task: UserTasks) -> tuple[int, int]:
+    """
+        Получает курсор пагинации задачи для данных кнопок.
+
+        Параметры:
+        - task (UserTasks): Объект задачи пользователя.
+
+        Возвращает:
+        - tuple[int, int]: Время окончания задачи в микросекундах от эпохи и ID задачи.
+    """
+    return (task.end_time - CURSOR_EPOCH) // timedelta(microseconds=1), task.id_task
+
+
 def get_task_by_id(id_task: int, owner_telegram_id: int) -> UserTasks | None:
     """
         Получает конкретную задачу пользователя по её ID.
@@ -258,31 +324,133 @@ def get_text_set_time(start_time: datetime | str = None, is_error: bool = False)
     return text_message
 
 
+def get_task_card(task: UserTasks) -> str:
+    """
+        Формирует текст карточки задачи.
+
+        Параметры:
+        - task (UserTasks): Объект задачи пользователя.
+
+        Возвращает:
+        - str: Текст карточки задачи.
+    """
+    return (
+        f"*                                 Задача {task.task_name} № {task.id_task}                     *\n\n"
+        f"Описание задачи:\n{task.description}\n\n"
+        f"Время старта данной задачи по Гринвичу:\n{task.start_time.astimezone(pytz.timezone('UTC'))}\n\n"
+        f"Время завершения данной задачи по Гринвичу:\n{task.end_time.astimezone(pytz.timezone('UTC'))}\n\n"
+        f"Статус завершения задачи:\nЗадача {(
+            'завершена' if task.status else 'просрочена' if 
+            task.end_time < datetime.now(UTC) else 'выполняется')}\n\n"
+        f"{(f'Время завершения задачи по Гринвичу:\n{task.completion_time.astimezone(pytz.timezone('UTC'))}\n\n' 
+            if task.status else '')}"
+    )
+
+
+def render_tasks_digest(list_tasks: Iterable[UserTasks], max_length: int = MESSAGE_MAX_LENGTH) -> Iterator[str]:
+    """
+        Собирает карточки задач в сообщения, каждое из которых не длиннее max_length. Карточки добавляются
+        в буфер StringIO по одной, и сообщение отдается, как только следующая карточка в него не помещается,
+        поэтому в памяти одновременно находится только одно сообщение. Длина считается в единицах UTF-16,
+        как ее считает Telegram. Карточка длиннее max_length отправляется несколькими сообщениями, которые
+        разделяются по концам строк, а строка длиннее max_length - между словами (_split_card).
+
+        Параметры:
+        - list_tasks (Iterable[UserTasks]): Задачи пользователя.
+        - max_length (int): Максимальная длина сообщения (по умолчанию MESSAGE_MAX_LENGTH).
+
+        Возвращает:
+        - Iterator[str]: Тексты сообщений.
+    """
+    buffer, length = StringIO(), 0
+    for task in list_tasks:
+        card = get_task_card(task=task)
+        card_length = _utf16_length(card)
+        if length and length + card_length > max_length:
+            yield buffer.getvalue()
+            buffer, length = StringIO(), 0
+        if card_length <= max_length:
+            buffer.write(card)
+            length += card_length
+            continue
+        chunks = list(_split_card(card=card, max_length=max_length))
+        yield from chunks[:-1]
+        buffer.write(chunks[-1])
+        length = _utf16_length(chunks[-1])
+    if length:
+        yield buffer.getvalue()
+
+
+def _split_card(card: str, max_length: int) -> Iterator[str]:
+    """
+        Разделяет карточку задачи на части не длиннее max_length единиц UTF-16. Часть заканчивается последним
+        переводом строки, который в нее помещается, а если в части нет перевода строки - последним целым словом.
+        Разметка сущностей сообщения (например, **жирный текст** или <a href="...">ссылка</a>) считается одним
+        словом, поэтому сущность не разрывается между сообщениями. Только слово длиннее max_length делится
+        посимвольно (суррогатные пары UTF-16 не разрываются).
+
+        Параметры:
+        - card (str): Текст карточки задачи.
+        - max_length (int): Максимальная длина части.
+
+        Возвращает:
+        - Iterator[str]: Части карточки, которые вместе составляют исходный текст.
+    """
+    tokens: list[str] = list()
+    length, line_end = 0, None
+    for match in CARD_TOKEN_PATTERN.finditer(card):
+        token = match.group()
+        token_length = _utf16_length(token)
+        while tokens and length + token_length > max_length:
+            # Часть заканчивается последним переводом строки, остальные токены переносятся в следующую часть
+            # (если и с ними токен не помещается, они отдаются отдельной частью)
+            cut = line_end + 1 if line_end is not None else len(tokens)
+            yield "".join(tokens[:cut])
+            tokens = tokens[cut:]
+            length, line_end = sum(map(_utf16_length, tokens)), None
+        if token_length > max_length:
+            start, chunk_length = 0, 0
+            for end, char in enumerate(token):
+                char_length = 2 if ord(char) > 0xFFFF else 1
+                if chunk_length + char_length > max_length:
+                    yield token[start:end]
+                    start, chunk_length = end, 0
+                chunk_length += char_length
+            token, token_length = token[start:], chunk_length
+        tokens.append(token)
+        length += token_length
+        if token == "\n":
+            line_end = len(tokens) - 1
+    if tokens:
+        yield "".join(tokens)
+
+
+def _utf16_length(text_message: str) -> int:
+    """
+        Считает длину текста в единицах UTF-16, как ее считает Telegram.
+
+        Параметры:
+        - text_message (str): Текст.
+
+        Возвращает:
+        - int: Длина текста.
+    """
+    return len(text_message.encode("utf-16-le")) // 2
+
+
 async def send_messages_get_all_tasks(list_tasks: list[UserTasks], message: types.CallbackQuery) -> None:
     """
-        Асинхронно отправляет сообщения с информацией о задачах.
+        Асинхронно отправляет сообщения с информацией о задачах. Карточки задач собираются в сообщения
+        не длиннее MESSAGE_MAX_LENGTH (render_tasks_digest), поэтому количество запросов к Telegram API зависит
+        от общего объема текста, а не от количества задач. Сообщения отправляются с приоритетом PRIORITY_BULK,
+        чтобы длинные списки задач не задерживали ответы другим пользователям.
 
         Параметры:
         - list_tasks (list[UserTasks]): Список объектов задач пользователя.
         - message (types.CallbackQuery) -> None: Объект сообщения в Telegram.
     """
-    list_text_messages = list()
-    if not list_tasks:
-        list_text_messages.append("Задачи данного типа у вас отсутствуют")
-    else:
-        for count, task in enumerate(list_tasks):
-            message_text = (
-                f"*                                 Задача {task.task_name} № {task.id_task}                     *\n\n"
-                f"Описание задачи:\n{task.description}\n\n"
-                f"Время старта данной задачи по Гринвичу:\n{task.start_time.astimezone(pytz.timezone('UTC'))}\n\n"
-                f"Время завершения данной задачи по Гринвичу:\n{task.end_time.astimezone(pytz.timezone('UTC'))}\n\n"
-                f"Статус завершения задачи:\nЗадача {(
-                    'завершена' if task.status else 'просрочена' if 
-                    task.end_time < datetime.now(UTC) else 'выполняется')}\n\n"
-                f"{(f'Время завершения задачи по Гринвичу:\n{task.completion_time.astimezone(pytz.timezone('UTC'))}\n\n' 
-                    if task.status else '')}"
-            )
-            list_text_messages.append(message_text)
-    for count, text_message in enumerate(list_text_messages):
-        telegram_utils = TelegramUtils(text=text_message, message=message)
+    list_text_messages = (
+        render_tasks_digest(list_tasks=list_tasks) if list_tasks else ["Задачи данного типа у вас отсутствуют"])
+    for text_message in list_text_messages:
+        telegram_utils = await TelegramUtils.create(text=text_message, message=message, priority=PRIORITY_BULK)
         await telegram_utils.send_messages()
@@ -1,15 +1,20 @@
-from pyrogram import filters, Client, types
+import asyncio
 
+from pyrogram import Client, types
+
+from app import config
 from app.bot_init.bot_init import client_bot
-from app.db.models import UserTasks
+from app.bot_init.router import get_callback_router
 from app.fsm_context.fsm_context import get_fsm_context
 from app.root.filters import get_filters
+from app.root.screens import get_screen_renderer
 from app.tasks_manager import tasks_controller
-from app.tasks_manager.handlers import get_back_buttons
 from app.utils import TelegramUtils
 
 
-@client_bot.on_callback_query(filters.regex("tasks:view_tasks:") & get_filters().message_filter(state="tasks"))
+@client_bot.on_callback_query(
+    get_callback_router().route("tasks:view_tasks:{owner_telegram_id}")
+    & (get_filters().message_filter(state="tasks") | get_filters().message_filter(state="tasks:view")))
 async def view_tasks(_: Client, message: types.CallbackQuery) -> None:
     """
         Обрабатывает запрос пользователя на просмотр задач в зависимости от выбранной опции.
@@ -28,36 +33,16 @@ async def view_tasks(_: Client, message: types.CallbackQuery) -> None:
         Возвращает:
         - None
     """
-    owner_telegram_id = int(message.data.split(":")[-1])
-    text_message = (
-        "В данном меню вы можете:\n\n"
-        "1) Просмотреть все действующие задачи\n"
-        "2) Просмотреть все выполненные задачи\n"
-        "3) Просмотреть все просроченные задачи\n"
-        "4) Просмотреть все задачи\n"
-    )
-    inline_keyboard = list()
-    inline_keyboard.append([types.InlineKeyboardButton(
-        text="Просмотреть все действующие задачи",
-        callback_data=f"tasks:view_current_tasks:{owner_telegram_id}")])
-    inline_keyboard.append([types.InlineKeyboardButton(
-        text="Просмотреть все выполненные задачи",
-        callback_data=f"tasks:view_completed_tasks:{owner_telegram_id}")])
-    inline_keyboard.append([types.InlineKeyboardButton(
-        text="Просмотреть все просроченные задачи",
-        callback_data=f"tasks:view_overdue_tasks:{owner_telegram_id}")])
-    inline_keyboard.append([types.InlineKeyboardButton(
-        text="Просмотреть все задачи",
-        callback_data=f"tasks:view_all_tasks:{owner_telegram_id}")])
-    inline_keyboard += (get_back_buttons(owner_telegram_id=owner_telegram_id)).inline_keyboard
-    reply_markup = types.InlineKeyboardMarkup(inline_keyboard=inline_keyboard)
-    telegram_utils = TelegramUtils(text=text_message, reply_markup=reply_markup, message=message)
+    owner_telegram_id = get_callback_router().params(message=message).owner_telegram_id
+    text_message, reply_markup = get_screen_renderer().render(screen="view_tasks", owner_telegram_id=owner_telegram_id)
+    telegram_utils = await TelegramUtils.create(text=text_message, reply_markup=reply_markup, message=message)
     await telegram_utils.send_messages()
-    get_fsm_context().update_state(telegram_id=message.from_user.id, state="tasks:view")
+    await get_fsm_context().update_state(telegram_id=message.from_user.id, state="tasks:view")
 
 
 @client_bot.on_callback_query(
-    filters.regex("tasks:view_current_tasks:") & get_filters().message_filter(state="tasks:view"))
+    get_callback_router().route("tasks:view_current_tasks:{owner_telegram_id}")
+    & get_filters().message_filter(state="tasks:view"))
 async def get_all_current_tasks(_: Client, message: types.CallbackQuery) -> None:
     """
         Обрабатывает запрос пользователя на просмотр всех текущих задач.
@@ -67,21 +52,19 @@ async def get_all_current_tasks(_: Client, message: types.CallbackQuery) -> None
         - message: types.CallbackQuery: Объект сообщения типа CallbackQuery в Telegram.
 
         Действия:
-        - Получает список текущих задач пользователя.
-        - Отправляет сообщение с информацией о текущих задачах.
-        - Вызывает функцию view_tasks для возврата к меню просмотра задач.
+        - Получает первую страницу текущих задач пользователя.
+        - Отправляет сообщения с задачами страницы и кнопками перехода между страницами.
 
         Возвращает:
         - None
     """
-    list_user_tasks: list[UserTasks] = tasks_controller.get_all_tasks(
-        owner_telegram_id=int(message.data.split(":")[-1]), current_tasks=True)
-    await tasks_controller.send_messages_get_all_tasks(list_tasks=list_user_tasks, message=message)
-    await view_tasks(_=_, message=message)
+    owner_telegram_id = get_callback_router().params(message=message).owner_telegram_id
+    await send_tasks_page(message=message, owner_telegram_id=owner_telegram_id, view="current")
 
 
 @client_bot.on_callback_query(
-    filters.regex("tasks:view_completed_tasks:") & get_filters().message_filter(state="tasks:view"))
+    get_callback_router().route("tasks:view_completed_tasks:{owner_telegram_id}")
+    & get_filters().message_filter(state="tasks:view"))
 async def get_all_completed_tasks(_: Client, message: types.CallbackQuery) -> None:
     """
         Обрабатывает запрос пользователя на просмотр всех выполненных задач.
@@ -91,21 +74,19 @@ async def get_all_completed_tasks(_: Client, message: types.CallbackQuery) -> No
         - message: types.CallbackQuery: Объект сообщения типа CallbackQuery в Telegram.
 
         Действия:
-        - Получает список выполненных задач пользователя.
-        - Отправляет сообщение с информацией о выполненных задачах.
-        - Вызывает функцию view_tasks для возврата к меню просмотра задач.
+        - Получает первую страницу выполненных задач пользователя.
+        - Отправляет сообщения с задачами страницы и кнопками перехода между страницами.
 
         Возвращает:
         - None
     """
-    list_user_tasks: list[UserTasks] = tasks_controller.get_all_tasks(
-        owner_telegram_id=int(message.data.split(":")[-1]), completed_tasks=True)
-    await tasks_controller.send_messages_get_all_tasks(list_tasks=list_user_tasks, message=message)
-    await view_tasks(_=_, message=message)
+    owner_telegram_id = get_callback_router().params(message=message).owner_telegram_id
+    await send_tasks_page(message=message, owner_telegram_id=owner_telegram_id, view="completed")
 
 
 @client_bot.on_callback_query(
-    filters.regex("tasks:view_overdue_tasks:") & get_filters().message_filter(state="tasks:view"))
+    get_callback_router().route("tasks:view_overdue_tasks:{owner_telegram_id}")
+    & get_filters().message_filter(state="tasks:view"))
 async def get_all_overdue_tasks(_: Client, message: types.CallbackQuery) -> None:
     """
         Обрабатывает запрос пользователя на просмотр всех просроченных задач.
@@ -115,20 +96,19 @@ async def get_all_overdue_tasks(_: Client, message: types.CallbackQuery) -> None
         - message: types.CallbackQuery: Объект сообщения типа CallbackQuery в Telegram.
 
         Действия:
-        - Получает список просроченных задач пользователя.
-        - Отправляет сообщение с информацией о просроченных задачах.
-        - Вызывает функцию view_tasks для возврата к меню просмотра задач.
+        - Получает первую страницу просроченных задач пользователя.
+        - Отправляет сообщения с задачами страницы и кнопками перехода между страницами.
 
         Возвращает:
         - None
     """
-    list_user_tasks: list[UserTasks] = tasks_controller.get_all_tasks(
-        owner_telegram_id=int(message.data.split(":")[-1]), overdue_tasks=True)
-    await tasks_controller.send_messages_get_all_tasks(list_tasks=list_user_tasks, message=message)
-    await view_tasks(_=_, message=message)
+    owner_telegram_id = get_callback_router().params(message=message).owner_telegram_id
+    await send_tasks_page(message=message, owner_telegram_id=owner_telegram_id, view="overdue")
 
 
-@client_bot.on_callback_query(filters.regex("tasks:view_all_tasks:") & get_filters().message_filter(state="tasks:view"))
+@client_bot.on_callback_query(
+    get_callback_router().route("tasks:view_all_tasks:{owner_telegram_id}")
+    & get_filters().message_filter(state="tasks:view"))
 async def get_all_tasks(_: Client, message: types.CallbackQuery) -> None:
     """
         Обрабатывает запрос пользователя на просмотр всех задач.
@@ -138,14 +118,90 @@ async def get_all_tasks(_: Client, message: types.CallbackQuery) -> None:
         - message: types.CallbackQuery: Объект сообщения типа CallbackQuery в Telegram.
 
         Действия:
-        - Получает список всех задач пользователя.
-        - Отправляет сообщение с информацией о всех задачах.
-        - Вызывает функцию view_tasks для возврата к меню просмотра задач.
+        - Получает первую страницу всех задач пользователя.
+        - Отправляет сообщения с задачами страницы и кнопками перехода между страницами.
 
         Возвращает:
         - None
     """
-    list_user_tasks: list[UserTasks] = tasks_controller.get_all_tasks(
-        owner_telegram_id=int(message.data.split(":")[-1]))
+    owner_telegram_id = get_callback_router().params(message=message).owner_telegram_id
+    await send_tasks_page(message=message, owner_telegram_id=owner_telegram_id, view="all")
+
+
+@client_bot.on_callback_query(
+    get_callback_router().route("tasks:view_page:{view}:{page}:{end_time}:{id_task}:{owner_telegram_id}")
+    & get_filters().message_filter(state="tasks:view"))
+async def view_tasks_page(_: Client, message: types.CallbackQuery) -> None:
+    """
+        Обрабатывает нажатие кнопки перехода на следующую или предыдущую страницу списка задач.
+
+        Параметры:
+        - _: Client: Объект клиента Pyrogram (не используется в функции).
+        - message: types.CallbackQuery: Объект сообщения типа CallbackQuery в Telegram.
+
+        Действия:
+        - Извлекает из callback_data тип задач, направление и курсор (end_time, id_task) граничной задачи.
+          Неизвестный тип задач (устаревшая или подделанная кнопка) заменяется на все задачи, а неполный курсор -
+          на первую страницу.
+        - Отправляет сообщения с задачами страницы и кнопками перехода между страницами.
+
+        Возвращает:
+        - None
+    """
+    params = get_callback_router().params(message=message)
+    view = params.view if params.view in tasks_controller.TASK_FILTERS else "all"
+    after_key = (
+        (params.end_time, params.id_task) if params.end_time is not None and params.id_task is not None else None)
+    await send_tasks_page(
+        message=message, owner_telegram_id=params.owner_telegram_id, view=view, after_key=after_key,
+        backward=after_key is not None and params.page == "previous")
+
+
+async def send_tasks_page(
+        message: types.CallbackQuery, owner_telegram_id: int, view: str, after_key: tuple[int, int] | None = None,
+        backward: bool = False) -> None:
+    """
+        Отправляет страницу задач пользователя и сообщение с кнопками перехода между страницами. Кнопки
+        содержат курсор граничной задачи страницы, поэтому следующая страница читается из базы данных
+        без смещения и без загрузки предыдущих задач.
+
+        Параметры:
+        - message: types.CallbackQuery: Объект сообщения типа CallbackQuery в Telegram.
+        - owner_telegram_id: int: ID владельца задач.
+        - view: str: Тип задач из tasks_controller.TASK_FILTERS.
+        - after_key: tuple[int, int] | None: Курсор граничной задачи (None - первая страница).
+        - backward: bool: Флаг перехода на предыдущую страницу.
+
+        Возвращает:
+        - None
+    """
+    list_user_tasks, has_more = await asyncio.to_thread(
+        tasks_controller.get_tasks_page, owner_telegram_id=owner_telegram_id, task_filter=view, after_key=after_key,
+        limit=config.TASKS_PAGE_SIZE, backward=backward)
+    if backward and not list_user_tasks:
+        # Задачи перед курсором были удалены - показывается первая страница
+        after_key, backward = None, False
+        list_user_tasks, has_more = await asyncio.to_thread(
+            tasks_controller.get_tasks_page, owner_telegram_id=owner_telegram_id, task_filter=view,
+            limit=config.TASKS_PAGE_SIZE)
+    has_previous, has_next = (has_more, True) if backward else (after_key is not None, has_more)
     await tasks_controller.send_messages_get_all_tasks(list_tasks=list_user_tasks, message=message)
-    await view_tasks(_=_, message=message)
+    navigation = list()
+    for page, task, button_text, is_shown in (
+            ("previous", list_user_tasks[:1], "Предыдущие задачи", has_previous),
+            ("next", list_user_tasks[-1:], "Следующие задачи", has_next)):
+        if is_shown and task:
+            end_time, id_task = tasks_controller.get_task_cursor(task=task[0])
+            navigation.append(types.InlineKeyboardButton(text=button_text, callback_data=get_callback_router().pack(
+                "tasks:view_page:{view}:{page}:{end_time}:{id_task}:{owner_telegram_id}", view=view, page=page,
+                end_time=end_time, id_task=id_task, owner_telegram_id=owner_telegram_id)))
+    inline_keyboard = [navigation] if navigation else list()
+    inline_keyboard += get_screen_renderer().markup(
+        screen="tasks_view_back", owner_telegram_id=owner_telegram_id).inline_keyboard
+    text_message = (
+        "Для перехода между страницами списка задач используйте кнопки ниже" if navigation else
+        "Больше задач данного типа нет"
+    )
+    reply_markup = types.InlineKeyboardMarkup(inline_keyboard=inline_keyboard)
+    telegram_utils = await TelegramUtils.create(text=text_message, reply_markup=reply_markup, message=message)
+    await telegram_utils.send_messages()
@@ -1,15 +1,53 @@
 import asyncio
+import functools
+import logging
+from typing import Awaitable, Callable
 
 from pyrogram import types
+from pyrogram.errors import BadRequest, MessageNotModified
 
+from app import config
 from app.bot_init.bot_init import client_bot
-from app.fsm_context.fsm_context import get_fsm_context
+from app.bot_init.ledger import get_message_ledger
+from app.bot_init.outbound import PRIORITY_INTERACTIVE, get_outbound_scheduler
+
+logger = logging.getLogger(__name__)
+
+# Максимальное количество ID сообщений в одном запросе delete_messages (ограничение Telegram API)
+DELETE_MESSAGES_CHUNK = 100
+
+
+class FanOutResult:
+    """
+        Результат отправки или удаления сообщений в нескольких чатах.
+
+        Параметры:
+        - message_ids: dict[int, list[int]]: ID отправленных (удаленных) сообщений по ID чатов.
+        - errors: dict[int, Exception]: Ошибки по ID чатов, в которых запрос не выполнен.
+    """
+    def __init__(self):
+        self.message_ids: dict[int, list[int]] = dict()
+        self.errors: dict[int, Exception] = dict()
 
 
 class TelegramUtils:
     """
         Утилита для взаимодействия с Telegram API, отправки сообщений и удаления сообщений.
 
+        Объект создается асинхронной фабрикой create(), которая запускает удаление текущего и предыдущих сообщений
+        в фоне на основном цикле событий. Удаление выполняется одновременно с отправкой новых сообщений
+        и ожидается в send_messages(). Все запросы выполняются через OutboundScheduler с учетом ограничений частоты
+        отправки сообщений Telegram.
+
+        Экраны меню показываются через show_screen(): если включен режим UI_EDIT_IN_PLACE и обновление - нажатие
+        кнопки, сообщение с нажатой кнопкой (экран пользователя) редактируется вместо удаления и повторной отправки.
+
+        ID отправленных сообщений с инлайн-клавиатурой записываются в журнал MessageLedger по парам (пользователь,
+        чат) и удаляются при следующем ответе.
+
+        Запросы в несколько чатов выполняются одновременно, но не более FANOUT_CONCURRENCY одновременно; ошибка
+        в одном чате не останавливает отправку в остальные и возвращается в FanOutResult.
+
         Параметры:
         - message: types.Message | types.CallbackQuery: Объект сообщения или коллбэк-запроса в Telegram.
         - text: str: Текст сообщения.
@@ -17,11 +55,17 @@ class TelegramUtils:
         - reply_markup: types.ReplyKeyboardMarkup | types.InlineKeyboardMarkup | None: Объект разметки клавиатуры
           (по умолчанию None).
         - resize_keyboard: bool: Флаг изменения размеров клавиатуры (по умолчанию True).
+        - priority: int: Приоритет запросов в OutboundScheduler (по умолчанию PRIORITY_INTERACTIVE, для массовых
+          отправок - PRIORITY_BULK).
 
         Методы:
-        - send_messages(): Асинхронно отправляет сообщение в указанные чаты с учетом разметки клавиатуры.
-        - delete_message(delete_last_messages: bool = False, message_delete_ids: list[int] = None): Асинхронно удаляет
-          сообщения из указанных чатов. Может использоваться для удаления текущего сообщения или предыдущих.
+        - create(...): Асинхронно создает объект TelegramUtils и запускает удаление сообщений.
+        - show_screen(...): Асинхронно показывает экран меню, редактируя сообщение с нажатой кнопкой.
+        - send_messages() -> FanOutResult: Асинхронно отправляет сообщение в указанные чаты с учетом разметки
+          клавиатуры.
+        - delete_message(delete_last_messages: bool = False, message_delete_ids: list[int] = None) -> FanOutResult:
+          Асинхронно удаляет сообщения из указанных чатов. Может использоваться для удаления текущего сообщения
+          или предыдущих.
 
         Возвращает:
         - None
@@ -29,33 +73,98 @@ class TelegramUtils:
     def __init__(
             self, message: types.Message | types.CallbackQuery, text: str, chat_ids: list[int] | None = None,
             reply_markup: types.ReplyKeyboardMarkup | types.InlineKeyboardMarkup | None = None,
-            resize_keyboard: bool = True):
+            resize_keyboard: bool = True, priority: int = PRIORITY_INTERACTIVE):
 
         self.message = message
         self.text = text
         self.chat_ids = chat_ids if chat_ids else [message.from_user.id]
         self.reply_markup = reply_markup
-        if isinstance(reply_markup, types.ReplyKeyboardMarkup):
-            reply_markup.resize_keyboard = resize_keyboard
-        asyncio.run(self.delete_message())
+        self.priority = priority
+        if isinstance(reply_markup, types.ReplyKeyboardMarkup) and reply_markup.resize_keyboard != resize_keyboard:
+            # Клавиатуры экранов общие и неизменяемые (app.root.screens), поэтому вместо изменения создается копия
+            self.reply_markup = types.ReplyKeyboardMarkup(
+                keyboard=reply_markup.keyboard, is_persistent=reply_markup.is_persistent,
+                resize_keyboard=resize_keyboard, one_time_keyboard=reply_markup.one_time_keyboard,
+                selective=reply_markup.selective, placeholder=reply_markup.placeholder)
+        self.__deleting: asyncio.Task | None = None
 
-    async def send_messages(self) -> None:
+    @classmethod
+    async def create(
+            cls, message: types.Message | types.CallbackQuery, text: str, chat_ids: list[int] | None = None,
+            reply_markup: types.ReplyKeyboardMarkup | types.InlineKeyboardMarkup | None = None,
+            resize_keyboard: bool = True, priority: int = PRIORITY_INTERACTIVE) -> "TelegramUtils":
         """
-            Асинхронно отправляет сообщение(я) в указанные чаты с учетом разметки клавиатуры.
+            Асинхронно создает объект TelegramUtils и запускает в фоне удаление текущего сообщения и сообщений
+            из журнала MessageLedger. Идентификаторы забираются из журнала сразу, до отправки новых сообщений,
+            поэтому новые сообщения в удаление не попадают.
+
+            Параметры совпадают с параметрами TelegramUtils.
+
+            Возвращает:
+            - TelegramUtils: Объект TelegramUtils.
+        """
+        telegram_utils = cls(
+            message=message, text=text, chat_ids=chat_ids, reply_markup=reply_markup, resize_keyboard=resize_keyboard,
+            priority=priority)
+        message_delete_ids = await telegram_utils.__take_message_delete_ids()
+        telegram_utils.__deleting = asyncio.create_task(telegram_utils.__delete_messages(message_delete_ids))
+        return telegram_utils
+
+    @classmethod
+    async def show_screen(
+            cls, message: types.Message | types.CallbackQuery, text: str,
+            reply_markup: types.ReplyKeyboardMarkup | types.InlineKeyboardMarkup | None = None,
+            priority: int = PRIORITY_INTERACTIVE) -> None:
+        """
+            Асинхронно показывает экран меню. Если включен режим UI_EDIT_IN_PLACE, обновление - нажатие кнопки,
+            а экран содержит инлайн-клавиатуру, сообщение с нажатой кнопкой редактируется (один запрос вместо
+            удаления и отправки), а остальные сообщения из журнала MessageLedger удаляются. Иначе, а также
+            если сообщение нельзя отредактировать, сообщения удаляются и экран отправляется заново.
+
+            Параметры:
+            - message: types.Message | types.CallbackQuery: Объект сообщения или коллбэк-запроса в Telegram.
+            - text: str: Текст экрана.
+            - reply_markup: types.ReplyKeyboardMarkup | types.InlineKeyboardMarkup | None: Объект разметки клавиатуры
+              (по умолчанию None).
+            - priority: int: Приоритет запросов в OutboundScheduler (по умолчанию PRIORITY_INTERACTIVE).
 
             Возвращает:
             - None
         """
-        data = get_fsm_context().get_data(telegram_id=self.message.from_user.id)
-        for count, chat_id in enumerate(self.chat_ids):
-            message = await client_bot.send_message(reply_markup=self.reply_markup, chat_id=chat_id, text=self.text)
-            if isinstance(self.reply_markup, types.InlineKeyboardMarkup):
-                if not data.get('list_messages_delete_ids'):
-                    data["list_messages_delete_ids"] = list()
-                data["list_messages_delete_ids"].append(message.id)
-        get_fsm_context().update_data(telegram_id=self.message.from_user.id, data=data)
+        if (config.UI_EDIT_IN_PLACE and isinstance(message, types.CallbackQuery) and message.message
+                and isinstance(reply_markup, types.InlineKeyboardMarkup)):
+            telegram_utils = cls(message=message, text=text, reply_markup=reply_markup, priority=priority)
+            if await telegram_utils.__edit_screen():
+                return
+        telegram_utils = await cls.create(message=message, text=text, reply_markup=reply_markup, priority=priority)
+        await telegram_utils.send_messages()
+
+    async def send_messages(self) -> FanOutResult:
+        """
+            Асинхронно отправляет сообщение(я) в указанные чаты с учетом разметки клавиатуры. Сообщения в разные
+            чаты отправляются одновременно, запущенное в create() удаление сообщений ожидается вместе с ними.
+            Ошибка отправки в один из чатов не останавливает отправку в остальные. Если сообщение не отправлено
+            ни в один чат, исключение первого чата пробрасывается.
+
+            Возвращает:
+            - FanOutResult: ID отправленных сообщений и ошибки по ID чатов.
+        """
+        deleting, self.__deleting = self.__deleting, None
+        result = await self.__fan_out(chat_ids=self.chat_ids, call=self.__send_message)
+        if deleting:
+            await deleting
+        if not result.message_ids and result.errors:
+            raise next(iter(result.errors.values()))
+        if isinstance(self.reply_markup, types.InlineKeyboardMarkup):
+            await get_message_ledger().preload(
+                telegram_id=self.message.from_user.id, chat_ids=list(result.message_ids))
+            for chat_id, message_ids in result.message_ids.items():
+                get_message_ledger().record(
+                    telegram_id=self.message.from_user.id, chat_id=chat_id, message_ids=message_ids)
+        return result
 
-    async def delete_message(self, delete_last_messages: bool = False, message_delete_ids: list[int] = None) -> None:
+    async def delete_message(
+            self, delete_last_messages: bool = False, message_delete_ids: list[int] = None) -> FanOutResult:
         """
             Асинхронно удаляет сообщения из указанных чатов. Может использоваться для удаления текущего сообщения
             или предыдущих.
@@ -65,16 +174,132 @@ class TelegramUtils:
             - message_delete_ids: list[int] | None: Список ID сообщений для удаления (по умолчанию None).
 
             Возвращает:
-            - None
+            - FanOutResult: ID удаленных сообщений и ошибки по ID чатов.
+        """
+        return await self.__delete_messages(await self.__take_message_delete_ids(
+            delete_last_messages=delete_last_messages, message_delete_ids=message_delete_ids))
+
+    async def __edit_screen(self) -> bool:
+        """
+            Приватный метод для редактирования сообщения с нажатой кнопкой. Сообщение остается в журнале
+            MessageLedger, остальные сообщения журнала удаляются.
+
+            Возвращает:
+            - bool: True, если сообщение отредактировано (или уже совпадает с экраном).
         """
-        data = get_fsm_context().get_data(telegram_id=self.message.from_user.id)
-        if not self.chat_ids:
-            return
-        if not message_delete_ids and not delete_last_messages:
-            message_delete_ids = [self.message.id] if isinstance(self.message, types.Message) else list()
-        if data.get('list_messages_delete_ids'):
-            message_delete_ids += data.get('list_messages_delete_ids')
-            del data["list_messages_delete_ids"]
-            get_fsm_context().update_data(telegram_id=self.message.from_user.id, data=data)
-        for count, chat_id in enumerate(self.chat_ids):
-            await client_bot.delete_messages(chat_id=chat_id, message_ids=message_delete_ids)
+        screen = self.message.message
+        try:
+            await get_outbound_scheduler().send(
+                chat_id=screen.chat.id, priority=self.priority,
+                call=functools.partial(
+                    client_bot.edit_message_text, chat_id=screen.chat.id, message_id=screen.id, text=self.text,
+                    reply_markup=self.reply_markup))
+        except MessageNotModified:
+            pass
+        except BadRequest as error:
+            logger.debug("Screen %s in chat %s is not editable, sending a new one: %s",
+                         screen.id, screen.chat.id, error)
+            return False
+        await get_message_ledger().preload(telegram_id=self.message.from_user.id, chat_ids=[screen.chat.id])
+        message_delete_ids = get_message_ledger().take(telegram_id=self.message.from_user.id, chat_id=screen.chat.id)
+        get_message_ledger().record(
+            telegram_id=self.message.from_user.id, chat_id=screen.chat.id, message_ids=[screen.id])
+        message_delete_ids = [message_id for message_id in message_delete_ids if message_id != screen.id]
+        if message_delete_ids:
+            await self.__delete_messages({screen.chat.id: message_delete_ids})
+        return True
+
+    async def __take_message_delete_ids(
+            self, delete_last_messages: bool = False, message_delete_ids: list[int] = None) -> dict[int, list[int]]:
+        """
+            Приватный метод для получения ID удаляемых сообщений по чатам: текущего сообщения (или переданных ID)
+            и сообщений, которые забираются из журнала MessageLedger. Журналы чатов предварительно загружаются
+            из базы данных в отдельном потоке.
+
+            Параметры:
+            - delete_last_messages: bool: Флаг удаления предыдущих сообщений (по умолчанию False).
+            - message_delete_ids: list[int] | None: Список ID сообщений для удаления (по умолчанию None).
+
+            Возвращает:
+            - dict[int, list[int]]: Списки ID сообщений для удаления по ID чатов.
+        """
+        message_delete_ids = list(message_delete_ids) if message_delete_ids else list()
+        if not message_delete_ids and not delete_last_messages and isinstance(self.message, types.Message):
+            message_delete_ids.append(self.message.id)
+        await get_message_ledger().preload(telegram_id=self.message.from_user.id, chat_ids=self.chat_ids)
+        return {
+            chat_id: message_delete_ids + get_message_ledger().take(
+                telegram_id=self.message.from_user.id, chat_id=chat_id)
+            for chat_id in self.chat_ids}
+
+    async def __delete_messages(self, message_delete_ids: dict[int, list[int]]) -> FanOutResult:
+        """
+            Приватный метод для одновременного удаления сообщений во всех чатах. Сообщения удаляются запросами
+            не более чем по DELETE_MESSAGES_CHUNK ID. Удаление не ограничивается лимитами чатов OutboundScheduler,
+            поэтому выполняется одновременно с отправкой новых сообщений. Ошибки удаления не пробрасываются,
+            а возвращаются в FanOutResult.
+
+            Параметры:
+            - message_delete_ids: dict[int, list[int]]: Списки ID сообщений для удаления по ID чатов.
+
+            Возвращает:
+            - FanOutResult: ID удаленных сообщений и ошибки по ID чатов.
+        """
+        async def delete(chat_id: int) -> list[int]:
+            await asyncio.gather(*(
+                get_outbound_scheduler().send(
+                    chat_id=None, priority=self.priority,
+                    call=functools.partial(
+                        client_bot.delete_messages, chat_id=chat_id,
+                        message_ids=message_delete_ids[chat_id][start:start + DELETE_MESSAGES_CHUNK]))
+                for start in range(0, len(message_delete_ids[chat_id]), DELETE_MESSAGES_CHUNK)))
+            return message_delete_ids[chat_id]
+
+        return await self.__fan_out(
+            chat_ids=[chat_id for chat_id, message_ids in message_delete_ids.items() if message_ids], call=delete)
+
+    async def __send_message(self, chat_id: int) -> list[int]:
+        """
+            Приватный метод для отправки сообщения в один чат.
+
+            Параметры:
+            - chat_id: int: ID чата.
+
+            Возвращает:
+            - list[int]: ID отправленного сообщения.
+        """
+        message = await get_outbound_scheduler().send(
+            chat_id=chat_id, priority=self.priority,
+            call=functools.partial(
+                client_bot.send_message, reply_markup=self.reply_markup, chat_id=chat_id, text=self.text))
+        return [message.id]
+
+    async def __fan_out(self, chat_ids: list[int], call: Callable[[int], Awaitable[list[int]]]) -> FanOutResult:
+        """
+            Приватный метод для одновременного выполнения запроса во всех чатах, не более
+            FANOUT_CONCURRENCY запросов одновременно. Ошибка в одном чате записывается в результат и не останавливает
+            запросы в остальные чаты.
+
+            Параметры:
+            - chat_ids: list[int]: Список ID чатов.
+            - call: Callable[[int], Awaitable[list[int]]]: Функция запроса для ID чата, возвращающая ID сообщений.
+
+            Возвращает:
+            - FanOutResult: ID сообщений и ошибки по ID чатов.
+        """
+        result = FanOutResult()
+        semaphore = asyncio.Semaphore(config.FANOUT_CONCURRENCY)
+
+        async def run(chat_id: int) -> None:
+            async with semaphore:
+                try:
+                    result.message_ids[chat_id] = await call(chat_id)
+                except Exception as error:
+                    result.errors[chat_id] = error
+
+        await asyncio.gather(*(run(chat_id) for chat_id in chat_ids))
+        if result.errors:
+            chat_id, error = next(iter(result.errors.items()))
+            logger.warning("%s of %s chats failed, first in chat %s: %r",
+                           len(result.errors), len(chat_ids), chat_id, error)
+        return result
@@ -0,0 +1,78 @@
+"""
+Бенчмарки производительности бота.
+
+Каждый модуль пакета запускается из корня репозитория командой python -m benchmarks.<модуль>
+и печатает таблицу результатов.
+
+Пакеты app регистрируются без выполнения их __init__, который подключает обработчики к клиенту Telegram
+и создает таблицы в PostgreSQL, поэтому модули бота импортируются по отдельности. Если переменная
+DATABASE_CONNECTION_STRING не задана, используется временная база SQLite.
+
+Функции:
+    measure(func: Callable[[], Any], number: int) -> float: Среднее время вызова функции в микросекундах.
+    measure_async(func: Callable[[], Awaitable], number: int) -> float: Среднее время выполнения корутины
+        в микросекундах.
+
+"""
+
+import asyncio
+import os
+import sys
+import tempfile
+import types
+from time import perf_counter
+from typing import Any, Awaitable, Callable
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+os.environ.setdefault(
+    "DATABASE_CONNECTION_STRING", "sqlite:///" + os.path.join(tempfile.mkdtemp(), "benchmarks.sqlite3"))
+
+if ROOT not in sys.path:
+    sys.path.insert(0, ROOT)
+
+for _name in ("app", "app.db", "app.fsm_context", "app.root", "app.bot_init", "app.auth_manager",
+              "app.tasks_manager"):
+    if _name not in sys.modules:
+        _package = types.ModuleType(_name)
+        _package.__path__ = [os.path.join(ROOT, *_name.split("."))]
+        sys.modules[_name] = _package
+
+
+def measure(func: Callable[[], Any], number: int) -> float:
+    """
+    Измеряет среднее время вызова функции.
+
+    Параметры:
+        func (Callable[[], Any]): Измеряемая функция без аргументов.
+        number (int): Количество вызовов.
+
+    Возвращает:
+        float: Среднее время вызова в микросекундах.
+
+    """
+    started = perf_counter()
+    for _ in range(number):
+        func()
+    return (perf_counter() - started) / number * 1e6
+
+
+def measure_async(func: Callable[[], Awaitable], number: int) -> float:
+    """
+    Измеряет среднее время выполнения корутины на новом цикле событий.
+
+    Параметры:
+        func (Callable[[], Awaitable]): Функция без аргументов, возвращающая измеряемую корутину.
+        number (int): Количество запусков.
+
+    Возвращает:
+        float: Среднее время выполнения в микросекундах.
+
+    """
+    async def run() -> float:
+        started = perf_counter()
+        for _ in range(number):
+            await func()
+        return (perf_counter() - started) / number * 1e6
+
+    return asyncio.run(run())
@@ -0,0 +1,157 @@
+"""
+Микробенчмарк выбора обработчика диспетчером обновлений.
+
+Измеряет время обработки одного сообщения при росте количества зарегистрированных обработчиков. Обработчики
+ограничены фильтром состояния FSM, как обработчики бота, и распределены по состояниям из реестра так, что
+состояние пользователя пропускает только последний зарегистрированный обработчик.
+
+Варианты:
+    - linear: диспетчер без индекса по состояниям проверяет фильтры обработчиков по порядку
+      (как диспетчер Pyrogram);
+    - indexed: диспетчер проверяет только обработчики из ячейки таблицы для состояния пользователя;
+    - indexed, 2 groups: обработчик первой группы меняет состояние пользователя, и код состояния определяется
+      заново перед второй группой.
+
+Запуск:
+    python -m benchmarks.dispatch
+
+"""
+
+import asyncio
+
+from benchmarks import measure_async  # регистрирует пакеты app и базу данных по умолчанию
+
+from pyrogram import enums, filters, types
+from pyrogram.filters import Filter
+from pyrogram.handlers import MessageHandler
+
+from app.bot_init.dispatcher import Dispatcher
+from app.fsm_context.fsm_context import FSM
+from app.fsm_context.states import STATES, get_states
+from app.fsm_context.storage import MemoryStorage
+
+HANDLERS = [10, 100, 1000]
+
+NUMBER = 2000
+
+TELEGRAM_ID = 1
+
+STATE = "tasks:edit:edit_task:delete"
+
+NEXT_STATE = "tasks:edit:edit_task"
+
+OTHER_STATES = [state for state in STATES if state not in (STATE, NEXT_STATE)]
+
+
+class FakeClient:
+    """
+    Клиент Telegram без подключения к серверу.
+    """
+
+    def __init__(self):
+        self.loop = asyncio.get_event_loop()
+        self.executor = None
+
+
+def state_filter(fsm: FSM, state: str) -> Filter:
+    """
+    Создает фильтр состояния FSM, как get_filters().message_filter, для заданного объекта FSM.
+
+    Параметры:
+        fsm (FSM): Объект FSM.
+        state (str): Состояние пользователя.
+
+    Возвращает:
+        Filter: Фильтр Pyrogram с атрибутом state_codes.
+
+    """
+    async def func(flt, _, update: types.Message) -> bool:
+        return fsm.get_state_code(telegram_id=update.from_user.id) in flt.state_codes
+
+    return filters.create(func, state_codes=frozenset({get_states().code(state)}))
+
+
+def create_dispatcher(fsm: FSM, handlers: int, indexed: bool, groups: int) -> tuple[Dispatcher, list[int]]:
+    """
+    Создает диспетчер с handlers обработчиками в каждой группе. Состояние пользователя пропускает только
+    последний обработчик группы. Последний обработчик первой группы переводит пользователя в другое состояние,
+    которое пропускает только последний обработчик второй группы.
+
+    Параметры:
+        fsm (FSM): Объект FSM.
+        handlers (int): Количество обработчиков в группе.
+        indexed (bool): Флаг индексации обработчиков по состояниям.
+        groups (int): Количество групп обработчиков (1 или 2).
+
+    Возвращает:
+        tuple[Dispatcher, list[int]]: Диспетчер обновлений и список, в который записываются номера групп
+            выполненных последних обработчиков.
+
+    """
+    dispatcher = Dispatcher(
+        preload=fsm.preload, get_state_code=fsm.get_state_code if indexed else None,
+        get_state_version=fsm.get_state_version if indexed else None)
+    calls = list()
+    for group in range(groups):
+        for num in range(handlers - 1):
+            async def skip(_, update: types.Message) -> None:
+                raise AssertionError("handler of another state was called")
+
+            dispatcher.add_handler(MessageHandler(skip, state_filter(fsm=fsm, state=OTHER_STATES[
+                num % len(OTHER_STATES)])), group=group)
+
+        async def last(_, update: types.Message, group=group) -> None:
+            calls.append(group)
+            if group == 0:
+                await fsm.update_state(telegram_id=update.from_user.id, state=NEXT_STATE)
+
+        dispatcher.add_handler(MessageHandler(last, state_filter(fsm=fsm, state=(STATE, NEXT_STATE)[group])),
+                               group=group)
+    return dispatcher, calls
+
+
+def run(handlers: int, indexed: bool, groups: int) -> float:
+    """
+    Измеряет время обработки сообщения от постановки в очередь до завершения обработчиков.
+
+    Параметры:
+        handlers (int): Количество обработчиков в группе.
+        indexed (bool): Флаг индексации обработчиков по состояниям.
+        groups (int): Количество групп обработчиков.
+
+    Возвращает:
+        float: Время обработки сообщения в микросекундах.
+
+    """
+    # Изменения состояния остаются в памяти, чтобы замер не включал запись в хранилище
+    fsm = FSM(storage=MemoryStorage(), write_behind=True)
+    dispatcher, calls = create_dispatcher(fsm=fsm, handlers=handlers, indexed=indexed, groups=groups)
+    update = types.Message(id=1, from_user=types.User(id=TELEGRAM_ID),
+                           chat=types.Chat(id=TELEGRAM_ID, type=enums.ChatType.PRIVATE), text="text")
+    client = None
+
+    async def dispatch() -> None:
+        nonlocal client
+        client = client or FakeClient()
+        await fsm.update_state(telegram_id=TELEGRAM_ID, state=STATE)
+        await dispatcher.feed(client=client, update=update)
+        while dispatcher.queue_depth():
+            await asyncio.sleep(0)
+
+    elapsed = measure_async(dispatch, number=NUMBER)
+    assert calls == list(range(groups)) * NUMBER
+    return elapsed
+
+
+def main() -> None:
+    print(f"{NUMBER} messages per measurement, time in us per message")
+    print(f"{'handlers':>10}{'linear':>12}{'indexed':>12}{'indexed, 2 groups':>20}")
+    for handlers in HANDLERS:
+        linear = run(handlers=handlers, indexed=False, groups=1)
+        indexed = run(handlers=handlers, indexed=True, groups=1)
+        two_groups = run(handlers=handlers, indexed=True, groups=2)
+        print(f"{handlers:>10}{linear:>12.1f}{indexed:>12.1f}{two_groups:>20.1f}")
+
+
+if __name__ == "__main__":
+    main()
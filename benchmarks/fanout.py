@@ -0,0 +1,100 @@
+"""
+Бенчмарк отправки и удаления сообщений в нескольких чатах через TelegramUtils.
+
+Клиент Telegram заменяется имитацией с задержкой сети LATENCY секунд на каждый запрос, отправка в каждый
+BLOCKED_EVERY-й чат завершается ошибкой UserIsBlocked. OutboundScheduler создается без ограничений частоты,
+чтобы измерялась только одновременная отправка. Запросы в разные чаты выполняются одновременно, не более
+FANOUT_CONCURRENCY одновременно, поэтому время отправки не растет с количеством чатов, пока оно не превышает
+FANOUT_CONCURRENCY, а затем растет ступенями по LATENCY (столбец expected), а не линейно (столбец sequential).
+
+Запуск:
+    python -m benchmarks.fanout
+
+"""
+
+import asyncio
+import logging
+import math
+from itertools import count
+from time import perf_counter
+
+import benchmarks  # noqa: F401  регистрирует пакеты app и базу данных по умолчанию
+
+from pyrogram import enums, types
+from pyrogram.errors import UserIsBlocked
+from sqlalchemy import text
+
+from app import config, utils
+from app.bot_init.outbound import OutboundScheduler
+from app.db.db_config import engine
+
+CHATS = [1, 10, 32, 100, 320, 1000]
+
+LATENCY = 0.05
+
+BLOCKED_EVERY = 97
+
+
+class FakeClient:
+    """
+    Клиент Telegram без подключения к серверу с задержкой сети на каждый запрос.
+    """
+
+    def __init__(self):
+        self.message_ids = count(1000)
+
+    async def send_message(self, chat_id: int, text: str, reply_markup=None, **kwargs) -> types.Message:
+        await asyncio.sleep(LATENCY)
+        if chat_id % BLOCKED_EVERY == 0:
+            raise UserIsBlocked()
+        return types.Message(id=next(self.message_ids), chat=types.Chat(id=chat_id, type=enums.ChatType.PRIVATE))
+
+    async def delete_messages(self, chat_id: int, message_ids: list[int], **kwargs) -> int:
+        await asyncio.sleep(LATENCY)
+        return len(message_ids)
+
+
+async def run(chats: int) -> tuple[float, float, int]:
+    """
+    Отправляет сообщение в chats чатов, затем удаляет сообщения во всех чатах.
+
+    Параметры:
+        chats (int): Количество чатов.
+
+    Возвращает:
+        tuple[float, float, int]: Время отправки и время удаления в миллисекундах и количество чатов с ошибкой
+            отправки.
+
+    """
+    scheduler = OutboundScheduler(global_rate=1e9, chat_rate=1e9, chat_burst=1000)
+    utils.get_outbound_scheduler = lambda: scheduler
+    update = types.Message(id=1, from_user=types.User(id=1),
+                           chat=types.Chat(id=1, type=enums.ChatType.PRIVATE), text="text")
+    telegram_utils = utils.TelegramUtils(message=update, text="Новая задача", chat_ids=list(range(1, chats + 1)))
+    started = perf_counter()
+    result = await telegram_utils.send_messages()
+    sent = perf_counter()
+    await telegram_utils.delete_message()
+    deleted = perf_counter()
+    return (sent - started) * 1e3, (deleted - sent) * 1e3, len(result.errors)
+
+
+def main() -> None:
+    with engine.begin() as connection:
+        connection.execute(text(
+            "CREATE TABLE IF NOT EXISTS message_ledger (telegram_id BIGINT NOT NULL, chat_id BIGINT NOT NULL, "
+            "message_ids TEXT, PRIMARY KEY (telegram_id, chat_id))"))
+    utils.client_bot = FakeClient()
+    # Ошибки заблокированных чатов ожидаемы и не выводятся
+    logging.getLogger(utils.__name__).setLevel(logging.ERROR)
+    print(f"{LATENCY * 1e3:.0f} ms per Telegram API request, FANOUT_CONCURRENCY={config.FANOUT_CONCURRENCY}, "
+          f"time in ms")
+    print(f"{'chats':>6}{'send':>10}{'delete':>10}{'expected':>10}{'sequential':>12}{'failed':>8}")
+    for chats in CHATS:
+        send, delete, failed = asyncio.run(run(chats=chats))
+        expected = math.ceil(chats / config.FANOUT_CONCURRENCY) * LATENCY * 1e3
+        print(f"{chats:>6}{send:>10.1f}{delete:>10.1f}{expected:>10.0f}{chats * LATENCY * 1e3:>12.0f}{failed:>8}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,161 @@
+"""
+Бенчмарк количества запросов к базе данных на одну запись FSM.
+
+Сравнивает прежнюю запись FSMContext объекта (SELECT, затем UPDATE или INSERT, затем повторный SELECT
+для обновления словаря в памяти) с записью через PostgresStorage (один INSERT ... ON CONFLICT DO UPDATE ...
+RETURNING) и с режимом отложенной записи, в котором изменения сбрасываются одним запросом на пакет.
+
+Запросы считаются обработчиком события before_cursor_execute движка SQLAlchemy. В режиме отложенной записи
+update_data выполняет запрос только при первом обращении к пользователю (загрузка контекста в кэш).
+Для измерения задержки на реальной базе задайте DATABASE_CONNECTION_STRING с адресом PostgreSQL.
+
+Запуск:
+    python -m benchmarks.fsm_queries
+
+"""
+
+import asyncio
+from time import perf_counter
+
+import benchmarks  # noqa: F401  регистрирует пакеты app и базу данных по умолчанию
+
+from sqlalchemy import event, text
+
+from app.db.db_config import Session, engine
+from app.fsm_context.fsm_context import FSM
+from app.fsm_context.states import get_states
+from app.fsm_context.storage import PostgresStorage, dump_fsm_data
+
+USERS = 200
+
+STEPS = 5
+
+
+class LegacyFSM:
+    """
+    Прежняя запись FSMContext объектов: три запроса на каждый вызов update_state и update_data.
+    Методы асинхронные, как у FSM, но выполняют запросы в цикле событий, как прежняя запись.
+
+    Параметры:
+        __list_fsm_contexts (dict[int, tuple]): Строки fsm_context, загруженные после записи.
+
+    """
+
+    def __init__(self):
+        self.__list_fsm_contexts: dict[int, tuple] = dict()
+
+    @staticmethod
+    def __get_fsm_context(telegram_id: int):
+        with Session() as session:
+            query = text("SELECT telegram_id, state, data FROM fsm_context WHERE telegram_id=:telegram_id")
+            return session.execute(query, {"telegram_id": telegram_id}).first()
+
+    def __write(self, telegram_id: int, state: int, data: dict, exists: bool) -> None:
+        with Session() as session:
+            if exists:
+                query = text("UPDATE fsm_context SET state=:state, data=:data WHERE telegram_id=:telegram_id")
+            else:
+                query = text("INSERT INTO fsm_context (telegram_id, state, data) VALUES (:telegram_id, :state, :data)")
+            session.execute(query, {"telegram_id": telegram_id, "state": state, "data": dump_fsm_data(data)})
+            session.commit()
+        self.__list_fsm_contexts[telegram_id] = self.__get_fsm_context(telegram_id=telegram_id)
+
+    async def update_state(self, telegram_id: int, state: str) -> None:
+        fsm_context = self.__get_fsm_context(telegram_id=telegram_id)
+        self.__write(telegram_id=telegram_id, state=get_states().code(state), data=dict(),
+                     exists=fsm_context is not None)
+
+    async def update_data(self, telegram_id: int, data: dict) -> None:
+        fsm_context = self.__get_fsm_context(telegram_id=telegram_id)
+        self.__write(telegram_id=telegram_id, state=fsm_context.state if fsm_context else 0, data=data,
+                     exists=fsm_context is not None)
+
+
+class QueryCounter:
+    """
+    Счетчик запросов, выполненных движком SQLAlchemy.
+
+    Параметры:
+        queries (int): Количество запросов.
+
+    """
+
+    def __init__(self):
+        self.queries = 0
+        event.listen(engine, "before_cursor_execute", self.__count)
+
+    def __count(self, *_) -> None:
+        self.queries += 1
+
+    def close(self) -> None:
+        event.remove(engine, "before_cursor_execute", self.__count)
+
+
+def prepare_table() -> None:
+    """
+    Пересоздает пустую таблицу fsm_context с колонками, которые используются хранилищем PostgresStorage.
+
+    """
+    with engine.begin() as connection:
+        connection.execute(text("DROP TABLE IF EXISTS fsm_context"))
+        connection.execute(text(
+            "CREATE TABLE fsm_context (telegram_id BIGINT NOT NULL PRIMARY KEY, state SMALLINT NOT NULL DEFAULT 0, "
+            "data JSONB DEFAULT '{}', last_touched TIMESTAMP NOT NULL DEFAULT CURRENT_TIMESTAMP)"))
+
+
+async def run(name: str, fsm, flush=None) -> tuple[str, float, float, float, float]:
+    """
+    Выполняет STEPS пар update_data/update_state для USERS пользователей и считает запросы.
+
+    Параметры:
+        name (str): Название варианта записи.
+        fsm: Объект с методами update_state и update_data.
+        flush (Callable[[], int] | None): Функция сброса отложенных изменений, вызываемая после каждого шага.
+
+    Возвращает:
+        tuple[str, float, float, float, float]: Название, запросы на один вызов update_state, update_data
+            и flush в пересчете на одну запись, среднее время одной записи в микросекундах.
+
+    """
+    prepare_table()
+    counter = QueryCounter()
+    state_queries, data_queries, flush_queries, elapsed = 0, 0, 0, 0.0
+    try:
+        for step in range(STEPS):
+            for telegram_id in range(USERS):
+                before = counter.queries
+                started = perf_counter()
+                await fsm.update_data(telegram_id, {"task_name": f"task {step}", "editor_task_id": step})
+                middle = counter.queries
+                await fsm.update_state(telegram_id, "tasks:create:set_name" if step % 2 else "tasks")
+                elapsed += perf_counter() - started
+                data_queries += middle - before
+                state_queries += counter.queries - middle
+            if flush is not None:
+                before = counter.queries
+                started = perf_counter()
+                flush()
+                elapsed += perf_counter() - started
+                flush_queries += counter.queries - before
+    finally:
+        counter.close()
+    calls = STEPS * USERS
+    return (name, state_queries / calls, data_queries / calls, flush_queries / (calls * 2),
+            elapsed / (calls * 2) * 1e6)
+
+
+def main() -> None:
+    write_behind = FSM(storage=PostgresStorage(), write_behind=True, flush_max_dirty=USERS + 1)
+    results = [
+        asyncio.run(run("before: SELECT + UPDATE/INSERT + SELECT", LegacyFSM())),
+        asyncio.run(run("after: INSERT ... ON CONFLICT ... RETURNING", FSM(storage=PostgresStorage()))),
+        asyncio.run(run("after, write-behind (flush per step)", write_behind, flush=write_behind.flush)),
+    ]
+    print(f"{engine.dialect.name}: {USERS} users x {STEPS} steps, update_data + update_state per step")
+    print(f"{'variant':<46}{'update_state':>14}{'update_data':>14}{'flush/write':>14}{'us/write':>12}")
+    for name, state_queries, data_queries, flush_queries, latency in results:
+        print(f"{name:<46}{state_queries:>14.2f}{data_queries:>14.2f}{flush_queries:>14.3f}{latency:>12.1f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,68 @@
+"""
+Бенчмарк сериализации дополнительных данных FSM: стандартный модуль json против msgspec.
+
+Для типичных данных каждого сценария (app/fsm_context/schemas.py) измеряет:
+    - size: размер сериализованных данных в байтах (json.dumps с параметрами по умолчанию, которые использовались
+      до перехода на msgspec, и компактный JSON msgspec, записываемый хранилищами);
+    - encode: сериализацию словаря (json.dumps и dump_fsm_data);
+    - decode: десериализацию в словарь (json.loads и load_fsm_data);
+    - payload: получение схемы сценария из JSON (json.loads + msgspec.convert, как FSM.get_payload после загрузки
+      из хранилища, и msgspec.json.decode сразу в схему).
+
+Запуск:
+    python -m benchmarks.fsm_schemas
+
+"""
+
+import json
+
+import msgspec
+
+from benchmarks import measure  # регистрирует пакеты app и базу данных по умолчанию
+
+from app.fsm_context.schemas import (
+    AuthorizationData, FSMData, RegistrationData, TaskCreationData, TaskEditData, to_fsm_data)
+from app.fsm_context.storage import dump_fsm_data, load_fsm_data
+
+NUMBER = 20000
+
+PAYLOADS: dict[str, FSMData] = {
+    "registration": RegistrationData(
+        owner_telegram_id=123456789, username="Иван", login_name="ivan_petrov",
+        password="gAAAAABmZ2x5VnRkT0JxQ1N6cXpVd1R5d2JmX3J0d2VlZ3l0a0J4eFhQd0F6c3h4UDl3"),
+    "authorization": AuthorizationData(owner_telegram_id=123456789, login_name="ivan_petrov"),
+    "task creation": TaskCreationData(
+        owner_telegram_id=123456789, task_name="Подготовить отчет",
+        task_description="Собрать метрики за квартал и отправить руководителю", task_start_time="01.06.2025 10:00"),
+    "task edit, 10 ids": TaskEditData(
+        owner_telegram_id=123456789, editor_task_id=42, editor_task_pagination=0,
+        editor_task_list_ids=list(range(1000, 1010))),
+    "task edit, 500 ids": TaskEditData(
+        owner_telegram_id=123456789, editor_task_id=42, editor_task_pagination=480,
+        editor_task_list_ids=list(range(100000, 100500))),
+}
+
+
+def main() -> None:
+    print(f"{NUMBER} calls per measurement, time in us per call")
+    print(f"{'payload':<20}{'json B':>8}{'msgspec B':>11}{'encode json':>13}{'msgspec':>9}"
+          f"{'decode json':>13}{'msgspec':>9}{'payload json':>14}{'msgspec':>9}")
+    for name, payload in PAYLOADS.items():
+        schema = type(payload)
+        data = to_fsm_data(payload)
+        raw_json = json.dumps(data)
+        raw_msgspec = dump_fsm_data(data)
+        assert json.loads(raw_msgspec) == load_fsm_data(raw_json) == data
+        encode_json = measure(lambda: json.dumps(data), number=NUMBER)
+        encode_msgspec = measure(lambda: dump_fsm_data(data), number=NUMBER)
+        decode_json = measure(lambda: json.loads(raw_msgspec), number=NUMBER)
+        decode_msgspec = measure(lambda: load_fsm_data(raw_msgspec), number=NUMBER)
+        payload_json = measure(lambda: msgspec.convert(json.loads(raw_msgspec), type=schema), number=NUMBER)
+        payload_msgspec = measure(lambda: msgspec.json.decode(raw_msgspec, type=schema), number=NUMBER)
+        print(f"{name:<20}{len(raw_json.encode()):>8}{len(raw_msgspec.encode()):>11}{encode_json:>13.2f}"
+              f"{encode_msgspec:>9.2f}{decode_json:>13.2f}{decode_msgspec:>9.2f}{payload_json:>14.2f}"
+              f"{payload_msgspec:>9.2f}")
+
+
+if __name__ == "__main__":
+    main()
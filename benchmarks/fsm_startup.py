@@ -0,0 +1,190 @@
+"""
+Бенчмарк времени до первого ответа после перезапуска бота.
+
+Хранилище SQLite содержит CONTEXTS FSMContext объектов. Перезапуск измеряется в двух вариантах:
+    - cold: без снимка, контексты загружаются из хранилища при первом обращении пользователя;
+    - snapshot: контексты загружаются из файла снимка в фоновой задаче (restore_snapshot), обновления
+      обрабатываются сразу, не дожидаясь снимка.
+
+Каждый вариант измеряется с локальной базой и с задержкой сети LATENCY секунд на каждый запрос к хранилищу
+(как у базы данных на другом сервере).
+
+Для каждого варианта печатается время до первого ответа и до ответа RESPONSES пользователям (от начала
+перезапуска, обновления обрабатывает Dispatcher с имитацией клиента Telegram), наибольшая задержка цикла
+событий до загрузки снимка, время до завершения загрузки снимка и время ответа еще RESPONSES пользователям,
+обратившимся после нее.
+
+Запуск:
+    python -m benchmarks.fsm_startup
+
+"""
+
+import asyncio
+import os
+import tempfile
+import time
+from time import perf_counter
+
+import benchmarks  # noqa: F401  регистрирует пакеты app и базу данных по умолчанию
+
+from pyrogram import enums, types
+from pyrogram.handlers import MessageHandler
+
+from app.bot_init.dispatcher import Dispatcher
+from app.fsm_context.fsm_context import FSM
+from app.fsm_context.storage import SQLiteStorage
+
+CONTEXTS = 20000
+
+RESPONSES = 100
+
+LATENCY = 0.002
+
+
+class FakeClient:
+    """
+    Клиент Telegram без подключения к серверу, запоминающий время отправки сообщений.
+    """
+
+    def __init__(self):
+        self.loop = asyncio.get_running_loop()
+        self.executor = None
+        self.sent: list[float] = list()
+
+    async def send_message(self, chat_id: int, text: str, **kwargs) -> None:
+        self.sent.append(perf_counter())
+
+
+class RemoteStorage(SQLiteStorage):
+    """
+    Хранилище SQLite с задержкой сети на каждый запрос чтения.
+    """
+
+    def load(self, telegram_id):
+        time.sleep(LATENCY)
+        return super().load(telegram_id=telegram_id)
+
+    def touched_since(self, watermark):
+        time.sleep(LATENCY)
+        return super().touched_since(watermark=watermark)
+
+    def existing(self, telegram_ids):
+        time.sleep(LATENCY)
+        return super().existing(telegram_ids=telegram_ids)
+
+
+def message(telegram_id: int) -> types.Message:
+    return types.Message(id=1, from_user=types.User(id=telegram_id),
+                         chat=types.Chat(id=telegram_id, type=enums.ChatType.PRIVATE), text="/start")
+
+
+async def reply_all(fsm: FSM, telegram_ids: list[int]) -> list[float]:
+    """
+    Отправляет обновления пользователей в Dispatcher и ожидает ответа каждому из них.
+
+    Параметры:
+        fsm (FSM): Объект FSM.
+        telegram_ids (list[int]): Идентификаторы пользователей.
+
+    Возвращает:
+        list[float]: Время отправки ответов по часам perf_counter.
+
+    """
+    dispatcher = Dispatcher(preload=fsm.preload, get_state_code=fsm.get_state_code, max_queue=len(telegram_ids))
+    client = FakeClient()
+
+    async def reply(_, update: types.Message) -> None:
+        await client.send_message(chat_id=update.chat.id, text=fsm.get_state(telegram_id=update.from_user.id))
+
+    dispatcher.add_handler(MessageHandler(reply))
+    for telegram_id in telegram_ids:
+        await dispatcher.feed(client=client, update=message(telegram_id=telegram_id))
+    while len(client.sent) < len(telegram_ids):
+        await asyncio.sleep(0)
+    return client.sent
+
+
+async def restart(storage: SQLiteStorage, snapshot: str | None) -> tuple[float, float, float, float | None, float]:
+    """
+    Имитирует перезапуск бота: снимок загружается в фоновой задаче, как в app/__main__.py, а обновления RESPONSES
+    пользователей обрабатываются сразу. После загрузки снимка обрабатываются обновления еще RESPONSES
+    пользователей.
+
+    Параметры:
+        storage (SQLiteStorage): Хранилище FSMContext объектов.
+        snapshot (str | None): Путь к файлу снимка или None для запуска без снимка.
+
+    Возвращает:
+        tuple[float, float, float, float | None, float]: Время до первого ответа, время до ответа всем
+            пользователям, пиковая задержка цикла событий, время до загрузки снимка (None без снимка)
+            от начала перезапуска и время ответа следующим пользователям от их обращения в миллисекундах.
+
+    """
+    started = perf_counter()
+    fsm = FSM(storage=storage, cache_max_size=CONTEXTS)
+    restorer = asyncio.create_task(fsm.restore_snapshot(path=snapshot)) if snapshot is not None else None
+    stop = asyncio.Event()
+    lag = asyncio.create_task(loop_lag(stop))
+    step = CONTEXTS // RESPONSES
+    sent = await reply_all(fsm=fsm, telegram_ids=list(range(step, CONTEXTS + 1, step)))
+    restored = None
+    if restorer is not None:
+        await restorer
+        restored = (perf_counter() - started) * 1e3
+    stop.set()
+    lag = await lag
+    next_started = perf_counter()
+    next_sent = await reply_all(fsm=fsm, telegram_ids=list(range(step // 2, CONTEXTS + 1, step)))
+    return ((sent[0] - started) * 1e3, (sent[-1] - started) * 1e3, lag * 1e3, restored,
+            (next_sent[-1] - next_started) * 1e3)
+
+
+async def loop_lag(stop: asyncio.Event) -> float:
+    """
+    Измеряет наибольшую задержку цикла событий, пока не установлено событие stop.
+
+    Параметры:
+        stop (asyncio.Event): Событие завершения измерения.
+
+    Возвращает:
+        float: Наибольшая задержка в секундах.
+
+    """
+    worst = 0.0
+    while not stop.is_set():
+        before = perf_counter()
+        await asyncio.sleep(0)
+        worst = max(worst, perf_counter() - before)
+    return worst
+
+
+def main() -> None:
+    directory = tempfile.mkdtemp()
+    path = os.path.join(directory, "fsm_context.sqlite3")
+    storage = SQLiteStorage(path=path)
+    fsm = FSM(storage=storage, write_behind=True, flush_max_dirty=CONTEXTS + 1, cache_max_size=CONTEXTS)
+
+    async def fill() -> None:
+        for telegram_id in range(1, CONTEXTS + 1):
+            await fsm.transition(telegram_id=telegram_id, state="tasks",
+                                 data={"owner_telegram_id": telegram_id, "task_name": f"task {telegram_id}"})
+
+    asyncio.run(fill())
+    fsm.flush()
+    snapshot = os.path.join(directory, "fsm_context.snapshot")
+    print(f"{CONTEXTS} contexts in SQLite, {RESPONSES} users send /start right after the restart, "
+          f"then {RESPONSES} other users send /start after the snapshot is restored")
+    print(f"{'restart':<24}{'first ms':>10}{f'{RESPONSES} users ms':>16}{'max lag ms':>12}{'restored ms':>13}"
+          f"{f'next {RESPONSES} ms':>14}")
+    for database, restart_storage in (("local", storage), (f"{LATENCY * 1e3:.0f} ms", RemoteStorage(path=path))):
+        for name, snapshot_path in (("cold", None), ("snapshot", snapshot)):
+            if snapshot_path is not None:
+                fsm.dump_snapshot(path=snapshot_path)
+            first, last, lag, restored, following = asyncio.run(
+                restart(storage=restart_storage, snapshot=snapshot_path))
+            restored = f"{restored:.1f}" if restored is not None else "-"
+            print(f"{f'{name}, {database}':<24}{first:>10.1f}{last:>16.1f}{lag:>12.1f}{restored:>13}"
+                  f"{following:>14.1f}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,152 @@
+"""
+Бенчмарк хранилищ FSMContext объектов.
+
+Для каждого хранилища из app/fsm_context/storage.py измеряет задержку (p50, p99) и пропускную способность
+операций:
+    - get: загрузка контекста пользователя (load);
+    - set: установка ключей в данных пользователя (set_keys);
+    - transition: атомарная смена состояния и данных (save с объединением данных).
+
+Пропускная способность измеряется в одном потоке и в THREADS потоках (обработчики выполняют запись
+из пула потоков).
+
+Хранилища:
+    - memory: MemoryStorage;
+    - sqlite: SQLiteStorage во временном файле;
+    - redis: RedisStorage с сервером в памяти fakeredis (или с сервером из BENCH_REDIS_URL);
+    - postgres: PostgresStorage, если DATABASE_CONNECTION_STRING указывает на PostgreSQL с созданной таблицей
+      fsm_context. Используются отрицательные идентификаторы пользователей, которые удаляются после замера.
+
+Запуск:
+    python -m benchmarks.fsm_storage
+
+"""
+
+import os
+import tempfile
+from concurrent.futures import ThreadPoolExecutor
+from statistics import quantiles
+from time import perf_counter
+from typing import Callable
+
+import benchmarks  # noqa: F401  регистрирует пакеты app и базу данных по умолчанию
+
+from app.db.db_config import engine
+from app.fsm_context.storage import BaseStorage, MemoryStorage, PostgresStorage, RedisStorage, SQLiteStorage
+
+USERS = 500
+
+OPERATIONS = 2000
+
+THREADS = 8
+
+STATES = ["tasks", "tasks:create:set_name", "tasks:create:set_description", "tasks:create:set_start_time"]
+
+
+def create_storages() -> dict[str, BaseStorage]:
+    """
+    Создает хранилища, доступные в текущем окружении.
+
+    Возвращает:
+        dict[str, BaseStorage]: Хранилища по названиям.
+
+    """
+    storages: dict[str, BaseStorage] = {
+        "memory": MemoryStorage(),
+        "sqlite": SQLiteStorage(path=os.path.join(tempfile.mkdtemp(), "fsm_context.sqlite3")),
+    }
+    if os.getenv("BENCH_REDIS_URL"):
+        storages["redis"] = RedisStorage(url=os.environ["BENCH_REDIS_URL"])
+    else:
+        try:
+            import fakeredis
+        except ImportError:
+            print("redis: skipped, install fakeredis or set BENCH_REDIS_URL")
+        else:
+            storages["redis (fakeredis)"] = RedisStorage(
+                url=str(), client=fakeredis.FakeRedis(decode_responses=True))
+    if engine.dialect.name == "postgresql":
+        storages["postgres"] = PostgresStorage()
+    else:
+        print("postgres: skipped, set DATABASE_CONNECTION_STRING to a PostgreSQL database")
+    return storages
+
+
+def operations(storage: BaseStorage) -> dict[str, Callable[[int], object]]:
+    """
+    Получает измеряемые операции хранилища. Идентификаторы пользователей отрицательные, чтобы не пересекаться
+    с настоящими пользователями в общей базе данных.
+
+    Параметры:
+        storage (BaseStorage): Хранилище.
+
+    Возвращает:
+        dict[str, Callable[[int], object]]: Операции по названиям, принимающие номер операции.
+
+    """
+    return {
+        "transition": lambda num: storage.save(
+            telegram_id=-1 - num % USERS, state=STATES[num % len(STATES)],
+            data={"task_name": f"task {num}", "editor_task_id": num}, merge=True),
+        "set": lambda num: storage.set_keys(
+            telegram_id=-1 - num % USERS, values={"task_start_time": "01.01.2025 10:00", "step": num}),
+        "get": lambda num: storage.load(telegram_id=-1 - num % USERS),
+    }
+
+
+def latency(func: Callable[[int], object]) -> tuple[float, float, float]:
+    """
+    Измеряет задержку операции в одном потоке.
+
+    Параметры:
+        func (Callable[[int], object]): Операция.
+
+    Возвращает:
+        tuple[float, float, float]: p50 и p99 в микросекундах и пропускная способность в операциях в секунду.
+
+    """
+    samples = list()
+    started = perf_counter()
+    for num in range(OPERATIONS):
+        before = perf_counter()
+        func(num)
+        samples.append((perf_counter() - before) * 1e6)
+    elapsed = perf_counter() - started
+    percentiles = quantiles(samples, n=100)
+    return percentiles[49], percentiles[98], OPERATIONS / elapsed
+
+
+def throughput(func: Callable[[int], object]) -> float:
+    """
+    Измеряет пропускную способность операции в THREADS потоках.
+
+    Параметры:
+        func (Callable[[int], object]): Операция.
+
+    Возвращает:
+        float: Пропускная способность в операциях в секунду.
+
+    """
+    with ThreadPoolExecutor(max_workers=THREADS) as executor:
+        started = perf_counter()
+        list(executor.map(func, range(OPERATIONS)))
+        return OPERATIONS / (perf_counter() - started)
+
+
+def main() -> None:
+    storages = create_storages()
+    print(f"{USERS} users, {OPERATIONS} operations per measurement, {THREADS} threads for concurrent throughput")
+    print(f"{'storage':<20}{'operation':<12}{'p50 us':>10}{'p99 us':>10}{'ops/s':>12}{f'ops/s x{THREADS}':>14}")
+    for name, storage in storages.items():
+        try:
+            for operation, func in operations(storage).items():
+                p50, p99, single = latency(func)
+                concurrent = throughput(func)
+                print(f"{name:<20}{operation:<12}{p50:>10.1f}{p99:>10.1f}{single:>12.0f}{concurrent:>14.0f}")
+        finally:
+            for num in range(USERS):
+                storage.delete(telegram_id=-1 - num)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,118 @@
+"""
+Бенчмарк накладных расходов сбора метрик обработчиков.
+
+Сравнивает работу с выключенными метриками (METRICS_ENABLED=false, значение по умолчанию) и с включенными:
+    - dispatch: обработка сообщения диспетчером с пустым обработчиком; с метриками функция обработчика
+      обернута HandlerMetrics.instrument;
+    - query: запрос SELECT 1 к базе данных в контексте обновления; с метриками к движку подключены обработчики
+      событий, измеряющие время запроса (без метрик подключен только счетчик запросов);
+    - render: вывод метрик в текстовом формате Prometheus (только с метриками).
+
+Каждое измерение повторяется REPEAT раз, печатается лучший результат.
+
+Запуск:
+    python -m benchmarks.metrics
+
+"""
+
+import asyncio
+
+from benchmarks import measure, measure_async  # регистрирует пакеты app и базу данных по умолчанию
+
+from pyrogram import enums, types
+from pyrogram.handlers import MessageHandler
+from sqlalchemy import event, text
+
+from app.bot_init.context import UpdateContext, reset_update_context, set_update_context
+from app.bot_init.dispatcher import Dispatcher
+from app.bot_init.metrics import HandlerMetrics
+from app.db.db_config import engine, start_update_query, time_update_query
+
+NUMBER = 5000
+
+REPEAT = 5
+
+TELEGRAM_ID = 1
+
+
+class FakeClient:
+    """
+    Клиент Telegram без подключения к серверу.
+    """
+
+    def __init__(self):
+        self.loop = asyncio.get_event_loop()
+        self.executor = None
+
+
+def run_dispatch(metrics: HandlerMetrics | None) -> float:
+    """
+    Измеряет время обработки сообщения диспетчером от постановки в очередь до завершения обработчика.
+
+    Параметры:
+        metrics (HandlerMetrics | None): Сбор метрик обработчиков (None - метрики выключены).
+
+    Возвращает:
+        float: Время обработки сообщения в микросекундах.
+
+    """
+    dispatcher = Dispatcher(metrics=metrics)
+
+    async def handler(_, update: types.Message) -> None:
+        pass
+
+    dispatcher.add_handler(MessageHandler(handler))
+    update = types.Message(id=1, from_user=types.User(id=TELEGRAM_ID),
+                           chat=types.Chat(id=TELEGRAM_ID, type=enums.ChatType.PRIVATE), text="text")
+    client = None
+
+    async def dispatch() -> None:
+        nonlocal client
+        client = client or FakeClient()
+        await dispatcher.feed(client=client, update=update)
+        while dispatcher.queue_depth():
+            await asyncio.sleep(0)
+
+    return measure_async(dispatch, number=NUMBER)
+
+
+def run_query(timed: bool) -> float:
+    """
+    Измеряет время запроса к базе данных в контексте обрабатываемого обновления.
+
+    Параметры:
+        timed (bool): Флаг подключения обработчиков событий, измеряющих время запроса.
+
+    Возвращает:
+        float: Время запроса в микросекундах.
+
+    """
+    if timed:
+        event.listen(engine, "before_cursor_execute", start_update_query)
+        event.listen(engine, "after_cursor_execute", time_update_query)
+    update = types.Message(id=1, from_user=types.User(id=TELEGRAM_ID),
+                           chat=types.Chat(id=TELEGRAM_ID, type=enums.ChatType.PRIVATE), text="text")
+    token = set_update_context(UpdateContext(update=update))
+    try:
+        with engine.connect() as connection:
+            return measure(lambda: connection.execute(text("SELECT 1")), number=NUMBER)
+    finally:
+        reset_update_context(token)
+        if timed:
+            event.remove(engine, "before_cursor_execute", start_update_query)
+            event.remove(engine, "after_cursor_execute", time_update_query)
+
+
+def main() -> None:
+    metrics = HandlerMetrics()
+    print(f"{NUMBER} calls per measurement, best of {REPEAT}, time in us per call")
+    print(f"{'operation':<12}{'disabled':>10}{'enabled':>10}")
+    dispatch = [min(run_dispatch(metrics=value) for _ in range(REPEAT)) for value in (None, metrics)]
+    print(f"{'dispatch':<12}{dispatch[0]:>10.2f}{dispatch[1]:>10.2f}")
+    query = [min(run_query(timed=value) for _ in range(REPEAT)) for value in (False, True)]
+    print(f"{'query':<12}{query[0]:>10.2f}{query[1]:>10.2f}")
+    print(f"{'render':<12}{'-':>10}{min(measure(metrics.render, number=NUMBER) for _ in range(REPEAT)):>10.2f}")
+
+
+if __name__ == "__main__":
+    main()
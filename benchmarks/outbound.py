@@ -0,0 +1,124 @@
+"""
+Бенчмарк задержки ответа пользователю при отправке сообщений через TelegramUtils.
+
+Клиент Telegram заменяется имитацией с задержкой сети LATENCY секунд на каждый запрос. USERS пользователей
+одновременно получают ответ: удаление предыдущего сообщения с инлайн-клавиатурой и отправку нового сообщения.
+Для каждого ответа измеряется время от начала обработки до завершения отправки.
+
+Варианты:
+    - serial: удаление сообщений ожидается до отправки нового сообщения (как до перехода на TelegramUtils.create);
+    - concurrent: TelegramUtils.create запускает удаление в фоне, и оно выполняется одновременно с отправкой.
+
+Каждый вариант измеряется с OutboundScheduler без ограничений частоты (задержка самого TelegramUtils)
+и с ограничениями по умолчанию из config (OUTBOUND_GLOBAL_RATE и OUTBOUND_CHAT_RATE), при которых ответы
+многим пользователям ожидают токенов общего ведра.
+
+Запуск:
+    python -m benchmarks.outbound
+
+"""
+
+import asyncio
+import statistics
+from itertools import count
+from time import perf_counter
+
+import benchmarks  # noqa: F401  регистрирует пакеты app и базу данных по умолчанию
+
+from pyrogram import enums, types
+from sqlalchemy import text
+
+from app import config, utils
+from app.bot_init.ledger import get_message_ledger
+from app.bot_init.outbound import OutboundScheduler
+from app.db.db_config import engine
+
+USERS = [1, 10, 30]
+
+LATENCY = 0.05
+
+MARKUP = types.InlineKeyboardMarkup(inline_keyboard=[[types.InlineKeyboardButton(text="Меню", callback_data="x")]])
+
+
+class FakeClient:
+    """
+    Клиент Telegram без подключения к серверу с задержкой сети на каждый запрос.
+    """
+
+    def __init__(self):
+        self.message_ids = count(1000)
+
+    async def send_message(self, chat_id: int, text: str, reply_markup=None, **kwargs) -> types.Message:
+        await asyncio.sleep(LATENCY)
+        return types.Message(id=next(self.message_ids), chat=types.Chat(id=chat_id, type=enums.ChatType.PRIVATE))
+
+    async def delete_messages(self, chat_id: int, message_ids: list[int], **kwargs) -> int:
+        await asyncio.sleep(LATENCY)
+        return len(message_ids)
+
+
+def message(telegram_id: int) -> types.Message:
+    return types.Message(id=1, from_user=types.User(id=telegram_id),
+                         chat=types.Chat(id=telegram_id, type=enums.ChatType.PRIVATE), text="Меню")
+
+
+async def serial_reply(update: types.Message) -> None:
+    telegram_utils = utils.TelegramUtils(message=update, text="Главное меню", reply_markup=MARKUP)
+    await telegram_utils.delete_message()
+    await telegram_utils.send_messages()
+
+
+async def concurrent_reply(update: types.Message) -> None:
+    telegram_utils = await utils.TelegramUtils.create(message=update, text="Главное меню", reply_markup=MARKUP)
+    await telegram_utils.send_messages()
+
+
+async def run(users: int, reply, limited: bool) -> tuple[float, float]:
+    """
+    Отправляет ответы users пользователям одновременно.
+
+    Параметры:
+        users (int): Количество пользователей.
+        reply: Функция ответа на сообщение (serial_reply или concurrent_reply).
+        limited (bool): Флаг ограничений частоты отправки по умолчанию.
+
+    Возвращает:
+        tuple[float, float]: Медиана и максимум времени ответа в миллисекундах.
+
+    """
+    scheduler = (
+        OutboundScheduler(global_rate=config.OUTBOUND_GLOBAL_RATE, chat_rate=config.OUTBOUND_CHAT_RATE,
+                          chat_burst=config.OUTBOUND_CHAT_BURST) if limited else
+        OutboundScheduler(global_rate=1e9, chat_rate=1e9, chat_burst=1000))
+    utils.get_outbound_scheduler = lambda: scheduler
+    for telegram_id in range(1, users + 1):
+        await get_message_ledger().preload(telegram_id=telegram_id, chat_ids=[telegram_id])
+        get_message_ledger().record(telegram_id=telegram_id, chat_id=telegram_id, message_ids=[1])
+
+    async def timed(update: types.Message) -> float:
+        started = perf_counter()
+        await reply(update)
+        return (perf_counter() - started) * 1e3
+
+    elapsed = await asyncio.gather(*(timed(message(telegram_id)) for telegram_id in range(1, users + 1)))
+    return statistics.median(elapsed), max(elapsed)
+
+
+def main() -> None:
+    with engine.begin() as connection:
+        connection.execute(text(
+            "CREATE TABLE IF NOT EXISTS message_ledger (telegram_id BIGINT NOT NULL, chat_id BIGINT NOT NULL, "
+            "message_ids TEXT, PRIMARY KEY (telegram_id, chat_id))"))
+    utils.client_bot = FakeClient()
+    print(f"{LATENCY * 1e3:.0f} ms per Telegram API request, reply time in ms")
+    print(f"{'scheduler':<12}{'users':>6}{'serial p50':>12}{'max':>8}{'concurrent p50':>16}{'max':>8}")
+    for limited in (False, True):
+        for users in USERS:
+            serial = asyncio.run(run(users=users, reply=serial_reply, limited=limited))
+            concurrent = asyncio.run(run(users=users, reply=concurrent_reply, limited=limited))
+            print(f"{'default' if limited else 'unlimited':<12}{users:>6}{serial[0]:>12.1f}{serial[1]:>8.1f}"
+                  f"{concurrent[0]:>16.1f}{concurrent[1]:>8.1f}")
+
+
+if __name__ == "__main__":
+    main()
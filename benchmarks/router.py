@@ -0,0 +1,59 @@
+"""
+Микробенчмарк кодирования и разбора данных коллбэк-запросов маршрутизатором.
+
+Для маршрутов с одним параметром и с пятью параметрами (страница списка задач) измеряет:
+    - pack: кодирование данных в компактном формате (CallbackRouter.pack);
+    - parse compact: разбор данных в компактном формате;
+    - parse text: разбор тех же данных в текстовом формате шаблона (кнопки, отправленные до появления
+      компактного формата), с поиском маршрута в префиксном дереве;
+    - params: повторное получение разобранных данных из атрибута callback_params коллбэк-запроса, как
+      в фильтрах маршрутов после первого разбора.
+
+Также печатается длина данных в обоих форматах (Telegram принимает не больше 64 байт).
+
+Запуск:
+    python -m benchmarks.router
+
+"""
+
+from benchmarks import measure  # регистрирует пакеты app и базу данных по умолчанию
+
+from pyrogram import types
+
+from app.bot_init.router import ROUTES, CallbackParams, CallbackRouter
+
+NUMBER = 50000
+
+CASES: dict[str, tuple[str, dict]] = {
+    "main_menu": ("main_menu:{owner_telegram_id}", {"owner_telegram_id": 123456789}),
+    "id_task": ("tasks:edit_task:id_task:{id_task}:{owner_telegram_id}",
+                {"id_task": 4242, "owner_telegram_id": 123456789}),
+    "view_page": ("tasks:view_page:{view}:{page}:{end_time}:{id_task}:{owner_telegram_id}",
+                  {"view": "completed", "page": "next", "end_time": 1750000000000000, "id_task": 4242,
+                   "owner_telegram_id": 123456789}),
+}
+
+
+def main() -> None:
+    router = CallbackRouter(routes=ROUTES)
+    for template in ROUTES:
+        router.route(template)
+    print(f"{NUMBER} calls per measurement, time in us per call")
+    print(f"{'route':<12}{'compact B':>11}{'text B':>8}{'pack':>8}{'parse compact':>15}{'parse text':>12}"
+          f"{'params':>8}")
+    for name, (template, params) in CASES.items():
+        compact = router.pack(template, **params)
+        text = template.format(**params)
+        assert router.parse(data=compact) == router.parse(data=text) == CallbackParams(route=template, **params)
+        query = types.CallbackQuery(id="1", from_user=types.User(id=1), chat_instance="1", data=compact)
+        router.params(message=query)
+        pack = measure(lambda: router.pack(template, **params), number=NUMBER)
+        parse_compact = measure(lambda: router.parse(data=compact), number=NUMBER)
+        parse_text = measure(lambda: router.parse(data=text), number=NUMBER)
+        cached = measure(lambda: router.params(message=query), number=NUMBER)
+        print(f"{name:<12}{len(compact):>11}{len(text.encode()):>8}{pack:>8.2f}{parse_compact:>15.2f}"
+              f"{parse_text:>12.2f}{cached:>8.2f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,92 @@
+"""
+Бенчмарк времени и памяти сборки клавиатур экранов меню.
+
+Для нескольких экранов сравнивает:
+    - plain: сборку новой клавиатуры из объектов Pyrogram при каждом показе экрана (как обработчики собирали
+      клавиатуры до ScreenRenderer);
+    - build: сборку неизменяемой клавиатуры ScreenRenderer с кэшем нулевого размера (промах кэша);
+    - cached: получение готовой клавиатуры из кэша ScreenRenderer.
+
+Для каждого варианта печатается среднее время показа экрана и объем памяти, выделенной на один показ
+и удерживаемой, пока клавиатура используется (измеряется tracemalloc на NUMBER показах с сохранением
+результатов, как при одновременной отправке экрана многим пользователям).
+
+Запуск:
+    python -m benchmarks.screens
+
+"""
+
+import tracemalloc
+from typing import Any, Callable
+
+from benchmarks import measure  # регистрирует пакеты app и базу данных по умолчанию
+
+from pyrogram import types
+
+from app.bot_init.router import get_callback_router
+from app.root.screens import SCREENS, ScreenRenderer
+
+NUMBER = 5000
+
+OWNER_TELEGRAM_ID = 123456789
+
+SCREEN_NAMES = ["tasks_menu", "edit_task", "main_menu"]
+
+
+def plain_markup(screen: str, owner_telegram_id: int,
+                 is_owner: bool) -> types.InlineKeyboardMarkup | types.ReplyKeyboardMarkup:
+    """
+    Собирает клавиатуру экрана из изменяемых объектов Pyrogram.
+    """
+    template = SCREENS[screen]
+    rows = [[button for button in row if is_owner or not button.owner_only] for row in template.rows]
+    if template.reply:
+        return types.ReplyKeyboardMarkup(
+            keyboard=[[types.KeyboardButton(text=button.text) for button in row] for row in rows if row],
+            resize_keyboard=True)
+    return types.InlineKeyboardMarkup(inline_keyboard=[[
+        types.InlineKeyboardButton(text=button.text, callback_data=get_callback_router().pack(
+            button.route, **({"owner_telegram_id": owner_telegram_id} if "{owner_telegram_id}" in button.route
+                             else {})))
+        for button in row] for row in rows if row])
+
+
+def allocated(func: Callable[[], Any]) -> float:
+    """
+    Измеряет объем памяти, выделенной на один вызов функции и удерживаемой ее результатом.
+
+    Параметры:
+        func (Callable[[], Any]): Функция без аргументов.
+
+    Возвращает:
+        float: Объем памяти в байтах на вызов.
+
+    """
+    func()
+    tracemalloc.start()
+    results = [func() for _ in range(NUMBER)]
+    size, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    del results
+    return size / NUMBER
+
+
+def main() -> None:
+    uncached = ScreenRenderer(screens=SCREENS, max_size=0)
+    cached = ScreenRenderer(screens=SCREENS)
+    print(f"{NUMBER} renders per measurement, time in us and retained memory in bytes per render")
+    print(f"{'screen':<12}{'plain us':>10}{'B':>8}{'build us':>10}{'B':>8}{'cached us':>11}{'B':>8}")
+    for screen in SCREEN_NAMES:
+        variants = (
+            lambda: plain_markup(screen=screen, owner_telegram_id=OWNER_TELEGRAM_ID, is_owner=True),
+            lambda: uncached.markup(screen=screen, owner_telegram_id=OWNER_TELEGRAM_ID, is_owner=True),
+            lambda: cached.markup(screen=screen, owner_telegram_id=OWNER_TELEGRAM_ID, is_owner=True),
+        )
+        row = f"{screen:<12}"
+        for width, func in zip((10, 10, 11), variants):
+            row += f"{measure(func, number=NUMBER):>{width}.2f}{allocated(func):>8.0f}"
+        print(row)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,134 @@
+"""
+Бенчмарк сборки больших списков задач в сообщения render_tasks_digest.
+
+Для списков из TASKS задач с описаниями разной длины (каждое OVERSIZED_EVERY-е описание длиннее
+MESSAGE_MAX_LENGTH, строки описаний содержат разметку сущностей сообщения) печатает:
+    - cards: количество сообщений при отправке каждой карточки отдельным сообщением;
+    - messages: количество сообщений render_tasks_digest;
+    - ms: время сборки всех сообщений;
+    - peak KiB: пиковый объем памяти, выделенной при сборке, если сообщения отправляются по одному
+      (измеряется tracemalloc).
+
+Затем для списка из PAGE_TASKS задач, разбитого на страницы по config.TASKS_PAGE_SIZE задач, как его
+показывает send_tasks_page, для описаний из PAGE_DESCRIPTION_LINES строк печатает количество запросов
+к Telegram API при отправке каждой карточки отдельным сообщением и с render_tasks_digest (в обоих случаях
+учитывается сообщение с кнопками перехода на каждой странице) и их отношение.
+
+Затем для одной карточки с описанием из DESCRIPTION_LINES строк печатает количество частей и время ее
+разделения по концам строк и между словами.
+
+Запуск:
+    python -m benchmarks.tasks_digest
+
+"""
+
+import tracemalloc
+from datetime import UTC, datetime, timedelta
+from time import perf_counter
+
+import benchmarks  # noqa: F401  регистрирует пакеты app и базу данных по умолчанию
+
+from app import config
+from app.db.models import UserTasks, Users
+from app.tasks_manager.tasks_controller import MESSAGE_MAX_LENGTH, get_task_card, render_tasks_digest
+
+TASKS = [100, 1000, 10000]
+
+OVERSIZED_EVERY = 50
+
+DESCRIPTION_LINES = [100, 1000, 10000]
+
+PAGE_TASKS = 200
+
+PAGE_DESCRIPTION_LINES = [0, 1, 3, 5, 10]
+
+LINE = "Пункт описания задачи с **жирным текстом**, [ссылкой](https://example.com) и эмодзи 😀"
+
+START_TIME = datetime(2026, 1, 1, tzinfo=UTC)
+
+USER = Users(owner_telegram_id=1, login_name="user", username="user", password="", is_login=True)
+
+
+def task(id_task: int, lines: int) -> UserTasks:
+    return UserTasks(id_task=id_task, user=USER, task_name=f"Задача {id_task}", description="\n".join([LINE] * lines),
+                     start_time=START_TIME, end_time=START_TIME + timedelta(days=1),
+                     completion_time=START_TIME + timedelta(hours=1), status=bool(id_task % 2))
+
+
+def tasks_list(number: int) -> list[UserTasks]:
+    return [task(id_task=id_task, lines=100 if id_task % OVERSIZED_EVERY == 0 else id_task % 5 + 1)
+            for id_task in range(1, number + 1)]
+
+
+def page_requests(list_tasks: list[UserTasks]) -> tuple[int, int]:
+    """
+    Считает запросы к Telegram API при просмотре списка задач по страницам из config.TASKS_PAGE_SIZE задач.
+
+    Параметры:
+        list_tasks (list[UserTasks]): Задачи пользователя.
+
+    Возвращает:
+        tuple[int, int]: Количество запросов при отправке каждой карточки отдельным сообщением
+            и с render_tasks_digest.
+
+    """
+    pages = [list_tasks[start:start + config.TASKS_PAGE_SIZE]
+             for start in range(0, len(list_tasks), config.TASKS_PAGE_SIZE)]
+    cards = sum(len(page) + 1 for page in pages)
+    messages = sum(sum(1 for _ in render_tasks_digest(page)) + 1 for page in pages)
+    return cards, messages
+
+
+def digest(list_tasks: list[UserTasks]) -> tuple[int, float, float]:
+    """
+    Собирает сообщения из задач, не сохраняя уже собранные сообщения.
+
+    Параметры:
+        list_tasks (list[UserTasks]): Задачи пользователя.
+
+    Возвращает:
+        tuple[int, float, float]: Количество сообщений, время сборки в миллисекундах и пиковый объем
+            выделенной памяти в KiB.
+
+    """
+    tracemalloc.start()
+    started = perf_counter()
+    messages = sum(1 for _ in render_tasks_digest(list_tasks))
+    elapsed = perf_counter() - started
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return messages, elapsed * 1e3, peak / 1024
+
+
+def main() -> None:
+    print(f"every {OVERSIZED_EVERY}th card is longer than {MESSAGE_MAX_LENGTH} UTF-16 units, "
+          f"time without tracemalloc")
+    print(f"{'tasks':>6}{'cards':>8}{'messages':>10}{'ms':>10}{'peak KiB':>10}")
+    for number in TASKS:
+        list_tasks = tasks_list(number=number)
+        started = perf_counter()
+        for _ in render_tasks_digest(list_tasks):
+            pass
+        elapsed = (perf_counter() - started) * 1e3
+        messages, _, peak = digest(list_tasks=list_tasks)
+        print(f"{number:>6}{number:>8}{messages:>10}{elapsed:>10.1f}{peak:>10.0f}")
+    print()
+    print(f"{PAGE_TASKS} tasks, TASKS_PAGE_SIZE={config.TASKS_PAGE_SIZE}, one navigation message per page")
+    print(f"{'lines':>6}{'card chars':>12}{'cards':>8}{'messages':>10}{'ratio':>8}")
+    for lines in PAGE_DESCRIPTION_LINES:
+        list_tasks = [task(id_task=id_task, lines=lines) for id_task in range(1, PAGE_TASKS + 1)]
+        cards, messages = page_requests(list_tasks=list_tasks)
+        card_chars = len(get_task_card(task=list_tasks[0]))
+        print(f"{lines:>6}{card_chars:>12}{cards:>8}{messages:>10}{cards / messages:>8.1f}")
+    print()
+    print(f"{'lines':>6}{'card chars':>12}{'messages':>10}{'ms':>10}")
+    for lines in DESCRIPTION_LINES:
+        oversized = task(id_task=1, lines=lines)
+        started = perf_counter()
+        messages = list(render_tasks_digest([oversized]))
+        elapsed = (perf_counter() - started) * 1e3
+        print(f"{lines:>6}{len(get_task_card(task=oversized)):>12}{len(messages):>10}{elapsed:>10.1f}")
+
+
+if __name__ == "__main__":
+    main()
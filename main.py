@@ -1,9 +1,4 @@
-import asyncio
-
-import nest_asyncio
-
 from app.__main__ import main
+from app.bot_init.bot_init import client_bot
 
-nest_asyncio.apply()
-
-asyncio.run(main())
+client_bot.run(main())
@@ -0,0 +1,34 @@
+"""
+Общая настройка тестов.
+
+Пакеты app регистрируются без выполнения их __init__, который подключает обработчики к клиенту Telegram
+и создает таблицы в PostgreSQL, поэтому тесты импортируют модули бота по отдельности. Вместо PostgreSQL
+используется временная база SQLite, а FSM по умолчанию хранится в памяти.
+
+Запуск из корня репозитория:
+    python -m pytest
+
+"""
+
+import os
+import sys
+import tempfile
+import types
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+_tmp = tempfile.mkdtemp()
+os.environ.setdefault("DATABASE_CONNECTION_STRING", "sqlite:///" + os.path.join(_tmp, "tests.sqlite3"))
+os.environ.setdefault("FSM_STORAGE", "memory")
+os.environ.setdefault("FSM_SQLITE_PATH", os.path.join(_tmp, "fsm_context.sqlite3"))
+os.environ.setdefault("FSM_SNAPSHOT_PATH", os.path.join(_tmp, "fsm_context.snapshot"))
+
+if ROOT not in sys.path:
+    sys.path.insert(0, ROOT)
+
+for _name in ("app", "app.db", "app.fsm_context", "app.root", "app.bot_init", "app.auth_manager",
+              "app.tasks_manager"):
+    if _name not in sys.modules:
+        _package = types.ModuleType(_name)
+        _package.__path__ = [os.path.join(ROOT, *_name.split("."))]
+        sys.modules[_name] = _package
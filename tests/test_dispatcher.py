@@ -0,0 +1,377 @@
+"""
+Нагрузочные тесты диспетчера обновлений с имитацией клиента Telegram.
+
+Многие пользователи одновременно отправляют серии обновлений, обработчики которых читают и изменяют данные FSM
+с ожиданием запросов к базе данных между чтением и записью. Ни одно изменение не должно потеряться, обновления
+каждого пользователя обрабатываются по порядку, а запросы к базе данных выполняются вне цикла событий
+и не задерживают обработку обновлений других пользователей.
+
+"""
+
+import asyncio
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+from pyrogram import enums, filters, types
+from pyrogram.handlers import MessageHandler
+
+from app.bot_init import dispatcher as dispatcher_module
+from app.bot_init.dispatcher import Dispatcher
+from app.bot_init.outbound import OutboundScheduler
+from app.fsm_context.fsm_context import FSM
+from app.fsm_context.states import get_states
+from app.fsm_context.storage import MemoryStorage
+
+USERS = 200
+
+UPDATES = 20
+
+
+class FakeClient:
+    """
+    Клиент Telegram без подключения к серверу, запоминающий отправленные сообщения.
+    """
+
+    def __init__(self):
+        self.loop = asyncio.get_running_loop()
+        self.executor = ThreadPoolExecutor(max_workers=4)
+        self.sent: list[tuple[int, str]] = list()
+
+    async def send_message(self, chat_id: int, text: str, **kwargs) -> None:
+        self.sent.append((chat_id, text))
+
+    async def answer_callback_query(self, callback_query_id: str, text: str, **kwargs) -> None:
+        self.sent.append((0, text))
+
+
+class ThreadCheckingStorage(MemoryStorage):
+    """
+    Хранилище в памяти, запоминающее потоки, в которых загружаются контексты, и имитирующее медленный запрос.
+    """
+
+    def __init__(self, delay: float = 0.0):
+        super().__init__()
+        self.delay = delay
+        self.load_threads: set[str] = set()
+
+    def load(self, telegram_id):
+        self.load_threads.add(threading.current_thread().name)
+        time.sleep(self.delay)
+        return super().load(telegram_id=telegram_id)
+
+
+def message(telegram_id: int, num: int) -> types.Message:
+    return types.Message(id=num, from_user=types.User(id=telegram_id),
+                         chat=types.Chat(id=telegram_id, type=enums.ChatType.PRIVATE), text=str(num))
+
+
+def create_dispatcher(fsm: FSM) -> Dispatcher:
+    return Dispatcher(max_concurrency=16, preload=fsm.preload, get_state_code=fsm.get_state_code,
+                      max_queue=USERS * UPDATES, max_user_queue=UPDATES)
+
+
+async def drain(dispatcher: Dispatcher) -> None:
+    while dispatcher.queue_depth():
+        await asyncio.sleep(0.01)
+
+
+async def loop_lag(stop: asyncio.Event) -> float:
+    """
+    Измеряет максимальную задержку цикла событий, пока не установлено событие stop.
+
+    Возвращает:
+        float: Максимальная задержка в секундах.
+
+    """
+    lag = 0.0
+    while not stop.is_set():
+        started = time.monotonic()
+        await asyncio.sleep(0.005)
+        lag = max(lag, time.monotonic() - started - 0.005)
+    return lag
+
+
+def test_concurrent_users_lose_no_updates():
+    async def run():
+        storage = MemoryStorage()
+        fsm = FSM(storage=storage)
+        dispatcher = create_dispatcher(fsm)
+        in_flight: dict[int, int] = dict()
+        overlaps = list()
+
+        async def increment(_, update: types.Message) -> None:
+            telegram_id = update.from_user.id
+            in_flight[telegram_id] = in_flight.get(telegram_id, 0) + 1
+            if in_flight[telegram_id] > 1:
+                overlaps.append(telegram_id)
+            data = fsm.get_data(telegram_id=telegram_id)
+            await asyncio.to_thread(time.sleep, 0.001)
+            await fsm.update_data(telegram_id=telegram_id, data={
+                "counter": data.get("counter", 0) + 1, "order": data.get("order", list()) + [update.id]})
+            in_flight[telegram_id] -= 1
+
+        dispatcher.add_handler(MessageHandler(increment))
+        client = FakeClient()
+        for num in range(UPDATES):
+            for telegram_id in range(1, USERS + 1):
+                await dispatcher.feed(client=client, update=message(telegram_id=telegram_id, num=num))
+        await drain(dispatcher)
+        await fsm.wait_writes()
+        return storage, fsm, dispatcher, client, overlaps
+
+    storage, fsm, dispatcher, client, overlaps = asyncio.run(run())
+    assert not overlaps
+    assert not any(dispatcher.dropped.values()) and not client.sent
+    for telegram_id in range(1, USERS + 1):
+        for data in (fsm.get_data(telegram_id=telegram_id), storage.load(telegram_id=telegram_id).data):
+            assert data["counter"] == UPDATES
+            assert data["order"] == list(range(UPDATES))
+
+
+def test_database_work_does_not_block_other_users():
+    async def run():
+        fsm = FSM(storage=ThreadCheckingStorage(delay=0.02))
+        dispatcher = create_dispatcher(fsm)
+
+        async def query(_, update: types.Message) -> None:
+            await asyncio.to_thread(time.sleep, 0.05)
+            await fsm.update_state(telegram_id=update.from_user.id, state="main_menu")
+
+        dispatcher.add_handler(MessageHandler(query))
+        client = FakeClient()
+        stop = asyncio.Event()
+        lag = asyncio.create_task(loop_lag(stop))
+        started = time.monotonic()
+        for telegram_id in range(1, 65):
+            await dispatcher.feed(client=client, update=message(telegram_id=telegram_id, num=1))
+        await drain(dispatcher)
+        elapsed = time.monotonic() - started
+        stop.set()
+        return fsm, elapsed, await lag
+
+    fsm, elapsed, lag = asyncio.run(run())
+    # 64 пользователя по 70 мс последовательно заняли бы 4.5 секунды
+    assert elapsed < 1.5
+    assert lag < 0.05
+    assert all(fsm.get_state(telegram_id=telegram_id) == "main_menu" for telegram_id in range(1, 65))
+
+
+def test_preload_loads_fsm_context_in_thread():
+    async def run():
+        storage = ThreadCheckingStorage()
+        storage.save(telegram_id=1, state="tasks", data={"owner_telegram_id": 1}, merge=False)
+        storage.load_threads.clear()
+        fsm = FSM(storage=storage)
+        dispatcher = create_dispatcher(fsm)
+        states = list()
+
+        async def read_state(_, update: types.Message) -> None:
+            states.append(fsm.get_state(telegram_id=update.from_user.id))
+
+        dispatcher.add_handler(MessageHandler(read_state))
+        client = FakeClient()
+        await dispatcher.feed(client=client, update=message(telegram_id=1, num=1))
+        await dispatcher.feed(client=client, update=message(telegram_id=2, num=1))
+        await drain(dispatcher)
+        return storage, states
+
+    storage, states = asyncio.run(run())
+    assert states == ["tasks", None]
+    assert storage.load_threads and threading.main_thread().name not in storage.load_threads
+
+
+@pytest.mark.parametrize("write_behind", [False, True])
+def test_writes_without_preload_run_in_thread(write_behind):
+    async def run():
+        storage = ThreadCheckingStorage()
+        fsm = FSM(storage=storage, write_behind=write_behind)
+        await fsm.transition(telegram_id=1, state="tasks", data={"step": 1})
+        await fsm.set_keys(telegram_id=2, values={"step": 2})
+        await fsm.append_to_list(telegram_id=3, key="message_ids", values=[1])
+        fsm.flush()
+        return storage, fsm
+
+    storage, fsm = asyncio.run(run())
+    assert storage.load_threads and threading.main_thread().name not in storage.load_threads
+    assert fsm.get_state(telegram_id=1) == "tasks"
+    assert [storage.load(telegram_id=telegram_id).data for telegram_id in range(1, 4)] == [
+        {"step": 1}, {"step": 2}, {"message_ids": [1]}]
+
+
+def test_write_is_applied_after_it_is_stored():
+    async def run():
+        storage = ThreadCheckingStorage(delay=0.05)
+        storage.save(telegram_id=1, state="tasks", data={"step": 1}, merge=False)
+        fsm = FSM(storage=storage)
+        await fsm.preload(telegram_id=1)
+        write = asyncio.create_task(fsm.transition(telegram_id=1, state="main_menu", data={"step": 2}))
+        await asyncio.sleep(0.01)
+        during = fsm.get_state(telegram_id=1), fsm.get_data(telegram_id=1)
+        await write
+        return fsm, storage, during
+
+    fsm, storage, during = asyncio.run(run())
+    assert during == ("tasks", {"step": 1})
+    assert fsm.get_state(telegram_id=1) == storage.load(telegram_id=1).state == "main_menu"
+    assert fsm.get_data(telegram_id=1) == {"step": 2}
+
+
+def test_failed_write_is_raised_to_handler():
+    class FailingStorage(MemoryStorage):
+        fail = False
+
+        def modify(self, telegram_id, func):
+            if self.fail:
+                raise ConnectionError("database is unavailable")
+            return super().modify(telegram_id=telegram_id, func=func)
+
+    async def run():
+        storage = FailingStorage()
+        fsm = FSM(storage=storage)
+        dispatcher = create_dispatcher(fsm)
+        replies = list()
+
+        async def handler(_, update: types.Message) -> None:
+            await fsm.set_keys(telegram_id=update.from_user.id, values={"step": update.id})
+            replies.append(update.id)
+
+        dispatcher.add_handler(MessageHandler(handler))
+        client = FakeClient()
+        await fsm.update_state(telegram_id=1, state="tasks")
+        storage.fail = True
+        await dispatcher.feed(client=client, update=message(telegram_id=1, num=1))
+        await drain(dispatcher)
+        storage.fail = False
+        await dispatcher.feed(client=client, update=message(telegram_id=1, num=2))
+        await drain(dispatcher)
+        return fsm, storage, replies
+
+    fsm, storage, replies = asyncio.run(run())
+    # Обработчик не ответил на обновление, изменение которого не записано
+    assert replies == [2]
+    assert fsm.get_data(telegram_id=1) == storage.load(telegram_id=1).data == {"step": 2}
+
+
+@pytest.mark.parametrize("with_version", [True, False])
+def test_next_group_uses_changed_state(with_version):
+    async def run():
+        fsm = FSM(storage=MemoryStorage())
+        dispatcher = Dispatcher(preload=fsm.preload, get_state_code=fsm.get_state_code,
+                                get_state_version=fsm.get_state_version if with_version else None)
+        calls = list()
+
+        def state_filter(state: str):
+            async def func(flt, _, update: types.Message) -> bool:
+                return fsm.get_state_code(telegram_id=update.from_user.id) in flt.state_codes
+
+            return filters.create(func, state_codes=frozenset({get_states().code(state)}))
+
+        async def open_menu(_, update: types.Message) -> None:
+            calls.append("open_menu")
+            await fsm.update_state(telegram_id=update.from_user.id, state="main_menu")
+
+        async def stale_tasks(_, update: types.Message) -> None:
+            calls.append("stale_tasks")
+
+        async def main_menu(_, update: types.Message) -> None:
+            calls.append("main_menu")
+
+        dispatcher.add_handler(MessageHandler(open_menu, state_filter("tasks")), group=0)
+        dispatcher.add_handler(MessageHandler(stale_tasks, state_filter("tasks")), group=1)
+        dispatcher.add_handler(MessageHandler(main_menu, state_filter("main_menu")), group=1)
+        await fsm.update_state(telegram_id=1, state="tasks")
+        await dispatcher.feed(client=FakeClient(), update=message(telegram_id=1, num=1))
+        await drain(dispatcher)
+        return calls
+
+    assert asyncio.run(run()) == ["open_menu", "main_menu"]
+
+
+def test_busy_reply_goes_through_outbound_scheduler(monkeypatch):
+    class RecordingScheduler(OutboundScheduler):
+        def __init__(self):
+            super().__init__()
+            self.chat_ids: list[int | None] = list()
+
+        async def send(self, chat_id, call, priority=0):
+            self.chat_ids.append(chat_id)
+            return await super().send(chat_id=chat_id, call=call, priority=priority)
+
+    async def run():
+        scheduler = RecordingScheduler()
+        monkeypatch.setattr(dispatcher_module, "get_outbound_scheduler", lambda: scheduler)
+        dispatcher = Dispatcher(max_user_queue=1)
+        release = asyncio.Event()
+
+        async def wait(_, update: types.Message) -> None:
+            await release.wait()
+
+        dispatcher.add_handler(MessageHandler(wait))
+        client = FakeClient()
+        for num in range(3):
+            await dispatcher.feed(client=client, update=message(telegram_id=1, num=num))
+        while not client.sent:
+            await asyncio.sleep(0.01)
+        release.set()
+        await drain(dispatcher)
+        return scheduler, client
+
+    scheduler, client = asyncio.run(run())
+    assert scheduler.chat_ids == [1]
+    assert client.sent == [(1, "Бот сейчас перегружен, попробуйте еще раз через минуту")]
+
+
+def test_stop_waits_for_queued_updates():
+    async def run():
+        storage = ThreadCheckingStorage(delay=0.005)
+        fsm = FSM(storage=storage)
+        dispatcher = create_dispatcher(fsm)
+
+        async def increment(_, update: types.Message) -> None:
+            data = fsm.get_data(telegram_id=update.from_user.id)
+            await asyncio.sleep(0.01)
+            await fsm.update_data(telegram_id=update.from_user.id, data={"counter": data.get("counter", 0) + 1})
+
+        dispatcher.add_handler(MessageHandler(increment))
+        client = FakeClient()
+        for num in range(5):
+            for telegram_id in range(1, 11):
+                await dispatcher.feed(client=client, update=message(telegram_id=telegram_id, num=num))
+        queued = await dispatcher.stop()
+        writes = await fsm.wait_writes()
+        await dispatcher.feed(client=client, update=message(telegram_id=1, num=5))
+        return storage, dispatcher, client, queued, writes
+
+    storage, dispatcher, client, queued, writes = asyncio.run(run())
+    assert queued == 50 and writes == 0
+    assert dispatcher.queue_depth() == 0
+    assert all(storage.load(telegram_id=telegram_id).data == {"counter": 5} for telegram_id in range(1, 11))
+    assert dispatcher.dropped["stopped"] == 1 and not client.sent
+
+
+def test_stop_cancels_handlers_after_timeout():
+    async def run():
+        dispatcher = Dispatcher()
+        cancelled = list()
+
+        async def hang(_, update: types.Message) -> None:
+            try:
+                await asyncio.Event().wait()
+            except asyncio.CancelledError:
+                cancelled.append(update.id)
+                raise
+
+        dispatcher.add_handler(MessageHandler(hang))
+        client = FakeClient()
+        for telegram_id in range(1, 4):
+            await dispatcher.feed(client=client, update=message(telegram_id=telegram_id, num=telegram_id))
+        started = time.monotonic()
+        await dispatcher.stop(timeout=0.05)
+        return cancelled, time.monotonic() - started, dispatcher
+
+    cancelled, elapsed, dispatcher = asyncio.run(run())
+    assert sorted(cancelled) == [1, 2, 3]
+    assert elapsed < 1
+    assert dispatcher.queue_depth() == 0
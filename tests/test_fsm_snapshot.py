@@ -0,0 +1,82 @@
+"""
+Тесты снимка FSM: после перезапуска из снимка не загружаются контексты, измененные или удаленные в хранилище
+после записи снимка, для каждого хранилища без внешних серверов.
+
+"""
+
+import asyncio
+
+import fakeredis
+import pytest
+
+from app.fsm_context.fsm_context import FSM
+from app.fsm_context.storage import MemoryStorage, RedisStorage, SQLiteStorage
+
+
+@pytest.fixture(params=["memory", "sqlite", "redis"])
+def storage(request, tmp_path):
+    if request.param == "sqlite":
+        return SQLiteStorage(path=str(tmp_path / "fsm_context.sqlite3"))
+    if request.param == "redis":
+        return RedisStorage(url=str(), client=fakeredis.FakeRedis(decode_responses=True))
+    return MemoryStorage()
+
+
+def test_touched_since_includes_watermark(storage):
+    storage.save(telegram_id=1, state="tasks", data=None, merge=True)
+    assert storage.touched_since(watermark=storage.watermark()) == [1]
+
+
+def test_existing(storage):
+    for telegram_id in range(1, 1201, 2):
+        storage.save(telegram_id=telegram_id, state="tasks", data=None, merge=True)
+    assert storage.existing(telegram_ids=list(range(1, 1201))) == set(range(1, 1201, 2))
+    assert storage.existing(telegram_ids=list()) == set()
+
+
+def test_restore_skips_changed_and_deleted_contexts(storage, tmp_path):
+    path = str(tmp_path / "fsm_context.snapshot")
+    fsm = FSM(storage=storage)
+
+    async def run():
+        for telegram_id in range(1, 6):
+            await fsm.update_state(telegram_id=telegram_id, state="tasks")
+            fsm.get_state(telegram_id=telegram_id)
+
+    asyncio.run(run())
+    assert fsm.dump_snapshot(path=path) == 5
+
+    # Пока бот остановлен, другой экземпляр изменяет и удаляет контексты
+    storage.save(telegram_id=1, state="main_menu", data=None, merge=True)
+    storage.delete(telegram_id=2)
+    assert storage.delete_stale(idle=-1, limit=1) == [3]
+
+    restored = FSM(storage=storage)
+    # Контекст 5 изменен в момент watermark, поэтому тоже загружается из хранилища заново
+    assert asyncio.run(restored.restore_snapshot(path=path)) == 1
+    loads = list()
+    load = storage.load
+    storage.load = lambda telegram_id: loads.append(telegram_id) or load(telegram_id=telegram_id)
+    assert [restored.get_state(telegram_id=telegram_id) for telegram_id in range(1, 6)] == [
+        "main_menu", None, None, "tasks", "tasks"]
+    assert loads == [1, 2, 3, 5]
+
+
+def test_restored_context_is_not_used_after_write(storage, tmp_path):
+    path = str(tmp_path / "fsm_context.snapshot")
+    fsm = FSM(storage=storage)
+    asyncio.run(fsm.transition(telegram_id=1, state="tasks", data={"task_name": "old"}))
+    # Контекст 2 изменен в момент watermark и не загружается из снимка
+    asyncio.run(fsm.update_state(telegram_id=2, state="tasks"))
+    assert fsm.dump_snapshot(path=path) == 2
+
+    restored = FSM(storage=storage)
+
+    async def run():
+        assert await restored.restore_snapshot(path=path) == 1
+        # Изменение без предварительной загрузки контекста записывается только в хранилище
+        await restored.set_keys(telegram_id=1, values={"task_name": "new"})
+
+    asyncio.run(run())
+    assert restored.get_data(telegram_id=1) == {"task_name": "new"}
+    assert restored.dump_snapshot(path=path) == 1
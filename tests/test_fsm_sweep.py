@@ -0,0 +1,91 @@
+"""
+Тесты удаления неактивных контекстов FSM: запрос к хранилищу выполняется в отдельном потоке, контексты
+с выполняющейся записью остаются в памяти, а контекст, измененный после выборки неактивных, не удаляется.
+
+"""
+
+import asyncio
+import threading
+import time
+
+import fakeredis
+import pytest
+
+from app.fsm_context.fsm_context import FSM
+from app.fsm_context.storage import MemoryStorage, RedisStorage, SQLiteStorage
+
+
+@pytest.fixture(params=["memory", "sqlite", "redis"])
+def storage(request, tmp_path):
+    if request.param == "sqlite":
+        return SQLiteStorage(path=str(tmp_path / "fsm_context.sqlite3"))
+    if request.param == "redis":
+        return RedisStorage(url=str(), client=fakeredis.FakeRedis(decode_responses=True))
+    return MemoryStorage()
+
+
+class TouchingRedis(fakeredis.FakeRedis):
+    """
+    Сервер Redis в памяти, в котором другой экземпляр бота изменяет контекст сразу после выборки неактивных.
+    """
+
+    def zrangebyscore(self, *args, **kwargs):
+        telegram_ids = super().zrangebyscore(*args, **kwargs)
+        self.zadd("fsm_context:last_touched", {"1": time.time() + 1})
+        return telegram_ids
+
+
+def test_sweep_deletes_in_thread(storage):
+    fsm = FSM(storage=storage)
+    threads = set()
+    delete_stale = storage.delete_stale
+
+    def recording_delete_stale(**kwargs):
+        threads.add(threading.get_ident())
+        return delete_stale(**kwargs)
+
+    storage.delete_stale = recording_delete_stale
+
+    async def run():
+        for telegram_id in range(1, 6):
+            await fsm.update_state(telegram_id=telegram_id, state="tasks")
+        assert await fsm.sweep(idle=-1, batch_size=3) == 3
+        assert await fsm.sweep(idle=-1, batch_size=3) == 2
+
+    asyncio.run(run())
+    assert threads and threading.get_ident() not in threads
+    assert storage.existing(telegram_ids=list(range(1, 6))) == set()
+    assert [fsm.get_state(telegram_id=telegram_id) for telegram_id in range(1, 6)] == [None] * 5
+
+
+def test_sweep_keeps_context_with_pending_write():
+    storage = MemoryStorage()
+    fsm = FSM(storage=storage)
+    started, release = threading.Event(), threading.Event()
+    modify = storage.modify
+
+    def slow_modify(**kwargs):
+        started.set()
+        release.wait(timeout=5)
+        return modify(**kwargs)
+
+    async def run():
+        await fsm.update_state(telegram_id=1, state="tasks")
+        storage.modify = slow_modify
+        write = asyncio.create_task(fsm.update_state(telegram_id=1, state="main_menu"))
+        await asyncio.to_thread(started.wait, 5)
+        assert await fsm.sweep(idle=-1, batch_size=10) == 1
+        release.set()
+        await write
+
+    asyncio.run(run())
+    assert fsm.get_state(telegram_id=1) == "main_menu"
+    assert storage.load(telegram_id=1).state == "main_menu"
+
+
+def test_redis_sweep_keeps_context_touched_after_selection():
+    storage = RedisStorage(url=str(), client=TouchingRedis(decode_responses=True))
+    for telegram_id in (1, 2):
+        storage.save(telegram_id=telegram_id, state="tasks", data=None, merge=True)
+    assert storage.delete_stale(idle=-1, limit=10) == [2]
+    assert storage.existing(telegram_ids=[1, 2]) == {1}
@@ -0,0 +1,220 @@
+"""
+Нагрузочные тесты режима отложенной записи FSM (write-behind).
+
+Всплеск изменений от многих пользователей должен записываться в хранилище редкими многострочными запросами,
+запись при превышении flush_max_dirty выполняется фоновой задачей, а незаписанные изменения не теряются
+ни при ошибке записи, ни при остановке с записью снимка.
+
+"""
+
+import asyncio
+import os
+import threading
+import time
+
+import pytest
+
+from app.fsm_context.fsm_context import FSM
+from app.fsm_context.storage import MemoryStorage
+
+USERS = 50
+
+BURSTS = 40
+
+
+class CountingStorage(MemoryStorage):
+    """
+    Хранилище в памяти, считающее запросы записи и умеющее имитировать медленную или недоступную базу данных.
+    """
+
+    def __init__(self, delay: float = 0.0):
+        super().__init__()
+        self.delay = delay
+        self.fail = False
+        self.writes = 0
+        self.flushes = 0
+        self.flushed_rows = 0
+        self.release = threading.Event()
+        self.release.set()
+
+    def modify(self, telegram_id, func):
+        self.writes += 1
+        return super().modify(telegram_id=telegram_id, func=func)
+
+    def save_many(self, fsm_contexts):
+        self.release.wait()
+        time.sleep(self.delay)
+        if self.fail:
+            raise ConnectionError("database is unavailable")
+        self.flushes += 1
+        self.flushed_rows += len(fsm_contexts)
+        super().save_many(fsm_contexts=fsm_contexts)
+
+    def watermark(self):
+        if self.fail:
+            raise ConnectionError("database is unavailable")
+        return super().watermark()
+
+
+async def burst(fsm: FSM) -> int:
+    """
+    Имитирует цепочки send_messages -> update_data -> update_state пользователей, нажимающих кнопки подряд.
+
+    Возвращает:
+        int: Количество вызовов записи FSM.
+
+    """
+    writes = 0
+    for step in range(BURSTS):
+        for telegram_id in range(USERS):
+            await fsm.update_data(telegram_id, {"task_name": f"task {step}", "step": step})
+            await fsm.update_state(telegram_id, "tasks:create:set_name" if step % 2 else "tasks")
+            writes += 2
+        await asyncio.sleep(0.002)
+    return writes
+
+
+def test_write_behind_reduces_flush_rate():
+    async def run():
+        write_through = CountingStorage()
+        write_through_fsm = FSM(storage=write_through)
+        writes = await burst(write_through_fsm)
+        await write_through_fsm.wait_writes()
+
+        storage = CountingStorage(delay=0.002)
+        fsm = FSM(storage=storage, write_behind=True, flush_interval=0.02, flush_max_dirty=10000)
+        flusher = asyncio.create_task(fsm.run_flusher())
+        started = time.monotonic()
+        await burst(fsm)
+        elapsed = time.monotonic() - started
+        flusher.cancel()
+        await asyncio.wait([flusher])
+        fsm.flush()
+        return writes, write_through.writes, storage, elapsed
+
+    writes, write_through_writes, storage, elapsed = asyncio.run(run())
+    assert write_through_writes == writes
+    assert storage.writes == 0
+    # Не больше одной записи за интервал и финальная запись при остановке
+    assert storage.flushes <= elapsed / 0.02 + 2
+    assert storage.flushes * 20 <= writes
+    assert storage.flushed_rows < writes / 4
+    for telegram_id in range(USERS):
+        fsm_context = storage.load(telegram_id)
+        assert fsm_context.state == "tasks:create:set_name"
+        assert fsm_context.data == {"task_name": f"task {BURSTS - 1}", "step": BURSTS - 1}
+
+
+def test_threshold_flush_runs_in_flusher():
+    async def run():
+        storage = CountingStorage()
+        fsm = FSM(storage=storage, write_behind=True, flush_interval=60, flush_max_dirty=5)
+        flusher = asyncio.create_task(fsm.run_flusher())
+        await asyncio.sleep(0)
+        for telegram_id in range(5):
+            await fsm.update_state(telegram_id, "tasks")
+        flushed_inline = storage.flushes
+        await asyncio.sleep(0.1)
+        flusher.cancel()
+        await asyncio.wait([flusher])
+        return storage, flushed_inline
+
+    storage, flushed_inline = asyncio.run(run())
+    assert flushed_inline == 0
+    assert storage.flushes == 1 and storage.flushed_rows == 5
+
+
+def test_threshold_flush_without_flusher_is_inline():
+    async def run():
+        storage = CountingStorage()
+        fsm = FSM(storage=storage, write_behind=True, flush_max_dirty=5)
+        for telegram_id in range(5):
+            await fsm.update_state(telegram_id, "tasks")
+        return storage
+
+    storage = asyncio.run(run())
+    assert storage.flushes == 1 and storage.flushed_rows == 5
+
+
+def test_changes_during_flush_are_kept():
+    async def run():
+        storage = CountingStorage()
+        fsm = FSM(storage=storage, write_behind=True)
+        await fsm.update_data(1, {"step": 1})
+        storage.release.clear()
+        flush = asyncio.create_task(fsm.flush_in_thread())
+        await asyncio.sleep(0.01)
+        await fsm.update_data(1, {"step": 2})
+        storage.release.set()
+        assert await flush == 1
+        assert storage.load(1).data == {"step": 1}
+        assert fsm.flush() == 1
+        return storage
+
+    assert asyncio.run(run()).load(1).data == {"step": 2}
+
+
+def test_cancelled_flusher_waits_for_write():
+    async def run():
+        storage = CountingStorage(delay=0.05)
+        fsm = FSM(storage=storage, write_behind=True, flush_interval=0.01)
+        flusher = asyncio.create_task(fsm.run_flusher())
+        await fsm.update_state(1, "tasks")
+        await asyncio.sleep(0.02)
+        flusher.cancel()
+        await asyncio.wait([flusher])
+        return storage, fsm
+
+    storage, fsm = asyncio.run(run())
+    assert storage.flushes == 1
+    assert fsm.flush() == 0
+
+
+def test_failed_flush_is_kept_in_snapshot(tmp_path):
+    path = str(tmp_path / "fsm_context.snapshot")
+    storage = CountingStorage()
+    fsm = FSM(storage=storage, write_behind=True)
+
+    async def run():
+        await fsm.update_data(1, {"task_name": "unsaved"})
+        await fsm.update_state(1, "tasks:create:set_name")
+
+    asyncio.run(run())
+    storage.fail = True
+    with pytest.raises(ConnectionError):
+        fsm.flush()
+    assert fsm.dump_snapshot(path=path) == 1
+
+    storage.fail = False
+    restored = FSM(storage=storage, write_behind=True)
+    assert asyncio.run(restored.restore_snapshot(path=path)) == 1
+    assert restored.flush() == 0
+    fsm_context = storage.load(1)
+    assert fsm_context.state == "tasks:create:set_name"
+    assert fsm_context.data == {"task_name": "unsaved"}
+
+
+def test_restore_keeps_context_changed_before_snapshot_is_loaded(tmp_path):
+    path = str(tmp_path / "fsm_context.snapshot")
+    storage = CountingStorage()
+    fsm = FSM(storage=storage, write_behind=True)
+    asyncio.run(fsm.update_state(1, "tasks:create:set_name"))
+    storage.fail = True
+    with pytest.raises(ConnectionError):
+        fsm.flush()
+    fsm.dump_snapshot(path=path)
+
+    storage.fail = False
+    restored = FSM(storage=storage)
+
+    async def run():
+        restorer = asyncio.create_task(restored.restore_snapshot(path=path))
+        await asyncio.sleep(0)
+        # Пользователь ответил боту до того, как снимок загружен в фоне
+        await restored.update_state(1, "main_menu")
+        return await restorer
+
+    assert asyncio.run(run()) == 0
+    assert restored.get_state(1) == "main_menu"
+    assert storage.load(1).state == "main_menu"
+    assert not os.path.exists(path)
@@ -0,0 +1,96 @@
+"""
+Тесты журнала MessageLedger: загрузка и запись буферов выполняются в отдельном потоке, буферы, запись
+которых не удалась, снова помечаются измененными и не вытесняются, а обращение к незагруженному буферу
+не выполняет запрос в цикле событий.
+
+"""
+
+import asyncio
+import threading
+
+import pytest
+
+from app.bot_init import ledger
+from app.bot_init.ledger import MessageLedger
+
+
+class FakeSession:
+    """
+    Сессия базы данных, которая запоминает потоки и параметры запросов.
+    """
+
+    rows: list = list()
+    threads: set = set()
+    executed: list = list()
+    fail: bool = False
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        return False
+
+    def execute(self, statement, params):
+        FakeSession.threads.add(threading.get_ident())
+        if FakeSession.fail:
+            raise ConnectionError("database is unavailable")
+        FakeSession.executed.append((str(statement).split()[0], params))
+        return self
+
+    def all(self):
+        return FakeSession.rows
+
+    def commit(self):
+        pass
+
+
+@pytest.fixture(autouse=True)
+def session(monkeypatch):
+    FakeSession.rows, FakeSession.threads, FakeSession.executed, FakeSession.fail = list(), set(), list(), False
+    monkeypatch.setattr(ledger, "Session", FakeSession)
+    return FakeSession
+
+
+def test_preload_and_flush_run_in_thread():
+    message_ledger = MessageLedger()
+
+    async def run():
+        FakeSession.rows = [(10, [1, 2])]
+        await message_ledger.preload(telegram_id=1, chat_ids=[10, 20])
+        assert message_ledger.take(telegram_id=1, chat_id=10) == [1, 2]
+        message_ledger.record(telegram_id=1, chat_id=20, message_ids=[3])
+        assert await message_ledger.flush() == 2
+        assert await message_ledger.flush() == 0
+
+    asyncio.run(run())
+    assert threading.get_ident() not in FakeSession.threads
+    assert [statement for statement, _ in FakeSession.executed] == ["SELECT", "INSERT", "DELETE"]
+
+
+def test_failed_flush_marks_buffers_dirty_again():
+    message_ledger = MessageLedger(max_size=1)
+
+    async def run():
+        await message_ledger.preload(telegram_id=1, chat_ids=[10])
+        message_ledger.record(telegram_id=1, chat_id=10, message_ids=[1])
+        FakeSession.fail = True
+        with pytest.raises(ConnectionError):
+            await message_ledger.flush()
+        FakeSession.fail = False
+        # Буфер с незаписанными изменениями не вытесняется загрузкой буфера другого чата
+        await message_ledger.preload(telegram_id=1, chat_ids=[20])
+        assert await message_ledger.flush() == 1
+        await message_ledger.preload(telegram_id=1, chat_ids=[10])
+        assert message_ledger.take(telegram_id=1, chat_id=10) == [1]
+
+    asyncio.run(run())
+    assert FakeSession.executed[-1][0] == "INSERT"
+
+
+def test_buffer_is_not_loaded_in_event_loop():
+    message_ledger = MessageLedger()
+    with pytest.raises(RuntimeError):
+        message_ledger.record(telegram_id=1, chat_id=10, message_ids=[1])
+    with pytest.raises(RuntimeError):
+        message_ledger.take(telegram_id=1, chat_id=10)
+    assert not FakeSession.threads
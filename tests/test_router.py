@@ -0,0 +1,96 @@
+"""
+Тесты маршрутизатора коллбэк-запросов: данные в компактном формате разбираются в те же параметры, которые
+были закодированы, для всех маршрутов реестра и крайних значений целых параметров, а закодированные данные
+не превышают ограничение Telegram в 64 байта.
+
+"""
+
+import base64
+from datetime import UTC, datetime, timedelta
+
+import pytest
+
+from app.bot_init.router import (
+    CALLBACK_MARKER, CALLBACK_MAX_LENGTH, CALLBACK_VERSION, ROUTES, CallbackParams, CallbackRouter)
+
+PARAMS = {
+    "owner_telegram_id": 123456789,
+    "id_task": 42,
+    "page": "next",
+    "view": "completed",
+    "end_time": 1750000000000000,
+}
+
+INTEGERS = [0, 1, -1, 63, 64, -64, -65, 127, 128, 2 ** 31, -2 ** 31, 2 ** 52, -2 ** 52, 2 ** 63 - 1, -2 ** 63]
+
+
+def route_params(template: str) -> dict:
+    return {name: value for name, value in PARAMS.items() if "{" + name + "}" in template}
+
+
+@pytest.fixture
+def router():
+    router = CallbackRouter(routes=ROUTES)
+    for template in ROUTES:
+        router.route(template)
+    return router
+
+
+@pytest.mark.parametrize("template", list(ROUTES))
+def test_round_trip_all_routes(router, template):
+    params = route_params(template)
+    data = router.pack(template, **params)
+    assert data.startswith(CALLBACK_MARKER) and len(data.encode()) <= CALLBACK_MAX_LENGTH
+    assert router.parse(data=data) == CallbackParams(route=template, **params)
+    empty = router.pack(template)
+    assert router.parse(data=empty) == CallbackParams(route=template)
+
+
+@pytest.mark.parametrize("value", INTEGERS)
+def test_round_trip_integers(router, value):
+    template = "tasks:view_page:{view}:{page}:{end_time}:{id_task}:{owner_telegram_id}"
+    params = dict(PARAMS, end_time=value, id_task=value, owner_telegram_id=value)
+    assert router.parse(data=router.pack(template, **params)) == CallbackParams(route=template, **params)
+
+
+def test_largest_view_page_fits_limit(router):
+    template = "tasks:view_page:{view}:{page}:{end_time}:{id_task}:{owner_telegram_id}"
+    # Самые длинные значения параметров по типам столбцов: serial, 52 значащих бита идентификатора Telegram
+    # и самое раннее время окончания задачи
+    epoch = datetime(1970, 1, 1, tzinfo=UTC)
+    params = {"view": "completed", "page": "previous",
+              "end_time": (datetime.min.replace(tzinfo=UTC) - epoch) // timedelta(microseconds=1),
+              "id_task": 2 ** 31 - 1, "owner_telegram_id": 2 ** 52 - 1}
+    data = router.pack(template, **params)
+    assert len(data.encode()) <= CALLBACK_MAX_LENGTH
+    assert router.parse(data=data) == CallbackParams(route=template, **params)
+
+
+def test_pack_rejects_data_over_limit(router):
+    with pytest.raises(ValueError):
+        router.pack("tasks:edit_task:button:{page}", page="x" * CALLBACK_MAX_LENGTH)
+    with pytest.raises(ValueError):
+        router.pack("main_menu:{unknown}", owner_telegram_id=1)
+    with pytest.raises(ValueError):
+        router.pack("main_menu:{owner_telegram_id}", id_task=1)
+
+
+def test_parse_text_format(router):
+    assert router.parse(data="tasks:edit_task:id_task:42:123456789") == CallbackParams(
+        route="tasks:edit_task:id_task:{id_task}:{owner_telegram_id}", id_task=42, owner_telegram_id=123456789)
+    assert router.parse(data="main_menu:None") == CallbackParams(route="main_menu:{owner_telegram_id}")
+    assert router.parse(data="main_menu:abc") == CallbackParams()
+    assert router.parse(data="unknown:1") == CallbackParams()
+
+
+@pytest.mark.parametrize("raw", [
+    bytes((CALLBACK_VERSION + 1, 1, 2)),
+    bytes((CALLBACK_VERSION, 255, 2)),
+    bytes((CALLBACK_VERSION, 1)),
+    bytes((CALLBACK_VERSION, 1, 0x80)),
+    bytes((CALLBACK_VERSION, 1, 2, 2)),
+])
+def test_parse_rejects_malformed_data(router, raw):
+    data = CALLBACK_MARKER + base64.urlsafe_b64encode(raw).rstrip(b"=").decode()
+    assert router.parse(data=data) == CallbackParams()
+    assert router.parse(data=CALLBACK_MARKER + "!") == CallbackParams()
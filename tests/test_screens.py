@@ -0,0 +1,100 @@
+"""
+Тесты кэша клавиатур экранов: готовые неизменяемые клавиатуры сериализуются Pyrogram так же, как обычные,
+отдаются из кэша одним объектом и не позволяют изменить себя обработчику.
+
+"""
+
+import asyncio
+
+import pytest
+from pyrogram import raw, types
+
+from app.bot_init.router import get_callback_router
+from app.root.screens import SCREENS, ScreenRenderer
+
+OWNER_TELEGRAM_ID = 123456789
+
+
+def write(markup: types.InlineKeyboardMarkup | types.ReplyKeyboardMarkup):
+    """
+    Сериализует клавиатуру, как Pyrogram при отправке сообщения (в цикле событий write - корутина).
+    """
+    async def run():
+        return await markup.write(None)
+
+    return asyncio.run(run())
+
+
+@pytest.fixture
+def renderer():
+    return ScreenRenderer(screens=SCREENS)
+
+
+def test_inline_markup_writes_like_plain_markup(renderer):
+    markup = renderer.markup(screen="tasks_menu", owner_telegram_id=OWNER_TELEGRAM_ID, is_owner=True)
+    plain = types.InlineKeyboardMarkup(inline_keyboard=[
+        [types.InlineKeyboardButton(text=button.text, callback_data=button.callback_data) for button in row]
+        for row in markup.inline_keyboard])
+    written = write(markup)
+    assert isinstance(written, raw.types.ReplyInlineMarkup)
+    assert written == write(plain)
+    assert [row.buttons[0].data for row in written.rows] == [
+        get_callback_router().pack(template, owner_telegram_id=OWNER_TELEGRAM_ID).encode() for template in (
+            "tasks:create_task:{owner_telegram_id}", "tasks:view_tasks:{owner_telegram_id}",
+            "tasks:edit_tasks:{owner_telegram_id}", "main_menu:{owner_telegram_id}")]
+
+
+def test_reply_markup_writes_like_plain_markup(renderer):
+    markup = renderer.markup(screen="main_menu", is_owner=True)
+    plain = types.ReplyKeyboardMarkup(keyboard=[[button.text for button in row] for row in markup.keyboard],
+                                      resize_keyboard=True)
+    written = write(markup)
+    assert isinstance(written, raw.types.ReplyKeyboardMarkup)
+    assert written == write(plain)
+
+
+def test_markup_is_cached_per_owner(renderer):
+    markup = renderer.markup(screen="tasks_menu", owner_telegram_id=OWNER_TELEGRAM_ID, is_owner=True)
+    assert renderer.markup(screen="tasks_menu", owner_telegram_id=OWNER_TELEGRAM_ID, is_owner=True) is markup
+    assert renderer.markup(screen="tasks_menu", owner_telegram_id=OWNER_TELEGRAM_ID, is_owner=False) is not markup
+    assert len(renderer.markup(
+        screen="tasks_menu", owner_telegram_id=OWNER_TELEGRAM_ID, is_owner=False).inline_keyboard) == 3
+    # Экран без кнопок владельца не зависит от признака владельца
+    assert renderer.markup(screen="view_tasks", owner_telegram_id=1, is_owner=True) is renderer.markup(
+        screen="view_tasks", owner_telegram_id=1, is_owner=False)
+
+
+def test_cache_is_bounded():
+    renderer = ScreenRenderer(screens=SCREENS, max_size=2)
+    first = renderer.markup(screen="tasks_back", owner_telegram_id=1)
+    for owner_telegram_id in range(2, 5):
+        renderer.markup(screen="tasks_back", owner_telegram_id=owner_telegram_id)
+    assert renderer.markup(screen="tasks_back", owner_telegram_id=1) is not first
+
+
+@pytest.mark.parametrize("mutate", [
+    lambda markup: setattr(markup, "inline_keyboard", list()),
+    lambda markup: delattr(markup, "inline_keyboard"),
+    lambda markup: setattr(markup.inline_keyboard[0][0], "text", "Другая кнопка"),
+    lambda markup: setattr(markup.inline_keyboard[0][0], "callback_data", "main_menu:1"),
+    lambda markup: markup.inline_keyboard.append(tuple()),
+    lambda markup: markup.inline_keyboard[0].__setitem__(0, None),
+])
+def test_inline_markup_rejects_mutation(renderer, mutate):
+    markup = renderer.markup(screen="tasks_back", owner_telegram_id=OWNER_TELEGRAM_ID)
+    written = write(markup)
+    with pytest.raises((AttributeError, TypeError)):
+        mutate(markup)
+    assert write(renderer.markup(screen="tasks_back", owner_telegram_id=OWNER_TELEGRAM_ID)) == written
+
+
+@pytest.mark.parametrize("mutate", [
+    lambda markup: setattr(markup, "resize_keyboard", False),
+    lambda markup: setattr(markup.keyboard[0][0], "text", "Другая кнопка"),
+    lambda markup: markup.keyboard.append(tuple()),
+])
+def test_reply_markup_rejects_mutation(renderer, mutate):
+    markup = renderer.markup(screen="start_guest")
+    with pytest.raises((AttributeError, TypeError)):
+        mutate(markup)
+    assert markup.resize_keyboard is True and markup.keyboard[0][0].text == "Авторизация"
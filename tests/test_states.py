@@ -0,0 +1,92 @@
+"""
+Тесты реестра состояний FSM и графа разрешенных переходов.
+"""
+
+import asyncio
+import os
+import textwrap
+import types
+
+import pytest
+
+from app.fsm_context.fsm_context import FSM
+from app.fsm_context.states import ENTRY_STATES, STATES, TRANSITIONS, States, get_states, validate_handlers
+from app.fsm_context.storage import MemoryStorage
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+HANDLER_MODULES = [
+    "app/auth_manager/auth_handlers.py", "app/auth_manager/registration_handlers.py",
+    "app/auth_manager/settings_handlers.py", "app/root/handlers.py", "app/tasks_manager/create_tasks_handlers.py",
+    "app/tasks_manager/edit_tasks_handlers.py", "app/tasks_manager/handlers.py",
+    "app/tasks_manager/view_tasks_handlers.py",
+]
+
+
+def source_module(name: str, path: str) -> types.ModuleType:
+    """
+    Создает модуль с исходным кодом из файла без его выполнения (validate_handlers читает только исходный код).
+    """
+    module = types.ModuleType(name)
+    module.__file__ = path
+    return module
+
+
+def test_graph_references_declared_states():
+    for source, targets in TRANSITIONS.items():
+        assert source in STATES
+        assert set(targets) <= set(STATES)
+    assert set(ENTRY_STATES) <= set(STATES)
+
+
+def test_unknown_state_in_graph_fails_at_startup():
+    with pytest.raises(ValueError):
+        States(states={"": 0, "tasks": 1}, transitions={"tasks": ("tasks:unknown",)})
+
+
+def test_allows():
+    states = get_states()
+    assert states.allows(source="tasks", target="tasks:edit")
+    assert states.allows(source="tasks:edit", target="tasks:edit")
+    assert states.allows(source="tasks:create:set_name", target="main_menu")
+    assert not states.allows(source="tasks", target="tasks:edit:edit_task:delete")
+    assert not states.allows(source="registration:username", target="settings:set_password")
+
+
+@pytest.mark.parametrize("path", HANDLER_MODULES)
+def test_handler_modules_use_declared_transitions(path):
+    validate_handlers(source_module(name=path, path=os.path.join(ROOT, path)))
+
+
+def test_undeclared_transition_is_rejected(tmp_path):
+    path = tmp_path / "handlers.py"
+    path.write_text(textwrap.dedent("""
+        @client_bot.on_message(filters.text & get_filters().message_filter(state="tasks"))
+        async def skip_to_delete(_, message):
+            get_fsm_context().update_state(telegram_id=message.from_user.id, state="tasks:edit:edit_task:delete")
+
+
+        @client_bot.on_message(filters.text & get_filters().message_filter(state="tasks", is_regex=True))
+        async def unknown_state(_, message):
+            get_fsm_context().update_state(telegram_id=message.from_user.id, state="tasks:archive")
+
+
+        @client_bot.on_message(filters.text & get_filters().message_filter(state="tasks", is_regex=True))
+        async def back_to_tasks(_, message):
+            get_fsm_context().update_state(telegram_id=message.from_user.id, state="tasks")
+    """))
+    with pytest.raises(ValueError) as error:
+        validate_handlers(source_module(name="handlers", path=str(path)))
+    assert "skip_to_delete: 'tasks' -> 'tasks:edit:edit_task:delete'" in str(error.value)
+    assert "unknown_state: unknown state 'tasks:archive'" in str(error.value)
+    assert "back_to_tasks" not in str(error.value)
+
+
+def test_undeclared_runtime_transition_is_logged(caplog):
+    fsm = FSM(storage=MemoryStorage())
+    asyncio.run(fsm.update_state(1, "tasks"))
+    asyncio.run(fsm.update_state(1, "tasks:edit"))
+    assert not caplog.records
+    asyncio.run(fsm.update_state(1, "settings:set_password"))
+    assert "'tasks:edit' -> 'settings:set_password'" in caplog.text
+    assert fsm.get_state(1) == "settings:set_password"
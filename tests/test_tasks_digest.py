@@ -0,0 +1,84 @@
+"""
+Тесты сборки карточек задач в сообщения: сообщения не длиннее лимита Telegram в единицах UTF-16, вместе
+составляют все карточки, а карточка длиннее лимита разделяется только по концам строк и между словами,
+не разрывая разметку сущностей сообщения.
+
+"""
+
+import re
+from datetime import UTC, datetime, timedelta
+
+import pytest
+
+from app.db.models import UserTasks, Users
+from app.tasks_manager.tasks_controller import MESSAGE_MAX_LENGTH, get_task_card, render_tasks_digest
+
+START_TIME = datetime(2026, 1, 1, tzinfo=UTC)
+
+MAX_LENGTH = 200
+
+
+def task(id_task: int, description: str = "Описание задачи") -> UserTasks:
+    return UserTasks(id_task=id_task, task_name=f"Задача {id_task}", description=description,
+                     user=Users(owner_telegram_id=1, login_name="user", username="user", password="", is_login=True),
+                     start_time=START_TIME, end_time=START_TIME + timedelta(days=1),
+                     completion_time=START_TIME + timedelta(hours=1), status=True)
+
+
+def utf16_length(text: str) -> int:
+    return len(text.encode("utf-16-le")) // 2
+
+
+def digest(description: str) -> list[str]:
+    messages = list(render_tasks_digest([task(id_task=1, description=description)], max_length=MAX_LENGTH))
+    assert all(utf16_length(message) <= MAX_LENGTH for message in messages)
+    assert "".join(messages) == get_task_card(task=task(id_task=1, description=description))
+    return messages
+
+
+def test_digest_packs_cards_into_messages():
+    tasks = [task(id_task=id_task, description="Описание 😀 " * (id_task % 50)) for id_task in range(500)]
+    cards = [get_task_card(task=user_task) for user_task in tasks]
+    messages = list(render_tasks_digest(tasks))
+    assert len(messages) > 1
+    assert all(utf16_length(message) <= MESSAGE_MAX_LENGTH for message in messages)
+    assert "".join(messages) == "".join(cards)
+    # Карточки короче лимита не разделяются между сообщениями
+    assert all(message.endswith(cards[-1] if message is messages[-1] else "\n\n") for message in messages)
+    assert sum(message.count("Описание задачи:") for message in messages) == len(cards)
+
+
+def test_oversized_card_is_split_at_line_ends():
+    messages = digest("\n".join(f"Строка {number} описания задачи" for number in range(100)))
+    assert len(messages) > 1
+    assert all(message.endswith("\n") for message in messages[:-1])
+
+
+def test_oversized_line_is_split_between_words():
+    words = [f"слово{number}" for number in range(200)]
+    messages = digest(" ".join(words))
+    assert len(messages) > 1
+    description = [word for message in messages for word in re.findall(r"\S+", message) if word.startswith("слово")]
+    assert description == words
+
+
+@pytest.mark.parametrize("entity", [
+    "**жирный текст с пробелами**",
+    "__курсив с пробелами__",
+    "`код с пробелами`",
+    "[текст ссылки](https://example.com)",
+    '<a href="https://example.com">текст ссылки</a>',
+    "<b>жирный\nтекст</b>",
+])
+def test_oversized_card_does_not_split_entities(entity):
+    for offset in range(0, 60, 3):
+        messages = digest(" ".join(["слово"] * offset + [entity] + ["слово"] * 100))
+        assert sum(entity in message for message in messages) == 1
+
+
+def test_oversized_word_is_split_between_surrogate_pairs():
+    messages = digest("😀a" * 300)
+    assert len(messages) > 2
+    for message in messages:
+        encoded = message.encode("utf-16-le")
+        assert encoded.decode("utf-16-le") == message
@@ -0,0 +1,51 @@
+"""
+Тесты обработчика перехода между страницами списка задач: данные устаревших или подделанных кнопок
+не вызывают ошибку, а показывают задачи с безопасными значениями по умолчанию.
+
+"""
+
+import asyncio
+
+import pytest
+from pyrogram import types
+
+from app.bot_init.router import get_callback_router
+from app.tasks_manager import view_tasks_handlers
+
+TEMPLATE = "tasks:view_page:{view}:{page}:{end_time}:{id_task}:{owner_telegram_id}"
+
+
+def callback_query(data: str) -> types.CallbackQuery:
+    return types.CallbackQuery(id="1", from_user=types.User(id=1), chat_instance="1", data=data)
+
+
+@pytest.fixture
+def pages(monkeypatch):
+    pages = list()
+
+    async def send_tasks_page(**kwargs) -> None:
+        pages.append(kwargs)
+
+    monkeypatch.setattr(view_tasks_handlers, "send_tasks_page", send_tasks_page)
+    return pages
+
+
+@pytest.mark.parametrize("data, view, after_key, backward", [
+    (get_callback_router().pack(TEMPLATE, view="overdue", page="previous", end_time=10, id_task=5,
+                                owner_telegram_id=1), "overdue", (10, 5), True),
+    (get_callback_router().pack(TEMPLATE, view="archived", page="next", end_time=10, id_task=5,
+                                owner_telegram_id=1), "all", (10, 5), False),
+    (get_callback_router().pack(TEMPLATE, page="previous", end_time=-10, id_task=5, owner_telegram_id=1),
+     "all", (-10, 5), True),
+    (get_callback_router().pack(TEMPLATE, view="current", page="previous", id_task=5, owner_telegram_id=1),
+     "current", None, False),
+    ("tasks:view_page:__class__:next:10:5:1", "all", (10, 5), False),
+    ("tasks:view_page:completed:previous:None:None:1", "completed", None, False),
+])
+def test_view_page_validates_callback_data(pages, data, view, after_key, backward):
+    asyncio.run(view_tasks_handlers.view_tasks_page(None, callback_query(data=data)))
+    assert len(pages) == 1
+    assert pages[0]["view"] == view
+    assert pages[0]["after_key"] == after_key
+    assert pages[0]["backward"] is backward
+    assert pages[0]["owner_telegram_id"] == 1